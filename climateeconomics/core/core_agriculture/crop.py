@@ -133,7 +133,8 @@ class Crop():
         self.crf = None
         self.nb_years_amort_capex = None
         self.production = None
-        self.age_distrib_prod_df = None
+        self.new_aged_production = None
+        self.old_aged_production = None
         self.calories_per_day_constraint = None
         self.food_waste_percentage_df = None
         self.param = param
@@ -592,85 +593,44 @@ class Crop():
         Compute biomass_dry production
         '''
         # Compute the aging distribution over the years of study to determine the total production over the years
-        # This function also erase old factories from the distribution
+        # Productions older than the lifetime are not counted
         self.compute_aging_distribution_production()
 
         # Finally compute the production by summing all aged production for
         # each year
-        # Grouping the aging distribution production by year and summing up the production
-        age_distrib_prod_sum = self.age_distrib_prod_df.groupby([GlossaryCore.Years], as_index=False).agg(
-            {'distrib_prod (TWh)': 'sum'}
-        )
         # Delete the 'biomass_dry (TWh)' column if it already exists in the self.production dataframe
         if 'biomass_dry (TWh)' in self.production:
             del self.production['biomass_dry (TWh)']
-        # Merging production data with aged distribution data
-        self.production = pd.merge(self.production, age_distrib_prod_sum, how='left', on=GlossaryCore.Years).rename(
-            columns={'distrib_prod (TWh)': 'biomass_dry (TWh)'}).fillna(0.0)
+        self.production['biomass_dry (TWh)'] = self.new_aged_production + self.old_aged_production
 
     def compute_aging_distribution_production(self):
         '''
         Compute the aging distribution production of primary energy for years of study
-        Start with the initial distribution and add a year on the age each year 
-        Add also the yearly production regarding the investment
-        All productions older than the lifetime are removed from the dataframe  
+        The production from the investment of one year lasts lifetime years, so the new production of a year is the sum
+        of the productions from invest of the lifetime previous years: a convolution with a lifetime window of ones,
+        truncated at year end.
+        The initial production is distributed by age, each part gets one year older each year and stops producing when
+        its age reaches the lifetime
         '''
-        # To break the object link with initial distrib
-        # Creating a DataFrame to separate the initial distribution of production from the rest
-
-        aging_distrib_year_df = pd.DataFrame(
-            {'age': self.initial_age_distrib['age'].values})
-        aging_distrib_year_df['distrib_prod (TWh)'] = self.initial_age_distrib['distrib'] * \
-                                                       self.initial_production / 100.0
+        len_years = len(self.years)
         # Calculating yearly production based on investment
         production_from_invest = self.compute_prod_from_invest(
             construction_delay=self.construction_delay)
-
-        # get the whole dataframe for new production with one line for each
-        # year at each age
-        # concatenate tuple to get correct df to mimic the old year loop
-        # Creating DataFrame for new production with one line for each year at each age
-        len_years = len(self.years)
-        range_years = np.arange(
-            self.year_start, self.year_end + len_years)
-
-        year_array = np.concatenate(
-            tuple(range_years[i:i + len_years] for i in range(len_years)))
-        age_array = np.concatenate(tuple(np.ones(
-            len_years) * (len_years - i) for i in range(len_years, 0, -1)))
-        prod_array = production_from_invest['prod_from_invest'].values.tolist(
-        ) * len_years
-
-        new_prod_aged = pd.DataFrame(
-            {GlossaryCore.Years: year_array, 'age': age_array, 'distrib_prod (TWh)': prod_array})
-
-        # Creating DataFrame for old production with one line for each year at each age
-        year_array = np.array([[year] * len(aging_distrib_year_df)
-                               for year in self.years]).flatten()
-        age_values = aging_distrib_year_df['age'].values
-        age_array = np.concatenate(tuple(
-            age_values + i for i in range(len_years)))
-        prod_array = aging_distrib_year_df['distrib_prod (TWh)'].values.tolist(
-        ) * len_years
-
-        old_prod_aged = pd.DataFrame({GlossaryCore.Years: year_array, 'age': age_array,
-                                      'distrib_prod (TWh)': prod_array})
-
-        # Concatenating the two created DataFrames
-        self.age_distrib_prod_df = pd.concat(
-            [new_prod_aged, old_prod_aged], ignore_index=True)
-        # Removing all lines where age is higher than lifetime and all-zero productions
-        self.age_distrib_prod_df = self.age_distrib_prod_df.loc[
-            # Suppress all lines where age is higher than lifetime
-            (self.age_distrib_prod_df['age'] <
-             self.lifetime)
-            # delete years after year end
-            & (self.age_distrib_prod_df[GlossaryCore.Years] < self.year_end + 1)
-            # Fill Nan with zeros and suppress all zeros
-            & (self.age_distrib_prod_df['distrib_prod (TWh)'] != 0.0)
-            ]
-        # Fill Nan with zeros
-        self.age_distrib_prod_df.fillna(0.0, inplace=True)
+        if self.lifetime > 0:
+            self.new_aged_production = np.convolve(production_from_invest['prod_from_invest'].values,
+                                                   np.ones(self.lifetime))[:len_years]
+        else:
+            # nothing produces with a zero lifetime (and np.convolve does not accept an empty window)
+            self.new_aged_production = np.zeros(len_years)
+
+        # The initial production of age a still produces at year i if a + i < lifetime, the production of year i is
+        # then the cumulated initial production of the ages lower than lifetime - i
+        initial_ages = self.initial_age_distrib['age'].values
+        initial_distrib_prod = self.initial_age_distrib['distrib'].values * self.initial_production / 100.0
+        age_order = np.argsort(initial_ages)
+        cumulated_initial_prod = np.insert(np.cumsum(initial_distrib_prod[age_order]), 0, 0.)
+        nb_productive_ages = np.searchsorted(initial_ages[age_order], self.lifetime - np.arange(len_years))
+        self.old_aged_production = cumulated_initial_prod[nb_productive_ages]
 
     def compute_prod_from_invest(self, construction_delay):
         '''
@@ -1118,29 +1078,17 @@ class Crop():
                '''
 
         nb_years = (self.year_end - self.year_start + 1)
-        arr_type = 'float64'
-        dprod_list_dinvest_list = np.zeros(
-            (nb_years, nb_years), dtype=arr_type)
-
-        # We fill this jacobian column by column because it is the same element
-        # in the entire column
-        for i in range(nb_years):
-            len_non_zeros = min(max(0, nb_years - self.construction_delay - i), self.lifetime)
-            first_len_zeros = min(i + self.construction_delay, nb_years)
-            last_len_zeros = max(0, nb_years - len_non_zeros - first_len_zeros)
-            # For prod in each column there is lifetime times the same value which is dpprod_dpinvest
-            # This value is delayed in time (means delayed in lines for
-            # jacobian by construction _delay)
-            # Each column is then composed of [0,0,0... (dp/dx,dp/dx)*lifetime,
-            # 0,0,0]
-            dpprod_dpinvest = 1 / self.cost_details['Capex ($/MWh)'].values[i] / \
-                              self.data_fuel_dict['calorific_value']
-            is_invest_negative = max(
-                np.sign(self.cost_details[GlossaryCore.InvestmentsValue].values[i] + np.finfo(float).eps), 0.0)
-            dprod_list_dinvest_list[:, i] = np.hstack((np.zeros(first_len_zeros),
-                                                       np.ones(
-                                                           len_non_zeros) * dpprod_dpinvest * is_invest_negative,
-                                                       np.zeros(last_len_zeros)))
+        # The investment of year i produces from year i + construction_delay during lifetime years, the column i
+        # has the same element dpprod_dpinvest on all these years
+        # Each column is then composed of [0,0,0... (dp/dx,dp/dx)*lifetime,
+        # 0,0,0]
+        production_age = np.subtract.outer(np.arange(nb_years), np.arange(nb_years)) - self.construction_delay
+        is_producing = (production_age >= 0) & (production_age < self.lifetime)
+        dpprod_dpinvest = 1 / self.cost_details['Capex ($/MWh)'].values / \
+                          self.data_fuel_dict['calorific_value']
+        is_invest_negative = np.maximum(
+            np.sign(self.cost_details[GlossaryCore.InvestmentsValue].values + np.finfo(float).eps), 0.0)
+        dprod_list_dinvest_list = np.where(is_producing, dpprod_dpinvest * is_invest_negative, 0.)
 
         # Mt to GWh
         return dprod_list_dinvest_list
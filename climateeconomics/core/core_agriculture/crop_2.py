@@ -16,12 +16,16 @@ limitations under the License.
 '''
 import autograd.numpy as np
 import pandas as pd
-from autograd import jacobian
+from autograd import make_jvp
 from energy_models.glossaryenergy import GlossaryEnergy
 
 from climateeconomics.core.core_witness.climateeco_discipline import (
     ClimateEcoDiscipline,
 )
+from climateeconomics.core.tools.linear_recurrence import (
+    geometric_impulse_response,
+    geometric_recurrence_jacobian,
+)
 from climateeconomics.glossarycore import GlossaryCore
 
 
@@ -91,12 +95,20 @@ class Crop:
             4: (GlossaryCore.PopulationDfValue, GlossaryCore.PopulationValue),
         }
 
-    def get_params_food_type(self, food_type: str):
-        params_food_type= {}
+    def get_params_food_types(self) -> dict:
+        """
+        parameters of all the food types stacked along the first axis, as (n_food_types, 1) arrays for the parameters
+        given by food type (dict) and (n_food_types, n_years) arrays for the ones given as time series (dataframe)
+        """
+        food_types = self.inputs[GlossaryCore.FoodTypesName]
+        params_food_types = {}
         for param in self.params_for_food_types:
-            params_food_type[param] = self.inputs[param][food_type] if isinstance(self.inputs[param], dict) else self.inputs[param][food_type].values
+            if isinstance(self.inputs[param], dict):
+                params_food_types[param] = np.array([self.inputs[param][food_type] for food_type in food_types])[:, np.newaxis]
+            else:
+                params_food_types[param] = self.inputs[param][food_types].values.T
 
-        return params_food_type
+        return params_food_types
 
     def init_dataframes(self):
         years = np.arange(self.inputs[GlossaryCore.YearStart], self.inputs[GlossaryCore.YearEnd] + 1)
@@ -136,70 +148,82 @@ class Crop:
     def compute(self, inputs: dict):
         self.inputs = inputs
         self.init_dataframes()
-        for food_type in inputs[GlossaryCore.FoodTypesName]:
-            output_food_type = self.compute_food_type(*self.get_args(food_type))
-            for varname, value in output_food_type.items():
-                self.outputs[varname][food_type] = value
-                if varname in self.dataframes_to_totalize_by_food_type:
-                    varname_total_df, column_total_df = self.dataframes_to_totalize_by_food_type[varname]
-                    self.outputs[varname_total_df][column_total_df] += value
+        food_types = inputs[GlossaryCore.FoodTypesName]
+        output_food_types = self.compute_food_types(*self.get_args())
+        for varname, value in output_food_types.items():
+            for food_type, value_food_type in zip(food_types, value):
+                self.outputs[varname][food_type] = value_food_type
+            if varname in self.dataframes_to_totalize_by_food_type:
+                varname_total_df, column_total_df = self.dataframes_to_totalize_by_food_type[varname]
+                self.outputs[varname_total_df][column_total_df] += np.sum(value, axis=0)
 
         self.compute_kcal_infos()
         self.compute_kg_infos()
 
     def get_coupling_inputs_arrays(self) -> tuple:
-        """returns the tuple of all the coupling inputs arrays for the compute_food_type function"""
+        """returns the tuple of all the coupling inputs arrays for the compute_food_types function"""
         return tuple([self.inputs[varname][colname].values for varname, colname in self.mapping_coupling_inputs_argument_number.values()])
 
-    def _null_derivative(self):
-        nb_years = self.inputs[GlossaryCore.YearEnd] - self.inputs[GlossaryCore.YearStart] + 1
-        return np.zeros((nb_years, nb_years))
+    def get_args(self):
+        """returns the arguments of the compute_food_types function, investments are stacked as (n_food_types, n_years)"""
+        invest_food_types = self.inputs[GlossaryCore.FoodTypesInvestName][self.inputs[GlossaryCore.FoodTypesName]].values.T
+        return self.get_coupling_inputs_arrays() + (invest_food_types, self.get_params_food_types())
+
+    def jacobian_food_types(self, argnum: int, args: tuple) -> np.ndarray:
+        """
+        Jacobian of the outputs of compute_food_types wrt its argument number argnum, with forward mode autograd.
+        Each pass perturbs one year of the input for all the food types at once : it gives d output / d input[t] of
+        every food type for the inputs shared by the food types, and d output / d invest[food type, t] for the
+        investments since food types do not interact.
+        returns an array (n_outputs, n_food_types, n_years, n_years)
+        """
+        jvp = make_jvp(lambda *args: self.wrap_outputs_to_arrays(self.compute_food_types(*args)), argnum)(*args)
+        input_shape = np.shape(args[argnum])
+        jacobian_columns = []
+        for year_index in range(input_shape[-1]):
+            tangent = np.zeros(input_shape)
+            tangent[..., year_index] = 1.
+            jacobian_columns.append(jvp(tangent)[1])
+
+        return np.stack(jacobian_columns, axis=-1)
 
-    def get_args(self, food_type: str):
-        return self.get_coupling_inputs_arrays() + (self.inputs[GlossaryCore.FoodTypesInvestName][food_type].values, self.get_params_food_type(food_type))
     def jacobians(self):
-        """Compute the gradients using autograd"""
+        """Compute the gradients using autograd, with one forward mode pass per year of each coupling input"""
         # gradients dict structure: [input_varname][input_columnname][output_varname][output_colomnname] = value
 
         gradients = {}
+        food_types = self.inputs[GlossaryCore.FoodTypesName]
+        args = self.get_args()
 
         # jacobians to sum on all food types
         for index, (ci_varname, ci_colomn_name) in enumerate(self.mapping_coupling_inputs_argument_number.values()):
             gradients[ci_varname] = {ci_colomn_name: {}}
-            for food_type in self.inputs[GlossaryCore.FoodTypesName]:
-                args = self.get_args(food_type)
-                jac_coupling_input_food_type = jacobian(lambda *args: self.wrap_outputs_to_arrays(self.compute_food_type(*args)), index)
-                gradient_food_type = jac_coupling_input_food_type(*args)
-                dict_jacobians_of_food_type = self.unwrap_arrays_to_outputs(gradient_food_type)
-                for varname, value in dict_jacobians_of_food_type.items():
-                    co_varname, co_colname = self.dataframes_to_totalize_by_food_type_couplings[varname] if varname in self.dataframes_to_totalize_by_food_type_couplings else (varname, food_type)
+            dict_jacobians = self.unwrap_arrays_to_outputs(self.jacobian_food_types(index, args))
+            for varname, value in dict_jacobians.items():
+                if varname in self.dataframes_to_totalize_by_food_type_couplings:
+                    co_varname, co_colname = self.dataframes_to_totalize_by_food_type_couplings[varname]
                     if co_varname not in gradients[ci_varname][ci_colomn_name]:
                         gradients[ci_varname][ci_colomn_name][co_varname] = {}
-                    if co_colname not in gradients[ci_varname][ci_colomn_name][co_varname]:
-                        gradients[ci_varname][ci_colomn_name][co_varname][co_colname] = self._null_derivative()
-                    gradients[ci_varname][ci_colomn_name][co_varname][co_colname] += value
+                    gradients[ci_varname][ci_colomn_name][co_varname][co_colname] = np.sum(value, axis=0)
+                else:
+                    gradients[ci_varname][ci_colomn_name][varname] = dict(zip(food_types, value))
 
         # gradients wrt invest food type
         ci_varname = GlossaryCore.FoodTypesInvestName
-        gradients[ci_varname] = {}
-        for food_type in self.inputs[GlossaryCore.FoodTypesName]:
-            ci_colomn_name = food_type
-            gradients[ci_varname][ci_colomn_name] = {}
-            args = self.get_args(food_type)
-            jac_coupling_input_food_type = jacobian(lambda *args: self.wrap_outputs_to_arrays(self.compute_food_type(*args)), 5)
-            gradient_food_type = jac_coupling_input_food_type(*args)
-            dict_jacobians_of_food_type = self.unwrap_arrays_to_outputs(gradient_food_type)
-            for varname, value in dict_jacobians_of_food_type.items():
+        gradients[ci_varname] = {food_type: {} for food_type in food_types}
+        dict_jacobians = self.unwrap_arrays_to_outputs(self.jacobian_food_types(5, args))
+        for varname, value in dict_jacobians.items():
+            for food_type, value_food_type in zip(food_types, value):
                 co_varname, co_colname = self.dataframes_to_totalize_by_food_type_couplings[varname] if varname in self.dataframes_to_totalize_by_food_type_couplings else (varname, food_type)
-                if co_varname not in gradients[ci_varname][ci_colomn_name]:
-                    gradients[ci_varname][ci_colomn_name][co_varname] = {}
-                gradients[ci_varname][ci_colomn_name][co_varname][co_colname] = value
+                if co_varname not in gradients[ci_varname][food_type]:
+                    gradients[ci_varname][food_type][co_varname] = {}
+                gradients[ci_varname][food_type][co_varname][co_colname] = value_food_type
 
         return gradients
 
     def wrap_outputs_to_arrays(self, outputs: dict):
         """
-        gathers the dictionnary outputs of the compute food type function and flattens it in an array
+        gathers the dictionnary outputs of the compute food types function and stacks it in an array
         helps for the using autograd jacobian which only deals with arrays
         """
         return np.array([outputs[varname] for varname in list(self.dataframes_to_totalize_by_food_type_couplings.keys()) + self.coupling_dataframes_not_totalized])
@@ -210,21 +234,26 @@ class Crop:
                                                          array)}
 
     @staticmethod
-    def compute_food_type(
+    def compute_food_types(
             energy_allocated_to_agri: np.ndarray,  # 0
             workforce_agri: np.ndarray,  # 1
             damage_fraction: np.ndarray,  # 2
             crop_productivity_reduction: np.ndarray,  # 3
             population: np.ndarray,  # 4
-            invest_food_type: np.ndarray,  # 5
+            invest_food_types: np.ndarray,  # 5
             params: dict,
     ):
+        """
+        Computes all the food types at once : investments and outputs are (n_food_types, n_years) arrays, parameters
+        are stacked by food type (see get_params_food_types) and broadcast along the years
+        """
         outputs = {}
-        # forecasting capital of food type
-        capital_food_type = [params[GlossaryCore.FoodTypeCapitalStartName]]  # G$
-        for invest in invest_food_type[:-1]:
-            capital_food_type.append(capital_food_type[-1] * (1 - params[GlossaryCore.FoodTypeCapitalDepreciationRateName] / 100) + invest)
-        capital_food_type = np.array(capital_food_type)  # G$
+        # forecasting capital of food type : capital(t) = (1 - depreciation) * capital(t-1) + invest(t-1)
+        n_years = invest_food_types.shape[-1]
+        capital_depreciation_factor = 1 - params[GlossaryCore.FoodTypeCapitalDepreciationRateName] / 100
+        capital_jacobians = geometric_recurrence_jacobian(geometric_impulse_response(n_years, capital_depreciation_factor))
+        capital_food_type = params[GlossaryCore.FoodTypeCapitalStartName] * capital_depreciation_factor ** np.arange(n_years) + \
+                            np.matmul(capital_jacobians, invest_food_types[:, :, np.newaxis])[:, :, 0]  # G$
 
         # limiting capital to usable capital, depending on the variation of ratios of energy and workforce per capital, relative to year start
         year_start_energy_per_capital = energy_allocated_to_agri[0] / params[GlossaryCore.FoodTypeCapitalStartName]
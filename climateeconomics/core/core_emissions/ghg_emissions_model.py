@@ -42,6 +42,12 @@ class GHGEmissions:
         self.dict_sector_emissions = {}
         self.total_economics_emisssions = None
         self.new_sector_list = []
+        self.sections_energy_consumption = None
+        self.sections_non_energy_emission_gdp = None
+        self.sections_gdp = None
+        self.sections_energy_emissions = None
+        self.sections_non_energy_emissions = None
+        self.sections_emissions = None
         self.carbon_intensity_of_energy_mix = None
         self.get_sosdisc_inputs = None
         self.affine_co2_objective: bool = False
@@ -59,6 +65,7 @@ class GHGEmissions:
         self.year_end = self.param[GlossaryCore.YearEnd]
         self.new_sector_list = self.param[GlossaryCore.SectorListValue]
         self.economic_sectors_except_agriculture = [sector for sector in self.new_sector_list if sector != GlossaryCore.SectorAgriculture]
+        self.configure_sections_tensor_store()
         self.CO2_land_emissions = self.param[GlossaryCore.insertGHGAgriLandEmissions.format(GlossaryCore.CO2)]
         self.CH4_land_emissions = self.param[GlossaryCore.insertGHGAgriLandEmissions.format(GlossaryCore.CH4)]
         self.N2O_land_emissions = self.param[GlossaryCore.insertGHGAgriLandEmissions.format(GlossaryCore.N2O)]
@@ -199,6 +206,48 @@ class GHGEmissions:
     def d_total_co2_eq_energy_emissions(self, d_ghg_total_emissions, ghg: str):
         return d_ghg_total_emissions * self.gwp_100[ghg]
 
+    def configure_sections_tensor_store(self):
+        """
+        Sections emissions are stored as (n_sectors, n_sections, n_years) arrays. The sections axis is shared by all
+        the sectors (GlossaryCore.SectionsPossibleValues) : the sections that are not in a sector are zero padded.
+        Agriculture is always on the sectors axis as its section emissions come from land emissions, even when it is
+        not in the sector list
+        """
+        self.emission_sectors = list(self.new_sector_list)
+        if GlossaryCore.SectorAgriculture not in self.emission_sectors:
+            self.emission_sectors.append(GlossaryCore.SectorAgriculture)
+        self.sector_index = {sector: i for i, sector in enumerate(self.emission_sectors)}
+        self.section_index = {section: i for i, section in enumerate(GlossaryCore.SectionsPossibleValues)}
+        self.sector_sections_indices = {sector: [self.section_index[section] for section in GlossaryCore.SectionDictSectors[sector]]
+                                        for sector in self.emission_sectors}
+
+        self.economic_sectors_mask = np.array([sector in self.economic_sectors_except_agriculture for sector in self.emission_sectors])
+
+        # (sector, section) pairs of all_sections_emissions_df, in the order of its columns
+        self.all_sections_columns = [section for sector in self.emission_sectors for section in GlossaryCore.SectionDictSectors[sector]]
+        self.all_sections_indices = (
+            np.array([self.sector_index[sector] for sector in self.emission_sectors for _ in self.sector_sections_indices[sector]], dtype=int),
+            np.array([index for sector in self.emission_sectors for index in self.sector_sections_indices[sector]], dtype=int))
+
+    def get_sections_tensor(self, input_name: str) -> np.ndarray:
+        """
+        (n_sectors, n_sections, n_years) array of the sections dataframes {sector}.{input_name} of the sectors of the
+        sector list, zero padded
+        """
+        sections_values = {sector: self.param[f"{sector}.{input_name}"][GlossaryCore.SectionDictSectors[sector]].values.T
+                           for sector in self.new_sector_list}
+        tensor = np.zeros((len(self.emission_sectors), len(self.section_index), len(self.years_range)),
+                          dtype=np.result_type(float, *sections_values.values()))
+        for sector, values in sections_values.items():
+            tensor[self.sector_index[sector], self.sector_sections_indices[sector]] = values
+        return tensor
+
+    def get_sections_dataframe(self, sections_tensor: np.ndarray, sector: str) -> pd.DataFrame:
+        """dataframe of the sections of the sector from a (n_sectors, n_sections, n_years) array"""
+        sector_values = sections_tensor[self.sector_index[sector], self.sector_sections_indices[sector]]
+        return pd.DataFrame({GlossaryCore.Years: self.years_range,
+                             **dict(zip(GlossaryCore.SectionDictSectors[sector], sector_values))})
+
     def compute_energy_emission_per_section(self):
         """
         Computing the energy emission for each section of the sector
@@ -206,15 +255,8 @@ class GHGEmissions:
         section_energy_emission (GtCO2eq) = section_energy_consumption (PWh) x carbon_intensity (kgCO2eq/kWh)
         """
         carbon_intensity = self.carbon_intensity_of_energy_mix[GlossaryCore.EnergyCarbonIntensityDfValue].values
-        for sector in self.new_sector_list:
-            section_energy_emissions = {
-                GlossaryCore.Years: self.years_range
-            }
-            energy_sections_consumptions_consumptions_of_sector = self.param[f"{sector}.{GlossaryCore.SectionEnergyConsumptionDfValue}"]
-            for section in GlossaryCore.SectionDictSectors[sector]:
-                section_energy_emissions[section] = energy_sections_consumptions_consumptions_of_sector[section].values * carbon_intensity
-
-            self.dict_sector_sections_energy_emissions[sector] = pd.DataFrame(section_energy_emissions)
+        self.sections_energy_consumption = self.get_sections_tensor(GlossaryCore.SectionEnergyConsumptionDfValue)
+        self.sections_energy_emissions = self.sections_energy_consumption * carbon_intensity
 
     def compute_non_energy_emission_per_section(self):
         """
@@ -222,18 +264,9 @@ class GHGEmissions:
 
         section_non_energy_emission (GtCO2eq) = section_non_energy_emission_wrt_gdp (tCO2eq/M$) x section_gdp (T$) / 1000.
         """
-
-        for sector in self.new_sector_list:
-            section_non_energy_emissions = {
-                GlossaryCore.Years: self.years_range
-            }
-            energy_sections_non_energy_emissions_gdp_of_sector = self.param[f"{sector}.{GlossaryCore.SectionNonEnergyEmissionGdpDfValue}"]
-            sector_sections_gdp = self.param[f"{sector}.{GlossaryCore.SectionGdpDfValue}"]
-            for section in GlossaryCore.SectionDictSectors[sector]:
-                section_non_energy_emissions[section] = energy_sections_non_energy_emissions_gdp_of_sector[section].values * \
-                                                        sector_sections_gdp[section].values / 1000.
-
-            self.dict_sector_sections_non_energy_emissions[sector] = pd.DataFrame(section_non_energy_emissions)
+        self.sections_non_energy_emission_gdp = self.get_sections_tensor(GlossaryCore.SectionNonEnergyEmissionGdpDfValue)
+        self.sections_gdp = self.get_sections_tensor(GlossaryCore.SectionGdpDfValue)
+        self.sections_non_energy_emissions = self.sections_non_energy_emission_gdp * self.sections_gdp / 1000.
 
     def compute_total_emission_per_section(self):
         """
@@ -241,15 +274,7 @@ class GHGEmissions:
 
         section_emission (GtCO2eq) = section_energy_emission (GtCO2eq) + section_non_energy_emission (GtCO2eq)
         """
-        for sector in self.new_sector_list:
-            sections_emissions = {
-                GlossaryCore.Years: self.years_range
-            }
-            for section in GlossaryCore.SectionDictSectors[sector]:
-                sections_emissions[section] = self.dict_sector_sections_energy_emissions[sector][section].values + \
-                                              self.dict_sector_sections_non_energy_emissions[sector][section].values
-
-            self.dict_sector_sections_emissions[sector] = pd.DataFrame(sections_emissions)
+        self.sections_emissions = self.sections_energy_emissions + self.sections_non_energy_emissions
 
     def compute_total_emissions_for_section_agriculture(self):
         """
@@ -257,82 +282,68 @@ class GHGEmissions:
         Calculate the total Global Warming Potential (GWP) over a 100-year time horizon for CO2, CH4, and N2O emissions
         for agriculture sector (and the associated section)
 
-        This method combines the greenhouse gas emissions data from self.ghg_emissions_df with the GWP100 conversion
-        factors stored . It calculates the GWP100 for each gas and then sums them up to get the
-        total GWP100 for each year.
-
-        Returns:
-        --------
-        pandas.DataFrame
-            A DataFrame containing two columns:
-            - GlossaryCore.Years: The year of the emissions
-            - 'Total_GWP100': The total GWP100 value for all three gases combined for each year
+        The land emissions of the gases (n_ghg, n_years) are weighted by their GWP100 and reduced over the gases axis,
+        the result is stored in the only section of agriculture sector
         """
         # List of greenhouse gases
         gases = [GlossaryCore.CO2, GlossaryCore.CH4, GlossaryCore.N2O]
 
-        # Create a dictionary with emission columns for each gas
-        emissions_columns = {
-            gas: GlossaryCore.insertGHGAgriLandEmissions.format(gas)
-            for gas in gases
-        }
-
-        # Calculate GWP100 for each gas and year
-        gwp_100_by_gas = {
-            gas: self.ghg_emissions_df[emissions_columns[gas]] * self.gwp_100[gas]
-            for gas in gases
-        }
-
-        # Calculate total GWP100 per year
-        total_gwp_100 = pd.DataFrame({
-            GlossaryCore.Years: self.ghg_emissions_df[GlossaryCore.Years],
-            GlossaryCore.SectionA: sum(gwp_100_by_gas.values())  #store values in the only section of agriculture sector
-        })
+        land_emissions = np.array([self.ghg_emissions_df[GlossaryCore.insertGHGAgriLandEmissions.format(gas)].values
+                                   for gas in gases])
+        gwp_100 = np.array([self.gwp_100[gas] for gas in gases])
 
-        # add it to dictionary
-        self.dict_sector_sections_emissions[GlossaryCore.SectorAgriculture] = total_gwp_100
+        agriculture_index = self.sector_index[GlossaryCore.SectorAgriculture]
+        self.sections_emissions[agriculture_index] = 0.
+        self.sections_emissions[agriculture_index, self.section_index[GlossaryCore.SectionA]] = \
+            np.sum(gwp_100[:, np.newaxis] * land_emissions, axis=0)
 
     def aggregate_emissions_per_section(self):
         """
         Aggregates emissions data from all sectors and converts units from Gt to Mt.
 
-        This method processes the emissions data stored in self.dict_sector_sections_emissions,
-        which contains emissions data for different sectors and their subsections.
+        The columns of all the sections are gathered at once from the sections emissions array
         """
-        # Get all DataFrames in a list
-        all_dfs = [sector_data for sector_data in self.dict_sector_sections_emissions.values()
-                   ]
-
-        # Extract the 'years' column from the first DataFrame
-        years = all_dfs[0][GlossaryCore.Years]
-
-        # Aggregate all DataFrames without the 'years' column and convert Gt to Mt
-        aggregated_df = pd.concat([df.drop(columns='years').mul(1000) for df in all_dfs], axis=1)
+        aggregated_df = pd.DataFrame(self.sections_emissions[self.all_sections_indices].T * 1000.,
+                                     columns=self.all_sections_columns)
 
         # Add the 'years' column at the beginning
-        aggregated_df.insert(0, GlossaryCore.Years, years)
+        aggregated_df.insert(0, GlossaryCore.Years, self.years_range)
         self.all_sections_emissions_df = aggregated_df
 
     def compute_total_emission_sectors(self):
         """
         Computing the total emissions for each sector
         """
-        # sector_emission = sum of section_emission
-        for sector in self.new_sector_list:
-            sector_emissions = {GlossaryCore.Years: self.years_range}
-            sector_sections = GlossaryCore.SectionDictSectors[sector]
-            sector_emissions[GlossaryCore.EnergyEmissions] = self.dict_sector_sections_energy_emissions[sector][sector_sections].values.sum(axis=1)
-            sector_emissions[GlossaryCore.NonEnergyEmissions] = self.dict_sector_sections_non_energy_emissions[sector][sector_sections].values.sum(axis=1)
-            sector_emissions[GlossaryCore.TotalEmissions] = sector_emissions[GlossaryCore.EnergyEmissions] + sector_emissions[GlossaryCore.NonEnergyEmissions]
-            self.dict_sector_emissions[sector] = pd.DataFrame(sector_emissions)
+        # sector_emission = sum of section_emission, padded sections are null
+        self.sectors_energy_emissions = self.sections_energy_emissions.sum(axis=1)
+        self.sectors_non_energy_emissions = self.sections_non_energy_emissions.sum(axis=1)
+        self.sectors_total_emissions = self.sectors_energy_emissions + self.sectors_non_energy_emissions
 
     def compute_total_economics_emission(self):
         """Compute economics emissions : sum of emissions for sectors Services and Industry"""
-        total_economics_emisssions = {GlossaryCore.Years: self.years_range}
-        total_economics_emisssions[GlossaryCore.EnergyEmissions] = np.sum([self.dict_sector_emissions[sector][GlossaryCore.EnergyEmissions].values for sector in self.economic_sectors_except_agriculture], axis=0)
-        total_economics_emisssions[GlossaryCore.NonEnergyEmissions] = np.sum([self.dict_sector_emissions[sector][GlossaryCore.NonEnergyEmissions].values for sector in self.economic_sectors_except_agriculture], axis=0)
-        total_economics_emisssions[GlossaryCore.TotalEmissions] = np.sum([self.dict_sector_emissions[sector][GlossaryCore.TotalEmissions].values for sector in self.economic_sectors_except_agriculture], axis=0)
-        self.total_economics_emisssions = pd.DataFrame(total_economics_emisssions)
+        self.total_economics_emisssions = pd.DataFrame({
+            GlossaryCore.Years: self.years_range,
+            GlossaryCore.EnergyEmissions: self.sectors_energy_emissions[self.economic_sectors_mask].sum(axis=0),
+            GlossaryCore.NonEnergyEmissions: self.sectors_non_energy_emissions[self.economic_sectors_mask].sum(axis=0),
+            GlossaryCore.TotalEmissions: self.sectors_total_emissions[self.economic_sectors_mask].sum(axis=0),
+        })
+
+    def build_sectors_emissions_dataframes(self):
+        """
+        Per sector dataframes outputs, built from the sector x section x year arrays
+        """
+        for sector in self.new_sector_list:
+            self.dict_sector_sections_energy_emissions[sector] = self.get_sections_dataframe(self.sections_energy_emissions, sector)
+            self.dict_sector_sections_non_energy_emissions[sector] = self.get_sections_dataframe(self.sections_non_energy_emissions, sector)
+            sector_index = self.sector_index[sector]
+            self.dict_sector_emissions[sector] = pd.DataFrame({
+                GlossaryCore.Years: self.years_range,
+                GlossaryCore.EnergyEmissions: self.sectors_energy_emissions[sector_index],
+                GlossaryCore.NonEnergyEmissions: self.sectors_non_energy_emissions[sector_index],
+                GlossaryCore.TotalEmissions: self.sectors_total_emissions[sector_index],
+            })
+        for sector in self.emission_sectors:
+            self.dict_sector_sections_emissions[sector] = self.get_sections_dataframe(self.sections_emissions, sector)
 
     def compute(self, inputs_dict):
         """
@@ -355,6 +366,7 @@ class GHGEmissions:
         self.compute_total_emissions_for_section_agriculture()
         self.compute_total_emission_sectors()
         self.compute_total_economics_emission()
+        self.build_sectors_emissions_dataframes()
 
         # compute total emissions
         self.compute_total_emissions()
@@ -393,7 +405,16 @@ class GHGEmissions:
         return np.diag(self.gwp_100[ghg] / total_energy_production)
 
     def d_section_energy_emissions_d_user_input(self, d_carbon_intensity_d_user_input, sector_name:str, section_name: str):
-        return np.diag(self.param[f"{sector_name}.{GlossaryCore.SectionEnergyConsumptionDfValue}"][section_name].values) * d_carbon_intensity_d_user_input
+        section_energy_consumption = self.sections_energy_consumption[self.sector_index[sector_name], self.section_index[section_name]]
+        return section_energy_consumption[:, np.newaxis] * d_carbon_intensity_d_user_input
+
+    def d_economics_energy_emissions_d_user_input(self, d_carbon_intensity_d_user_input):
+        """
+        Derivative of economics energy emissions wrt any input (named X), the energy consumptions of all the sections of
+        the economic sectors are reduced before the product with the derivative of carbon intensity wrt X
+        """
+        economics_energy_consumption = self.sections_energy_consumption[self.economic_sectors_mask].sum(axis=(0, 1))
+        return economics_energy_consumption[:, np.newaxis] * d_carbon_intensity_d_user_input
 
     def d_section_non_energy_emissions_d_gdp_section(self, sector: str, section: str):
         """
@@ -402,7 +423,7 @@ class GHGEmissions:
         compute the chain rule
         """
 
-        return np.diag(self.param[f"{sector}.{GlossaryCore.SectionNonEnergyEmissionGdpDfValue}"][section] / 1000.)
+        return np.diag(self.sections_non_energy_emission_gdp[self.sector_index[sector], self.section_index[section]] / 1000.)
 
     def d_section_energy_emissions_d_section_energy_consumption(self):
         return np.diag(self.carbon_intensity_of_energy_mix[GlossaryCore.EnergyCarbonIntensityDfValue].values)
@@ -15,29 +15,18 @@ See the License for the specific language governing permissions and
 limitations under the License.
 '''
 
-import os
-
 import numpy as np
 import pandas as pd
 
+from climateeconomics.core.core_land_use.world_surface_table import (
+    KM_2_TO_HA,
+    KM_2_UNIT,
+    OrderOfMagnitude,
+    get_world_surface_table,
+)
 from climateeconomics.glossarycore import GlossaryCore
 
 
-class OrderOfMagnitude():
-
-    KILO = 'k'
-    MEGA = 'M'
-    GIGA = 'G'
-    TERA = 'T'
-
-    magnitude_factor = {
-        KILO: 10 ** 3,
-        MEGA: 10 ** 6,
-        GIGA: 10 ** 9,
-        TERA: 10 ** 12
-    }
-
-
 class LandUseV1():
     """
     Land use pyworld3 class
@@ -47,7 +36,7 @@ class LandUseV1():
     source: https://ourworldindata.org/land-use
     """
 
-    KM_2_unit = 'km2'
+    KM_2_unit = KM_2_UNIT
     HECTARE = 'ha'
 
     LAND_DEMAND_DF = 'land_demand_df'
@@ -85,9 +74,8 @@ class LandUseV1():
         self.param = param
         self.world_surface_data = None
         self.ha2km2 = 0.01
-        self.km2toha = 100.
-        self.surface_file = 'world_surface_data.csv'
-        self.surface_df = None
+        self.km2toha = KM_2_TO_HA
+        self.world_surface_table = None
         self.import_world_surface_data()
 
         self.set_data()
@@ -101,9 +89,7 @@ class LandUseV1():
         self.ref_land_use_constraint = self.param[LandUseV1.LAND_USE_CONSTRAINT_REF]
 
     def import_world_surface_data(self):
-        curr_dir = os.path.dirname(__file__)
-        data_file = os.path.join(curr_dir, self.surface_file)
-        self.surface_df = pd.read_csv(data_file)
+        self.world_surface_table = get_world_surface_table()
 
     def compute(self, land_demand_df, total_food_land_surface, deforested_surface_df):
         ''' 
@@ -342,23 +328,7 @@ class LandUseV1():
 
         @return: number in ha unit
         '''
-        surface = self.surface_df[(self.surface_df['Category'] == category) &
-                                  (self.surface_df['Name'] == name)]['Surface'].values[0]
-        unit = self.surface_df[(self.surface_df['Category'] == category) &
-                               (self.surface_df['Name'] == name)]['Unit'].values[0]
-        magnitude = self.surface_df[(self.surface_df['Category'] == category) &
-                                    (self.surface_df['Name'] == name)]['Magnitude'].values[0]
-
-        # unit conversion factor
-        unit_factor = 1.0
-        if unit == LandUseV1.KM_2_unit:
-            unit_factor = self.km2toha
-
-        magnitude_factor = 1.0
-        if magnitude in OrderOfMagnitude.magnitude_factor.keys():
-            magnitude_factor = OrderOfMagnitude.magnitude_factor[magnitude]
-
-        return surface * unit_factor * magnitude_factor
+        return self.world_surface_table.get_surface(category, name)
 
     def __extract_and_make_sum(self, target_columns):
         '''
@@ -0,0 +1,69 @@
+'''
+Copyright 2024 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+WORLD_SURFACE_DATA_FILE = os.path.join(os.path.dirname(__file__), 'world_surface_data.csv')
+KM_2_UNIT = 'km2'
+KM_2_TO_HA = 100.
+
+
+class OrderOfMagnitude():
+
+    KILO = 'k'
+    MEGA = 'M'
+    GIGA = 'G'
+    TERA = 'T'
+
+    magnitude_factor = {
+        KILO: 10 ** 3,
+        MEGA: 10 ** 6,
+        GIGA: 10 ** 9,
+        TERA: 10 ** 12
+    }
+
+
+class WorldSurfaceTable:
+    """
+    Read-only world surfaces reference table (source: https://ourworldindata.org/land-use), with all the surfaces
+    converted to ha once
+    """
+
+    def __init__(self, surface_df: pd.DataFrame):
+        self.categories = surface_df['Category'].to_numpy(dtype=str)
+        self.names = surface_df['Name'].to_numpy(dtype=str)
+        unit_factors = np.where(surface_df['Unit'].to_numpy() == KM_2_UNIT, KM_2_TO_HA, 1.0)
+        magnitude_factors = np.array([OrderOfMagnitude.magnitude_factor.get(magnitude, 1.0) for magnitude in surface_df['Magnitude']])
+        self.surfaces_ha = surface_df['Surface'].to_numpy(dtype=float) * unit_factors * magnitude_factors
+        for array in [self.categories, self.names, self.surfaces_ha]:
+            array.flags.writeable = False
+
+        self._index = {}
+        for position, key in enumerate(zip(self.categories, self.names)):
+            self._index.setdefault(key, position)
+
+    def get_surface(self, category: str, name: str) -> float:
+        """surface (ha) of the land name in the land category"""
+        return self.surfaces_ha[self._index[(category, name)]]
+
+
+@lru_cache(maxsize=1)
+def get_world_surface_table() -> WorldSurfaceTable:
+    """world surfaces table, read from the csv file at first call only and shared by all the land use models"""
+    return WorldSurfaceTable(pd.read_csv(WORLD_SURFACE_DATA_FILE))
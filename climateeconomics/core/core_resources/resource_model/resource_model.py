@@ -91,11 +91,23 @@ class ResourceModel():
         self.init_dataframes()
         self.sub_resource_list = [col for col in list(
             self.resource_production_data.columns) if col != GlossaryCore.Years]
+        self.configure_merit_order()
 
         # self.resource_consumed_dict ={}
         # for resource_type in self.sub_resource_list :
         #     self.resource_consumed_dict[f'{resource_type}_consumption'] = inputs_dict['resource_consumed_data'][f'{resource_type}_consumption'].values
 
+    def configure_merit_order(self):
+        '''
+        Sort the resource types by ascending price once, and store the position of each of them in the sub resource
+        columns of the stock arrays
+        '''
+        sorted_price_data = self.resource_price_data.sort_values(by=['price'])
+        self.ascending_price_resource_list = list(sorted_price_data['resource_type'])
+        self.ascending_prices = sorted_price_data['price'].values
+        self.merit_order_index = np.array([self.sub_resource_list.index(resource_type)
+                                           for resource_type in self.ascending_price_resource_list], dtype=int)
+
     def init_dataframes(self):
         '''
         Init dataframes with years
@@ -160,140 +172,106 @@ class ResourceModel():
                 self.resource_production_data, self.production_years, self.production_start, resource_type)
 
     def compute_stock(self):
-        # pylint: disable-msg=unsubscriptable-object
-        # Initialize stocks df
-        for resource_type in self.sub_resource_list:
-            self.resource_stock[resource_type] = np.insert(
-                np.zeros(len(self.years) - 1), 0, self.stock_start)
-            # Concat what was consumed in the past years and what will be
-            # consumed (needed for recycled materials calculations)
-            self.use_stock[resource_type] = np.insert(np.zeros(len(
-                self.years) - 1), 0, self.resource_consumed_data[f'{resource_type}_consumption'])
-            self.recycled_production[resource_type] = np.insert(np.zeros(len(self.years) - 1), 0,
-                                                                self.resource_consumed_data[f'{resource_type}_consumption'].values[0] * self.recycled_rate)
+        '''
+        Allocate the demand of each year to the resource types by ascending price (merit order): the cheapest resource
+        is used first, the next one only takes what is left of the demand, and what is not used is stocked.
+        Stock, use and recycling are computed on arrays of shape (nb_years, nb_sub_resources), only the loop on years
+        remains since the stock of a year depends on the previous one
+        '''
+        nb_years = len(self.years)
+        # Concat what was consumed in the past years and what will be
+        # consumed (needed for recycled materials calculations)
+        consumed_values = self.resource_consumed_data[
+            [f'{resource_type}_consumption' for resource_type in self.sub_resource_list]].values
+        self.nb_past_years = len(consumed_values) - 1
 
         # Select only the right resource demand and convert the demand unit if
         # needed
-
         self.resource_demand = self.resources_demand[[
             GlossaryCore.Years, self.resource_name]]
-
         self.convert_demand(self.resource_demand)
-
-        # Sort the resource type by ascending price
-        ascending_price_resource_list = list(
-            self.resource_price_data.sort_values(by=['price'])['resource_type'])
         # If needed, get the global demand from the energy demand
         self.get_global_demand(self.resource_demand)
-        # Turn dataframes into dict of np array for faster computation time
-        resource_demand_dict = self.resource_demand.to_dict()
-        predictable_production_dict = self.predictable_production.to_dict()
-        resource_stock_dict = self.resource_stock.to_dict()
-        use_stock_dict = self.use_stock.to_dict()
-        recycled_production_dict = self.recycled_production.to_dict()
-
-        # compute of stock per year (stock = 0 at year 0, no longer true for
-        # copper)
-    
-        for year_demand in self.years[1:]:
-            total_stock = 0.0
-            demand = resource_demand_dict[self.resource_name][year_demand]
-
-            # we take in priority the less expensive resource
-            for resource_type in ascending_price_resource_list:
-                total_stock = total_stock + \
-                    predictable_production_dict[resource_type][year_demand]
-
-            # chek if the stock is not empty this year:
-            if total_stock > 0:
-                for resource_type in ascending_price_resource_list:
-                    # compute recycled quantity of the different resources
-                    self.compute_recycling(
-                        year_demand, resource_type, recycled_production_dict, use_stock_dict)
-                    # while demand is not satisfied we use extracted and stocked
-                    # resource, if there is resource in excess we stock it
-                    if demand.real > 0:
-                        available_resource = resource_stock_dict[resource_type][year_demand - 1] + \
-                            predictable_production_dict[resource_type][year_demand] + \
-                            recycled_production_dict[resource_type][year_demand] - demand
-                        if available_resource.real >= 0:
-                            resource_stock_dict[resource_type][year_demand] = \
-                                resource_stock_dict[resource_type][year_demand - 1] + \
-                                predictable_production_dict[resource_type][year_demand] + \
-                                recycled_production_dict[resource_type][year_demand] - demand
-                            use_stock_dict[resource_type][year_demand] = demand
-                            demand = 0
-
-                        # if there is not enough resource we use all the
-                        # resource we have and we don't answer all the demand
-                        else:
-                            resource_stock_dict[resource_type][year_demand] = 0
-                            use_stock_dict[resource_type][year_demand] = \
-                                predictable_production_dict[resource_type][year_demand] + \
-                                resource_stock_dict[resource_type][year_demand - 1] + \
-                                recycled_production_dict[resource_type][year_demand]
-                            demand = demand - \
-                                use_stock_dict[resource_type][year_demand]
-
-                    else:
-                        resource_stock_dict[resource_type][year_demand] = \
-                            resource_stock_dict[resource_type][year_demand - 1] + \
-                            predictable_production_dict[resource_type][year_demand] +\
-                                recycled_production_dict[resource_type][year_demand]
-                        use_stock_dict[resource_type][year_demand] = 0
-            # if the stock is empty we just use what we produced this year
-            else:
-                resource_stock_dict[resource_type][year_demand] = 0
-                use_stock_dict[resource_type][year_demand] = 0
-        self.predictable_production = pd.DataFrame.from_dict(
-            predictable_production_dict)
-        self.resource_stock = pd.DataFrame.from_dict(resource_stock_dict)
-        self.use_stock = pd.DataFrame.from_dict(use_stock_dict) 
-        self.use_stock = self.use_stock.loc[self.use_stock[GlossaryCore.Years]>= self.year_start]
-        self.use_stock= self.use_stock.loc[self.use_stock[GlossaryCore.Years]<= self.year_end]
-        
-        self.recycled_production = pd.DataFrame.from_dict(
-            recycled_production_dict)
-
-    def compute_price(self):
-        # pylint: disable-msg=unsubscriptable-object
 
-        # dataframe initialization
-        # self.resource_price = pd.DataFrame({GlossaryCore.Years: self.years})
+        demand_values = self.resource_demand.loc[self.years, self.resource_name].values
+        production_values = self.predictable_production.loc[self.years, self.sub_resource_list].values
+        dtype = np.result_type(demand_values, production_values, consumed_values, self.stock_start,
+                               self.recycled_rate, float)
 
-        # for each year we calculate the price with the proportion of each
-        # resource. The resource price is stored in the price data dataframe
-        self.resource_price['price'] = np.zeros(len(self.years))
-        self.total_consumption['production'] = np.zeros(len(self.years))
+        # stock = stock_start at year 0 and 0 after (no longer true for
+        # copper)
+        stock_values = np.zeros((nb_years, len(self.sub_resource_list)), dtype=dtype)
+        stock_values[0] = self.stock_start
+        use_stock_values = np.zeros((self.nb_past_years + nb_years, len(self.sub_resource_list)), dtype=dtype)
+        use_stock_values[:self.nb_past_years + 1] = consumed_values
+        recycled_values = np.zeros((nb_years, len(self.sub_resource_list)), dtype=dtype)
+        recycled_values[0] = consumed_values[0] * self.recycled_rate
+
+        # allocation decisions of each year, the resource types that are fully used and the one that fulfills the
+        # remaining demand
+        merit_order = self.merit_order_index
+        self.supplied_years = np.zeros(nb_years, dtype=bool)
+        self.exhausted_resources = np.zeros((nb_years, len(merit_order)), dtype=bool)
+        self.marginal_resources = np.zeros((nb_years, len(merit_order)), dtype=bool)
+
+        for year_index in range(1, nb_years):
+            # if there is no production this year the stock and its use are
+            # set to zero
+            if np.real(np.sum(production_values[year_index, merit_order])) <= 0:
+                continue
+            self.supplied_years[year_index] = True
+            # compute recycled quantity of the different resources
+            recycled_values[year_index, merit_order] = self.compute_recycling(year_index, use_stock_values)[merit_order]
+            available_resource = stock_values[year_index - 1, merit_order] + \
+                production_values[year_index, merit_order] + \
+                recycled_values[year_index, merit_order]
+            use_values = np.zeros(len(merit_order), dtype=dtype)
+            if np.real(demand_values[year_index]) > 0:
+                # demand left to each resource type if all the cheaper ones are fully used
+                remaining_demand = np.subtract.accumulate(
+                    np.concatenate((demand_values[year_index:year_index + 1], available_resource[:-1])))
+                sufficient = np.real(available_resource - remaining_demand) >= 0
+                # while demand is not satisfied we use all the resource we have,
+                # the first resource type that is sufficient answers the rest of the demand
+                marginal_index = np.argmax(sufficient) if sufficient.any() else len(merit_order)
+                exhausted = np.arange(len(merit_order)) < marginal_index
+                use_values[exhausted] = available_resource[exhausted]
+                if marginal_index < len(merit_order):
+                    use_values[marginal_index] = remaining_demand[marginal_index]
+                    self.marginal_resources[year_index, marginal_index] = True
+                self.exhausted_resources[year_index] = exhausted
+            # if there is resource in excess we stock it
+            stock_values[year_index, merit_order] = available_resource - use_values
+            use_stock_values[self.nb_past_years + year_index, merit_order] = use_values
+
+        self.stock_values = stock_values
+        self.use_stock_values = use_stock_values[self.nb_past_years:]
+        self.recycled_values = recycled_values
+        self.resource_stock = self.values_to_dataframe(stock_values)
+        self.use_stock = self.values_to_dataframe(self.use_stock_values)
+        self.recycled_production = self.values_to_dataframe(recycled_values)
+
+    def values_to_dataframe(self, values):
+        '''
+        Dataframe indexed by years with one column per sub resource from an array of shape (nb_years, nb_sub_resources)
+        '''
+        return pd.DataFrame({GlossaryCore.Years: self.years, **dict(zip(self.sub_resource_list, values.T))},
+                            index=self.years)
 
-        # we compute the total consumption of one resource
-        for resource_type in self.sub_resource_list:
-            self.total_consumption['production'] = self.use_stock[resource_type] + \
-                self.total_consumption['production']
-        # Turn dataframes into dict of np array for faster computation time
-        resource_price_dict = self.resource_price.to_dict()
-        resource_price_data_dict = self.resource_price_data.to_dict()
-        total_consumption_dict = self.total_consumption.to_dict()
-        use_stock_dict = self.use_stock.to_dict()
+    def compute_price(self):
+        '''
+        The price of each year is the mean of the resource type prices weighted by their use
+        '''
+        self.total_consumption['production'] = self.use_stock[self.sub_resource_list].values.sum(axis=1)
+        total_consumption = self.total_consumption['production'].values
+        use_values = self.use_stock[self.ascending_price_resource_list].values
 
         # we divide each resource use by the total consumption to have the
         # proportion and we multiply by the price
-        ascending_price_resource_list = list(
-            self.resource_price_data.sort_values(by=['price'])['resource_type'])
-        for resource_type in ascending_price_resource_list:
-            mask_1 = np.array(
-                [val for val in use_stock_dict[resource_type].values()]) >= 0
-            mask_2 = np.array(
-                [val for val in total_consumption_dict['production'].values()]) != 0
-            resource_type_price_idx = list(resource_price_data_dict['resource_type'].keys())[
-                list(resource_price_data_dict['resource_type'].values()).index(resource_type)]
-            for year in np.array([val for val in resource_price_dict[GlossaryCore.Years].values()])[(mask_1 * mask_2)]:
-                resource_price_dict['price'][year] = \
-                    resource_price_dict['price'][year] + \
-                    use_stock_dict[resource_type][year] / \
-                    total_consumption_dict['production'][year] * \
-                    resource_price_data_dict['price'][resource_type_price_idx]
-        self.resource_price = pd.DataFrame.from_dict(resource_price_dict)
+        mask = (np.real(use_values) >= 0) & (total_consumption[:, np.newaxis] != 0)
+        safe_total_consumption = np.where(total_consumption != 0, total_consumption, 1.)
+        weighted_prices = np.where(mask, use_values / safe_total_consumption[:, np.newaxis] * self.ascending_prices, 0.)
+        self.resource_price['price'] = weighted_prices.sum(axis=1)
 
     def convert_demand(self, demand):
         '''
@@ -301,12 +279,12 @@ class ResourceModel():
         '''
         pass
 
-    def compute_recycling(self, year_demand, resource_type, recycled_production_dict, use_stock_dict):
+    def compute_recycling(self, year_index, use_stock_values):
         # infrastructures have a certain lifespan, so the recycled materials
         # obtained each are those used a lifespan ago, multiplied by a
         # recycle-rate
-        recycled_production_dict[resource_type][year_demand] = \
-            use_stock_dict[resource_type][year_demand - self.lifespan] * self.recycled_rate
+        # use_stock_values rows start with the consumption of the years before year_start
+        return use_stock_values[year_index + self.nb_past_years - self.lifespan] * self.recycled_rate
 
     def get_global_demand(self, demand):
         '''
@@ -314,207 +292,86 @@ class ResourceModel():
         '''
         pass
 
-    def compute_derivative_recycling(self, year_demand, resource_type, grad_use, grad_stock, grad_recycling) :
-        """ 
-        Compute derivative of reclycling regarding demand
+    def compute_derivative_recycling(self, year_index, grad_use_values):
+        """
+        Compute derivative of recycling regarding demand
         """
-        # recycling of the current year (year_demand - self.year_start) which depends on the used stock at current_year - lifespan
-        if year_demand - self.lifespan > self.year_start :
-            grad_recycling[resource_type][year_demand - self.year_start] = \
-                grad_use[resource_type][year_demand - self.lifespan - self.year_start] * self.recycled_rate       
-           
-        return grad_recycling
-        
+        # recycling of the current year depends on the used stock at current_year - lifespan, the past consumption
+        # (and the use of the current year read before its update when lifespan is zero) does not depend on demand
+        if self.lifespan > 0 and year_index - self.lifespan > 0:
+            return grad_use_values[year_index - self.lifespan] * self.recycled_rate
+        return np.zeros(grad_use_values.shape[1:])
 
     def get_derivative_resource(self):
         """ Compute derivative of stock, used stock and price regarding demand
+
+        Forward mode propagation over years: the derivatives of the stock, use and recycling of one year regarding
+        the demand of all years are computed from the ones of the previous years, replaying the allocation decisions
+        (exhausted and marginal resource types) recorded in compute_stock
         """
-        # pylint: disable-msg=unsubscriptable-object
-        # # ------------------------------------------------
-        # # gather inputs
         year_start = self.year_start
         year_end = self.year_end
         nb_years = self.year_end - self.year_start + 1
-        ascending_price_resource_list = list(
-            self.resource_price_data.sort_values(by=['price'])['resource_type'])
-        # Turn dataframes into dict of np array for faster computation time
-        resource_demand_dict = self.resource_demand.to_dict()
-        predictable_production_dict = self.predictable_production.to_dict()
-        resource_stock_dict = self.resource_stock.to_dict()
-        # # # resource_price_data_dict = self.resource_price_data.to_dict()
-        # # # total_consumption_dict = self.total_consumption.to_dict()
-        self.use_stock = self.use_stock.loc[self.use_stock[GlossaryCore.Years]>= self.year_start]
-        self.use_stock= self.use_stock.loc[self.use_stock[GlossaryCore.Years]<= self.year_end]
-        use_stock_dict = self.use_stock.to_dict()
-        recycled_production_dict = self.recycled_production.to_dict()
-
+        merit_order = self.merit_order_index
         # # ------------------------------------------------
-        # # init gradient dict of matrix transmitted to discipline
-        # # dict of matrix, one per resource_type -> ex. for Oil: {'heavy': [...], 'medium': [...]..
-        # # price matrix
+        # # gradient arrays, grad_x_values[year, sub_resource] is the gradient of x at this year regarding the demand of
+        # # all years
         # # resource production is NOT dependent of demand since it is calculated with Hubbert regression
+        grad_stock_values = np.zeros((nb_years, len(self.sub_resource_list), nb_years))
+        grad_use_values = np.zeros((nb_years, len(self.sub_resource_list), nb_years))
+        grad_recycling_values = np.zeros((nb_years, len(self.sub_resource_list), nb_years))
+
+        for year_index in range(1, nb_years):
+            # if there is no production, stock, use and recycling are zero
+            if not self.supplied_years[year_index]:
+                continue
+            grad_recycling_values[year_index, merit_order] = self.compute_derivative_recycling(
+                year_index, grad_use_values)[merit_order]
+            grad_available = grad_stock_values[year_index - 1, merit_order] + \
+                grad_recycling_values[year_index, merit_order]
+            # demand left to each resource type, the demand minus what the cheaper ones provide
+            grad_remaining_demand = np.zeros(grad_available.shape)
+            grad_remaining_demand[:, year_index] = self.conversion_factor
+            grad_remaining_demand[1:] -= np.cumsum(grad_available[:-1], axis=0)
+            # exhausted resource types give all the available resource, the marginal one the remaining demand and the
+            # others nothing (they are stocked)
+            exhausted = self.exhausted_resources[year_index][:, np.newaxis]
+            marginal = self.marginal_resources[year_index][:, np.newaxis]
+            grad_use = np.where(exhausted, grad_available, np.where(marginal, grad_remaining_demand, 0.))
+            grad_use_values[year_index, merit_order] = grad_use
+            grad_stock_values[year_index, merit_order] = grad_available - grad_use
+
+        # # ------------------------------------------------
+        # # dict of matrix transmitted to discipline, one per resource_type -> ex. for Oil: {'heavy': [...], 'medium': [...]..
         grad_stock = {}
-        grad_price =  np.identity(nb_years) * 0
         grad_use = {}
-        # # ------------------------------------------------
-        # # init useful containers for calculation
-        # # no_stock_year contains the last year at which there is no stock
-        # # year_stock contains years at which we stored resource without demand
-        # # grad_demand is used for resource use gradient calculation
-        # # grad_recycling is used for stock and use gradient calculations
-        # # coef_conversion is the demand multiplier for units
-        grad_demand = 0
-        no_stock_year = {}
-        year_stock = {}
         grad_recycling = {}
-    
-        for resource_type in self.sub_resource_list:
-            grad_stock[resource_type] = np.identity(nb_years) * 0
-            grad_use[resource_type] = np.identity(nb_years) * 0
-            grad_recycling[resource_type] = np.identity(nb_years) * 0 
-            no_stock_year[resource_type] = 0
-            year_stock[resource_type] = []
-           
-        # # ------------------------------------------------
-        # # gradient matrix computation
-        for year_demand in range(year_start + 1, year_end + 1):
-            total_stock = 0
-            grad_recycling = self.compute_derivative_recycling(year_demand, resource_type, grad_use, grad_stock, grad_recycling)
-            # # ------------------------------------------------
-            # # dealing with units
-            demand = resource_demand_dict[self.resource_name][year_demand] 
-
-            for resource_type in ascending_price_resource_list:
-                total_stock = total_stock + predictable_production_dict[resource_type][
-                    year_demand]
-
-            # check if the stock is not empty this year
-            if total_stock > 0:
-                for resource_type in ascending_price_resource_list:
-                    if demand > 0:
-                        if resource_stock_dict[resource_type][year_demand - 1] \
-                            + predictable_production_dict[resource_type][
-                                year_demand] \
-                            + recycled_production_dict[resource_type][year_demand] \
-                            - demand >= 0 and resource_stock_dict[resource_type][
-                                year_demand] > 0:
-
-                            # # -----------------------------------------------
-                            # # stock of resource_type and production are sufficient to fulfill demand
-                            # # so we remove demand from stock and resource type use is the demand
-
-                            # stock at year_demand depends on demand at year if stock is not zero, if demand is not zero
-                            # and if the stock was not zero after this year (by recursivity, stock is stock at year n
-                            # minus stock at year n-1 which is stock at year n-2 and so on, so the stock at year n depends
-                            # on all previous year unless the stock is empty at
-                            # a given year).  
-                            # Recycling depends on the use_stock of lifespan ago 
-
-                           
-                            for year in range(year_start + 1, year_demand + 1):
-                                
-                                if resource_stock_dict[resource_type][
-                                    year] > 0 and \
-                                        resource_demand_dict[self.resource_name][year] != 0 and \
-                                        year > no_stock_year[resource_type]:
-                                    
-                                    
-                                    grad_stock[resource_type][
-                                        year_demand - year_start, year - year_start] = - self.conversion_factor 
-                                if self.lifespan != 0 :
-                                    if year_demand - self.lifespan > self.year_start and year <year_demand - self.lifespan:
-                                        grad_stock[resource_type][year_demand - year_start, year - year_start]  = \
-                                            grad_stock[resource_type][year_demand -1 - year_start, year - year_start]            
-
-                                if year_demand == year:
-                                    grad_use[resource_type][
-                                        year_demand - year_start, year - year_start] = self.conversion_factor
-                                # resource use depends on previous year demand if at the year considered demand is not zero
-                                # and if we stored resource type without demand
-                                elif resource_demand_dict[self.resource_name][year] != 0 and year in year_stock[resource_type]:
-                                    grad_use[resource_type][year_demand -
-                                                            year_start, year - year_start] = grad_demand 
-
-                            grad_stock[resource_type][year_demand - year_start] += grad_recycling[resource_type][year_demand - year_start]
-                            demand = 0
-                            grad_demand = 0
-                            year_stock[resource_type] = []
-                        else:
-                            # # -----------------------------------------------
-                            # # stock of resource_type + production + recycling are not sufficient to fulfill demand
-                            # # so we use all the stock we had at previous year, the current year production, and the current year recycled production
-                            # # and remove it from the demand
-                            # # then use the next resource type (by ascending order of price)
-                            # # we store the no_stock_year, last year at which there is no stock
-
-                            no_stock_year[resource_type] = year_demand
-                            grad_use[resource_type][year_demand - year_start] = grad_stock[resource_type][
-                                year_demand - year_start - 1] 
-                            grad_use[resource_type][year_demand - year_start, year_demand - self.lifespan - year_start] += \
-                                grad_recycling[resource_type][year_demand - year_start, year_demand - self.lifespan - year_start]
-                            # grad_use[resource_type][year_demand - year_start] += \
-                            #     grad_recycling[resource_type][year_demand - year_start]
-                            demand = demand - \
-                                use_stock_dict[resource_type][year_demand]
-                            # if no stock at previous year grad_demand = 0
-                            if resource_stock_dict[resource_type][
-                                    year_demand - 1] > 0:
-                                grad_demand = self.conversion_factor
-                    else:
-                        # # ------------------------------------------------
-                        # # demand is zero or has been fulfilled by cheaper resources types
-                        # # stock equal previous year stock + production + recycled production
-                        # # we store all years at which we stored resource without demand
-                        grad_stock[resource_type][year_demand - year_start] = grad_stock[resource_type][
-                            year_demand - year_start - 1] 
-                        grad_stock[resource_type][year_demand - year_start, year_demand -self.lifespan - year_start] += \
-                            grad_recycling[resource_type][year_demand - year_start, year_demand - self.lifespan - year_start]
-                        year_stock[resource_type].append(year_demand)
-        
+        for resource_index, resource_type in enumerate(self.sub_resource_list):
+            grad_stock[resource_type] = grad_stock_values[:, resource_index]
+            grad_use[resource_type] = grad_use_values[:, resource_index]
+            grad_recycling[resource_type] = grad_recycling_values[:, resource_index]
 
+        grad_price = np.zeros((nb_years, nb_years))
         grad_price = self.get_d_price_d_demand(year_start, year_end, nb_years, grad_use, grad_price)
-        
-        return grad_stock, grad_price, grad_use, grad_recycling
-
 
-    def get_d_price_d_demand (self, year_start, year_end, nb_years, grad_use, grad_price):
-        # pylint: disable-msg=unsubscriptable-object
-        ascending_price_resource_list = list(
-            self.resource_price_data.sort_values(by=['price'])['resource_type'])
+        return grad_stock, grad_price, grad_use, grad_recycling
 
-        # Turn dataframes into dict of np array for faster computation time
-        resource_price_data_dict = self.resource_price_data.to_dict()
-        total_consumption_dict = self.total_consumption.to_dict()
-        use_stock_dict = self.use_stock.to_dict()
+    def get_d_price_d_demand(self, year_start, year_end, nb_years, grad_use, grad_price):
+        total_consumption = self.total_consumption['production'].values
+        use_values = self.use_stock[self.ascending_price_resource_list].values
+        grad_use_values = np.array([grad_use[resource_type] for resource_type in self.ascending_price_resource_list])
+        # # ------------------------------------------------
+        # # total consumption -> use stock + production
+        grad_total_consumption = grad_use_values.sum(axis=0)
 
         # # ------------------------------------------------
-        # # init useful containers for calculation
-        # # grad_total_consumption is used for price gradient calculation
-        grad_total_consumption = np.identity(nb_years) * 0
-
-        for year_demand in range(year_start + 1, year_end + 1):
-            # # ------------------------------------------------
-            # # total consumption -> use stock + production
-            for resource_type in ascending_price_resource_list:
-                grad_total_consumption[year_demand -
-                                        year_start] += grad_use[resource_type][year_demand - year_start]
-
-            # # ------------------------------------------------
-            # # price is u/v function with u = use and v = total consumption
-            for resource_type in ascending_price_resource_list:
-                for year in range(year_start + 1, year_end + 1):
-                    # # ------------------------------------------------
-                    # # price is u/v function with u = use and v = total consumption
-                    # # price gradient is (u'v - uv') / v^2
-                    if total_consumption_dict['production'][year_demand] != 0:
-                        resource_type_price_idx = list(resource_price_data_dict['resource_type'].keys())[
-                            list(resource_price_data_dict['resource_type'].values()).index(resource_type)]
-                        grad_price[year_demand - year_start, year - year_start] += \
-                            resource_price_data_dict['price'][resource_type_price_idx]\
-                            * (grad_use[resource_type][year_demand - year_start, year - year_start]
-                                * total_consumption_dict['production'][year_demand]
-                                - use_stock_dict[resource_type][year_demand]
-                                * grad_total_consumption[year_demand - year_start, year - year_start])\
-                            / (total_consumption_dict['production'][year_demand]) ** 2
+        # # price is u/v function with u = use and v = total consumption
+        # # price gradient is (u'v - uv') / v^2, on the years where the price is computed
+        mask = (np.real(use_values) >= 0) & (total_consumption[:, np.newaxis] != 0)
+        safe_total_consumption = np.where(total_consumption != 0, total_consumption, 1.)[:, np.newaxis]
+        for merit_index, price in enumerate(self.ascending_prices):
+            grad_price += np.where(mask[:, merit_index, np.newaxis],
+                                   price * (grad_use_values[merit_index] * safe_total_consumption
+                                            - use_values[:, merit_index, np.newaxis] * grad_total_consumption)
+                                   / safe_total_consumption ** 2, 0.)
         return grad_price
-        
\ No newline at end of file
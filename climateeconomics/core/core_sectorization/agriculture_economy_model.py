@@ -140,8 +140,66 @@ class AgricultureEconomyModel:
                self.get_coupling_inputs_arrays() + \
                (self.get_params_food_type(food_type), )
 
-    def jacobians(self):
-        """Compute the gradients using autograd"""
+    def jacobians(self, use_autograd: bool = False):
+        """
+        Compute the gradients, analytically as compute_food_type is elementwise in years so that all the jacobians
+        are diagonal. Diagonals are only expanded to matrices here, for the discipline.
+        Set use_autograd to True to compute them with autograd instead (verification mode)
+        """
+        # gradients dict structure: [input_varname][input_columnname][output_varname][output_colomnname] = value
+        if use_autograd:
+            return self.jacobians_autograd()
+
+        gradients = self.diagonal_jacobians()
+        for gradients_input in gradients.values():
+            for gradients_input_column in gradients_input.values():
+                for gradients_output in gradients_input_column.values():
+                    for co_colname, diagonal in gradients_output.items():
+                        gradients_output[co_colname] = np.diag(diagonal)
+
+        return gradients
+
+    def _null_diagonal(self):
+        nb_years = self.inputs[GlossaryCore.YearEnd] - self.inputs[GlossaryCore.YearStart] + 1
+        return np.zeros(nb_years)
+
+    def diagonal_jacobians(self) -> dict:
+        """
+        Analytic gradients, same dict structure as the one returned by jacobians but storing the diagonals of the
+        jacobians (vectors of length nb_years)
+        """
+        gradients = {}
+        food_types = self.inputs[GlossaryCore.FoodTypesName]
+        for ci_varname, ci_colomn_name in self.mapping_coupling_inputs_argument_number.values():
+            gradients[ci_varname] = {ci_colomn_name: {}}
+        for ci_varname in self.mapping_coupling_inputs_argument_number_food_types.values():
+            gradients[ci_varname] = {food_type: {} for food_type in food_types}
+
+        for food_type in food_types:
+            derivatives_food_type = self.compute_food_type_derivatives(*self.get_args(food_type))
+            for varname in list(self.dataframes_to_totalize_by_food_type_couplings.keys()) + self.coupling_dataframes_not_totalized:
+                co_varname, co_colname = self.dataframes_to_totalize_by_food_type_couplings[varname] if varname in self.dataframes_to_totalize_by_food_type_couplings else (varname, food_type)
+                derivatives_output = derivatives_food_type.get(varname, {})
+
+                # jacobians to sum on all food types
+                for index, (ci_varname, ci_colomn_name) in self.mapping_coupling_inputs_argument_number.items():
+                    if co_varname not in gradients[ci_varname][ci_colomn_name]:
+                        gradients[ci_varname][ci_colomn_name][co_varname] = {}
+                    if co_colname not in gradients[ci_varname][ci_colomn_name][co_varname]:
+                        gradients[ci_varname][ci_colomn_name][co_varname][co_colname] = self._null_diagonal()
+                    if index in derivatives_output:
+                        gradients[ci_varname][ci_colomn_name][co_varname][co_colname] += derivatives_output[index]
+
+                # gradients wrt food type inputs
+                for index_ci, ci_varname in self.mapping_coupling_inputs_argument_number_food_types.items():
+                    if co_varname not in gradients[ci_varname][food_type]:
+                        gradients[ci_varname][food_type][co_varname] = {}
+                    gradients[ci_varname][food_type][co_varname][co_colname] = derivatives_output[index_ci] if index_ci in derivatives_output else self._null_diagonal()
+
+        return gradients
+
+    def jacobians_autograd(self):
+        """Compute the gradients using autograd, kept to check the analytic gradients"""
         # gradients dict structure: [input_varname][input_columnname][output_varname][output_colomnname] = value
 
         gradients = {}
@@ -264,4 +322,55 @@ class AgricultureEconomyModel:
         })
 
 
-        return outputs, price_breakdown_df
\ No newline at end of file
+        return outputs, price_breakdown_df
+
+    @staticmethod
+    def compute_food_type_derivatives(
+            capital_food_type: np.ndarray,  # 0
+            production_loss_from_prod_loss: np.ndarray,  # 1
+            production_loss_from_immediate_climate_damages: np.ndarray,  # 2
+            production_delivered_to_consumers: np.ndarray,  # 3
+            production_for_all_streams: np.ndarray,  # 4
+            energy_price: np.ndarray,  # 5
+
+            params: dict,
+    ) -> dict:
+        """
+        Derivatives of the outputs of compute_food_type wrt its arguments. Every output is a sum of productions times
+        the final price, itself affine in the energy price, so that all the jacobians are diagonal.
+        returns {output varname: {argument number: diagonal of the jacobian}}, null derivatives are omitted
+        """
+        outputs, _ = AgricultureEconomyModel.compute_food_type(
+            capital_food_type, production_loss_from_prod_loss, production_loss_from_immediate_climate_damages,
+            production_delivered_to_consumers, production_for_all_streams, energy_price, params)
+        margin_share_of_final_price = params[GlossaryCore.FoodTypesPriceMarginShareName]
+        d_final_price_d_energy_price = params[GlossaryCore.FoodTypeEnergyIntensityByProdUnitName] / 1e6 * \
+            (1 + margin_share_of_final_price / 100 / (1 - margin_share_of_final_price / 100))
+        d_output_d_production = outputs[GlossaryCore.FoodTypesPriceName] / 1e3
+
+        productions = {
+            1: production_loss_from_prod_loss,
+            2: production_loss_from_immediate_climate_damages,
+            3: production_delivered_to_consumers,
+            4: production_for_all_streams,
+        }
+        # productions valued at final price in each output
+        productions_of_outputs = {
+            GlossaryCore.Damages + "_breakdown": [1, 2],
+            GlossaryCore.EstimatedDamages + "_breakdown": [1, 2],
+            GlossaryCore.DamagesFromClimate + "_breakdown": [2],
+            GlossaryCore.DamagesFromProductivityLoss + "_breakdown": [1],
+            GlossaryCore.GrossOutput + "_breakdown": [1, 2, 3, 4],
+            GlossaryCore.OutputNetOfDamage + "_breakdown": [3, 4],
+            GlossaryCore.CropFoodNetGdpName + "_breakdown": [3],
+            GlossaryCore.CropEnergyNetGdpName + "_breakdown": [4],
+        }
+
+        derivatives = {}
+        for varname, production_indexes in productions_of_outputs.items():
+            derivatives[varname] = {index: d_output_d_production for index in production_indexes}
+            derivatives[varname][5] = np.sum([productions[index] for index in production_indexes], axis=0) * d_final_price_d_energy_price / 1e3
+
+        derivatives[GlossaryCore.FoodTypesPriceName] = {5: d_final_price_d_energy_price * np.ones_like(energy_price)}
+
+        return derivatives
@@ -119,72 +119,44 @@ class LaborMarketModel():
         """
         year_covid = 2020
         year_end_recovery = 2031
-        #create dataframe 
-        employment_df = pd.DataFrame(index=self.years_range, columns=[GlossaryCore.Years,GlossaryCore.EmploymentRate])
-        employment_df[GlossaryCore.Years] = self.years_range
-        # For all years employment_rate = base value
-        employment_df[GlossaryCore.EmploymentRate] = self.employment_rate_base_value
-        # Compute recovery phase
-        years_recovery = np.arange(year_covid, year_end_recovery + 1)
-        x_recovery = years_recovery + 1 - year_covid
-        employment_rate_recovery = self.employment_a_param * \
-            x_recovery**self.employment_power_param
-        employment_rate_recovery_df = pd.DataFrame(
-            {GlossaryCore.Years: years_recovery, GlossaryCore.EmploymentRate: employment_rate_recovery})
-        employment_rate_recovery_df.index = years_recovery
-        # Then replace values in original dataframe by recoveries values
-        employment_df.update(employment_rate_recovery_df)
+        # Recovery phase between covid year and end of recovery, base value for all other years
+        x_recovery = self.years_range + 1 - year_covid
+        recovery_years = (self.years_range >= year_covid) & (self.years_range <= year_end_recovery)
+        self.employment_rate = np.where(recovery_years,
+                                        self.employment_a_param * np.where(recovery_years, x_recovery, 1) ** self.employment_power_param,
+                                        self.employment_rate_base_value)
 
+        employment_df = pd.DataFrame({GlossaryCore.Years: self.years_range,
+                                      GlossaryCore.EmploymentRate: self.employment_rate},
+                                     index=self.years_range)
         self.employment_df = employment_df
         return employment_df
-    
+
     def compute_workforce_persector(self):
         """ Compute workforce per sector. 
         Inputs: - dataframe of share of workforce per sector per year
                 - working age population (million) per year
                 - dataframe employment rate per year
         output: dataframe with workforce per sector in million per year. 1 column per sector 
+
+        Workforces of the sectors are computed at once as a (n_sectors, n_years) array, the shares (%) being
+        broadcasted against the employed working age population
         """
-        workforce_df = self.workforce_share_per_sector.copy(deep=True)
-        #drop years for computation
-        workforce_df = workforce_df.drop(columns = [GlossaryCore.Years])
         working_age_pop = self.working_age_population_df[GlossaryCore.Population1570].values
-        employment_rate = self.employment_df[GlossaryCore.EmploymentRate].values
         #per sector the workforce = share_per_sector * employment_rate *workingagepop
-        workforce_df = workforce_df.apply(lambda x: x/100 * employment_rate * working_age_pop)
-        #workforce total is the sum of all sectors 
-        workforce_df[GlossaryCore.Workforce] = workforce_df.sum(axis = 1)
-        workforce_df.insert(0, GlossaryCore.Years, self.years_range)
-        self.workforce_df = workforce_df
-        share = self.workforce_share_per_sector[GlossaryCore.SectorAgriculture].values
-        
-        return workforce_df
-    
-    def compute_workforce_persector_bis(self):
-        """ Compute workforce per sector. 
-        Inputs: - dataframe of share of workforce per sector per year
-                - working age population (million) per year
-                - dataframe employment rate per year
-        output: dataframe with workforce per sector in million per year. 1 column per sector 
-        """
-        workforce_df_dict = {}
-        #drop years for computation
-        working_age_pop = self.working_age_population_df[GlossaryCore.Population1570].values
-        employment_rate = self.employment_df[GlossaryCore.EmploymentRate].values
-        sector_list = self.SECTORS_LIST
-        workforce_share = self.workforce_share_per_sector
-        for sector in sector_list: 
-            share = workforce_share[sector]/100
-            sector_wf = share * employment_rate * working_age_pop
-            workforce_df_dict[sector] = sector_wf
-        workforce_df = pd.DataFrame.from_dict(workforce_df_dict)
+        self.workforce_shares = self.workforce_share_per_sector[self.SECTORS_LIST].values.T / 100.
+        self.sectors_workforce = self.workforce_shares * (self.employment_rate * working_age_pop)
         #workforce total is the sum of all sectors 
-        workforce_df[GlossaryCore.Workforce] = workforce_df.sum(axis = 1)
-        workforce_df.insert(0, GlossaryCore.Years, self.years_range)
+        self.total_workforce = self.sectors_workforce.sum(axis=0)
+
+        workforce_df = pd.DataFrame({GlossaryCore.Years: self.years_range,
+                                     **dict(zip(self.SECTORS_LIST, self.sectors_workforce)),
+                                     GlossaryCore.Workforce: self.total_workforce},
+                                    index=self.workforce_share_per_sector.index)
         self.workforce_df = workforce_df
-        
+
         return workforce_df
-            
+
     #RUN
     def compute(self, inputs):
         """
@@ -193,25 +165,32 @@ class LaborMarketModel():
         self.inputs = inputs
         self.set_coupling_inputs(inputs)
         self.compute_employment_rate()
-        self.compute_workforce_persector_bis()
+        self.compute_workforce_persector()
 
         return self.workforce_df, self.employment_df 
-    
+
     ### GRADIENTS ###
+    def d_workforce_d_working_age_population(self):
+        """
+        Diagonal blocks of the gradients of the workforces wrt working age population :
+        (n_sectors, n_years) array for the sectors of SECTORS_LIST and (n_years,) array for the total workforce
+        """
+        d_sectors_workforce = self.workforce_shares * self.employment_rate
+        return d_sectors_workforce, self.workforce_shares.sum(axis=0) * self.employment_rate
+
+    def d_workforce_d_workforce_share(self):
+        """
+        Diagonal block of the gradient of the workforce of a sector wrt its share (%), the same for all the sectors
+        and for the total workforce
+        """
+        working_age_pop = self.working_age_population_df[GlossaryCore.Population1570].values
+        return self.employment_rate * working_age_pop / 100.
+
     def compute_dworkforcetotal_dworkagepop(self):
         """ Gradient for workforce wrt working age population 
         """
-        nb_years = self.nb_years
-        employment_rate = self.employment_df[GlossaryCore.EmploymentRate].values
-        dworkforce_dworkagepop = np.identity(nb_years) * employment_rate
+        return np.diag(self.d_workforce_d_working_age_population()[1])
 
-        return dworkforce_dworkagepop
-    
     def compute_dworkforcesector_dworkagepop(self, sector):
-        sector_share = self.workforce_share_per_sector[sector].values
-        employment_rate = self.employment_df[GlossaryCore.EmploymentRate].values
         #workforce sector = employmentrate * working age pop * share 
-        dworkforcesector_dworkagepop = np.identity(self.nb_years) * employment_rate * sector_share/100 
-        
-        return dworkforcesector_dworkagepop
-        
+        return np.diag(self.d_workforce_d_working_age_population()[0][self.SECTORS_LIST.index(sector)])
@@ -18,6 +18,11 @@ limitations under the License.
 import numpy as np
 import pandas as pd
 
+from climateeconomics.core.tools.jacobian_operators import LowerTriangularJacobian
+from climateeconomics.core.tools.linear_recurrence import (
+    geometric_impulse_response,
+    geometric_recurrence_jacobian,
+)
 from climateeconomics.glossarycore import GlossaryCore
 
 
@@ -53,6 +58,7 @@ class SectorModel:
         self.energy_eff_xzero_constraint = None
         self.usable_capital_ref = None
         self.usable_capital_objective_ref = None
+        self.stacked_model = None
 
     def configure_parameters(self, inputs_dict, sector_name):
         '''
@@ -142,116 +148,6 @@ class SectorModel:
         self.damage_fraction_output_df = inputs[GlossaryCore.DamageFractionDfValue]
         self.damage_fraction_output_df.index = self.damage_fraction_output_df[GlossaryCore.Years].values
 
-    def compute_productivity_growthrate(self):
-        """
-        A_g, Growth rate of total factor productivity.
-        Returns:
-            :returns: A_g(0) * exp(-Δ_a * (t-1))
-        """
-        prod_growth_rate = self.productivity_gr_start * np.exp(
-            - self.decline_rate_tfp * (self.years_range - self.year_start))
-        self.productivity_df[GlossaryCore.ProductivityGrowthRate] = prod_growth_rate
-
-    def compute_productivity(self):
-        """
-        productivity
-        if damage_to_productivity= True add damage to the the productivity
-        if  not: productivity evolves independently from other variables (except productivity growthrate)
-        """
-        prod_wo_d = self.productivity_start
-        productivity_wo_damage_list = [self.productivity_start]
-
-        damage_fraction_output = self.damage_fraction_output_df[GlossaryCore.DamageFractionOutput].values
-        productivity_growth = self.productivity_df[GlossaryCore.ProductivityGrowthRate].values
-
-        for prod_growth, damage_frac_year in zip(productivity_growth[:-1], damage_fraction_output[1:]):
-            prod_wo_d = prod_wo_d / (1 - prod_growth / 5)
-            productivity_wo_damage_list.append(prod_wo_d)
-
-        productivity_w_damage_list = np.array(productivity_wo_damage_list) * (1 - damage_fraction_output)
-
-        self.productivity_df[GlossaryCore.ProductivityWithDamage] = productivity_w_damage_list
-        self.productivity_df[GlossaryCore.ProductivityWithoutDamage] = productivity_wo_damage_list
-        if self.damage_to_productivity:
-            self.productivity_df[GlossaryCore.Productivity] = productivity_w_damage_list
-        else:
-            self.productivity_df[GlossaryCore.Productivity] = productivity_wo_damage_list
-
-    def compute_capital(self):
-        """
-        K(t), Capital for time period, trillions $USD
-        """
-        capital = self.capital_start
-        capital_list = [capital]
-
-        investments = self.investment_df[GlossaryCore.InvestmentsValue].values
-        for invest in investments[:-1]:
-            capital = (1 - self.depreciation_capital) * capital + invest
-            capital_list.append(capital)
-
-        capital = np.array(capital_list)
-
-        self.capital_df[GlossaryCore.Capital] = capital
-
-    def compute_usable_capital(self):
-        """
-        Usable capital = capital utilisation ratio * energy efficiency * energy production
-        """
-        energy_efficiency = self.capital_df[GlossaryCore.EnergyEfficiency].values
-        energy_production = self.energy_production[GlossaryCore.TotalProductionValue].values
-        usable_capital = self.capital_utilisation_ratio * energy_efficiency * energy_production
-        self.capital_df[GlossaryCore.UsableCapital] = usable_capital
-
-    def compute_gross_output(self):
-        """ Compute the gdp 
-        inputs: usable capital by year in trill $ , working population by year in million of people,
-             productivity by year (no unit), alpha (between 0 and 1) 
-        output: gdp in trillion dollars
-        """
-        alpha = self.output_alpha
-        gamma = self.output_gamma
-        productivity = self.productivity_df[GlossaryCore.Productivity].values
-        working_pop = self.workforce_df[self.sector_name].values
-        capital_u = self.capital_df[GlossaryCore.UsableCapital].values
-        output = productivity * (alpha * capital_u**gamma + (1 - alpha)* (working_pop)**gamma) **(1 / gamma)
-        self.production_df[GlossaryCore.GrossOutput] = output
-
-    def compute_output_net_of_damage(self):
-        """
-        Output net of damages, trillions USD
-        """
-        damage_to_productivity = self.damage_to_productivity
-        damefrac = self.damage_fraction_output_df[GlossaryCore.DamageFractionOutput].values
-        gross_output = self.production_df[GlossaryCore.GrossOutput].values
-
-        if not self.compute_climate_impact_on_gdp:
-            output_net_of_d = gross_output
-        else:
-            if damage_to_productivity:
-                damage = 1 - ((1 - damefrac) / (1 - self.frac_damage_prod * damefrac))
-                output_net_of_d = (1 - damage) * gross_output
-            else:
-                output_net_of_d = gross_output * (1 - damefrac)
-        self.production_df[GlossaryCore.OutputNetOfDamage] = output_net_of_d
-
-    def compute_output_net_of_damage_per_section(self):
-        """
-        Splitting output net of damages between sections of the sector
-        """
-        section_gdp_df = {GlossaryCore.Years: self.years}
-        for section in self.section_list:
-            section_gdp_df[section] = self.production_df[GlossaryCore.OutputNetOfDamage].values /100. * self.gdp_percentage_per_section_df[section]
-
-        self.section_gdp_df = pd.DataFrame(section_gdp_df)
-
-    def compute_output_growth_rate(self):
-        """ Compute output growth rate for every year for the year before: 
-        output_growth_rate(t-1) = (output(t) - output(t-1))/output(t-1)
-        for the last year we put the value of the previous year to avoid a 0 
-        """
-        gross_output = self.production_df[GlossaryCore.GrossOutput]
-        self.production_df[GlossaryCore.OutputGrowth] = (gross_output.diff() / gross_output.shift(1)).fillna(0.) * 100
-
     # For production fitting optim  only
     def compute_long_term_energy_efficiency(self):
         """ Compute energy efficiency function on a longer time scale to analyse shape
@@ -281,149 +177,28 @@ class SectorModel:
    
         return self.range_energy_eff_cstrt
 
-    def compute_energy_efficiency(self):
-        """compute energy_efficiency"""
-        years = self.capital_df[GlossaryCore.Years].values
-        energy_efficiency = self.energy_eff_cst + self.energy_eff_max / (1 + np.exp(-self.energy_eff_k *
-                                                                                    (years - self.energy_eff_xzero)))
-        self.capital_df[GlossaryCore.EnergyEfficiency] = energy_efficiency
-
-    def compute_damage_from_productivity_loss(self):
-        """
-        Compute damages due to loss of productivity.
-
-        As GDP ~= productivity x (Usable capital + Labor), and that we can compute productivity with or without damages,
-        we compute the damages on GDP from loss of productivity as
-        (productivity wo damage - productivity w damage) x (Usable capital + Labor).
-        """
-        productivity_w_damage = self.productivity_df[GlossaryCore.ProductivityWithDamage].values
-        productivity_wo_damage = self.productivity_df[GlossaryCore.ProductivityWithoutDamage].values
-        gross_output = self.production_df[GlossaryCore.GrossOutput].values
-        applied_productivity = self.productivity_df[GlossaryCore.Productivity].values
-
-        estimated_damage_from_productivity_loss = (productivity_wo_damage - productivity_w_damage) / applied_productivity * gross_output
-        if self.damage_to_productivity:
-            damage_from_productivity_loss = estimated_damage_from_productivity_loss
-        else:
-            damage_from_productivity_loss = np.zeros_like(estimated_damage_from_productivity_loss)
-
-        self.damage_df[GlossaryCore.DamagesFromProductivityLoss] = damage_from_productivity_loss
-        self.damage_df[GlossaryCore.EstimatedDamagesFromProductivityLoss] = estimated_damage_from_productivity_loss
-
-    def compute_damage_from_climate(self):
-        damefrac = self.damage_fraction_output_df[GlossaryCore.DamageFractionOutput]
-        gross_output = self.production_df[GlossaryCore.GrossOutput].values
-        net_output = self.production_df[GlossaryCore.OutputNetOfDamage].values
-
-        damage_from_climate = np.zeros_like(gross_output)
-        if self.compute_climate_impact_on_gdp:
-            damage_from_climate = gross_output - net_output
-            estimated_damage_from_climate = damage_from_climate
-        else:
-            if self.damage_to_productivity:
-                estimated_damage_from_climate = gross_output * damefrac * (1 - self.frac_damage_prod) / (
-                        1 - self.frac_damage_prod * damefrac)
-            else:
-                estimated_damage_from_climate = gross_output * damefrac
-
-        self.damage_df[GlossaryCore.DamagesFromClimate] = damage_from_climate
-        self.damage_df[GlossaryCore.EstimatedDamagesFromClimate] = estimated_damage_from_climate
-
-    def compute_total_damages(self):
-        """Damages are the sum of damages from climate + damges from loss of productivity"""
-
-        self.damage_df[GlossaryCore.EstimatedDamages] = self.damage_df[GlossaryCore.EstimatedDamagesFromClimate] + self.damage_df[GlossaryCore.EstimatedDamagesFromProductivityLoss]
-        self.damage_df[GlossaryCore.Damages] = self.damage_df[GlossaryCore.DamagesFromClimate] + self.damage_df[GlossaryCore.DamagesFromProductivityLoss]
-
-    def compute_energy_consumption_per_section(self):
-        """
-        Computing the energy consumption for each section of the sector
-
-        section_energy_consumption (PWh) = sector_energy_production (Pwh) x section_energy_consumption_percentage (%)
-        """
-        section_energy_consumption = {
-            GlossaryCore.Years: self.years
-        }
-        sector_energy_production = self.energy_production[GlossaryCore.TotalProductionValue].values
-        for section in self.section_list:
-            section_energy_consumption[section] = sector_energy_production * self.energy_consumption_percentage_per_section_df[section].values / 100.
-        self.section_energy_consumption_df = pd.DataFrame(section_energy_consumption)
-
-    def compute_usable_capital_upper_bound_constraint(self):
-        """
-        Upper bound usable capital constraint = max capital utilisation ratio * non energy capital - usable capital
-        """
-        ne_capital = self.capital_df[GlossaryCore.Capital].values
-        usable_capital = self.capital_df[GlossaryCore.UsableCapital].values
-        self.usable_capital_upper_bound_constraint = - (usable_capital - self.max_capital_utilisation_ratio * ne_capital) / self.usable_capital_ref
-
     # RUN
     def compute(self, inputs):
         """
-        Compute all models for year range
+        Compute all models for year range, the equations are evaluated by a StackedSectorModel of this sector only
+        which fills the output dataframes
         """
-        self.init_dataframes()
-        self.set_coupling_inputs(inputs)
-        self.compute_productivity_growthrate()
-        self.compute_productivity()
-        self.compute_energy_efficiency()
-        self.compute_usable_capital()
-
-        self.compute_gross_output()
-        self.compute_output_net_of_damage()
-        self.compute_output_growth_rate()
-        self.compute_capital()
-
-        if self.prod_function_fitting:
-            self.compute_long_term_energy_efficiency()
-            self.compute_energy_eff_constraints()
+        self.stacked_model = StackedSectorModel([self])
+        self.stacked_model.compute({self.sector_name: inputs})
 
-        self.compute_output_net_of_damage_per_section()
-        self.compute_energy_consumption_per_section()
-
-        self.compute_usable_capital_upper_bound_constraint()
-        self.compute_damage_from_productivity_loss()
-        self.compute_damage_from_climate()
-        self.compute_total_damages()
-        
-        self.output_types_to_float()
-
-    
     ### GRADIENTS ###
 
-    def _null_derivative(self):
-        nb_years = len(self.years_range)
-        return np.zeros((nb_years, nb_years))
-
-    def _identity_derivative(self):
-        nb_years = len(self.years_range)
-        return np.identity(nb_years)
+    def _sector_gradients(self, stacked_gradients) -> tuple:
+        """Jacobian matrices of the sector from the diagonals returned by the stacked model"""
+        return tuple({section: np.diag(gradient) for section, gradient in stacked_gradient[self.sector_name].items()}
+                     if isinstance(stacked_gradient, dict) else np.diag(stacked_gradient[0])
+                     for stacked_gradient in stacked_gradients)
 
     def compute_doutput_dworkforce(self):
         """ Gradient for output output wrt workforce
-        output = productivity * (alpha * capital_u**gamma + (1-alpha)* (working_pop)**gamma)**(1/gamma) 
+        output = productivity * (alpha * capital_u**gamma + (1-alpha)* (working_pop)**gamma)**(1/gamma)
         """
-        years = self.years_range
-        nb_years = len(years)
-        alpha = self.output_alpha
-        gamma = self.output_gamma
-        doutput = np.identity(nb_years)
-        working_pop = self.workforce_df[self.sector_name].values
-        capital_u = self.capital_df[GlossaryCore.UsableCapital].values
-        productivity = self.productivity_df[GlossaryCore.Productivity].values
-        # output = f(g(x)) with f = productivity*g**(1/gamma) a,d g= alpha * capital_u**gamma + (1-alpha)* (working_pop)**gamma
-        # f'(g) = productivity*(1/gamma)*g**(1/gamma -1)
-        # g'(workingpop) = (1-alpha)*gamma*workingpop**(gamma-1)
-        # f'(g(x)) = f'(g)*g'(x)
-        # first line stays at zero since derivatives of initial values are zero
-        g = alpha * capital_u**gamma + (1 - alpha) * (working_pop)**gamma
-        g_prime = (1 - alpha) * gamma * working_pop**(gamma - 1)
-        f_prime = productivity * (1 / gamma) * g * g_prime
-        doutput = doutput @ np.diag(f_prime)
-        return doutput
-
-    def d_section_energy_consumption_d_energy_prod(self):
-        return {section: np.diag(self.energy_consumption_percentage_per_section_df[section].values / 100.) for section in self.section_list}
+        return self.d_working_pop()[0]
 
     def d_energy_production(self):
         """
@@ -432,30 +207,7 @@ class SectorModel:
         - gross output
         wrt energy
         """
-        alpha = self.output_alpha
-        gamma = self.output_gamma
-        productivity = self.productivity_df[GlossaryCore.Productivity].values
-        working_pop = self.workforce_df[self.sector_name].values
-        usable_capital = self.capital_df[GlossaryCore.UsableCapital].values
-
-        energy_efficiency = self.capital_df[GlossaryCore.EnergyEfficiency].values
-        d_usable_capital_d_energy = np.diag(self.capital_utilisation_ratio * energy_efficiency)
-
-        d_gross_output_d_energy = d_usable_capital_d_energy @ np.diag(
-            productivity * alpha * usable_capital ** (gamma - 1) * (alpha * usable_capital ** gamma + (1 - alpha) * working_pop ** gamma) ** (1. / gamma - 1.)
-        )
-
-        d_net_output_d_energy = self._d_net_output_d_user_input(d_gross_output_d_energy)
-
-        d_damages_d_user_input, d_estimated_damages_d_user_input, d_damages_from_climate, d_estimated_damages_from_climate, d_damages_from_prod_loss, d_estimated_damages_from_prod_loss = self.d_damages_d_user_input(d_gross_output_d_energy, d_net_output_d_energy)
-
-        d_k_d_energy = self._null_derivative()
-        d_ku_ub_contraint = self.d_ku_upper_bound_constraint_d_user_input(d_usable_capital_d_energy, d_k_d_energy)
-        d_damages_from_climate = self.__d_damages_from_climate_d_user_input(d_gross_output_d_energy, d_net_output_d_energy)
-        d_section_energy_cons_d_energy_prod_dict = self.d_section_energy_consumption_d_energy_prod()
-        d_section_gdp = self.d_section_gdp_d_user_input(d_net_output_d_energy)
-
-        return d_gross_output_d_energy, d_net_output_d_energy, d_damages_d_user_input, d_estimated_damages_d_user_input, d_damages_from_climate, d_estimated_damages_from_climate, d_damages_from_prod_loss, d_estimated_damages_from_prod_loss, d_ku_ub_contraint, d_usable_capital_d_energy, d_section_energy_cons_d_energy_prod_dict, d_section_gdp
+        return self._sector_gradients(self.stacked_model.d_energy_production())
 
     def d_working_pop(self):
         """
@@ -465,213 +217,333 @@ class SectorModel:
         - lower bound constraint
         wrt working age population
         """
-        years = self.years_range
-        nb_years = len(years)
-        alpha = self.output_alpha
-        gamma = self.output_gamma
-        doutput = np.identity(nb_years)
-        working_pop = self.workforce_df[self.sector_name].values
-        capital_u = self.capital_df[GlossaryCore.UsableCapital].values
-        productivity = self.productivity_df[GlossaryCore.Productivity].values
-        g = alpha * capital_u ** gamma + (1 - alpha) * (working_pop) ** gamma
-        g_prime = (1 - alpha) * gamma * working_pop ** (gamma - 1)
-        f_prime = productivity * (1 / gamma) * g * g_prime
-        d_gross_output_d_wap = doutput @ np.diag(f_prime)
-        damefrac = self.damage_fraction_output_df[GlossaryCore.DamageFractionOutput].values
-        dQ_dY = 1 - damefrac if not self.damage_to_productivity else (1 - damefrac) / (1 - self.frac_damage_prod * damefrac)
-        if not self.compute_climate_impact_on_gdp:
-            dQ_dY = np.ones_like(self.years_range)
-        d_net_output_d_wap = np.diag(dQ_dY) @ d_gross_output_d_wap
+        return self._sector_gradients(self.stacked_model.d_working_pop())
 
-        d_damages_d_wap, d_estimated_damages_d_wap, d_damages_from_climate, d_estimated_damages_from_climate, d_damages_from_prod_loss, d_estimated_damages_from_prod_loss = self.d_damages_d_user_input(d_gross_output_d_wap, d_net_output_d_wap)
+    def d_damage_frac_output(self):
+        """derivative of net output wrt damage frac output"""
+        return self._sector_gradients(self.stacked_model.d_damage_frac_output())
 
-        d_k_d_wap = self._null_derivative()
-        d_ku_constraint_d_wap = self.d_ku_upper_bound_constraint_d_user_input(self._null_derivative(), d_k_d_wap)
+    def d_invests(self):
+        """ Compute derivative of capital wrt investments.
+        Returns lower triangular jacobians, dense matrices are built by the discipline
+        """
+        d_capital_d_invests, d_ku_constraint_d_invests = self.stacked_model.d_invests()
+        return LowerTriangularJacobian(d_capital_d_invests[0]), LowerTriangularJacobian(d_ku_constraint_d_invests[0])
 
-        d_section_gdp = self.d_section_gdp_d_user_input(d_net_output_d_wap)
+    def output_types_to_float(self):
+        """make sure these dataframes columns have type float instead of object to avoid errors during
+        seting of partial derivatives"""
+        dataframes = [
+            self.production_df,
+            self.section_gdp_df,
+            self.damage_df,
+            self.capital_df,
+            self.productivity_df
+        ]
 
-        return d_gross_output_d_wap, d_net_output_d_wap, d_damages_d_wap, d_estimated_damages_d_wap, d_damages_from_climate, d_estimated_damages_from_climate, d_damages_from_prod_loss, d_estimated_damages_from_prod_loss, d_ku_constraint_d_wap, d_section_gdp
+        for df in dataframes:
+            df.fillna(0.0, inplace=True)
 
-    def d_damage_frac_output(self):
-        """derivative of net output wrt damage frac output"""
-        damefrac = self.damage_fraction_output_df[GlossaryCore.DamageFractionOutput].values
-        gross_output = self.production_df[GlossaryCore.GrossOutput].values
-        productivity = self.productivity_df[GlossaryCore.Productivity].values
-
-        d_gross_output_d_dfo =  np.diag(gross_output / productivity) @ self.d_productivity_d_damage_frac_output()
-
-        if self.compute_climate_impact_on_gdp and self.damage_to_productivity:
-            factor = (1 - damefrac) / (1 - self.frac_damage_prod * damefrac)
-            d_factor_d_dfo = np.diag((self.frac_damage_prod - 1) / (1 - self.frac_damage_prod * damefrac) ** 2)
-        elif self.compute_climate_impact_on_gdp and not self.damage_to_productivity:
-            factor = 1 - damefrac
-            d_factor_d_dfo = -np.eye(self.nb_years)
-        elif not self.compute_climate_impact_on_gdp:
-            factor = np.ones_like(damefrac)
-            d_factor_d_dfo = self._null_derivative()
-        else:
-            raise Exception("Problem")
-        d_net_output_d_dfo = np.diag(gross_output) @ d_factor_d_dfo + np.diag(factor) @ d_gross_output_d_dfo
 
-        d_damages_from_productivity_loss_d_dfo, d_estimated_damages_from_productivity_loss_d_dfo = self.d_damages_from_productivity_loss_d_damage_fraction_output(d_gross_output_d_dfo)
-        d_estimated_damages_from_climate_d_dfo = self.d_estimated_damages_from_climate_d_damage_frac_output(d_gross_output_d_dfo, d_net_output_d_dfo)
-        d_damages_from_climate_d_dfo = self.__d_damages_from_climate_d_user_input(d_gross_output_d_dfo, d_net_output_d_dfo)
-        d_estimated_damages_d_dfo = d_estimated_damages_from_climate_d_dfo + d_estimated_damages_from_productivity_loss_d_dfo
-        d_damages_d_dfo = d_damages_from_climate_d_dfo + d_damages_from_productivity_loss_d_dfo
+class StackedSectorModel:
+    """
+    Batched evaluation of several sectors pyworld3 at once.
 
-        d_k_d_dfo = self._null_derivative()
-        dku_ub_constraint_d_dfo = self.d_ku_upper_bound_constraint_d_user_input(self._null_derivative(), d_k_d_dfo)
+    The sectors keep their own configured SectorModel (parameters, sections, output dataframes), the production,
+    capital and damage equations of all the sectors are evaluated in one call on (n_sectors, n_years) arrays, the
+    scalar parameters of the sectors being stacked as (n_sectors, 1) columns. The dataframes of each SectorModel are
+    only filled at the output boundary. SectorModel.compute and gradients of a single sector are evaluated by a
+    StackedSectorModel of this sector only, so that the equations are only written here.
 
-        d_section_gdp = self.d_section_gdp_d_user_input(d_net_output_d_dfo)
+    Gradients are batched too : derivatives that are diagonal in years are returned as their diagonals of shape
+    (n_sectors, n_years), the capital derivatives wrt investments as (n_sectors, n_years, n_years) lower triangular
+    matrices.
+    """
 
-        return d_gross_output_d_dfo, d_net_output_d_dfo, d_estimated_damages_d_dfo, d_damages_d_dfo, d_damages_from_productivity_loss_d_dfo , d_estimated_damages_from_productivity_loss_d_dfo, d_estimated_damages_from_climate_d_dfo, d_damages_from_climate_d_dfo, dku_ub_constraint_d_dfo, d_section_gdp
+    def __init__(self, sector_models: list[SectorModel]):
+        '''
+        Constructor
+        '''
+        self.sector_models = sector_models
+        self.sector_names = [model.sector_name for model in sector_models]
+        self.configure_parameters()
 
-    def d_invests(self):
-        """ Compute derivative of capital wrt investments.
-        """
-        nb_years = self.nb_years
-        d_capital_d_invests = self._null_derivative()
-        for i in range(nb_years):
-            for j in range(nb_years):
-                d_capital_d_invests[i, j] = d_capital_d_invests[i-1, j] * (1 - self.depreciation_capital) + 1 * (i - 1 == j)
-
-        d_ku_constraint_d_invests = self.max_capital_utilisation_ratio * d_capital_d_invests / self.usable_capital_ref
-        return d_capital_d_invests, d_ku_constraint_d_invests
-
-    def _d_net_output_d_user_input(self, d_gross_output_d_user_input):
-        """derivative of net output wrt X, user should provide the derivative of gross output wrt X"""
-        damefrac = self.damage_fraction_output_df[GlossaryCore.DamageFractionOutput].values
-
-        if self.compute_climate_impact_on_gdp and self.damage_to_productivity:
-            dQ_dY = np.diag((1 - damefrac) / (1 - self.frac_damage_prod * damefrac))
-        elif self.compute_climate_impact_on_gdp and not self.damage_to_productivity:
-            dQ_dY = np.diag(1 - damefrac)
-        elif not self.compute_climate_impact_on_gdp:
-            dQ_dY = np.eye(self.nb_years)
-        else:
-            raise Exception("Problem")
-        dQ_d_user_input = dQ_dY @ d_gross_output_d_user_input
-        return dQ_d_user_input
-    
-    def d_productivity_w_damage_d_damage_frac_output(self):
-        """derivative of productivity with damage wrt damage frac output"""
-        productivity_wo_damage = self.productivity_df[GlossaryCore.ProductivityWithoutDamage].values
-        return np.diag(-productivity_wo_damage)
+    def stack_parameter(self, name: str) -> np.ndarray:
+        """(n_sectors, 1) column of the scalar parameter of the sectors"""
+        return np.array([getattr(model, name) for model in self.sector_models])[:, np.newaxis]
 
-    def d_productivity_d_damage_frac_output(self):
-        """gradient for productivity for damage_df"""
-        d_productivity_d_damage_frac_output = self._null_derivative()
+    def stack_coupling_input(self, get_values) -> np.ndarray:
+        """(n_sectors, n_years) array of a coupling input, get_values gives the values of a configured SectorModel"""
+        return np.array([get_values(model) for model in self.sector_models])
 
-        if self.damage_to_productivity:
-            d_productivity_d_damage_frac_output = self.d_productivity_w_damage_d_damage_frac_output()
-        return d_productivity_d_damage_frac_output
+    def configure_parameters(self):
+        '''
+        Stack the parameters of the configured sector models
+        '''
+        reference_model = self.sector_models[0]
+        self.year_start = reference_model.year_start
+        self.years_range = reference_model.years_range
+        self.nb_years = reference_model.nb_years
+        for model in self.sector_models:
+            if not np.array_equal(model.years_range, self.years_range):
+                raise ValueError(f"Sector {model.sector_name} is not configured on the same years as sector {reference_model.sector_name}")
+
+        for name in ['productivity_start', 'capital_start', 'productivity_gr_start', 'decline_rate_tfp',
+                     'depreciation_capital', 'frac_damage_prod', 'output_alpha', 'output_gamma', 'energy_eff_k',
+                     'energy_eff_cst', 'energy_eff_xzero', 'energy_eff_max', 'capital_utilisation_ratio',
+                     'max_capital_utilisation_ratio', 'usable_capital_ref']:
+            setattr(self, name, self.stack_parameter(name))
+        # damage to productivity is already disabled by SectorModel.configure_parameters when climate impact on gdp
+        # is not computed, damages from productivity loss and their gradients only depend on it
+        self.damage_to_productivity = self.stack_parameter('damage_to_productivity').astype(bool)
+        self.compute_climate_impact_on_gdp = self.stack_parameter('compute_climate_impact_on_gdp').astype(bool)
+
+    def set_coupling_inputs(self, sectors_inputs: dict):
+        """
+        Set couplings inputs of each sector, sectors_inputs gives the inputs dict of each sector name, then stack
+        them as (n_sectors, n_years) arrays
+        """
+        for model in self.sector_models:
+            model.set_coupling_inputs(sectors_inputs[model.sector_name])
+        self.investments = self.stack_coupling_input(lambda model: model.investment_df[GlossaryCore.InvestmentsValue].values)
+        self.energy_production = self.stack_coupling_input(lambda model: model.energy_production[GlossaryCore.TotalProductionValue].values)
+        self.working_pop = self.stack_coupling_input(lambda model: model.workforce_df[model.sector_name].values)
+        self.damage_fraction_output = self.stack_coupling_input(lambda model: model.damage_fraction_output_df[GlossaryCore.DamageFractionOutput].values)
 
-    def __d_damages_from_climate_d_user_input(self, d_gross_output_d_user_input, d_net_output_d_user_input):
+    def compute_productivity(self):
         """
-        damages_from_climate = gross output - net output
+        Productivity growth rate and productivity of the sectors, the productivity without damage
+        A[t] = A[t-1] / (1 - A_g[t-1] / 5) is a cumulative product over years
         """
-        derivative = d_gross_output_d_user_input - d_net_output_d_user_input
-        return derivative
+        self.productivity_growth_rate = self.productivity_gr_start * np.exp(
+            - self.decline_rate_tfp * (self.years_range - self.year_start))
+        growth_factors = np.ones_like(self.productivity_growth_rate)
+        growth_factors[:, 1:] = 1. / (1 - self.productivity_growth_rate[:, :-1] / 5)
+        self.productivity_wo_damage = self.productivity_start * np.cumprod(growth_factors, axis=1)
+        self.productivity_w_damage = self.productivity_wo_damage * (1 - self.damage_fraction_output)
+        self.productivity = np.where(self.damage_to_productivity, self.productivity_w_damage, self.productivity_wo_damage)
 
-    def __d_estimated_damages_from_climate_d_user_input(self, d_gross_output_d_user_input, d_net_output_d_user_input):
+    def compute_capital(self):
         """
-        damages_from_climate = gross output - net output
+        K(t) = (1 - depreciation) * K(t-1) + I(t-1), as the free response of the capital at year start plus the
+        product of the lower triangular jacobian with the investments
         """
-        damefrac = self.damage_fraction_output_df[GlossaryCore.DamageFractionOutput]
+        decay = 1 - self.depreciation_capital
+        self.d_capital_d_invests = geometric_recurrence_jacobian(geometric_impulse_response(self.nb_years, decay))
+        self.capital = self.capital_start * decay ** np.arange(self.nb_years) + \
+            np.matmul(self.d_capital_d_invests, self.investments[:, :, np.newaxis])[:, :, 0]
 
-        if self.compute_climate_impact_on_gdp:
-            derivative = d_gross_output_d_user_input - d_net_output_d_user_input
-        else:
-            if self.damage_to_productivity:
-                derivative = np.diag(damefrac * (1 - self.frac_damage_prod) /
-                                     (1 - self.frac_damage_prod * damefrac)) @ d_gross_output_d_user_input
-            else:
-                derivative = np.diag(damefrac) @ d_gross_output_d_user_input
+    def compute_production(self):
+        """
+        Energy efficiency, usable capital, gross output, output net of damage and output growth of the sectors
+        """
+        self.energy_efficiency = self.energy_eff_cst + self.energy_eff_max / (
+                1 + np.exp(-self.energy_eff_k * (self.years_range - self.energy_eff_xzero)))
+        self.usable_capital = self.capital_utilisation_ratio * self.energy_efficiency * self.energy_production
 
-        return derivative
+        alpha = self.output_alpha
+        gamma = self.output_gamma
+        self.production_function = alpha * self.usable_capital ** gamma + (1 - alpha) * self.working_pop ** gamma
+        self.gross_output = self.productivity * self.production_function ** (1 / gamma)
+
+        self.net_output_factor = self.compute_net_output_factor()
+        self.output_net_of_damage = self.net_output_factor * self.gross_output
+
+        self.output_growth = np.zeros_like(self.gross_output)
+        self.output_growth[:, 1:] = (self.gross_output[:, 1:] - self.gross_output[:, :-1]) / self.gross_output[:, :-1] * 100
+
+    def compute_net_output_factor(self) -> np.ndarray:
+        """output net of damage / gross output, which is also the derivative of the net output wrt gross output"""
+        damefrac = self.damage_fraction_output
+        factor_w_damage_to_productivity = (1 - damefrac) / (1 - self.frac_damage_prod * damefrac)
+        factor = np.where(self.damage_to_productivity, factor_w_damage_to_productivity, 1 - damefrac)
+        return np.where(self.compute_climate_impact_on_gdp, factor, 1.)
+
+    def compute_damages(self):
+        """
+        Damages from climate and from productivity loss, estimated and applied, and usable capital upper bound
+        constraint of the sectors
+        """
+        self.usable_capital_upper_bound_constraint = - (self.usable_capital - self.max_capital_utilisation_ratio * self.capital) / self.usable_capital_ref
+
+        self.estimated_damages_from_productivity_loss = (self.productivity_wo_damage - self.productivity_w_damage) / self.productivity * self.gross_output
+        self.damages_from_productivity_loss = np.where(self.damage_to_productivity, self.estimated_damages_from_productivity_loss, 0.)
+
+        damefrac = self.damage_fraction_output
+        self.damages_from_climate = np.where(self.compute_climate_impact_on_gdp, self.gross_output - self.output_net_of_damage, 0.)
+        estimated_damages_wo_climate_impact = np.where(
+            self.damage_to_productivity,
+            self.gross_output * damefrac * (1 - self.frac_damage_prod) / (1 - self.frac_damage_prod * damefrac),
+            self.gross_output * damefrac)
+        self.estimated_damages_from_climate = np.where(self.compute_climate_impact_on_gdp, self.damages_from_climate, estimated_damages_wo_climate_impact)
+
+        self.estimated_damages = self.estimated_damages_from_climate + self.estimated_damages_from_productivity_loss
+        self.damages = self.damages_from_climate + self.damages_from_productivity_loss
+
+    def store_sector_outputs(self):
+        """
+        Output boundary : fill the dataframes of each SectorModel from the stacked arrays
+        """
+        for i, model in enumerate(self.sector_models):
+            model.init_dataframes()
+            model.productivity_df[GlossaryCore.ProductivityGrowthRate] = self.productivity_growth_rate[i]
+            model.productivity_df[GlossaryCore.ProductivityWithDamage] = self.productivity_w_damage[i]
+            model.productivity_df[GlossaryCore.ProductivityWithoutDamage] = self.productivity_wo_damage[i]
+            model.productivity_df[GlossaryCore.Productivity] = self.productivity[i]
+            model.capital_df[GlossaryCore.EnergyEfficiency] = self.energy_efficiency[i]
+            model.capital_df[GlossaryCore.UsableCapital] = self.usable_capital[i]
+            model.production_df[GlossaryCore.GrossOutput] = self.gross_output[i]
+            model.production_df[GlossaryCore.OutputNetOfDamage] = self.output_net_of_damage[i]
+            model.production_df[GlossaryCore.OutputGrowth] = self.output_growth[i]
+            model.capital_df[GlossaryCore.Capital] = self.capital[i]
+
+            if model.prod_function_fitting:
+                model.compute_long_term_energy_efficiency()
+                model.compute_energy_eff_constraints()
+
+            section_list = model.section_list
+            gdp_percentages = model.gdp_percentage_per_section_df[section_list].values.T
+            energy_consumption_percentages = model.energy_consumption_percentage_per_section_df[section_list].values.T
+            model.section_gdp_df = pd.DataFrame({GlossaryCore.Years: model.years,
+                                                 **dict(zip(section_list, self.output_net_of_damage[i] / 100. * gdp_percentages))})
+            model.section_energy_consumption_df = pd.DataFrame({GlossaryCore.Years: model.years,
+                                                                **dict(zip(section_list, self.energy_production[i] * energy_consumption_percentages / 100.))})
+
+            model.usable_capital_upper_bound_constraint = self.usable_capital_upper_bound_constraint[i]
+            model.damage_df[GlossaryCore.DamagesFromProductivityLoss] = self.damages_from_productivity_loss[i]
+            model.damage_df[GlossaryCore.EstimatedDamagesFromProductivityLoss] = self.estimated_damages_from_productivity_loss[i]
+            model.damage_df[GlossaryCore.DamagesFromClimate] = self.damages_from_climate[i]
+            model.damage_df[GlossaryCore.EstimatedDamagesFromClimate] = self.estimated_damages_from_climate[i]
+            model.damage_df[GlossaryCore.EstimatedDamages] = self.estimated_damages[i]
+            model.damage_df[GlossaryCore.Damages] = self.damages[i]
+
+            model.output_types_to_float()
 
-    def d_estimated_damages_from_climate_d_damage_frac_output(self, d_gross_output_d_user_input, d_net_output_d_user_input):
+    # RUN
+    def compute(self, sectors_inputs: dict):
         """
-        damages_from_climate = gross output - net output
+        Compute all sectors for year range, sectors_inputs gives the inputs dict of each sector name
         """
-        damefrac = self.damage_fraction_output_df[GlossaryCore.DamageFractionOutput]
-        gross_output = self.production_df[GlossaryCore.GrossOutput].values
+        self.set_coupling_inputs(sectors_inputs)
+        self.compute_productivity()
+        self.compute_production()
+        self.compute_capital()
+        self.compute_damages()
+        self.store_sector_outputs()
 
-        if self.compute_climate_impact_on_gdp:
-            derivative = d_gross_output_d_user_input - d_net_output_d_user_input
-        else:
-            if self.damage_to_productivity:
-                derivative = d_gross_output_d_user_input @ np.diag(damefrac * (1 - self.frac_damage_prod) /
-                                     (1 - self.frac_damage_prod * damefrac)) + np.diag(gross_output) * \
-                             np.diag((1 - self.frac_damage_prod) / (1 - self.frac_damage_prod * damefrac) ** 2)
-
-            else:
-                derivative = d_gross_output_d_user_input @ np.diag(damefrac) + np.diag(gross_output)
-
-        return derivative
-
-    def d_damages_from_productivity_loss_d_damage_fraction_output(self, d_gross_output_d_damage_fraction_output):
-        gross_output = self.production_df[GlossaryCore.GrossOutput].values
-        productivity_wo_damage = self.productivity_df[GlossaryCore.ProductivityWithoutDamage].values
-        productivity_w_damage = self.productivity_df[GlossaryCore.ProductivityWithDamage].values
-
-        d_productivity_w_damage_d_damage_frac_output = self.d_productivity_w_damage_d_damage_frac_output()
-        nb_years = len(self.years_range)
-        d_damages_from_productivity_loss_d_damage_fraction_output = self._null_derivative()
-        d_estimated_damages_from_productivity_loss_d_damage_fraction_output = self._null_derivative()
-        if self.damage_to_productivity:
-            for i in range(nb_years):
-                d_estimated_damages_from_productivity_loss_d_damage_fraction_output[i] = d_gross_output_d_damage_fraction_output[i] * (productivity_wo_damage[i]/productivity_w_damage[i] - 1) +\
-                    - gross_output[i] * productivity_wo_damage[i] / productivity_w_damage[i] ** 2 * d_productivity_w_damage_d_damage_frac_output[i]
-        else:
-            d_estimated_damages_from_productivity_loss_d_damage_fraction_output = np.diag((productivity_wo_damage - productivity_w_damage)/productivity_wo_damage) @ d_gross_output_d_damage_fraction_output - np.diag(gross_output / productivity_wo_damage) @ d_productivity_w_damage_d_damage_frac_output
-        if self.compute_climate_impact_on_gdp and self.damage_to_productivity:
-            d_damages_from_productivity_loss_d_damage_fraction_output = d_estimated_damages_from_productivity_loss_d_damage_fraction_output
+    ### GRADIENTS ###
 
-        return d_damages_from_productivity_loss_d_damage_fraction_output, d_estimated_damages_from_productivity_loss_d_damage_fraction_output
+    def d_damages_d_user_input(self, d_gross_output_d_user_input, d_net_output_d_user_input):
+        """
+        Diagonals of the derivatives of the damages wrt X, from the diagonals of the derivatives of the gross and net
+        outputs wrt X, when X has no effect on productivity
+        """
+        damefrac = self.damage_fraction_output
+        d_damages_from_climate = d_gross_output_d_user_input - d_net_output_d_user_input
+        estimated_damages_wo_climate_impact_factor = np.where(
+            self.damage_to_productivity,
+            damefrac * (1 - self.frac_damage_prod) / (1 - self.frac_damage_prod * damefrac),
+            damefrac)
+        d_estimated_damages_from_climate = np.where(self.compute_climate_impact_on_gdp, d_damages_from_climate,
+                                                    estimated_damages_wo_climate_impact_factor * d_gross_output_d_user_input)
+        d_estimated_damages_from_prod_loss = (self.productivity_wo_damage - self.productivity_w_damage) / self.productivity * d_gross_output_d_user_input
+        d_damages_from_prod_loss = np.where(self.damage_to_productivity, d_estimated_damages_from_prod_loss, 0.)
+        d_damages_d_user_input = d_damages_from_prod_loss + d_damages_from_climate
+        d_estimated_damages_d_user_input = d_estimated_damages_from_climate + d_estimated_damages_from_prod_loss
 
-    def __d_damages_from_productivity_loss_d_user_input(self, d_gross_output_d_user_input):
-        productivity_wo_damage = self.productivity_df[GlossaryCore.ProductivityWithoutDamage].values
-        productivity_w_damage = self.productivity_df[GlossaryCore.ProductivityWithDamage].values
+        return d_damages_d_user_input, d_estimated_damages_d_user_input, d_damages_from_climate, d_estimated_damages_from_climate, d_damages_from_prod_loss, d_estimated_damages_from_prod_loss
 
-        d_damages_from_productivity_loss_d_user_input = self._null_derivative()
-        applied_productivity = self.productivity_df[GlossaryCore.Productivity].values
-        d_estimated_damages_from_prod_loss_d_user_input = np.diag((productivity_wo_damage - productivity_w_damage) / (
-                applied_productivity)) @  d_gross_output_d_user_input
+    def d_section_values_d_user_input(self, percentages_name: str, d_sector_value_d_user_input: np.ndarray) -> dict:
+        """
+        Diagonals of the derivatives of the sections values (split with the section percentages dataframe named
+        percentages_name) wrt X, {sector: {section: (n_years,) array}}
+        """
+        return {model.sector_name: dict(zip(model.section_list, getattr(model, percentages_name)[model.section_list].values.T / 100. * d_sector_value_d_user_input[i]))
+                for i, model in enumerate(self.sector_models)}
 
-        if self.compute_climate_impact_on_gdp and self.damage_to_productivity:
-            d_damages_from_productivity_loss_d_user_input = d_estimated_damages_from_prod_loss_d_user_input
+    def d_energy_production(self):
+        """
+        Diagonals of the derivatives of the outputs of the sectors wrt their energy production, same order as
+        SectorModel.d_energy_production
+        """
+        alpha = self.output_alpha
+        gamma = self.output_gamma
+        d_usable_capital_d_energy = self.capital_utilisation_ratio * self.energy_efficiency
+        d_gross_output_d_energy = d_usable_capital_d_energy * self.productivity * alpha * self.usable_capital ** (gamma - 1) * \
+            self.production_function ** (1. / gamma - 1.)
+        d_net_output_d_energy = self.net_output_factor * d_gross_output_d_energy
 
-        return d_damages_from_productivity_loss_d_user_input, d_estimated_damages_from_prod_loss_d_user_input
+        d_damages_d_energy, d_estimated_damages_d_energy, d_damages_from_climate, d_estimated_damages_from_climate, d_damages_from_prod_loss, d_estimated_damages_from_prod_loss = self.d_damages_d_user_input(d_gross_output_d_energy, d_net_output_d_energy)
+        d_ku_ub_contraint = - d_usable_capital_d_energy / self.usable_capital_ref
+        d_section_energy_cons_d_energy_prod = self.d_section_values_d_user_input('energy_consumption_percentage_per_section_df', np.ones_like(self.energy_production))
+        d_section_gdp = self.d_section_values_d_user_input('gdp_percentage_per_section_df', d_net_output_d_energy)
 
-    def d_damages_d_user_input(self, d_gross_output_d_user_input, d_net_output_d_user_input):
-        d_damages_from_climate = self.__d_damages_from_climate_d_user_input(d_gross_output_d_user_input, d_net_output_d_user_input)
-        d_estimated_damages_from_climate = self.__d_estimated_damages_from_climate_d_user_input(d_gross_output_d_user_input, d_net_output_d_user_input)
-        d_damages_from_prod_loss, d_estimated_damages_from_prod_loss = self.__d_damages_from_productivity_loss_d_user_input(d_gross_output_d_user_input)
-        d_damages_d_user_input = d_damages_from_prod_loss + d_damages_from_climate
-        d_estimated_damages_d_user_input = d_estimated_damages_from_climate + d_estimated_damages_from_prod_loss
+        return d_gross_output_d_energy, d_net_output_d_energy, d_damages_d_energy, d_estimated_damages_d_energy, d_damages_from_climate, d_estimated_damages_from_climate, d_damages_from_prod_loss, d_estimated_damages_from_prod_loss, d_ku_ub_contraint, d_usable_capital_d_energy, d_section_energy_cons_d_energy_prod, d_section_gdp
 
-        return d_damages_d_user_input, d_estimated_damages_d_user_input, d_damages_from_climate, d_estimated_damages_from_climate, d_damages_from_prod_loss, d_estimated_damages_from_prod_loss
+    def d_working_pop(self):
+        """
+        Diagonals of the derivatives of the outputs of the sectors wrt their working age population, same order as
+        SectorModel.d_working_pop
+        """
+        alpha = self.output_alpha
+        gamma = self.output_gamma
+        d_gross_output_d_wap = self.productivity * (1 - alpha) * self.working_pop ** (gamma - 1) * \
+            self.production_function ** (1. / gamma - 1.)
+        d_net_output_d_wap = self.net_output_factor * d_gross_output_d_wap
 
-    def output_types_to_float(self):
-        """make sure these dataframes columns have type float instead of object to avoid errors during
-        seting of partial derivatives"""
-        dataframes = [
-            self.production_df,
-            self.section_gdp_df,
-            self.damage_df,
-            self.capital_df,
-            self.productivity_df
-        ]
+        d_damages_d_wap, d_estimated_damages_d_wap, d_damages_from_climate, d_estimated_damages_from_climate, d_damages_from_prod_loss, d_estimated_damages_from_prod_loss = self.d_damages_d_user_input(d_gross_output_d_wap, d_net_output_d_wap)
+        d_ku_constraint_d_wap = np.zeros_like(d_gross_output_d_wap)
+        d_section_gdp = self.d_section_values_d_user_input('gdp_percentage_per_section_df', d_net_output_d_wap)
 
-        for df in dataframes:
-            df.fillna(0.0, inplace=True)
+        return d_gross_output_d_wap, d_net_output_d_wap, d_damages_d_wap, d_estimated_damages_d_wap, d_damages_from_climate, d_estimated_damages_from_climate, d_damages_from_prod_loss, d_estimated_damages_from_prod_loss, d_ku_constraint_d_wap, d_section_gdp
 
-    def d_ku_upper_bound_constraint_d_user_input(self, d_ku_d_user_input, d_kne_d_user_input):
-        return - (d_ku_d_user_input - self.max_capital_utilisation_ratio * d_kne_d_user_input) / self.usable_capital_ref
+    def d_damage_frac_output(self):
+        """
+        Diagonals of the derivatives of the outputs of the sectors wrt their damage fraction output, same order as
+        SectorModel.d_damage_frac_output
+        """
+        damefrac = self.damage_fraction_output
+        frac_damage_prod = self.frac_damage_prod
+        gross_output = self.gross_output
+        productivity_wo_damage = self.productivity_wo_damage
+        productivity_w_damage = self.productivity_w_damage
+
+        d_productivity_d_dfo = np.where(self.damage_to_productivity, -productivity_wo_damage, 0.)
+        d_gross_output_d_dfo = gross_output / self.productivity * d_productivity_d_dfo
+
+        d_factor_w_damage_to_productivity = (frac_damage_prod - 1) / (1 - frac_damage_prod * damefrac) ** 2
+        d_factor_d_dfo = np.where(self.compute_climate_impact_on_gdp,
+                                  np.where(self.damage_to_productivity, d_factor_w_damage_to_productivity, -1.), 0.)
+        d_net_output_d_dfo = gross_output * d_factor_d_dfo + self.net_output_factor * d_gross_output_d_dfo
+
+        # productivity with damage = productivity without damage * (1 - damage fraction output)
+        d_estimated_damages_from_productivity_loss_d_dfo = np.where(
+            self.damage_to_productivity,
+            d_gross_output_d_dfo * (productivity_wo_damage / productivity_w_damage - 1) +
+            gross_output * productivity_wo_damage ** 2 / productivity_w_damage ** 2,
+            (productivity_wo_damage - productivity_w_damage) / productivity_wo_damage * d_gross_output_d_dfo + gross_output)
+        d_damages_from_productivity_loss_d_dfo = np.where(self.damage_to_productivity, d_estimated_damages_from_productivity_loss_d_dfo, 0.)
+
+        d_damages_from_climate_d_dfo = d_gross_output_d_dfo - d_net_output_d_dfo
+        d_estimated_damages_from_climate_wo_climate_impact = np.where(
+            self.damage_to_productivity,
+            d_gross_output_d_dfo * damefrac * (1 - frac_damage_prod) / (1 - frac_damage_prod * damefrac) +
+            gross_output * (1 - frac_damage_prod) / (1 - frac_damage_prod * damefrac) ** 2,
+            d_gross_output_d_dfo * damefrac + gross_output)
+        d_estimated_damages_from_climate_d_dfo = np.where(self.compute_climate_impact_on_gdp, d_damages_from_climate_d_dfo,
+                                                          d_estimated_damages_from_climate_wo_climate_impact)
+        d_estimated_damages_d_dfo = d_estimated_damages_from_climate_d_dfo + d_estimated_damages_from_productivity_loss_d_dfo
+        d_damages_d_dfo = d_damages_from_climate_d_dfo + d_damages_from_productivity_loss_d_dfo
+
+        dku_ub_constraint_d_dfo = np.zeros_like(d_gross_output_d_dfo)
+        d_section_gdp = self.d_section_values_d_user_input('gdp_percentage_per_section_df', d_net_output_d_dfo)
 
-    def d_section_gdp_d_user_input(self, d_net_output_d_user_input: np.ndarray):
+        return d_gross_output_d_dfo, d_net_output_d_dfo, d_estimated_damages_d_dfo, d_damages_d_dfo, d_damages_from_productivity_loss_d_dfo, d_estimated_damages_from_productivity_loss_d_dfo, d_estimated_damages_from_climate_d_dfo, d_damages_from_climate_d_dfo, dku_ub_constraint_d_dfo, d_section_gdp
+
+    def d_invests(self):
         """
-        Splitting output net of damages between sections of the sector
+        Derivatives of the capital of the sectors wrt their investments, (n_sectors, n_years, n_years) lower
+        triangular matrices
         """
-        return {section: np.diag(self.gdp_percentage_per_section_df[section] /100.) @ d_net_output_d_user_input for section in self.section_list}
+        d_ku_constraint_d_invests = self.max_capital_utilisation_ratio[:, :, np.newaxis] * self.d_capital_d_invests / self.usable_capital_ref[:, :, np.newaxis]
+        return self.d_capital_d_invests, d_ku_constraint_d_invests
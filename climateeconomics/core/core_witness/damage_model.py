@@ -17,6 +17,7 @@ limitations under the License.
 import numpy as np
 import pandas as pd
 
+from climateeconomics.core.tools.jacobian_operators import BandedJacobian
 from climateeconomics.glossarycore import GlossaryCore
 
 
@@ -57,6 +58,7 @@ class DamageModel:
         self.temperature_df = None
         self.extra_gigatons_co2eq_since_pre_indus_df = None
         self.total_emissions_ref = self.param['total_emissions_damage_ref']
+        self.co2_damage_price_window = self.param['co2_damage_price_window']
 
         self.damage_fraction_df = pd.DataFrame(index=self.years_range, data={
             GlossaryCore.Years: self.years_range,
@@ -127,23 +129,15 @@ class DamageModel:
         out[temp_atmo <= 0] = 0
         return out
 
-    def d_co2_damage_price_d_damages(self):
+    def d_co2_damage_price_d_damages(self) -> BandedJacobian:
         '''
-        Compute gradient of constraint wrt temp_atmo and economics
+        Compute gradient of CO2 damage price wrt damages:
+        d co2_damage_price[i] / d damages[i + j] = scaling[i] / window_length[i] for 0 <= j < window_length[i]
         '''
-        years = np.arange(self.year_start, self.year_end + 1)
-        nb_years = len(years)
-        d_co2_damage_price_d_damages = np.zeros((nb_years, nb_years))
-
-        for i, year in enumerate(years):
-            if year == self.year_end:
-                d_co2_damage_price_d_damages[i, i] = 1e3 * 1.01 ** i / self.total_emissions_ref
-            else:
-                k = max(year + 25 - self.year_end, 0)
-                for j in range(0, 25 - k):
-                    d_co2_damage_price_d_damages[i, i + j] = 1e3 * 1.01 ** i / (25 - k) / self.total_emissions_ref
-
-        return d_co2_damage_price_d_damages
+        window_lengths = self.get_co2_damage_price_window_lengths()
+        band_values = self.get_co2_damage_price_scaling() / window_lengths
+        return BandedJacobian({offset: np.where(offset < window_lengths, band_values, 0.)
+                               for offset in range(np.max(window_lengths))}, len(self.years_range))
 
     def d_co2_damage_price_dev_d_user_input(self, d_co2_extra_ton_damage_price_d_user_input):
         '''
@@ -178,31 +172,30 @@ class DamageModel:
             GlossaryCore.ExtraCO2tDamagePrice: extra_CO2t_eq_cost
         })
 
+    def get_co2_damage_price_window_lengths(self) -> np.ndarray:
+        """
+        Number of years of damages averaged for the CO2 damage price of each year: co2_damage_price_window years,
+        shrinking at the end of the horizon to the number of years left before year_end (1 for the last year)
+        """
+        return np.maximum(np.minimum(self.co2_damage_price_window, self.year_end - self.years_range), 1)
+
+    def get_co2_damage_price_scaling(self) -> np.ndarray:
+        """CO2 damage price per T$ of mean damages: 1e3 * 1.01 ** (year - year_start) / total_emissions_ref"""
+        return 1e3 * 1.01 ** np.arange(len(self.years_range)) / self.total_emissions_ref
+
     def compute_CO2_damage_price(self):
         """
         Compute CO2 tax - CO2 damage constraint:
                  CO2 tax - fact * CO2_damage_price  > 0
-            with CO2_damage_price[year] = 1e3 * 1.01**(year_start-year) * mean(damage_df[year:year+25] (T$)) / total_emissions_ref (Gt)
+            with CO2_damage_price[year] = 1e3 * 1.01**(year-year_start) * mean(damage_df[year:year+window] (T$)) / total_emissions_ref (Gt)
+        The rolling mean over a window shrinking at the end of the horizon is computed with a cumulative sum
         """
-        if 'complex128' in [self.damage_fraction_df[GlossaryCore.DamageFractionOutput].values.dtype]:
-            arr_type = 'complex128'
-        else:
-            arr_type = 'float64'
-
-        co2_damage_price = np.zeros(
-            len(self.damage_fraction_df.index), dtype=arr_type)
-
-        damages = self.damage_df[GlossaryCore.EstimatedDamages].values.tolist()
-
-        for i, year in enumerate(self.damage_fraction_df.index):
-
-            if year == self.year_end:
-                co2_damage_price[i] = 1e3 * 1.01 ** i * \
-                                      damages[i] / self.total_emissions_ref
-            else:
-                k = max(year + 25 - self.year_end, 0)
-                co2_damage_price[i] = 1e3 * 1.01 ** i * \
-                                      np.mean(damages[i:i + 25 - k]) / self.total_emissions_ref
+        damages = self.damage_df[GlossaryCore.EstimatedDamages].values
+        window_lengths = self.get_co2_damage_price_window_lengths()
+        window_starts = np.arange(len(damages))
+        cumulated_damages = np.concatenate([np.zeros(1, dtype=damages.dtype), np.cumsum(damages)])
+        mean_damages = (cumulated_damages[window_starts + window_lengths] - cumulated_damages[window_starts]) / window_lengths
+        co2_damage_price = self.get_co2_damage_price_scaling() * mean_damages
 
         self.co2_damage_price_df = pd.DataFrame(
             {GlossaryCore.Years: self.years_range,
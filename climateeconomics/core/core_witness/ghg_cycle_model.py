@@ -19,6 +19,11 @@ from typing import Union
 import numpy as np
 import pandas as pd
 
+from climateeconomics.core.tools.linear_recurrence import (
+    geometric_impulse_response,
+    geometric_recurrence_jacobian,
+    solve_geometric_recurrence,
+)
 from climateeconomics.glossarycore import GlossaryCore
 
 
@@ -58,6 +63,8 @@ class GHGCycle():
         self.em_ratios = self.param['co2_emissions_fractions']
         self.decays = self.param['co2_boxes_decays']
         self.boxes_conc = self.param['co2_boxes_init_conc']
+        # ppm of each box per Gt of CO2 emitted (0.000471 ppm per Mt)
+        self.boxes_gt_to_ppm = [0.000471 * em_ratio * 1e3 for em_ratio in self.em_ratios]
 
         self.decay_ch4 = self.param['ch4_decay_rate']
         self.pre_indus_conc_co2 = self.param['co2_pre_indus_conc']
@@ -105,19 +112,14 @@ class GHGCycle():
         computes derivative of co2_ppm with respect to CO2 emissions
         """
 
-        coeff = 0.000471*self.em_ratios[0] * 1e3
-        decay = self.decays[0]
-        mat = np.diag(coeff*np.ones(len(self.years_range)))
-
-        for i in np.arange(1, len(self.years_range-1)):
-            coeff = coeff*decay
-            mat += np.diag(coeff*np.ones(len(self.years_range)-i), -i)
-
+        # box(t) = decay * box(t-1) + coeff * E(t), d box(t) / d E(s) is the impulse response of the box at lag t - s
         # first year is from initial data and is fixed ==> grad is zero
-        mat[:, 0] = 0.0
         # gradient is null where the clip to 1e-10 was used on ppm co2
-        mat[self.ppm_co2_negative_indexes, :] = 0.0
-        return mat
+        impulse_response = geometric_impulse_response(len(self.years_range), self.decays[0], self.boxes_gt_to_ppm[0],
+                                                      input_lag=0)
+        jacobian = geometric_recurrence_jacobian(impulse_response, input_lag=0)
+        jacobian[self.ppm_co2_negative_indexes] = 0.
+        return jacobian
 
     def d_gwp100_objective_d_ppm(self, d_ppm: pd.Series, specie: str) -> float:
         """
@@ -261,21 +263,25 @@ class GHGCycle():
 
         self.global_warming_potential_df = global_warming_potential_df
 
-    def compute_concentration_co2(self):
-        conc_boxes = self.boxes_conc
-        boxes_list = [conc_boxes]
-        for emission_year_Gt in self.ghg_emissions_df[GlossaryCore.TotalCO2Emissions].values[1:]:
-            emission_year_Mt = emission_year_Gt * 1e3
-            conc_boxes = [decay * box_conc + 0.000471 * em_ratio * emission_year_Mt for (decay, box_conc, em_ratio) in zip(self.decays, conc_boxes, self.em_ratios)]
-            boxes_list.append(conc_boxes)
+    def compute_co2_boxes(self, co2_emissions: np.ndarray) -> np.ndarray:
+        """
+        Concentrations (ppm) of the CO2 boxes for CO2 emissions (Gt) of shape (..., n_years), scenarios can be stacked
+        along the leading axes. Each box is a discounted convolution of the emissions:
+        box(t) = decay * box(t-1) + 0.000471 * em_ratio * E(t)[Mt], first year is the initial concentration of the box
+        returns an array of shape (..., n_years, nb_boxes)
+        """
+        return np.stack([solve_geometric_recurrence(box_init, co2_emissions, decay, gt_to_ppm, input_lag=0)
+                         for decay, box_init, gt_to_ppm in zip(self.decays, self.boxes_conc, self.boxes_gt_to_ppm)],
+                        axis=-1)
 
-        boxes_array = np.array(boxes_list)
+    def compute_concentration_co2(self):
+        boxes_array = self.compute_co2_boxes(self.ghg_emissions_df[GlossaryCore.TotalCO2Emissions].values)
 
         for i in [1, 2, 3, 4, 5]:
             self.ghg_cycle_df[f'co2_ppm_b{i}'] = boxes_array[:, i - 1]
 
         # clip value to 0 if negative
-        self.ppm_co2_negative_indexes = self.ghg_cycle_df.index[self.ghg_cycle_df['co2_ppm_b1'] < 0].tolist()
+        self.ppm_co2_negative_indexes = np.flatnonzero(np.real(boxes_array[:, 0]) < 0)
         self.ghg_cycle_df.loc[self.ppm_co2_negative_indexes, 'co2_ppm_b1'] = 1e-10
         self.ghg_cycle_df[GlossaryCore.CO2Concentration] = self.ghg_cycle_df['co2_ppm_b1'].values
 
@@ -299,17 +305,16 @@ class GHGCycle():
 
         self.ghg_cycle_df[GlossaryCore.N2OConcentration] = n2o_concentrations
 
-    def _forecast_concentration(self, conc_init: float, decay_rate: float, conc_pre_indus: float,
-                                emissions_to_pp: float, emissions: np.ndarray):
-
-        # C(t+1) = C(t) + E(t) * E_to_ppm - decay_rate * (C(t) - Cpreindus)
-        conc = conc_init
-        concentrations = [conc]
-        for year, emission_year in zip(self.years_range, emissions):
-            conc += emission_year * emissions_to_pp - decay_rate * (conc - conc_pre_indus)
-            concentrations.append(conc)
-
-        return np.array(concentrations[:-1])
+    @staticmethod
+    def _forecast_concentration(conc_init: float, decay_rate: float, conc_pre_indus: float,
+                                emissions_to_pp: float, emissions: np.ndarray) -> np.ndarray:
+        """
+        C(t+1) = C(t) + E(t) * E_to_ppm - decay_rate * (C(t) - Cpreindus)
+        i.e. C relaxes towards Cpreindus with the decay 1 - decay_rate and is fed by the emissions of the previous year.
+        emissions of shape (..., n_years) give stacked concentrations of the same shape
+        """
+        return solve_geometric_recurrence(conc_init, emissions, 1 - decay_rate, emissions_to_pp, input_lag=1,
+                                          equilibrium=conc_pre_indus)
 
     def d_conc_d_emission(self, decay_rate: float, emissions_to_pp: float):
         """
@@ -318,13 +323,8 @@ class GHGCycle():
         d C[j] / d E[i] = d (C[j-1] + E[j-1] * E_to_ppm - decay_rate * C[j-1]) / d E[i]
                     = (1 - decay_rate) * (d C[j-1] / d E[i]) + E_to_ppm * (j-1 == i)
         """
-        n_years = len(self.years_range)
-        d_conc_d_emissions = np.zeros((n_years, n_years))
-        for i in range(1, n_years):
-            d_conc_d_emissions[i] = (1 - decay_rate) * d_conc_d_emissions[i - 1]
-            d_conc_d_emissions[i, i-1] += emissions_to_pp
-
-        return d_conc_d_emissions
+        impulse_response = geometric_impulse_response(len(self.years_range), 1 - decay_rate, emissions_to_pp)
+        return geometric_recurrence_jacobian(impulse_response)
 
     def d_conc_ch4_d_emissions(self):
         return self.d_conc_d_emission(decay_rate=self.decay_ch4,
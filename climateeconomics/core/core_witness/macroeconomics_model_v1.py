@@ -14,6 +14,8 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 '''
+from functools import lru_cache
+
 import numpy as np
 import pandas as pd
 from sostrades_optimization_plugins.tools.cst_manager.func_manager_common import (
@@ -21,10 +23,72 @@ from sostrades_optimization_plugins.tools.cst_manager.func_manager_common import
     pseudo_abs_obj,
 )
 
+from climateeconomics.core.tools.jacobian_operators import (
+    DiagonalJacobian,
+    LowerTriangularJacobian,
+    to_dense,
+)
 from climateeconomics.database.database_witness_core import DatabaseWitnessCore
 from climateeconomics.glossarycore import GlossaryCore
 
 
+@lru_cache(maxsize=1)
+def get_countries_breakdown() -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Country -> group mapping of the gdp breakdown as arrays, fixed data built once per process:
+    names and groups of the countries, index of the group of each country in the groups of CountriesPerRegionIMF
+    and mean percentage of gdp of the country within its group
+    """
+    groups = list(DatabaseWitnessCore.CountriesPerRegionIMF.value.keys())
+    mean_percentage_gdp_country = DatabaseWitnessCore.GDPPercentagePerCountry.value
+    countries_names = mean_percentage_gdp_country[GlossaryCore.CountryName].values
+    countries_groups = mean_percentage_gdp_country[GlossaryCore.GroupName].values
+    countries_group_index = np.array([groups.index(group) for group in countries_groups], dtype=int)
+    countries_mean_percentage_gdp = mean_percentage_gdp_country[GlossaryCore.MeanPercentageName].values
+    return countries_names, countries_groups, countries_group_index, countries_mean_percentage_gdp
+
+
+def compute_regionalised_gdp(years_range: np.ndarray,
+                             output_net_of_damage: np.ndarray) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Compute regionalised gdp based on the total gdp (output net of damage) computed by the macroeconomics model
+    Use linear model to compute share of each region and country in the total gdp
+    Compute the gdp per region and per country
+
+    returns the total gdp per group, the percentage of gdp per group and the gdp per country dataframes
+    """
+    # import linear parameters from database: parameters are computed in the jupyter notebook in data folder
+    dict_linear_parameters = DatabaseWitnessCore.LinearParemetersGDPperRegion.value
+    breakdown_countries = DatabaseWitnessCore.CountriesPerRegionIMF.value
+    # use linear equation y=a*x+b to compute predicted gdp per group per year
+    result_total_gdp_per_group = np.array(dict_linear_parameters['a']) * years_range + np.array(dict_linear_parameters['b']).reshape(-1, 1)
+    gdp_predicted_per_group = result_total_gdp_per_group.T
+    # compute percentage of gdp for each group
+    percentage_gdp_per_group = gdp_predicted_per_group / gdp_predicted_per_group.sum(axis=1, keepdims=True) * 100
+    # compute total based on predicted gdp and on gdp output from model
+    total_gdp_per_group = percentage_gdp_per_group * np.asarray(output_net_of_damage).reshape(-1, 1) / 100
+    # store data in total gdp
+    total_gdp_per_group_df = pd.DataFrame()
+    total_gdp_per_group_df[GlossaryCore.Years] = years_range
+    total_gdp_per_group_df[list(breakdown_countries.keys())] = total_gdp_per_group
+    percentage_gdp_per_group_df = pd.DataFrame()
+    percentage_gdp_per_group_df[GlossaryCore.Years] = years_range
+    percentage_gdp_per_group_df[list(breakdown_countries.keys())] = percentage_gdp_per_group
+    # compute GDP of each country (countries x years) using its mean percentage and the GDP of its group
+    # and convert T$ to G$
+    countries_names, countries_groups, countries_group_index, countries_mean_percentage_gdp = get_countries_breakdown()
+    gdp_per_country = 1000 * countries_mean_percentage_gdp[:, np.newaxis] * total_gdp_per_group.T[countries_group_index] / 100
+    # long format : years repeated for each country
+    nb_countries, nb_years = len(countries_names), len(years_range)
+    df_gdp_per_country = pd.DataFrame({
+        GlossaryCore.Years: np.tile(years_range, nb_countries),
+        GlossaryCore.GDPName: gdp_per_country.reshape(-1),
+        GlossaryCore.CountryName: np.repeat(countries_names, nb_years),
+        GlossaryCore.GroupName: np.repeat(countries_groups, nb_years),
+    })
+    return total_gdp_per_group_df, percentage_gdp_per_group_df, df_gdp_per_country
+
+
 class MacroEconomics:
     """
     Economic pyworld3 that compute the evolution of capital, consumption, output...
@@ -164,6 +228,7 @@ class MacroEconomics:
         self.section_list = self.param[GlossaryCore.SectionListValue]
         self.usable_capital_objective_ref = self.param[GlossaryCore.UsableCapitalObjectiveRefName]
         self.consommation_objective_ref = self.param[GlossaryCore.ConsumptionObjectiveRefValue]
+        self.defer_diagnostic_outputs = self.param[GlossaryCore.DeferDiagnosticOutputsName]
 
     def create_dataframe(self):
         """Create the dataframe and fill it with values at year_start"""
@@ -172,9 +237,10 @@ class MacroEconomics:
         self.capital_df = pd.DataFrame({GlossaryCore.Years: self.years_range})
         self.damage_df = pd.DataFrame({GlossaryCore.Years: self.years_range})
 
-        self.total_gdp_per_group_df = pd.DataFrame()
-        self.percentage_gdp_per_group_df = pd.DataFrame()
-        self.df_gdp_per_country = pd.DataFrame(columns=[GlossaryCore.CountryName, GlossaryCore.Years, GlossaryCore.GDPName, GlossaryCore.GroupName])
+        # built by compute_regionalised_gdp, left to None when defer_diagnostic_outputs is True
+        self.total_gdp_per_group_df = None
+        self.percentage_gdp_per_group_df = None
+        self.df_gdp_per_country = None
         self.dict_energy_consumption_detailed = {}
 
     def set_coupling_inputs(self, inputs: dict):
@@ -549,41 +615,9 @@ class MacroEconomics:
     def compute_regionalised_gdp(self):
         """
         Compute regionalised gdp based on the economics_df dataframe computed by the model (that gives total gdp)
-        Use linear model to compute share of each region and country in the total gdp
-        Compute the gdp per region and per country
         """
-        # import linear parameters from database: parameters are computed in the jupyter notebook in data folder
-        dict_linear_parameters = DatabaseWitnessCore.LinearParemetersGDPperRegion.value
-        breakdown_countries = DatabaseWitnessCore.CountriesPerRegionIMF.value
-        # use linear equation y=a*x+b to compute predicted gdp per group per year
-        result_total_gdp_per_group = np.array(dict_linear_parameters['a']) * self.years_range + np.array(dict_linear_parameters['b']).reshape(-1, 1)
-        gdp_predicted_per_group = result_total_gdp_per_group.T
-        # compute percentage of gdp for each group
-        percentage_gdp_per_group = gdp_predicted_per_group / gdp_predicted_per_group.sum(axis=1, keepdims=True) * 100
-        # compute total based on predicted gdp and on gdp output from model
-        total_gdp_per_group = percentage_gdp_per_group * self.economics_df[GlossaryCore.OutputNetOfDamage].values.reshape(-1,1) / 100
-        # store data in total gdp
-        self.total_gdp_per_group_df[GlossaryCore.Years] = self.years_range
-        self.total_gdp_per_group_df[list(breakdown_countries.keys())] = total_gdp_per_group
-        self.percentage_gdp_per_group_df[GlossaryCore.Years] = self.years_range
-        self.percentage_gdp_per_group_df[list(breakdown_countries.keys())] = percentage_gdp_per_group
-        # get percentage of gdp per country in each group
-        mean_percentage_gdp_country = DatabaseWitnessCore.GDPPercentagePerCountry.value
-        # Iterate over each row to compute gdp of the country
-        for index, (_, row) in enumerate(mean_percentage_gdp_country.iterrows()):
-            # repeat the years for each country
-            df_temp = pd.DataFrame({GlossaryCore.Years: self.total_gdp_per_group_df[GlossaryCore.Years]})
-            # compute GDP for each year using the percentage and GDP Value of the correspondant group
-            # and convert T$ to G$
-            df_temp[GlossaryCore.GDPName] = 1000 * row[GlossaryCore.MeanPercentageName] * self.total_gdp_per_group_df[row[GlossaryCore.GroupName]] / 100
-            # Add the country name
-            df_temp[GlossaryCore.CountryName] = row[GlossaryCore.CountryName]
-            # Add the country group
-            df_temp[GlossaryCore.GroupName] = row[GlossaryCore.GroupName]
-            # concatenate with the result dataframe
-            self.df_gdp_per_country = pd.concat([self.df_gdp_per_country, df_temp]) if index > 0 else df_temp.copy()
-        # reset index
-        self.df_gdp_per_country.reset_index(drop=True, inplace=True)
+        self.total_gdp_per_group_df, self.percentage_gdp_per_group_df, self.df_gdp_per_country = \
+            compute_regionalised_gdp(self.years_range, self.economics_df[GlossaryCore.OutputNetOfDamage].values)
 
     def compute(self, inputs: dict):
         """
@@ -628,7 +662,10 @@ class MacroEconomics:
 
         self.prepare_outputs()
 
-        self.compute_regionalised_gdp()
+        # gdp per group of countries and per country are only used by post-processings, when they are deferred
+        # the post-processings compute them from economics_detail_df with compute_regionalised_gdp
+        if not self.defer_diagnostic_outputs:
+            self.compute_regionalised_gdp()
 
         self.compute_energy_consumption_per_section()
         self.compute_energy_consumption_households()
@@ -690,22 +727,20 @@ class MacroEconomics:
         })
 
     """-------------------Gradient functions-------------------"""
+    # Gradients are chained as structured jacobian operators (diagonal, lower triangular, ...), see
+    # climateeconomics.core.tools.jacobian_operators. Dense matrices are only built by the discipline.
 
     def _null_derivative(self):
-        nb_years = len(self.years_range)
-        return np.zeros((nb_years, nb_years))
+        return DiagonalJacobian.zeros(self.nb_years)
 
     def _identity_derivative(self):
-        nb_years = len(self.years_range)
-        return np.identity(nb_years)
+        return DiagonalJacobian.identity(self.nb_years)
 
     def d_productivity_w_damage_d_damage_frac_output(self):
         """derivative of productivity with damage wrt damage frac output"""
-        nb_years = len(self.years_range)
-
         productivity_wo_damage = self.economics_detail_df[GlossaryCore.ProductivityWithoutDamage].values
 
-        return np.diag(-productivity_wo_damage)
+        return DiagonalJacobian(-productivity_wo_damage)
 
     def d_productivity_d_damage_frac_output(self):
         """gradient for productivity for damage_df"""
@@ -729,10 +764,10 @@ class MacroEconomics:
         usable_capital = self.capital_df[GlossaryCore.UsableCapital].values
 
         energy_efficiency = self.capital_df[GlossaryCore.EnergyEfficiency].values
-        d_usable_capital_d_energy = np.diag(self.capital_utilisation_ratio * energy_efficiency)
+        d_usable_capital_d_energy = DiagonalJacobian(self.capital_utilisation_ratio * energy_efficiency)
 
-        d_gross_output_d_energy = np.diag(
-            productivity * alpha * usable_capital ** (gamma - 1) * np.diag(d_usable_capital_d_energy) *
+        d_gross_output_d_energy = DiagonalJacobian(
+            productivity * alpha * usable_capital ** (gamma - 1) * d_usable_capital_d_energy.values *
             (alpha * usable_capital ** gamma + (1 - alpha) * working_pop ** gamma) ** (1. / gamma - 1.)
         ) if self.compute_gdp else self._null_derivative()
 
@@ -751,13 +786,13 @@ class MacroEconomics:
 
     def _d_ku_obj_d_user_input(self, dku_d_user_input, dkne_d_user_input):
         d_ku_obj_content_d_user_input = (dku_d_user_input - self.max_capital_utilisation_ratio * dkne_d_user_input) / self.usable_capital_objective_ref  # OK
-        d_ku_obj_d_user_input = d_pseudo_abs_obj(self.usable_capital_obj_content, d_ku_obj_content_d_user_input)
+        d_ku_obj_d_user_input = d_pseudo_abs_obj(self.usable_capital_obj_content, to_dense(d_ku_obj_content_d_user_input))
         return d_ku_obj_d_user_input
 
     def d_workforce_d_workagepop(self):
         """Gradient for workforce wrt working age population"""
         employment_rate = self.workforce_df[GlossaryCore.EmploymentRate].values
-        d_workforce_d_workagepop = np.diag(employment_rate)
+        d_workforce_d_workagepop = DiagonalJacobian(employment_rate)
         return d_workforce_d_workagepop
 
     def d_working_pop(self):
@@ -775,7 +810,7 @@ class MacroEconomics:
         productivity = self.economics_detail_df[GlossaryCore.Productivity].values
         employment_rate = self.workforce_df[GlossaryCore.EmploymentRate].values
 
-        d_gross_output_d_wap = np.diag(
+        d_gross_output_d_wap = DiagonalJacobian(
             productivity * (1 - alpha) * working_pop ** (gamma - 1) * employment_rate * (
                 alpha * usable_capital ** gamma + (1 - alpha) * working_pop ** gamma
             ) ** (1/gamma - 1)
@@ -785,7 +820,7 @@ class MacroEconomics:
         dQ_dY = 1 - damefrac if not self.damage_to_productivity else (1 - damefrac) / (1 - self.frac_damage_prod * damefrac)
         if not self.compute_climate_impact_on_gdp:
             dQ_dY = np.ones_like(self.years_range)
-        d_net_output_d_wap = np.diag(dQ_dY) @ d_gross_output_d_wap
+        d_net_output_d_wap = DiagonalJacobian(dQ_dY) @ d_gross_output_d_wap
         _,d_i_d_wap, d_ine_d_wap = self.d_investment_d_user_input(d_net_output_d_wap)
         d_consumption_d_wap = self.d_consumption_d_user_input(d_net_output_d_wap, d_i_d_wap)
         d_consumption_pc_d_wap = self.d_consumption_per_capita_d_user_input(d_consumption_d_wap)
@@ -798,11 +833,12 @@ class MacroEconomics:
         return d_gross_output_d_wap, d_net_output_d_wap, d_consumption_pc_d_wap, d_damages_d_wap, d_estimated_damages_d_wap, d_ku_obj_d_wap, d_ku_constraint_d_wap
 
     def _d_kne_d_user_input(self, d_invest_non_energy_d_user_input):
-        d_kne_d_user_input = self._null_derivative()
-        for i in range(1, self.nb_years):
-            for j in range(self.nb_years):
-                d_kne_d_user_input[i, j] = (1 - self.depreciation_capital) * d_kne_d_user_input[i - 1, j] + d_invest_non_energy_d_user_input[i - 1, j]
-        return d_kne_d_user_input
+        """
+        Capital non energy (t) = (1 - depreciation) * Capital non energy (t-1) + Invests non energy(t-1)
+        user should provide the derivative of invests non energy wrt X
+        """
+        d_kne_d_invest_non_energy = LowerTriangularJacobian.geometric_recurrence(1 - self.depreciation_capital, self.nb_years)
+        return d_kne_d_invest_non_energy @ d_invest_non_energy_d_user_input
 
     def d_share_invest_non_energy(self):
         """Derivative of the list below wrt to share investments non-energy (snei below)
@@ -811,7 +847,7 @@ class MacroEconomics:
         - net ouptut, gross output
         """
         net_output = self.economics_df[GlossaryCore.OutputNetOfDamage].values
-        d_ine_dsnei = np.diag(net_output) / 100.
+        d_ine_dsnei = DiagonalJacobian(net_output / 100.)
         d_net_output_dnsei = self._null_derivative()
         d_consumption_d_snei = self.d_consumption_d_user_input(d_net_output_dnsei, d_ine_dsnei)
         d_consumption_pc_d_snei = self.d_consumption_per_capita_d_user_input(d_consumption_d_snei)
@@ -826,11 +862,11 @@ class MacroEconomics:
         damefrac = self.damage_fraction_output_df[GlossaryCore.DamageFractionOutput].values
 
         if self.compute_climate_impact_on_gdp and self.damage_to_productivity:
-            dQ_dY = np.diag((1 - damefrac) / (1 - self.frac_damage_prod * damefrac))
+            dQ_dY = DiagonalJacobian((1 - damefrac) / (1 - self.frac_damage_prod * damefrac))
         elif self.compute_climate_impact_on_gdp and not self.damage_to_productivity:
-            dQ_dY = np.diag(1 - damefrac)
+            dQ_dY = DiagonalJacobian(1 - damefrac)
         elif not self.compute_climate_impact_on_gdp:
-            dQ_dY = np.eye(self.nb_years)
+            dQ_dY = self._identity_derivative()
         else:
             raise Exception("Problem")
         dQ_d_user_input = dQ_dY @ d_gross_output_d_user_input
@@ -841,7 +877,7 @@ class MacroEconomics:
         energy_investment(t), trillions $USD (including renewable investments)
         Share of the total output
         """
-        d_energy_investment_wo_tax_d_energy_investment_wo_tax = np.eye(self.nb_years)
+        d_energy_investment_wo_tax_d_energy_investment_wo_tax = self._identity_derivative()
         d_energy_investment_wo_renewable_d_energy_investment_wo_tax = d_energy_investment_wo_tax_d_energy_investment_wo_tax * 1e3 # TODO ? Sure of 1e3 ?
 
         d_energy_investment_d_energy_investment_wo_tax = d_energy_investment_wo_tax_d_energy_investment_wo_tax
@@ -862,7 +898,7 @@ class MacroEconomics:
         """derivative of investment wrt X, user should provide the derivative of net output wrt X"""
         d_energy_investment_d_user_input = self._null_derivative()
         percent_invest_non_energy = self.share_non_energy_investment[GlossaryCore.ShareNonEnergyInvestmentsValue].values
-        d_non_energy_investment_d_user_input = np.diag(percent_invest_non_energy / 100.) @ d_net_output_d_user_input
+        d_non_energy_investment_d_user_input = DiagonalJacobian(percent_invest_non_energy / 100.) @ d_net_output_d_user_input
 
         d_investment_d_user_input = d_energy_investment_d_user_input + d_non_energy_investment_d_user_input
 
@@ -879,7 +915,7 @@ class MacroEconomics:
 
         consumption per capita = consumption / population * 1000
         """
-        d_consumption_per_capita_d_consumption = np.diag(1 / self.population_df[GlossaryCore.PopulationValue].values * 1000)
+        d_consumption_per_capita_d_consumption = DiagonalJacobian(1 / self.population_df[GlossaryCore.PopulationValue].values * 1000)
         d_consumption_per_capita_d_user_input = d_consumption_per_capita_d_consumption @ d_consumption_d_user_input
         return d_consumption_per_capita_d_user_input
 
@@ -891,7 +927,7 @@ class MacroEconomics:
         consumption = self.economics_detail_df[GlossaryCore.Consumption].values
         population = self.population_df[GlossaryCore.PopulationValue].values
 
-        d_consumption_pc_d_population = np.diag( - consumption * 1000 / population ** 2)
+        d_consumption_pc_d_population = DiagonalJacobian(- consumption * 1000 / population ** 2)
         return d_consumption_pc_d_population
 
     def d_damage_frac_output(self):
@@ -900,20 +936,20 @@ class MacroEconomics:
         gross_output = self.economics_df[GlossaryCore.GrossOutput].values
         productivity = self.economics_detail_df[GlossaryCore.Productivity].values
 
-        d_gross_output_d_dfo =  np.diag(gross_output / productivity) @ self.d_productivity_d_damage_frac_output()
+        d_gross_output_d_dfo = DiagonalJacobian(gross_output / productivity) @ self.d_productivity_d_damage_frac_output()
 
         if self.compute_climate_impact_on_gdp and self.damage_to_productivity:
             factor = (1 - damefrac) / (1 - self.frac_damage_prod * damefrac)
-            d_factor_d_dfo = np.diag((self.frac_damage_prod - 1) / (1 - self.frac_damage_prod * damefrac) ** 2)
+            d_factor_d_dfo = DiagonalJacobian((self.frac_damage_prod - 1) / (1 - self.frac_damage_prod * damefrac) ** 2)
         elif self.compute_climate_impact_on_gdp and not self.damage_to_productivity:
             factor = 1 - damefrac
-            d_factor_d_dfo = -np.eye(self.nb_years)
+            d_factor_d_dfo = -self._identity_derivative()
         elif not self.compute_climate_impact_on_gdp:
             factor = np.ones_like(damefrac)
             d_factor_d_dfo = self._null_derivative()
         else:
             raise Exception("Problem")
-        d_net_output_d_dfo = np.diag(gross_output) @ d_factor_d_dfo + np.diag(factor) @ d_gross_output_d_dfo
+        d_net_output_d_dfo = DiagonalJacobian(gross_output) @ d_factor_d_dfo + DiagonalJacobian(factor) @ d_gross_output_d_dfo
         d_energy_investment_d_dfo, d_invest_d_dfo, d_ine_d_dfo = self.d_investment_d_user_input(d_net_output_d_dfo)
         d_consumption_d_dfo = self.d_consumption_d_user_input(d_net_output_d_dfo, d_invest_d_dfo)
         d_consumption_pc_d_dfo = self.d_consumption_per_capita_d_user_input(d_consumption_d_dfo)
@@ -946,16 +982,16 @@ class MacroEconomics:
         """
         damages_from_climate = gross output - net output
         """
-        damefrac = self.damage_fraction_output_df[GlossaryCore.DamageFractionOutput]
+        damefrac = self.damage_fraction_output_df[GlossaryCore.DamageFractionOutput].values
 
         if self.compute_climate_impact_on_gdp:
             derivative = d_gross_output_d_user_input - d_net_output_d_user_input
         else:
             if self.damage_to_productivity:
-                derivative = np.diag(damefrac * (1 - self.frac_damage_prod) /
-                                     (1 - self.frac_damage_prod * damefrac)) @ d_gross_output_d_user_input
+                derivative = DiagonalJacobian(damefrac * (1 - self.frac_damage_prod) /
+                                              (1 - self.frac_damage_prod * damefrac)) @ d_gross_output_d_user_input
             else:
-                derivative = np.diag(damefrac) @ d_gross_output_d_user_input
+                derivative = DiagonalJacobian(damefrac) @ d_gross_output_d_user_input
 
         return derivative
 
@@ -963,19 +999,19 @@ class MacroEconomics:
         """
         damages_from_climate = gross output - net output
         """
-        damefrac = self.damage_fraction_output_df[GlossaryCore.DamageFractionOutput]
+        damefrac = self.damage_fraction_output_df[GlossaryCore.DamageFractionOutput].values
         gross_output = self.economics_df[GlossaryCore.GrossOutput].values
 
         if self.compute_climate_impact_on_gdp:
             derivative = d_gross_output_d_user_input - d_net_output_d_user_input
         else:
             if self.damage_to_productivity:
-                derivative = d_gross_output_d_user_input @ np.diag(damefrac * (1 - self.frac_damage_prod) /
-                                     (1 - self.frac_damage_prod * damefrac)) + np.diag(gross_output) * \
-                             np.diag((1 - self.frac_damage_prod) / (1 - self.frac_damage_prod * damefrac) ** 2)
+                derivative = d_gross_output_d_user_input @ DiagonalJacobian(damefrac * (1 - self.frac_damage_prod) /
+                                                                            (1 - self.frac_damage_prod * damefrac)) + \
+                             DiagonalJacobian(gross_output * (1 - self.frac_damage_prod) / (1 - self.frac_damage_prod * damefrac) ** 2)
 
             else:
-                derivative = d_gross_output_d_user_input @ np.diag(damefrac) + np.diag(gross_output)
+                derivative = d_gross_output_d_user_input @ DiagonalJacobian(damefrac) + DiagonalJacobian(gross_output)
 
         return derivative
 
@@ -985,15 +1021,13 @@ class MacroEconomics:
         productivity_w_damage = self.economics_detail_df[GlossaryCore.ProductivityWithDamage].values
 
         d_productivity_w_damage_d_damage_frac_output = self.d_productivity_w_damage_d_damage_frac_output()
-        nb_years = len(self.years_range)
         d_damages_from_productivity_loss_d_damage_fraction_output = self._null_derivative()
-        d_estimated_damages_from_productivity_loss_d_damage_fraction_output = self._null_derivative()
         if self.damage_to_productivity:
-            for i in range(nb_years):
-                d_estimated_damages_from_productivity_loss_d_damage_fraction_output[i] = d_gross_output_d_damage_fraction_output[i] * (productivity_wo_damage[i]/productivity_w_damage[i] - 1) +\
-                    - gross_output[i] * productivity_wo_damage[i] / productivity_w_damage[i] ** 2 * d_productivity_w_damage_d_damage_frac_output[i]
+            d_estimated_damages_from_productivity_loss_d_damage_fraction_output = \
+                DiagonalJacobian(productivity_wo_damage / productivity_w_damage - 1) @ d_gross_output_d_damage_fraction_output \
+                - DiagonalJacobian(gross_output * productivity_wo_damage / productivity_w_damage ** 2) @ d_productivity_w_damage_d_damage_frac_output
         else:
-            d_estimated_damages_from_productivity_loss_d_damage_fraction_output = np.diag((productivity_wo_damage - productivity_w_damage)/productivity_wo_damage) @ d_gross_output_d_damage_fraction_output - np.diag(gross_output / productivity_wo_damage) @ d_productivity_w_damage_d_damage_frac_output
+            d_estimated_damages_from_productivity_loss_d_damage_fraction_output = DiagonalJacobian((productivity_wo_damage - productivity_w_damage)/productivity_wo_damage) @ d_gross_output_d_damage_fraction_output - DiagonalJacobian(gross_output / productivity_wo_damage) @ d_productivity_w_damage_d_damage_frac_output
         if self.compute_climate_impact_on_gdp and self.damage_to_productivity:
             d_damages_from_productivity_loss_d_damage_fraction_output = d_estimated_damages_from_productivity_loss_d_damage_fraction_output
 
@@ -1005,7 +1039,7 @@ class MacroEconomics:
 
         d_damages_from_productivity_loss_d_user_input = self._null_derivative()
         applied_productivity = self.economics_detail_df[GlossaryCore.Productivity].values
-        d_estimated_damages_from_prod_loss_d_user_input = np.diag((productivity_wo_damage - productivity_w_damage) / (
+        d_estimated_damages_from_prod_loss_d_user_input = DiagonalJacobian((productivity_wo_damage - productivity_w_damage) / (
                 applied_productivity)) @  d_gross_output_d_user_input
 
         if self.compute_climate_impact_on_gdp and self.damage_to_productivity:
@@ -1029,13 +1063,13 @@ class MacroEconomics:
         return - (d_ku_d_user_input - self.max_capital_utilisation_ratio * d_kne_d_user_input) / self.usable_capital_ref
 
     def d_gdp_section_d_gdp(self, d_gross_output, section_name: str):
-        return d_gross_output @ np.diag(self.gdp_percentage_per_section_df[section_name] / 100)
+        return d_gross_output @ DiagonalJacobian(self.gdp_percentage_per_section_df[section_name].values / 100)
 
     def d_gdp_section_energy_consumption_d_energy_prod(self, sector_name: str, section_name: str):
-        return np.diag(self.sector_energy_consumption_percentage_df[sector_name].values / 100 * self.dict_dataframe_energy_consumption_sections[sector_name][section_name].values / 100.)
+        return DiagonalJacobian(self.sector_energy_consumption_percentage_df[sector_name].values / 100 * self.dict_dataframe_energy_consumption_sections[sector_name][section_name].values / 100.)
 
     def d_residential_energy_consumption_d_energy_prod(self):
-        return np.diag(self.sector_energy_consumption_percentage_df[GlossaryCore.Households].values / 100)
+        return DiagonalJacobian(self.sector_energy_consumption_percentage_df[GlossaryCore.Households].values / 100)
 
     """-------------------END of Gradient functions-------------------"""
 
@@ -14,8 +14,8 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 '''
+import warnings
 from copy import deepcopy
-from itertools import chain
 
 import numpy as np
 import pandas as pd
@@ -24,6 +24,56 @@ from pandas import DataFrame
 from climateeconomics.glossarycore import GlossaryCore
 
 
+def get_age_range_index(nb_age_ranges: int) -> np.ndarray:
+    """
+    Index of the age range of each age, for age ranges of 5 years (0-4, 5-9, ..., 95-99) and a last 100+ range.
+    values_per_age_range[..., get_age_range_index(nb_age_ranges)] gives the values per age (0, 1, ..., 99, 100+)
+    """
+    nb_ages = 5 * (nb_age_ranges - 1) + 1
+    return np.minimum(np.arange(nb_ages) // 5, nb_age_ranges - 1)
+
+
+def compute_survival_curves(death_rate: np.ndarray) -> np.ndarray:
+    """
+    Share of people still alive at each age for all years at once, with death rates of shape (nb_years, nb_age_ranges)
+    survival_0 = 1
+    survival_i = survival_i-1 * (1 - death_rate_i-1)
+    returns an array of shape (nb_years, nb_ages)
+    """
+    full_death_rate = np.asarray(death_rate)[:, get_age_range_index(np.shape(death_rate)[1])]
+    survival = np.ones(full_death_rate.shape, dtype=full_death_rate.dtype)
+    survival[:, 1:] = np.cumprod(1 - full_death_rate[:, :-1], axis=1)
+    return survival
+
+
+def compute_life_expectancy(death_rate: np.ndarray) -> np.ndarray:
+    """
+    Life expectancy at birth for each year, with death rates of shape (nb_years, nb_age_ranges)
+    life expectancy = sum(survival_i) with i the age
+    """
+    return compute_survival_curves(death_rate).sum(axis=1)
+
+
+def compute_d_life_expectancy_d_death_rate(death_rate: np.ndarray) -> np.ndarray:
+    """
+    Derivative of the life expectancy of each year wrt the death rates of the same year, of shape (nb_years, nb_age_ranges)
+    (life expectancy of a year does not depend on death rates of other years).
+    d life_expectancy / d death_rate_a = - sum_{i > a} survival_i / (1 - death_rate_a) for each age a, summed over
+    the ages of each age range. Death rates are supposed strictly lower than 1.
+    """
+    nb_age_ranges = np.shape(death_rate)[1]
+    age_range_index = get_age_range_index(nb_age_ranges)
+    full_death_rate = np.asarray(death_rate)[:, age_range_index]
+    survival = compute_survival_curves(death_rate)
+    # sum of survival over ages strictly above each age
+    survival_above = np.cumsum(survival[:, ::-1], axis=1)[:, ::-1] - survival
+    d_life_expectancy_d_full_death_rate = - survival_above / (1 - full_death_rate)
+    d_life_expectancy = np.zeros(np.shape(death_rate), dtype=d_life_expectancy_d_full_death_rate.dtype)
+    for age_range in range(nb_age_ranges):
+        d_life_expectancy[:, age_range] = d_life_expectancy_d_full_death_rate[:, age_range_index == age_range].sum(axis=1)
+    return d_life_expectancy
+
+
 class Population:
     """
     Population model mostly based on McIsaac, F., 2020. A Representation of the World Population Dynamics for Integrated Assessment Models.
@@ -42,6 +92,8 @@ class Population:
         self.trillion = 1e12
         self.billion = 1e9
         self.million = 1e6
+        self.sensitivities = None
+        self.life_expectancy_sensitivities = None
 
     def format_popu_init_df(self, input_df):
         age_col = list(GlossaryCore.PopulationStartDf["dataframe_descriptor"].keys())
@@ -86,16 +138,23 @@ class Population:
         self.activate_pandemic_effects = inputs['assumptions_dict']['activate_pandemic_effects']
         # First year of the regression of knowledge function
         self.year_reg_know = 1800
+        # death rate parameters as arrays over age ranges
+        self.dr_param_arrays = {col: self.dr_param_df[col].values for col in self.dr_param_df.columns if col != 'param'}
+        self.climate_beta = self.climate_mortality_param_df['beta'].values
+        # effects on death rate, the total death rate is the sum of all effects
+        self.death_effects = ['base', 'climate', 'diet', 'pandemic']
 
 
     def create_dataframe(self):
         '''
-        Create the dataframe and fill it with values at year_start
+        Allocate the (nb_years, nb_ages) arrays of the cohort-component engine and fill them with values at year_start
+        Dataframes are only built at the end of compute, from these arrays
         '''
         years_range = np.arange(
             self.year_start,
             self.year_end + 1)
         self.years_range = years_range
+        self.nb_years = len(years_range)
         # Prepare columns of population df
         pop_column = [str(x) for x in np.arange(0, 100)]
         pop_column.append('100+')
@@ -104,80 +163,44 @@ class Population:
 
         self.pop_df_column.append('total')
 
-        # POPULATION
-        # select all age except 100+
-        pop_init = self.pop_init_df.iloc[:-1, 1]
-        # Divide by 5
-        pop_init = list(pop_init.divide(other=5))
-        # Duplicate over age group
-        pop_by_age = list(chain(*zip(*[pop_init for _ in range(5)])))
-        # Add 100+ value of pop init
-        pop_by_age.append(self.pop_init_df.iloc[-1, 1])
-
-        self.total_pop = self.pop_init_df[GlossaryCore.PopulationValue].sum()
-        self.population_dict = {self.year_start: np.array(
-            pop_by_age + [self.total_pop])}
-
         column_list = self.age_list.copy()
         column_list.insert(0, GlossaryCore.Years)
         self.column_list = self.age_list.copy()
-        # WORKING POULATION
-        self.working_age_population_df = DataFrame(index=years_range,
-                                                   columns=[GlossaryCore.Years, GlossaryCore.Population1570])
-        self.working_age_population_df[GlossaryCore.Years] = years_range
-
-        # BIRTH RATE
-        # BASE => calculated from GDB and knowledge level
-        self.birth_rate = DataFrame({GlossaryCore.Years: years_range,
-                                     'knowledge': 0.,
-                                     'birth_rate': 0.},
-                                    index=years_range)
-
-        # BIRTH NUMBER
+        nb_ages = len(self.full_age_list)
+        # index of the age range (of the death rate params) of each age: 5 ages per range, last one is 100+
+        self.age_range_index = get_age_range_index(len(self.age_list))
+
+        # POPULATION - one row per year, one column per age
+        self.population = np.zeros((self.nb_years, nb_ages), dtype=self.dtype)
+        self.total_population = np.zeros(self.nb_years, dtype=self.dtype)
+        # select all age except 100+, divide by 5 and duplicate over age group, then add 100+ value of pop init
+        pop_init = self.pop_init_df[GlossaryCore.PopulationValue].values
+        self.population[0, :-1] = np.repeat(pop_init[:-1] / 5, 5)
+        self.population[0, -1] = pop_init[-1]
+        self.total_population[0] = pop_init.sum()
+
+        # BIRTH RATE AND BIRTH NUMBER
         # BASE => calculated from GDB and knowledge level
-        self.birth_df = DataFrame({GlossaryCore.Years: years_range,
-                                   'knowledge': 0.,
-                                   'birth_rate': 0.},
-                                  index=years_range)
+        self.knowledge = np.zeros(self.nb_years)
+        self.gdp_per_capita = np.zeros(self.nb_years, dtype=self.dtype)
+        self.birth_rate_array = np.zeros(self.nb_years, dtype=self.dtype)
+        self.number_of_birth = np.zeros(self.nb_years, dtype=self.dtype)
 
-        # DEATH RATE - slices of 4 years age in column
+        # DEATH RATE - one column per age range (slices of 5 years)
         # BASE => calculated from GDP
-        self.base_death_rate_df_dict = {}
         # CLIMATE => calculated from temperature increase
-        self.climate_death_rate_df_dict = {}
         # DIET => calculated from kcal intake
-        self.diet_death_rate_df_dict = {}
         # PANDEMIC => calculated from pandemic parameters
-        self.pandemic_death_rate_df_dict = {}
         # TOTAL => sum of all effects
-        self.death_rate_df_dict = {}
-
-        # CONTAINER => dictionnary containing death rates dictionaties
-
-        self.death_rate_dict = {
-            'base': self.base_death_rate_df_dict,
-            'climate': self.climate_death_rate_df_dict,
-            'diet': self.diet_death_rate_df_dict,
-            'pandemic': self.pandemic_death_rate_df_dict,
-            'total': self.death_rate_df_dict}
+        self.death_rate_arrays = {effect: np.zeros((self.nb_years, len(self.age_list)), dtype=self.dtype)
+                                  for effect in self.death_effects + ['total']}
         # DEATH NUMBER - one column per age
-        # BASE => calculated from GDP
-        init_dict = {GlossaryCore.Years: years_range}
-        init_dict.update({col: 0 for col in self.pop_df_column})
-
-        self.base_death_df = DataFrame(init_dict, index=years_range)
-        # CLIMATE => calculated from temperature increase
-        self.climate_death_df = DataFrame(init_dict.copy(), index=years_range)
-        # TOTAL => sum of all effects
-        self.death_df = DataFrame(init_dict.copy(), index=years_range)
-
-        # CONTAINER => dictionnary containing death number
+        self.death_number_arrays = {effect: np.zeros((self.nb_years, nb_ages), dtype=self.dtype)
+                                    for effect in self.death_effects + ['total']}
+        self.diet_clipped = np.zeros((self.nb_years, len(self.age_list)), dtype=bool)
         self.death_dict = {}
-        self.death_list_dict = {effect: []
-                                for effect in self.death_rate_dict}
         # LIFE EXPECTANCY
-        self.life_expectancy_df = DataFrame({GlossaryCore.Years: years_range,
-                                             'life_expectancy': 0.}, index=years_range)
+        self.life_expectancy = None
 
     def compute_knowledge(self):
         """ Compute knowledge function for all year. Knowledge is a regression on % of 
@@ -186,938 +209,369 @@ class Population:
         x = self.years_range - self.year_reg_know
         knowledge = self.lower_know + (self.upper_know - self.lower_know) \
             * (1 / (1 + np.exp(-self.delta_know * (x - self.phi_know))) ** self.nu_know)
-        self.birth_rate['knowledge'] = knowledge
+        self.knowledge = knowledge
 
         return knowledge
 
+    @staticmethod
+    def logistic_rate(upper, lower, delta, phi, nu, gdp_per_capita):
+        """
+        Rate as a generalized logistic function of gdp per capita, used for base birth and death rates
+        rate = upper + (lower - upper) / (1 + exp(-delta * (gdp_per_capita - phi))) ** (1 / nu)
+        """
+        return upper + (lower - upper) / (1 + np.exp(-delta * (gdp_per_capita - phi))) ** (1 / nu)
+
+    def set_year_independent_rates(self):
+        """
+        Compute the parts of birth and death rates that do not depend on the population, for all years at once:
+        knowledge part of the birth rate, climate factor, unclipped diet and pandemic death rates (years x age ranges)
+        """
+        self.compute_knowledge()
+        self.f_knowledge = self.cst_br_k + self.alpha_br_k * (1 - self.knowledge / 100) ** self.beta_br_k
+
+        # Add climate impact on death rate
+        self.climate_factor = self.climate_beta[np.newaxis, :] * \
+            (self.temperature[:, np.newaxis] / self.cal_temp_increase) ** self.theta
+        if not self.activate_climate_effect_on_population:
+            self.climate_factor = np.zeros_like(self.climate_factor)
+
+        # Add diet impact on death rate: undernutrition or overnutrition parameters depending on kcal intake
+        overnutrition = np.real(self.kcal_pc - self.kcal_pc_ref) >= 0
+        alpha_diet = np.where(overnutrition[:, np.newaxis],
+                              self.diet_mortality_param_df['overnutrition'].values[np.newaxis, :],
+                              self.diet_mortality_param_df['undernutrition'].values[np.newaxis, :])
+        kcal_gap = np.where(overnutrition, self.kcal_pc - self.kcal_pc_ref, self.kcal_pc_ref - self.kcal_pc)
+        self.diet_death_rate_unclipped = alpha_diet * kcal_gap[:, np.newaxis] / (self.theta_diet * self.kcal_pc_ref)
+
+        # Add pandemic impact on death rate
+        pandemic_death_rate = self.pandemic_mortality_df.values
+        if not self.activate_pandemic_effects:
+            pandemic_death_rate = np.zeros_like(pandemic_death_rate)
+        self.death_rate_arrays['pandemic'][:] = pandemic_death_rate
+
     def compute_birth_rate_v1(self, year):
-        ''' Compute the birth rate. The birth rate can be defined as birth_rate = number of born/pop_1549
-        Inputs : - economics df: dataframe containing the economic output/ gdp per year in trillions $ 
-                 - population_df: dataframe containing total number of population per year in nb of people
-                 - year: the year for which we want to estimate the value of the birth rate
-                 - parameters of the function: br_lower_a, br_upper_a, br_delta, br_nu, br_phi
-        output : birth rate for the year 
+        ''' Deprecated: birth rate only computed from gdp per capita, compute uses compute_birth_rate_v2.
+        Kept for external callers, returns the birth rate of the year from the gdp and population of the last compute
+        without modifying the birth rate output
         '''
-        # COnvert GDP in $
-        gdp = self.economics_df.loc[year, GlossaryCore.OutputNetOfDamage] * self.trillion
-        pop = self.total_pop
-        birth_rate = self.br_upper + (self.br_lower - self.br_upper) / (
-            1 + np.exp(-self.br_delta * (gdp / pop - self.br_phi))) ** (1 / self.br_nu)
-        self.birth_rate.loc[year, 'birth_rate'] = birth_rate
+        warnings.warn('compute_birth_rate_v1 is deprecated, the birth rate of the model is given by compute_birth_rate_v2',
+                      DeprecationWarning, stacklevel=2)
+        gdp_per_capita = self.gdp[year - self.year_start] / self.total_population[year - self.year_start]
+        return self.logistic_rate(self.br_upper, self.br_lower, self.br_delta, self.br_phi, self.br_nu, gdp_per_capita)
 
-        return birth_rate
-
-    def compute_birth_rate_v2(self, year):
+    def compute_birth_rate_v2(self, iyear):
         """ Compute birth rate. birth rate = a * f(knowledge) + (1-a)*f(gdp)
         all parameters obtained by fitting of birth rate data btwn 1960 and 2020
-        Inputs: knowledge (series per year), gdp (series per year, pop (series per year), params
+        Inputs: knowledge (array per year), gdp (array per year), pop (array per year), params
         """
-        # Convert GDP in $
-        gdp = self.economics_df.loc[year, GlossaryCore.OutputNetOfDamage] * self.trillion
-        pop = self.total_pop
-        knowledge = self.birth_rate.loc[year, 'knowledge']
-        # Compute in two steps
-        f_knowledge = self.cst_br_k + self.alpha_br_k * \
-            (1 - knowledge / 100) ** self.beta_br_k
-        f_gdp = self.br_upper + (self.br_lower - self.br_upper) / (
-            1 + np.exp(-self.br_delta * (gdp / pop - self.br_phi))) ** (1 / self.br_nu)
-        birth_rate = self.share_know * f_knowledge + \
+        # Compute in two steps, f_knowledge does not depend on population
+        self.gdp_per_capita[iyear] = self.gdp[iyear] / self.total_population[iyear]
+        f_gdp = self.logistic_rate(self.br_upper, self.br_lower, self.br_delta, self.br_phi, self.br_nu,
+                                   self.gdp_per_capita[iyear])
+        birth_rate = self.share_know * self.f_knowledge[iyear] + \
             (1 - self.share_know) * f_gdp
 
-        self.birth_rate.loc[year, 'birth_rate'] = birth_rate
+        self.birth_rate_array[iyear] = birth_rate
 
         return birth_rate
 
     def compute_death_rate(self, year):
-        ''' Compute the death rate for each age range. The birth rate can be defined as 
-            death_rate = number of death/pop_agerange
-        Inputs : - economics df: dataframe containing the economic output/ gdp per year in trillions $ 
-                 - population_df: dataframe containing total number of population per year in nb of people
-                 - year: the year for which we want to estimate the value of the birth rate
-                 - parameters of the function: 
-        output : death rate for the year for each age range. type: pandas Series   
+        ''' Deprecated: death rate per age range without climate, diet and pandemic effects, compute uses
+        compute_death_rate_v2. Kept for external callers, returns the base death rate of the year computed by the last
+        compute as a Series indexed by age range
         '''
-        gdp = self.economics_df.loc[year, GlossaryCore.OutputNetOfDamage] * self.trillion
-        pop = self.total_pop
-        param = self.dr_param_df
-        # For all age range compute death rate
-        death_rate = param['death_rate_upper'] + (param['death_rate_lower'] - param['death_rate_upper']) / (
-            1 + np.exp(-param['death_rate_delta'] * 
-                       (gdp / pop - param['death_rate_phi']))) ** (1 / param['death_rate_nu'])
-        # Fill the year row in death rate df
-        self.death_rate_df.iloc[year - self.year_start, 1:] = death_rate
-
-        return self.death_rate_df.loc[year]
+        warnings.warn('compute_death_rate is deprecated, the death rates of the model are given by compute_death_rate_v2',
+                      DeprecationWarning, stacklevel=2)
+        return self.death_rate_dict['base'].loc[year]
 
-    def compute_death_rate_v2(self, year):
-        ''' Compute the death rate for each age range. The birth rate can be defined as 
+    def compute_death_rate_v2(self, iyear):
+        ''' Compute the death rate for each age range. The death rate can be defined as 
             death_rate = number of death/pop_agerange
-        Inputs : - economics df: dataframe containing the economic output/ gdp per year in trillions $
-                 - temperature df: dataframe containing the temperature increase per year since preindustrial era
-                 - population_df: dataframe containing total number of population per year in nb of people
-                 - year: the year for which we want to estimate the value of the birth rate
-                 - parameters of the function: 
-        output : death rate for the year for each age range. type: pandas Series   
+        Base death rate depends on gdp per capita, the climate, diet and pandemic effects are computed for all years
+        in set_year_independent_rates. Diet death rate is clipped so that the total death rate stays below 1
         '''
-        gdp = self.economics_df.loc[year, GlossaryCore.OutputNetOfDamage] * self.trillion
-        pop = self.total_pop
-        temp = self.temperature_df.loc[year, GlossaryCore.TempAtmo]
-        param = self.dr_param_df
-        add_death = self.climate_mortality_param_df
-        kcal_pc = self.calories_pc_df.loc[year, 'kcal_pc']
-        kcal_pc_ref = self.kcal_pc_ref
-        cal_temp_increase = self.cal_temp_increase
-        theta = self.theta
-        theta_diet = self.theta_diet
+        param = self.dr_param_arrays
         # For all age range compute death rate
-        death_rate = param['death_rate_upper'].values + (param['death_rate_lower'].values - param['death_rate_upper'].values) / (
-            1 + np.exp(-param['death_rate_delta'].values * 
-                       (gdp / pop - param['death_rate_phi'].values))) ** (1 / param['death_rate_nu'].values)
-        # Add climate impact on death rate
-        climate_death_rate = add_death['beta'].values * (temp / cal_temp_increase) ** theta
-        if not self.activate_climate_effect_on_population:
-            climate_death_rate *= 0
-
-        # Add diet impact on death rate
-        alpha_diet = self.diet_mortality_param_df['undernutrition'].values
-        if kcal_pc >= kcal_pc_ref:
-            alpha_diet = self.diet_mortality_param_df['overnutrition'].values
-
-        if np.real(kcal_pc - kcal_pc_ref) >= 0:
-            diet_death_rate = alpha_diet * (kcal_pc - kcal_pc_ref)/(theta_diet * kcal_pc_ref)
-        else:
-            diet_death_rate = alpha_diet * (kcal_pc_ref - kcal_pc)/(theta_diet * kcal_pc_ref)
-
-        for i in range(len(death_rate)):
-            if diet_death_rate[i] >= 1 - death_rate[i] * (1 + climate_death_rate[i]):
-                diet_death_rate[i] = (1 - death_rate[i] * (1 + climate_death_rate[i]))/ (1 + np.exp(-diet_death_rate[i]))
-
-        # Add pandemic impact on death rate
-        pandemic_death_rate = self.pandemic_mortality_df.values
-        if not self.activate_pandemic_effects:
-            pandemic_death_rate *= 0
-
-        # Fill the year key in each death rate dict
-        # FIXME: why do we have [year] on the left and side and not also on the right hand side?
-        self.base_death_rate_df_dict[year] = death_rate
-        self.climate_death_rate_df_dict[year] = climate_death_rate * death_rate
-        self.diet_death_rate_df_dict[year] = diet_death_rate
-        self.pandemic_death_rate_df_dict[year] = pandemic_death_rate
-        self.death_rate_df_dict[year] = death_rate * (1 + climate_death_rate) + diet_death_rate + pandemic_death_rate
-
-    def compute_death_number(self, year):
+        death_rate = self.logistic_rate(param['death_rate_upper'], param['death_rate_lower'], param['death_rate_delta'],
+                                        param['death_rate_phi'], param['death_rate_nu'],
+                                        self.gdp_per_capita[iyear])
+        climate_death_rate = self.climate_factor[iyear]
+        diet_death_rate = self.diet_death_rate_unclipped[iyear]
+        diet_upper_bound = 1 - death_rate * (1 + climate_death_rate)
+        self.diet_clipped[iyear] = np.real(diet_death_rate) >= np.real(diet_upper_bound)
+        diet_death_rate = np.where(self.diet_clipped[iyear],
+                                   diet_upper_bound / (1 + np.exp(-diet_death_rate)), diet_death_rate)
+        pandemic_death_rate = self.death_rate_arrays['pandemic'][iyear]
+
+        # Fill the year row in each death rate array
+        self.death_rate_arrays['base'][iyear] = death_rate
+        self.death_rate_arrays['climate'][iyear] = climate_death_rate * death_rate
+        self.death_rate_arrays['diet'][iyear] = diet_death_rate
+        self.death_rate_arrays['total'][iyear] = death_rate * (1 + climate_death_rate) + diet_death_rate + pandemic_death_rate
+
+    def compute_death_number(self, iyear):
         """Compute number of dead people per year
-        input: population df
-                death rate value per age range 
-        output df of number of death 
+        input: population of the year
+                death rate value per age range, duplicated to get one death rate per age
+        output: total number of death per age
         """
-
-        # last value is always total
-        pop_year = self.population_dict[year][:-1]
-        total_deaths = np.zeros(len(pop_year))
-
-        for effect in self.death_rate_dict:
-            if effect != 'total':
-                # get the death rate in the dict instead of the df at key year
-                # except the 100+
-                dr_year = self.death_rate_dict[effect][year][:-1]
-                # Duplicate each element of the list 5 times so that we have a
-                # death rate per age
-                full_dr_death = np.repeat(dr_year, 5).tolist()
-                # The last value is the 100+ that we do not want to repeat
-                full_dr_death.append(
-                    self.death_rate_dict[effect][year][-1])
-
-                nb_death = pop_year * np.array(full_dr_death)
-                total_deaths = total_deaths + nb_death
-                self.death_list_dict[effect].append(nb_death)
-            else:
-                self.death_list_dict[effect].append(total_deaths)
+        pop_year = self.population[iyear]
+        total_deaths = np.zeros(len(pop_year), dtype=self.dtype)
+        for effect in self.death_effects:
+            nb_death = pop_year * self.death_rate_arrays[effect][iyear, self.age_range_index]
+            total_deaths = total_deaths + nb_death
+            self.death_number_arrays[effect][iyear] = nb_death
+        self.death_number_arrays['total'][iyear] = total_deaths
         return total_deaths
 
-    def compute_birth_number(self, year):
+    def compute_birth_number(self, iyear):
         '''Compute number of birth per year
         input: birth rate 
-                population df 
-        output df of number of birth per year
+                population between 15 and 49 years
+        output: number of birth of the year
         '''
         # Sum population between 15 and 49year
-        pop_1549 = sum(self.population_dict[year][15:50])
-        nb_birth = self.birth_rate.loc[year, 'birth_rate'] * pop_1549
-        self.birth_df.loc[year, 'number_of_birth'] = nb_birth
+        pop_1549 = self.population[iyear, 15:50].sum()
+        nb_birth = self.birth_rate_array[iyear] * pop_1549
+        self.number_of_birth[iyear] = nb_birth
 
         return nb_birth
 
-    def compute_population_next_year(self, year, total_death, nb_birth):
-        if year > self.year_end:
-            pass
-        else:
-            year_start = self.year_start
-            pop_before = self.population_dict[year - 1][:-1]
-            pop_before = pop_before - total_death
-
-            # Add new born And +1 for each person alive
-            population_list = [nb_birth] + list(pop_before[:-1])
-            # Add not dead people over 100+
-            old_not_dead = pop_before[-1]
-            population_list[-1] += old_not_dead
-            # compute the total
-            self.total_pop = sum(population_list)
-            # Add pop each age + total in the dict
-            self.population_dict[year] = np.array(
-                population_list + [self.total_pop])
-
-    def compute_life_expectancy(self, year):
+    def compute_population_next_year(self, iyear, total_death, nb_birth):
         """
-        Compute life expectancy for a year
-        life expectancy = sum(pop_i) with i the age 
-        pop_0 = 1 
-        pop_i = pop_i-1(1- death_rate_i) 
+        Population of year iyear + 1: new born at age 0, +1 for each person alive, not dead people over 100+ stay 100+
         """
-        # dr_year = self.death_rate_df.iloc[year - self.year_start, 1:-1]
-        # do not duplicate 100+
-        dr_year = self.death_rate_df_dict[year][:-1]
-        # Duplicate each element of the list 5 times so that we have a death
-        # rate per age
-        full_dr_death = list(np.repeat(dr_year, 5))
-        full_dr_death.append(self.death_rate_df_dict[year][-1])
-
-        nb_age = len(self.full_age_list)
-        pop = [0] * nb_age
-        # Start with a pop = 1 and iterate over ages
-        pop[0] = 1
-        # COmpute surviving people
-        for i in range(0, nb_age - 1):
-            pop[i + 1] = pop[i] * (1 - full_dr_death[i])
-        # Sum all surviving people and divide by the initial pop = 1
-        life_expectancy = np.sum(pop)
-        self.life_expectancy_df.loc[year, 'life_expectancy'] = life_expectancy
-
-        return self.life_expectancy_df
-
-    def compute(self, in_dict) -> tuple[DataFrame, DataFrame, dict[str, DataFrame], DataFrame, dict, DataFrame, DataFrame]:
+        if iyear + 1 < self.nb_years:
+            pop_before = self.population[iyear] - total_death
+            pop_next_year = self.population[iyear + 1]
+            pop_next_year[0] = nb_birth
+            pop_next_year[1:] = pop_before[:-1]
+            pop_next_year[-1] += pop_before[-1]
+            self.total_population[iyear + 1] = pop_next_year.sum()
+
+    def set_coupling_inputs(self, in_dict):
         """
-        Compute all, returning tuple of:
-            population df,
-            birth_rate df,
-            death_rate dict,
-            birth df,
-            death dict,
-            life_expectancy df,
-            working_age_pop df,
+        Store coupling inputs as dataframes indexed by years (used by gradients) and as arrays over years_range
+        (used by the cohort-component engine)
         """
-        self.create_dataframe()
-        year_range = self.years_range
         self.economics_df = in_dict[GlossaryCore.EconomicsDfValue]
         self.economics_df.index = self.economics_df[GlossaryCore.Years].values
         self.temperature_df = in_dict[GlossaryCore.TemperatureDfValue]
         self.temperature_df.index = self.temperature_df[GlossaryCore.Years].values
         self.calories_pc_df = in_dict[GlossaryCore.CaloriesPerCapitaValue]
         self.calories_pc_df.index = self.calories_pc_df[GlossaryCore.Years].values
-        self.compute_knowledge()
-
-        # Loop over year to compute population evolution. except last year
-        for year in year_range:
-            self.compute_birth_rate_v2(year)
-            self.compute_death_rate_v2(year)
-            total_death = self.compute_death_number(year)
-            nb_birth = self.compute_birth_number(year)
-            self.compute_population_next_year(year + 1, total_death, nb_birth)
-            self.compute_life_expectancy(year)
-
-        self.population_df = DataFrame.from_dict(
-            self.population_dict, orient='index', columns=self.pop_df_column)
+        # Convert GDP in $
+        self.gdp = self.economics_df.loc[self.years_range, GlossaryCore.OutputNetOfDamage].values * self.trillion
+        self.temperature = self.temperature_df.loc[self.years_range, GlossaryCore.TempAtmo].values
+        self.kcal_pc = self.calories_pc_df.loc[self.years_range, 'kcal_pc'].values
+        self.dtype = np.result_type(self.gdp, self.temperature, self.kcal_pc, float)
 
+    def build_output_dataframes(self):
+        """
+        Build the output dataframes from the arrays of the cohort-component engine, once at the end of compute
+        """
+        years_range = self.years_range
+        self.population_df = DataFrame(np.column_stack([self.population, self.total_population]),
+                                       index=years_range, columns=self.pop_df_column)
         self.population_df.insert(loc=0, column=GlossaryCore.Years,
-                                  value=self.years_range)
+                                  value=years_range)
         self.population_df = self.population_df.replace(
             [np.inf, -np.inf], np.nan)
 
         # Compute working age population between 15 and 70 years
-        working_age_idx = [str(i) for i in np.arange(15, 71)]
-        self.working_age_population_df[GlossaryCore.Population1570] = (
-            self.population_df[working_age_idx]
-            .sum(axis=1)
-        )
-
-        # reconstruction of the dataframes with the dictionaries
-        self.climate_death_rate_df = DataFrame.from_dict(
-            self.climate_death_rate_df_dict, orient='index', columns=self.column_list)
-        self.diet_death_rate_df = DataFrame.from_dict(
-            self.diet_death_rate_df_dict, orient='index', columns=self.column_list)
-        self.pandemic_death_rate_df = DataFrame.from_dict(
-            self.pandemic_death_rate_df_dict, orient='index', columns=self.column_list)
-        self.base_death_rate_df = DataFrame.from_dict(
-            self.base_death_rate_df_dict, orient='index', columns=self.column_list)
-        self.death_rate_df = DataFrame.from_dict(
-            self.death_rate_df_dict, orient='index', columns=self.column_list)
-
-        # recontruction of the death rate_dict with dataframes instead of
-        # ditionaries at the end of the year loop
-        self.death_rate_dict = {'base': self.base_death_rate_df,
-                                'climate': self.climate_death_rate_df,
-                                'diet': self.diet_death_rate_df,
-                                'pandemic': self.pandemic_death_rate_df,
-                                'total': self.death_rate_df}
+        self.working_age_population_df = DataFrame({GlossaryCore.Years: years_range,
+                                                    GlossaryCore.Population1570: self.population[:, 15:71].sum(axis=1)},
+                                                   index=years_range)
+
+        self.birth_rate = DataFrame({GlossaryCore.Years: years_range,
+                                     'knowledge': self.knowledge,
+                                     'birth_rate': self.birth_rate_array},
+                                    index=years_range)
+        self.birth_df = DataFrame({GlossaryCore.Years: years_range,
+                                   'knowledge': 0.,
+                                   'birth_rate': 0.,
+                                   'number_of_birth': self.number_of_birth},
+                                  index=years_range)
+
+        # death rates per age range and number of death per age for each effect
+        self.death_rate_dict = {effect: DataFrame(death_rate, index=years_range, columns=self.column_list)
+                                for effect, death_rate in self.death_rate_arrays.items()}
+        self.base_death_rate_df = self.death_rate_dict['base']
+        self.climate_death_rate_df = self.death_rate_dict['climate']
+        self.diet_death_rate_df = self.death_rate_dict['diet']
+        self.pandemic_death_rate_df = self.death_rate_dict['pandemic']
+        self.death_rate_df = self.death_rate_dict['total']
         # Calculation of cumulative deaths
-        for effect in self.death_rate_dict:
-            self.death_dict[effect] = DataFrame(
-                self.death_list_dict[effect], index=self.years_range)
-            self.death_dict[effect]['total'] = self.death_dict[effect].sum(
-                axis=1, skipna=True)
-            self.death_dict[effect]['cum_total'] = self.death_dict[effect]['total'].cumsum(
-            )
-
-        for effect in self.death_dict:
-            self.death_dict[effect].fillna(0.0)
-            self.death_rate_dict[effect].fillna(0.0)
+        for effect, death_number in self.death_number_arrays.items():
+            self.death_dict[effect] = DataFrame(death_number, index=years_range)
+            self.death_dict[effect]['total'] = death_number.sum(axis=1)
+            self.death_dict[effect]['cum_total'] = self.death_dict[effect]['total'].cumsum()
 
-        return self.population_df.fillna(0.0), self.birth_rate.fillna(0.0), self.death_rate_dict, \
-            self.birth_df.fillna(
-                0.0), self.death_dict, self.life_expectancy_df.fillna(0.0), self.working_age_population_df.fillna(0.0)
+        self.life_expectancy_df = DataFrame({GlossaryCore.Years: years_range,
+                                             'life_expectancy': self.life_expectancy}, index=years_range)
 
-    # GRADIENTS OF POPULATION WTR GDP
-    def compute_d_pop_d_output(self):
-        """ Compute the derivative of population wrt output
+    def compute(self, in_dict) -> tuple[DataFrame, DataFrame, dict[str, DataFrame], DataFrame, dict, DataFrame, DataFrame]:
         """
-        nb_years = (self.year_end - self.year_start + 1)
-
-        # derivative of population of the current year for each age
-        d_pop_d_output = {}
-        d_working_pop_d_output = np.zeros((nb_years, nb_years))
-        d_pop_tot_d_output = np.zeros((nb_years, nb_years))
-        d_birthrate_d_output = np.zeros((nb_years, nb_years))
-        d_birth_d_output = np.zeros((nb_years, nb_years))
-        d_base_deathrate_d_output = {}
-        d_death_rate_climate_d_output = {}
-        d_death_d_output = {}
-        d_pop_1549_d_output = np.zeros((nb_years, nb_years))
-        d_pop_disabled_d_output = np.zeros((nb_years, nb_years))
-
-        for year in self.years_range:
-            if year == self.year_end:
-                pass
-            else:
-                d_birthrate_d_output += self.d_birthrate_d_output(
-                    year, d_pop_tot_d_output)
-                d_birth_d_output += self.d_birth_d_generic(
-                    year, d_birthrate_d_output, d_pop_1549_d_output)
-
-                d_base_deathrate_d_output[year] = self.d_base_death_rate_d_output(
-                    year, d_pop_tot_d_output)
-                d_death_rate_climate_d_output[year] = self.d_climate_death_rate_d_output(
-                    year, d_base_deathrate_d_output)
-
-                d_death_d_output[year] = self.d_death_d_generic(year, d_base_deathrate_d_output,
-                                                                d_death_rate_climate_d_output, d_pop_d_output,
-                                                                activate_effect_on_population=self.activate_climate_effect_on_population)
-                d_pop_d_output, d_pop_1549_d_output, d_pop_tot_d_output, d_working_pop_d_output = self.d_poptotal_generic(year, d_pop_d_output,
-                                                                                                                          d_death_d_output,
-                                                                                                                          d_birth_d_output,
-                                                                                                                          d_pop_1549_d_output,
-                                                                                                                          d_pop_tot_d_output,
-                                                                                                                          d_working_pop_d_output)
-        return d_pop_tot_d_output, d_working_pop_d_output
-
-    def d_birthrate_d_output(self, year, d_pop_tot_d_output):
-        """ Compute the derivative of birth rate wrt output
-        f_knowledge = self.cst_br_k + self.alpha_br_k * (1- knowledge/100)**self.beta_br_k
-        f_gdp = self.br_upper + (self.br_lower - self.br_upper)/(1+np.exp(-self.br_delta*(gdp/pop -self.br_phi)))**(1/self.br_nu)
-        birth_rate = self.share_know * f_knowledge + (1-self.share_know) * f_gdp
+        Compute all, returning tuple of:
+            population df,
+            birth_rate df,
+            death_rate dict,
+            birth df,
+            death dict,
+            life_expectancy df,
+            working_age_pop df,
         """
+        self.years_range = np.arange(self.year_start, self.year_end + 1)
+        self.set_coupling_inputs(in_dict)
+        self.create_dataframe()
+        self.set_year_independent_rates()
+        # gradients are computed on demand from the state of this compute
+        self.sensitivities = None
+        self.life_expectancy_sensitivities = None
 
-        nb_years = (self.year_end - self.year_start + 1)
-        d_birthrate_d_output = np.zeros((nb_years, nb_years))
-        iyear = year - self.year_start
-        idty = np.zeros(nb_years)
-        idty[iyear] = 1
-
-        # Param of birth rate equation
-        delta = self.br_delta
-        phi = self.br_phi
-        br_upper = self.br_upper
-        br_lower = self.br_lower
-        nu = self.br_nu
-        pop = self.population_df.loc[year, 'total']
-        gdp = self.economics_df.loc[year, GlossaryCore.OutputNetOfDamage] * self.trillion
-        d_pop = d_pop_tot_d_output[iyear]
-
-        # f gdp = br_upper + (self.br_lower - self.br_upper)/ u
-        # -> fprime = (self.br_lower - self.br_upper)*u_prime/u_squared
-        u_squared = ((1 + np.exp(-delta * (gdp / pop - phi))) ** (1 / nu)) ** 2
-        # u = g(f(x))  #u = g(f(x)) with g = f**(1:nu) and f = 1+
-        # exp(-delta(gdp/pop-phi))
-        g_prime_f = (1 / nu) * (1 + np.exp(-delta * 
-                                           (gdp / pop - phi))) ** (1 / nu - 1)
-        f_prime = -delta * (pop * idty * self.trillion - d_pop * gdp) / (pop ** 2) * (
-            np.exp(-delta * (gdp / pop - phi)))
-
-        u_prime = g_prime_f * f_prime
-        d_f_gdp_d_output = -(br_lower - br_upper) * u_prime / u_squared
-
-        # and lastly multiply by (1-share now)
-        d_birthrate_d_output[iyear] = (1 - self.share_know) * d_f_gdp_d_output
-
-        return d_birthrate_d_output
-
-    def d_birth_d_generic(self, year, d_birthrate_d_output, d_pop_1549_d_output):
-        """ Compute the derivative of birth number wrt output
-        nb birth = pop * birth_rate
-        """
-        nb_years = (self.year_end - self.year_start + 1)
-        iyear = year - self.year_start
-        idty = np.zeros(nb_years)
-        idty[iyear] = 1
-        d_birth_d_output = np.zeros((nb_years, nb_years))
-        pop_1549 = sum(self.population_df.iloc[iyear, 16:51])
-        d_pop_1549 = d_pop_1549_d_output[iyear]
+        # Loop over year to compute population evolution, only on arrays
+        for iyear in range(self.nb_years):
+            self.compute_birth_rate_v2(iyear)
+            self.compute_death_rate_v2(iyear)
+            total_death = self.compute_death_number(iyear)
+            nb_birth = self.compute_birth_number(iyear)
+            self.compute_population_next_year(iyear, total_death, nb_birth)
+
+        # LIFE EXPECTANCY does not impact the population evolution, computed for all years at once
+        self.life_expectancy = compute_life_expectancy(self.death_rate_arrays['total'])
+
+        self.build_output_dataframes()
 
-        br = self.birth_rate.loc[year, 'birth_rate']
+        return self.population_df.fillna(0.0), self.birth_rate.fillna(0.0), self.death_rate_dict, \
+            self.birth_df.fillna(
+                0.0), self.death_dict, self.life_expectancy_df.fillna(0.0), self.working_age_population_df.fillna(0.0)
 
-        # nb_birth = pop_1549 * birth_rate => d_nb_birth = u'v + v'u
-        d_birth_d_output[iyear] = d_birthrate_d_output[iyear] * \
-            pop_1549 + d_pop_1549 * br
+    # GRADIENTS
+    # Population gradients wrt output, temperature and kcal per capita are computed in a single forward sensitivity
+    # pass: the tangents of the population per age are propagated year by year for all input directions at once,
+    # stacked in arrays of shape (nb_ages, nb_directions, nb_years) where the last axis is the year of the input.
+    GRADIENT_DIRECTIONS = [GlossaryCore.OutputNetOfDamage, GlossaryCore.TempAtmo, 'kcal_pc']
 
-        return d_birth_d_output
+    @staticmethod
+    def d_logistic_rate_d_gdp_per_capita(upper, lower, delta, phi, nu, gdp_per_capita):
+        """Derivative of logistic_rate wrt gdp per capita"""
+        exp_term = np.exp(-delta * (gdp_per_capita - phi))
+        return (lower - upper) * delta / nu * exp_term * (1 + exp_term) ** (-1 / nu - 1)
 
-    def d_base_death_rate_d_output(self, year, d_pop_tot_d_output):
-        """
-        for every columns of death rate dataframe create a dictionary that contains all derivatives wrt output
+    def compute_sensitivities(self, life_expectancy: bool = False):
         """
-        nb_years = (self.year_end - self.year_start + 1)
-        iyear = year - self.year_start
-        idty = np.zeros(nb_years)
-        idty[iyear] = 1
-
-        param = self.dr_param_df
-        param.index = param['param'].values
-
-        d_deathrate_d_output = {}
-        pop = self.population_df.loc[year, 'total']
-        gdp = self.economics_df.loc[year, GlossaryCore.OutputNetOfDamage] * self.trillion
-        d_pop = d_pop_tot_d_output[iyear]
-
-        for age_range in param['param'].values:
-            # Param of death rate equation
-            delta = param.loc[age_range, 'death_rate_delta']
-            phi = param.loc[age_range, 'death_rate_phi']
-            br_upper = param.loc[age_range, 'death_rate_upper']
-            br_lower = param.loc[age_range, 'death_rate_lower']
-            nu = param.loc[age_range, 'death_rate_nu']
-            # Value on the diagonal. death rate t depends on output t
-            # derivative = (lower-upper)*u'/u^2
-            u_squared = ((1 + np.exp(-delta * (gdp / pop - phi)))
-                         ** (1 / nu)) ** 2
-            # u = g(f(x)) with g = f**(1:nu) and f = (1+
-            # exp(-delta(gdp/pop-phi))
-            g_prime_f = (1 / nu) * (1 + np.exp(-delta * 
-                                               (gdp / pop - phi))) ** (1 / nu - 1)
-            f_prime = -delta * (pop * idty * self.trillion - d_pop * gdp) / (pop ** 2) * np.exp(
-                -delta * (gdp / pop - phi))
-            u_prime = g_prime_f * f_prime
-
-            d_death_rate_d_output_age = -\
-                (br_lower - br_upper) * u_prime / u_squared
-            d_deathrate_d_output[age_range] = d_death_rate_d_output_age
-        return d_deathrate_d_output
-
-    def d_climate_death_rate_d_output(self, year, d_base_death_rate):
+        Forward sensitivity pass of the cohort-component engine, reusing the rates cached by compute.
+        Store the derivatives of total population and working age population (15-70) wrt each gradient direction in
+        self.sensitivities: {direction: (d_pop_tot, d_working_pop)}
+        If life_expectancy is True, also store the derivatives of life expectancy in
+        self.life_expectancy_sensitivities: {direction: d_life_expectancy}. They are not used by the discipline
+        gradients, so they are only computed on request
         """
-        for every columns of climate death rate dataframe create a dictionary that contains all derivatives wrt output
+        nb_years, nb_directions = self.nb_years, len(self.GRADIENT_DIRECTIONS)
+        i_output, i_temp, i_kcal = range(nb_directions)
+        param = self.dr_param_arrays
+        base_death_rate = self.death_rate_arrays['base']
+        if life_expectancy:
+            d_life_expectancy_d_death_rate = compute_d_life_expectancy_d_death_rate(self.death_rate_arrays['total'])
+
+        # direct derivatives of the year independent rates wrt the inputs of the same year
+        # climate factor wrt temperature
+        d_climate_factor_d_temp = self.climate_beta[np.newaxis, :] * self.theta / self.cal_temp_increase * \
+            (self.temperature[:, np.newaxis] / self.cal_temp_increase) ** (self.theta - 1)
+        if not self.activate_climate_effect_on_population:
+            d_climate_factor_d_temp = np.zeros_like(d_climate_factor_d_temp)
+        # unclipped diet death rate wrt kcal per capita
+        overnutrition = np.real(self.kcal_pc - self.kcal_pc_ref) >= 0
+        alpha_diet = np.where(overnutrition[:, np.newaxis],
+                              self.diet_mortality_param_df['overnutrition'].values[np.newaxis, :],
+                              self.diet_mortality_param_df['undernutrition'].values[np.newaxis, :])
+        d_diet_unclipped_d_kcal = np.where(overnutrition, 1., -1.)[:, np.newaxis] * alpha_diet / \
+            (self.theta_diet * self.kcal_pc_ref)
+
+        d_pop = np.zeros((len(self.full_age_list), nb_directions, nb_years), dtype=self.dtype)
+        d_pop_tot = np.zeros((nb_directions, nb_years, nb_years), dtype=self.dtype)
+        d_working_pop = np.zeros((nb_directions, nb_years, nb_years), dtype=self.dtype)
+        d_life_expectancy = np.zeros((nb_directions, nb_years, nb_years), dtype=self.dtype) if life_expectancy else None
+        for iyear in range(nb_years):
+            d_pop_tot[:, iyear] = d_pop.sum(axis=0)
+            d_working_pop[:, iyear] = d_pop[15:71].sum(axis=0)
+            total_pop = self.total_population[iyear]
+            # gdp per capita = gdp / total pop
+            d_gdp_per_capita = - self.gdp[iyear] * d_pop_tot[:, iyear] / total_pop ** 2
+            d_gdp_per_capita[i_output, iyear] += self.trillion / total_pop
+
+            # birth rate and birth number
+            d_birth_rate = (1 - self.share_know) * d_gdp_per_capita * self.d_logistic_rate_d_gdp_per_capita(
+                self.br_upper, self.br_lower, self.br_delta, self.br_phi, self.br_nu, self.gdp_per_capita[iyear])
+            d_birth = d_birth_rate * self.population[iyear, 15:50].sum() + \
+                self.birth_rate_array[iyear] * d_pop[15:50].sum(axis=0)
+
+            # death rates per age range
+            d_base_death_rate = self.d_logistic_rate_d_gdp_per_capita(
+                param['death_rate_upper'], param['death_rate_lower'], param['death_rate_delta'],
+                param['death_rate_phi'], param['death_rate_nu'],
+                self.gdp_per_capita[iyear])[:, np.newaxis, np.newaxis] * d_gdp_per_capita[np.newaxis]
+            d_base_and_climate = d_base_death_rate * (1 + self.climate_factor[iyear])[:, np.newaxis, np.newaxis]
+            d_base_and_climate[:, i_temp, iyear] += base_death_rate[iyear] * d_climate_factor_d_temp[iyear]
+            d_diet_death_rate = np.zeros_like(d_base_and_climate)
+            d_diet_death_rate[:, i_kcal, iyear] = d_diet_unclipped_d_kcal[iyear]
+            clipped = self.diet_clipped[iyear]
+            if clipped.any():
+                # clipped diet death rate = u / v with u = 1 - base * (1 + climate factor), v = 1 + exp(-diet)
+                diet_unclipped = self.diet_death_rate_unclipped[iyear, clipped]
+                u = 1 - base_death_rate[iyear, clipped] * (1 + self.climate_factor[iyear, clipped])
+                v = 1 + np.exp(-diet_unclipped)
+                d_u = - d_base_and_climate[clipped]
+                d_v = - d_diet_death_rate[clipped] * np.exp(-diet_unclipped)[:, np.newaxis, np.newaxis]
+                d_diet_death_rate[clipped] = (d_u * v[:, np.newaxis, np.newaxis] - d_v * u[:, np.newaxis, np.newaxis]) / \
+                    (v ** 2)[:, np.newaxis, np.newaxis]
+            d_death_rate = d_base_and_climate + d_diet_death_rate
+            if life_expectancy:
+                d_life_expectancy[:, iyear] = np.tensordot(d_life_expectancy_d_death_rate[iyear], d_death_rate, axes=1)
+            if iyear + 1 == nb_years:
+                break
+
+            # number of death per age, then population of next year
+            full_death_rate = self.death_rate_arrays['total'][iyear, self.age_range_index]
+            d_pop_before = d_pop - (d_pop * full_death_rate[:, np.newaxis, np.newaxis] +
+                                    self.population[iyear][:, np.newaxis, np.newaxis] * d_death_rate[self.age_range_index])
+            d_pop = np.concatenate([d_birth[np.newaxis], d_pop_before[:-1]])
+            d_pop[-1] += d_pop_before[-1]
+
+        self.sensitivities = {direction: (d_pop_tot[i], d_working_pop[i])
+                              for i, direction in enumerate(self.GRADIENT_DIRECTIONS)}
+        if life_expectancy:
+            self.life_expectancy_sensitivities = {direction: d_life_expectancy[i]
+                                                  for i, direction in enumerate(self.GRADIENT_DIRECTIONS)}
+
+    def get_sensitivities(self, direction: str) -> tuple[np.ndarray, np.ndarray]:
         """
-        nb_years = (self.year_end - self.year_start + 1)
-        iyear = year - self.year_start
-        idty = np.zeros(nb_years)
-        idty[iyear] = 1
-        param = self.dr_param_df
-        param.index = param['param'].values
-
-        d_climate_deathrate_d_output = {}
-        climate_death_rate = self.climate_death_rate_df.iloc[iyear, :]
-        temp = self.temperature_df.loc[year, GlossaryCore.TempAtmo]
-        add_death = self.climate_mortality_param_df
-        add_death.index = param['param'].values
-        cal_temp_increase = self.cal_temp_increase
-        theta = self.theta
-
-        for age_range in param['param'].values:
-            # (uv)' = u_prime_v * v_prime_u with u = base_deathrate v = climate_deathrate
-            # v_prime_u = 0 because d_climate_death_rate = 0
-            climate_death_rate = add_death['beta'][age_range] * \
-                (temp / cal_temp_increase) ** theta
-            u_prime_v = d_base_death_rate[year][age_range] * climate_death_rate
-            d_climate_deathrate_d_output[age_range] = u_prime_v
-
-        return d_climate_deathrate_d_output
-
-    def d_death_d_generic(self, year, dict_d_base_death_rate_d_temp, dict_d_climate_death_rate_d_temp,
-                          dict_d_population_d_output, activate_effect_on_population=True):
+        Derivatives of total population and working age population wrt a gradient direction, computed once per compute
         """
-        Compute derivative of each column of death df wrt output and returns a dictionary
-        has been initially developed for d_death_d_output which can take into account effect of climate on population
-        was then used for d_death_d_temp and d_death_d_k_cal. In order to activate the effect of diet on death rate,
-        this activate_effect_on_population must be set to true
+        if self.sensitivities is None:
+            self.compute_sensitivities()
+        return self.sensitivities[direction]
 
+    def compute_d_pop_d_output(self):
+        """ Compute the derivative of population wrt output
         """
-        iyear = year - self.year_start
-        number_of_values = (self.year_end - self.year_start + 1)
-        d_death = {}
-        idty = np.zeros(number_of_values)
-        idty[iyear] = 1
-
-        pop_year = self.population_df.iloc[iyear, 1:-1]
-        ages = self.population_df.columns[1:-1]
-
-        # step one get values from dictionaries
-        list_d_base_dr_d_out = list(
-            dict_d_base_death_rate_d_temp[year].values())
-        list_d_climate_dr_d_out = list(
-            dict_d_climate_death_rate_d_temp[year].values())
-        list_d_pop_d_out = {}
-        if year in dict_d_population_d_output.keys():
-            list_d_pop_d_out = dict_d_population_d_output[year]
-
-        # get death rate by age
-        dr_year = self.death_rate_dict['total'].iloc[iyear, :-1]
-        # Duplicate each element of the list 5 times so that we have a death
-        # rate per age
-        full_dr_death = list(chain(*zip(*[list(dr_year) for _ in range(5)])))
-        full_dr_death.append(self.death_rate_dict['total'].loc[year, '100+'])
-
-        # Remove 100+ value
-        base_value_hundred = list_d_base_dr_d_out[-1]
-        base_list_d_dr_d_out_t = list_d_base_dr_d_out[:-1]
-        # Duplicate to get one per age
-        base_list_d_dr_d_out = list(
-            chain(*zip(*[base_list_d_dr_d_out_t for _ in range(5)])))
-        # and add value of last year
-        base_list_d_dr_d_out.append(base_value_hundred)
-
-        # Remove 100+ value
-        climate_value_hundred = list_d_climate_dr_d_out[-1]
-        climate_list_d_dr_d_out_t = list_d_climate_dr_d_out[:-1]
-        # Duplicate to get one per age
-        climate_list_d_dr_d_out = list(
-            chain(*zip(*[climate_list_d_dr_d_out_t for _ in range(5)])))
-        # and add value of last year
-        climate_list_d_dr_d_out.append(climate_value_hundred)
-        # Compute derivative for each column of dataframe
-
-        for i in range(0, len(ages)):
-            if ages[i] not in list_d_pop_d_out.keys():
-                list_d_pop_d_out[ages[i]] = np.zeros(number_of_values)
-            climate_list_d_dr_d_out_i = climate_list_d_dr_d_out[i] if activate_effect_on_population else 0
-            d_death[ages[i]] = list_d_pop_d_out[ages[i]] * full_dr_death[i] + \
-                (climate_list_d_dr_d_out_i +
-                 base_list_d_dr_d_out[i]) * pop_year.values[i]
-
-        return d_death
-
-    def d_poptotal_generic(self, year, d_pop, d_death, d_birth, d_pop_1549,
-                           d_total_pop, d_working_pop):
-        """
-        Compute derivative of column total of pop df wrt output
-        """
-        ## refactored to improve performances (could still be improved)
-        if year + 1 <= self.year_end:
-            iyear = year - self.year_start
-            number_of_values = (self.year_end - self.year_start + 1)
-
-            age_list = self.population_df.columns[1:-1]
-            range_age_1549 = np.arange(15, 49 + 1)  # 15 to 49
-            range_age_1570 = np.arange(15, 70 + 1)  # 15 to 70
-
-            sum_pop_1549 = np.zeros(number_of_values)
-            sum_pop_1570 = np.zeros(number_of_values)
-
-            d_pop_d_age_prev = {}
-            d_pop_d_y = {}
-
-            # at age = 0 pop = nb_birth => d_pop = d_nb_birth
-            age_list_0 = age_list[0]
-            d_pop_d_y[age_list_0] = d_birth[iyear]
-            d_pop_d_age_prev[age_list_0] = (
-                    d_pop.get(year, {}).get(age_list_0, 0) - d_death[year][age_list_0]  # .get(age, 0)
-            )
-
-            sum_tot_pop = np.zeros(number_of_values)
-            sum_tot_pop += d_pop_d_y[age_list_0]
-            for i in range(1, len(age_list)):
-                age = age_list[i]
-                # Compute population of previous year: population - nb_death =>
-                # Derivative = d_pop - d_nb_death
-                d_pop_d_age_prev[age] = (
-                        d_pop.get(year, {}).get(age, 0) - d_death[year][age]  # .get(age, 0)
-                )
-                # at year age between 1 and 100+: = pop_before =>
-                # derivative = d_pop_before
-                d_pop_d_y[age] = d_pop_d_age_prev[age_list[i - 1]]
-                if i in range_age_1549:
-                    sum_pop_1549 += d_pop_d_y[age]
-                if i in range_age_1570:
-                    sum_pop_1570 += d_pop_d_y[age]
-
-            sum_tot_pop += np.sum(list(d_pop_d_y[age] for age in age_list[1::]), axis=0)
-
-            # Add old not dead at year before at 100+ this year
-            d_old_not_dead = d_pop_d_age_prev[age_list[-1]]
-            d_pop_d_y[age_list[-1]] += d_old_not_dead
-            sum_tot_pop += d_old_not_dead
-
-            d_pop[year + 1] = d_pop_d_y
-            d_pop_1549[iyear + 1] = sum_pop_1549
-            d_working_pop[iyear + 1] = sum_pop_1570
-            d_total_pop[iyear + 1] = sum_tot_pop
-
-        return d_pop, d_pop_1549, d_total_pop, d_working_pop
-
-    # WRT TEMPERATURE
+        return self.get_sensitivities(GlossaryCore.OutputNetOfDamage)
+
     def compute_d_pop_d_temp(self):
         """ Compute the derivative of population wrt temp
         """
-        nb_years = (self.year_end - self.year_start + 1)
+        return self.get_sensitivities(GlossaryCore.TempAtmo)
 
-        # derivative of population of the current year for each age
-        d_pop_d_temp = {}
-        d_working_pop_d_temp = np.zeros((nb_years, nb_years))
-        d_pop_tot_d_temp = np.zeros((nb_years, nb_years))
-        if not self.activate_climate_effect_on_population:
-            return d_pop_tot_d_temp, d_working_pop_d_temp
-        d_birthrate_d_temp = np.zeros((nb_years, nb_years))
-        d_birth_d_temp = np.zeros((nb_years, nb_years))
-        d_base_death_rate = {}
-        d_climate_death_rate = {}
-        d_death_d_temp = {}
-        d_pop_1549_d_temp = np.zeros((nb_years, nb_years))
-
-        for year in self.years_range:
-            if year == self.year_end:
-                pass
-            else:
-                d_birthrate_d_temp += self.d_birthrate_d_temp(
-                    year, d_pop_tot_d_temp)
-                d_birth_d_temp += self.d_birth_d_generic(
-                    year, d_birthrate_d_temp, d_pop_1549_d_temp)
-
-                d_base_death_rate[year] = self.d_base_death_rate_d_temp(
-                    year, d_pop_tot_d_temp)
-                d_climate_death_rate[year] = self.d_climate_death_rate_d_temp(
-                    year, d_base_death_rate)
-
-                d_death_d_temp[year] = self.d_death_d_generic(
-                    year, d_base_death_rate, d_climate_death_rate, d_pop_d_temp,
-                    activate_effect_on_population=self.activate_climate_effect_on_population)
-                d_pop_d_temp, d_pop_1549_d_temp, d_pop_tot_d_temp, d_working_pop_d_temp = self.d_poptotal_generic(year, d_pop_d_temp,
-                                                                                                                  d_death_d_temp,
-                                                                                                                  d_birth_d_temp,
-                                                                                                                  d_pop_1549_d_temp,
-                                                                                                                  d_pop_tot_d_temp,
-                                                                                                                  d_working_pop_d_temp)
-        return d_pop_tot_d_temp, d_working_pop_d_temp
-
-    def d_birthrate_d_temp(self, year, d_pop_tot_d_temp):
-        """ Compute the derivative of birth rate wrt temp
-        f_knowledge = self.cst_br_k + self.alpha_br_k * (1- knowledge/100)**self.beta_br_k
-        f_gdp = self.br_upper + (self.br_lower - self.br_upper)/(1+np.exp(-self.br_delta*(gdp/pop -self.br_phi)))**(1/self.br_nu)
-        birth_rate = self.share_know * f_knowledge + (1-self.share_know) * f_gdp
-        """
-        nb_years = (self.year_end - self.year_start + 1)
-        d_birthrate_d_temp = np.zeros((nb_years, nb_years))
-        iyear = year - self.year_start
-        # Param of birth rate equation
-        delta = self.br_delta
-        phi = self.br_phi
-        br_upper = self.br_upper
-        br_lower = self.br_lower
-        nu = self.br_nu
-        pop = self.population_df.loc[year, 'total']
-        gdp = self.economics_df.loc[year, GlossaryCore.OutputNetOfDamage] * self.trillion
-        d_pop = d_pop_tot_d_temp[iyear]
-        idty = np.zeros(nb_years)
-        idty[iyear] = 1
-        # f gdp = br_upper + (self.br_lower - self.br_upper)/ u
-        # -> fprime = (self.br_lower - self.br_upper)*u_prime/u_squared
-        u_squared = ((1 + np.exp(-delta * (gdp / pop - phi)))
-                     ** (1 / nu)) ** 2
-        # u = g(f(x))  #u = g(f(x)) with g = f**(1/nu) and f = 1+
-        # exp(-delta(gdp/pop-phi))
-        g_prime_f = (1 / nu) * (1 + np.exp(-delta * 
-                                           (gdp / pop - phi))) ** (1 / nu - 1)
-        f_prime = -delta * (-gdp * d_pop) / (pop ** 2) * \
-            np.exp(-delta * (gdp / pop - phi))
-        u_prime = g_prime_f * f_prime
-        d_f_gdp_d_temp = -(br_lower - br_upper) * u_prime / u_squared
-
-        d_f_gdp_d_net_temp = d_f_gdp_d_temp
-        # and lastly multiply by (1-share now)
-        d_birthrate_d_temp[iyear] = (1 - self.share_know) * d_f_gdp_d_net_temp
-
-        return d_birthrate_d_temp
-
-    def d_base_death_rate_d_temp(self, year, d_pop_tot_d_temp):
-        """
-        for every columns of death rate dataframe create a dictionary that contains all derivatives wrt temp
-        """
-        nb_years = (self.year_end - self.year_start + 1)
-        iyear = year - self.year_start
-        idty = np.zeros(nb_years)
-        idty[iyear] = 1
-
-        param = self.dr_param_df
-        param.index = param['param'].values
-
-        d_base_deathrate_d_temp = {}
-        pop = self.population_df.loc[year, 'total']
-        gdp = self.economics_df.loc[year, GlossaryCore.OutputNetOfDamage] * self.trillion
-        add_death = self.climate_mortality_param_df
-        add_death.index = add_death['param'].values
-
-        d_pop = d_pop_tot_d_temp[iyear]
-
-        for age_range in param['param'].values:
-            # Param of death rate equation
-            delta = param.loc[age_range, 'death_rate_delta']
-            phi = param.loc[age_range, 'death_rate_phi']
-            dr_upper = param.loc[age_range, 'death_rate_upper']
-            dr_lower = param.loc[age_range, 'death_rate_lower']
-            nu = param.loc[age_range, 'death_rate_nu']
-            # Value on the diagonal. death rate t depends on temp t
-            # dr = u + u * v
-            # u = upper + (lower - upper) / (1 + np.exp(-delta * (gdp / pop - phi))) ** (1 / nu)
-            # v = beta * (temp / cal_temp_increase) ** theta
-            # u' = (lower-upper)*w'/w^2
-            # w = g(f(x)) with g = f**(1:nu) and f = (1+ exp(-delta(gdp/pop-phi))
-            # v' = beta * tetha / cal_temp_increase * (temp /
-            # cal_temp_increase) ** (theta - 1)
-            w_squared = ((1 + np.exp(-delta * (gdp / pop - phi)))
-                         ** (1 / nu)) ** 2
-            # w = g(f(x)) with g = f**(1:nu) and f = (1+
-            # exp(-delta(gdp/pop-phi))
-            g_prime_f = (1 / nu) * (1 + np.exp(-delta * 
-                                               (gdp / pop - phi))) ** (1 / nu - 1)
-            f_prime = -delta * (-d_pop * gdp) / (pop ** 2) * \
-                np.exp(-delta * (gdp / pop - phi))
-            w_prime = g_prime_f * f_prime
-            # dr' = u'v + uv'
-            d_base_death_rate = (-(dr_lower - dr_upper) * w_prime / w_squared)
-
-            d_base_deathrate_d_temp[age_range] = d_base_death_rate
-
-        return d_base_deathrate_d_temp
-
-    def d_climate_death_rate_d_temp(self, year, d_base_death_rate):
-        """
-        for every columns of death rate dataframe create a dictionary that contains all derivatives wrt temp
-        """
-        nb_years = (self.year_end - self.year_start + 1)
-        iyear = year - self.year_start
-        idty = np.zeros(nb_years)
-        idty[iyear] = 1
-        param = self.dr_param_df
-        param.index = param['param'].values
-
-        d_climate_deathrate_d_temp = {}
-        base_death_rate = self.base_death_rate_df.iloc[iyear, :]
-        climate_death_rate = self.climate_death_rate_df.iloc[iyear, :]
-        temp = self.temperature_df.loc[year, GlossaryCore.TempAtmo]
-        cal_temp_increase = self.cal_temp_increase
-        theta = self.theta
-        add_death = self.climate_mortality_param_df
-        add_death.index = add_death['param'].values
-
-        for age_range in param['param'].values:
-            # Param of death rate equation
-            beta = add_death.loc[age_range, 'beta']
-            d_climate_death_rate = beta * theta * idty / \
-                cal_temp_increase * (temp / cal_temp_increase) ** (theta - 1)
-            # (uv)' = u_prime_v * v_prime_u with u = base_deathrate v = climate_deathrate
-            u_prime_v = d_base_death_rate[year][age_range] * \
-                climate_death_rate[age_range] / base_death_rate[age_range]
-            v_prime_u = d_climate_death_rate * base_death_rate[age_range]
-            d_climate_deathrate_d_temp[age_range] = u_prime_v + v_prime_u
-
-        return d_climate_deathrate_d_temp
-
-    # WRT KCAL PC
     def compute_d_pop_d_kcal_pc(self):
         """ Compute the derivative of population wrt calories per capita
         """
-        nb_years = (self.year_end - self.year_start + 1)
-
-        # derivative of population of the current year for each age
-        d_pop_d_kcal_pc = {}
-        d_working_pop_d_kcal_pc = np.zeros((nb_years, nb_years))
-        d_pop_tot_d_kcal_pc = np.zeros((nb_years, nb_years))
-        d_birthrate_d_kcal_pc = np.zeros((nb_years, nb_years))
-        d_birth_d_kcal_pc = np.zeros((nb_years, nb_years))
-        d_base_death_rate = {}
-        d_diet_death_rate = {}
-        d_death_d_kcal_pc = {}
-        d_pop_1549_d_kcal_pc = np.zeros((nb_years, nb_years))
-
-        for year in self.years_range:
-            if year == self.year_end:
-                pass
-            else:
-                d_birthrate_d_kcal_pc += self.d_birthrate_d_kcal_pc(
-                    year, d_pop_tot_d_kcal_pc)
-                d_birth_d_kcal_pc += self.d_birth_d_generic(
-                    year, d_birthrate_d_kcal_pc, d_pop_1549_d_kcal_pc)
-                d_base_death_rate[year] = self.d_base_death_rate_d_kcal_pc(
-                    year, d_pop_tot_d_kcal_pc)
-                d_diet_death_rate[year] = self.d_diet_death_rate_d_kcal_pc(year, d_base_death_rate)
-                d_death_d_kcal_pc[year] = self.d_death_d_generic(
-                    year, d_base_death_rate, d_diet_death_rate, d_pop_d_kcal_pc,
-                    activate_effect_on_population=True) # must activate d_pop_d_kcal_pc effect on pop of
-                d_pop_d_kcal_pc, d_pop_1549_d_kcal_pc, d_pop_tot_d_kcal_pc, d_working_pop_d_kcal_pc = self.d_poptotal_generic(year, d_pop_d_kcal_pc,
-                                                                                                                  d_death_d_kcal_pc,
-                                                                                                                  d_birth_d_kcal_pc,
-                                                                                                                  d_pop_1549_d_kcal_pc,
-                                                                                                                  d_pop_tot_d_kcal_pc,
-                                                                                                                  d_working_pop_d_kcal_pc)
-        return d_pop_tot_d_kcal_pc, d_working_pop_d_kcal_pc
-
-    def d_birthrate_d_kcal_pc(self, year, d_pop_tot_d_kcal_pc):
-        """ Compute the derivative of birth rate wrt kcal_pc
-        f_knowledge = self.cst_br_k + self.alpha_br_k * (1- knowledge/100)**self.beta_br_k
-        f_gdp = self.br_upper + (self.br_lower - self.br_upper)/(1+np.exp(-self.br_delta*(gdp/pop -self.br_phi)))**(1/self.br_nu)
-        birth_rate = self.share_know * f_knowledge + (1-self.share_know) * f_gdp
-        """
-        nb_years = (self.year_end - self.year_start + 1)
-        d_birthrate_d_kcal_pc = np.zeros((nb_years, nb_years))
-        iyear = year - self.year_start
-        # Param of birth rate equation
-        delta = self.br_delta
-        phi = self.br_phi
-        br_upper = self.br_upper
-        br_lower = self.br_lower
-        nu = self.br_nu
-        pop = self.population_df.loc[year, 'total']
-        gdp = self.economics_df.loc[year, GlossaryCore.OutputNetOfDamage] * self.trillion
-        d_pop = d_pop_tot_d_kcal_pc[iyear]
-        idty = np.zeros(nb_years)
-        idty[iyear] = 1
-        # f gdp = br_upper + (self.br_lower - self.br_upper)/ u
-        # -> fprime = (self.br_lower - self.br_upper)*u_prime/u_squared
-        u_squared = ((1 + np.exp(-delta * (gdp / pop - phi)))
-                     ** (1 / nu)) ** 2
-        # u = g(f(x))  #u = g(f(x)) with g = f**(1/nu) and f = 1+
-        # exp(-delta(gdp/pop-phi))
-        g_prime_f = (1 / nu) * (1 + np.exp(-delta * 
-                                           (gdp / pop - phi))) ** (1 / nu - 1)
-        f_prime = -delta * (-gdp * d_pop) / (pop ** 2) * \
-            np.exp(-delta * (gdp / pop - phi))
-        u_prime = g_prime_f * f_prime
-        d_f_gdp_d_kcal_pc = -(br_lower - br_upper) * u_prime / u_squared
-
-        d_f_gdp_d_net_kcal_pc = d_f_gdp_d_kcal_pc
-        # and lastly multiply by (1-share now)
-        d_birthrate_d_kcal_pc[iyear] = (1 - self.share_know) * d_f_gdp_d_net_kcal_pc
-
-        return d_birthrate_d_kcal_pc
-
-    def d_base_death_rate_d_kcal_pc(self, year, d_pop_tot_d_kcal_pc):
-        """
-        for every columns of death rate dataframe create a dictionary that contains all derivatives wrt kcal_pc
-        """
-        nb_years = (self.year_end - self.year_start + 1)
-        iyear = year - self.year_start
-        idty = np.zeros(nb_years)
-        idty[iyear] = 1
-
-        param = self.dr_param_df
-        param.index = param['param'].values
-
-        d_base_deathrate_d_kcal_pc = {}
-        pop = self.population_df.loc[year, 'total']
-        gdp = self.economics_df.loc[year, GlossaryCore.OutputNetOfDamage] * self.trillion
-        temp = self.temperature_df.loc[year, GlossaryCore.TempAtmo]
-        add_death = self.climate_mortality_param_df
-        add_death.index = add_death['param'].values
-        cal_temp_increase = self.cal_temp_increase
-        theta = self.theta
-        add_death = self.climate_mortality_param_df
-        d_pop = d_pop_tot_d_kcal_pc[iyear]
-
-        for age_range in param['param'].values:
-            # Param of death rate equation
-            delta = param.loc[age_range, 'death_rate_delta']
-            beta = add_death.loc[age_range, 'beta']
-            phi = param.loc[age_range, 'death_rate_phi']
-            dr_upper = param.loc[age_range, 'death_rate_upper']
-            dr_lower = param.loc[age_range, 'death_rate_lower']
-            nu = param.loc[age_range, 'death_rate_nu']
-
-            # Value on the diagonal. death rate t depends on kcal_pc t
-            # dr = u + u * v
-            # u = upper + (lower - upper) / (1 + np.exp(-delta * (gdp / pop - phi))) ** (1 / nu)
-            # v = beta * (temp / cal_temp_increase) ** theta
-            # u' = (lower-upper)*w'/w^2
-            # w = g(f(x)) with g = f**(1:nu) and f = (1+ exp(-delta(gdp/pop-phi))
-            # v' = beta * tetha / cal_temp_increase * (temp /
-            # cal_temp_increase) ** (theta - 1)
-            w_squared = ((1 + np.exp(-delta * (gdp / pop - phi)))
-                         ** (1 / nu)) ** 2
-            # w = g(f(x)) with g = f**(1:nu) and f = (1+
-            # exp(-delta(gdp/pop-phi))
-            g_prime_f = (1 / nu) * (1 + np.exp(-delta * 
-                                               (gdp / pop - phi))) ** (1 / nu - 1)
-            f_prime = -delta * (-d_pop * gdp) / (pop ** 2) * \
-                np.exp(-delta * (gdp / pop - phi))
-            w_prime = g_prime_f * f_prime
-            # dr' = u'v + uv'
-            d_base_death_rate = (-(dr_lower - dr_upper) * w_prime / w_squared)
-
-            d_base_deathrate_d_kcal_pc[age_range] = d_base_death_rate + d_base_death_rate * beta * (temp / cal_temp_increase) ** theta
-
-        return d_base_deathrate_d_kcal_pc
-
-    def d_diet_death_rate_d_kcal_pc(self, year, d_base_death_rate):
+        return self.get_sensitivities('kcal_pc')
+
+    def compute_d_life_expectancy(self, direction: str) -> np.ndarray:
         """
-        for every columns of death rate dataframe create a dictionary that contains all derivatives wrt kcal_pc
+        Compute the derivative of life expectancy wrt output, temperature or calories per capita (one of
+        GRADIENT_DIRECTIONS), with a dedicated sensitivity pass the first time it is requested after compute
         """
-        nb_years = (self.year_end - self.year_start + 1)
-        iyear = year - self.year_start
-        idty = np.zeros(nb_years)
-        idty[iyear] = 1
-        param = self.dr_param_df
-        param.index = param['param'].values
-
-        d_diet_deathrate_d_kcal_pc = {}
-        base_death_rate = self.base_death_rate_df.iloc[iyear, :]
-        climate_death_rate = self.climate_death_rate_df.iloc[iyear, :]
-        add_death = self.climate_mortality_param_df
-        add_death.index = add_death['param'].values
-        diet_death_param = self.diet_mortality_param_df
-        diet_death_param.index = diet_death_param['param'].values
-        kcal_pc = self.calories_pc_df.loc[year, 'kcal_pc']
-        kcal_pc_ref = self.kcal_pc_ref
-        theta_diet = self.theta_diet
-        risk_type = 'undernutrition'
-        if kcal_pc >= kcal_pc_ref:
-            risk_type = 'overnutrition'
-        alpha_diet = diet_death_param[risk_type]
-        if np.real(kcal_pc - kcal_pc_ref) >= 0:
-            diet_death_rate = alpha_diet * (kcal_pc - kcal_pc_ref)/(theta_diet * kcal_pc_ref)
-        else:
-            diet_death_rate = alpha_diet * (kcal_pc_ref - kcal_pc)/(theta_diet * kcal_pc_ref)
-
-        for age_range in param['param'].values:
-            # Param of death rate equation
-            alpha_diet = diet_death_param.loc[age_range, risk_type]
-            if np.real(kcal_pc - kcal_pc_ref) >= 0:
-                d_diet_deathrate_d_kcal_pc[age_range] = alpha_diet * idty / (theta_diet * kcal_pc_ref)
-            else:
-                d_diet_deathrate_d_kcal_pc[age_range] = - alpha_diet * idty / (theta_diet * kcal_pc_ref)
-
-            if diet_death_rate[age_range] >= 1 - base_death_rate[age_range] - climate_death_rate[age_range]:
-                # self.diet_death_rate_df_dict[year][age_range] = (1 - death_rate[i] * (1 + climate_death_rate[age_range]))/ (1 + np.exp(-self.diet_death_rate_df_dict[year][age_range]))
-                # self.diet_death_rate_df_dict[year][age_range] = u / v
-                # d_diet_death_rate_df_dict[year][age_range] = (du*v - dv*u)/v2
-                u = 1 - base_death_rate[age_range]  - climate_death_rate[age_range]
-                u_prime = - d_base_death_rate[year][age_range]
-                v = 1 + np.exp(-diet_death_rate[age_range])
-                v_prime = -d_diet_deathrate_d_kcal_pc[age_range] * np.exp(-diet_death_rate[age_range])
-                d_diet_deathrate_d_kcal_pc[age_range] = (u_prime*v - v_prime * u)/(v**2)
-
-        return d_diet_deathrate_d_kcal_pc
+        if self.life_expectancy_sensitivities is None:
+            self.compute_sensitivities(life_expectancy=True)
+        return self.life_expectancy_sensitivities[direction]
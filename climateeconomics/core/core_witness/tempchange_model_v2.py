@@ -18,8 +18,77 @@ limitations under the License.
 import numpy as np
 from pandas.core.frame import DataFrame
 
+from climateeconomics.core.tools.linear_recurrence import (
+    geometric_recurrence_jacobian,
+    linear_recurrence_jacobian,
+    linear_state_space_jacobian,
+    solve_linear_state_space,
+)
 from climateeconomics.glossarycore import GlossaryCore
 
+# time to double CO2 concentration at +1%/year, horizon of the transient climate response
+FAIR_TCR_HORIZON = 70.
+
+
+def get_fair_box_parameters(equilibrium_climate_sensitivity, transient_climate_response, response_timescales,
+                            forcing_2x) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Parameters of the two-box (fast, slow) FAIR thermal response for a batch of members
+    Smith et al. 2018, FAIR v1.3: a simple emissions-based impulse response and carbon cycle model, GMD 11, 2273-2297
+
+    :param equilibrium_climate_sensitivity: ECS in °C, scalar or array (n_members,)
+    :param transient_climate_response: TCR in °C, scalar or array (n_members,)
+    :param response_timescales: (fast, slow) timescales in years, array (2,) or (n_members, 2)
+    :param forcing_2x: forcing of a CO2 doubling in W.m-2
+    returns q, sensitivity of each box to forcing in °C/(W.m-2), and the yearly decay exp(-1/d) of each box,
+    both of shape (n_members, 2)
+    """
+    response_timescales = np.atleast_2d(response_timescales)
+    ecs, tcr, fast_timescale, slow_timescale = np.broadcast_arrays(
+        np.atleast_1d(equilibrium_climate_sensitivity), np.atleast_1d(transient_climate_response),
+        response_timescales[:, 0], response_timescales[:, 1])
+    timescales = np.stack([fast_timescale, slow_timescale], axis=1)
+    # fraction of the equilibrium response of each box reached after FAIR_TCR_HORIZON years of linear forcing increase
+    k = 1. - timescales / FAIR_TCR_HORIZON * (1. - np.exp(-FAIR_TCR_HORIZON / timescales))
+    q = np.stack([tcr - k[:, 1] * ecs, k[:, 0] * ecs - tcr], axis=1) / (forcing_2x * (k[:, 0] - k[:, 1]))[:, np.newaxis]
+    return q, np.exp(-1. / timescales)
+
+
+def compute_fair_impulse_response(q: np.ndarray, decay: np.ndarray, size: int) -> np.ndarray:
+    """
+    Temperature response k years after a unit forcing: h[m, k] = sum_j q_j (1 - a_j) a_j ** k, shape (n_members, size)
+    """
+    lags = np.arange(size)
+    return np.sum((q * (1. - decay))[:, :, np.newaxis] * decay[:, :, np.newaxis] ** lags, axis=1)
+
+
+def compute_fair_temperature_jacobian(impulse_response: np.ndarray) -> np.ndarray:
+    """
+    Jacobians of the FAIR temperature wrt forcing for each member, shape (n_members, size, size):
+    d temp[m, t] / d forcing[s] = h[m, t - s] for 1 <= s <= t, first year is fixed ==> grad is zero
+    """
+    return geometric_recurrence_jacobian(impulse_response, input_lag=0)
+
+
+def compute_fair_temperature(init_temp_atmo: float, forcing: np.ndarray, q: np.ndarray,
+                             decay: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Batched FAIR two-box temperature model, for all members and years without loop:
+        temp_box_j[t] = a_j * temp_box_j[t-1] + q_j * (1 - a_j) * forcing[t]
+        temp_atmo[t] = temp_box_fast[t] + temp_box_slow[t]
+    The initial temperature is split between the boxes proportionally to their equilibrium sensitivities q.
+
+    :param forcing: array (n_years,) shared by all members or (n_members, n_years)
+    returns temperatures of shape (n_members, n_years) and jacobians wrt forcing of shape (n_members, n_years, n_years)
+    """
+    size = np.shape(forcing)[-1]
+    lags = np.arange(size)
+    box_share = q / np.sum(q, axis=1, keepdims=True)
+    free_response = init_temp_atmo * np.sum(box_share[:, :, np.newaxis] * decay[:, :, np.newaxis] ** lags, axis=1)
+    jacobian = compute_fair_temperature_jacobian(compute_fair_impulse_response(q, decay, size))
+    forcing = np.broadcast_to(forcing, (len(q), size))
+    return free_response + np.einsum('mts,ms->mt', jacobian, forcing), jacobian
+
 
 class TempChange(object):
     """
@@ -29,6 +98,12 @@ class TempChange(object):
     # Constant
     LAST_TEMPERATURE_OBJECTIVE = 'last_temperature'
     INTEGRAL_OBJECTIVE = 'integral'
+    # FAIR ensemble parameters
+    ECS = 'equilibrium_climate_sensitivity'
+    TCR = 'transient_climate_response'
+    FAST_TIMESCALE = 'fast_timescale'
+    SLOW_TIMESCALE = 'slow_timescale'
+    FAIR_ENSEMBLE_COLUMNS = [ECS, TCR, FAST_TIMESCALE, SLOW_TIMESCALE]
 
     def __init__(self, inputs):
         '''
@@ -80,6 +155,12 @@ class TempChange(object):
         # FUND
         self.climate_sensitivity = 3.0
 
+        if self.temperature_model == 'FAIR':
+            # nominal member uses eq_temp_impact as equilibrium climate sensitivity
+            self.transient_climate_response = inputs['transient_climate_response']
+            self.fair_response_timescales = inputs['fair_response_timescales']
+            self.fair_ensemble_df = inputs['fair_ensemble_df']
+
     def create_dataframe(self):
         '''
         Create the dataframe and fill it with values at year_start
@@ -90,6 +171,7 @@ class TempChange(object):
         self.years_range = years_range
         self.temperature_df = DataFrame({GlossaryCore.Years: self.years_range})
         self.forcing_df = DataFrame({GlossaryCore.Years: self.years_range})
+        self.temperature_ensemble_df = None
 
     def compute_exog_forcing_dice(self):
         """
@@ -242,30 +324,40 @@ class TempChange(object):
         self.temperature_df[GlossaryCore.Forcing] = forcing
 
     ######### DICE ########
-    def compute_temp_atmo_ocean_dice(self):
+    def get_dice_state_space(self) -> tuple[np.ndarray, np.ndarray]:
         """
-        Compute temperature of atmosphere (t) using t-1 values
+        Two-box (atmosphere, ocean) DICE temperature model as a linear state-space system
+        [temp_atmo, temp_ocean][t] = A @ [temp_atmo, temp_ocean][t-1] + b * forcing[t]
+        returns the transition matrix A and the input vector b
         """
-        temp_atmo = self.init_temp_atmo
-        temp_ocean = self.init_temp_ocean
-
-        temp_atmo_list = [temp_atmo]
-        temp_ocean_list = [temp_ocean]
-
-        for year, forcing in zip(self.years_range[1:], self.temperature_df[GlossaryCore.Forcing].values[1:]) :
-            new_temp_ocean = temp_ocean + (self.transfer_lower / 5.) * (temp_atmo - temp_ocean)
-            new_temp_atmo = temp_atmo + (self.climate_upper / 5.) * \
-                ((forcing - (self.forcing_eq_co2 / self.eq_temp_impact) *
-                  temp_atmo) - ((self.transfer_upper / 5.) * (temp_atmo - temp_ocean)))
-
-            temp_atmo = new_temp_atmo
-            temp_ocean = new_temp_ocean
+        climate_upper = self.climate_upper / 5.
+        transfer_upper = self.transfer_upper / 5.
+        transfer_lower = self.transfer_lower / 5.
+        feedback = self.forcing_eq_co2 / self.eq_temp_impact
+        transition = np.array([[1. - climate_upper * (feedback + transfer_upper), climate_upper * transfer_upper],
+                               [transfer_lower, 1. - transfer_lower]])
+        input_vector = np.array([climate_upper, 0.])
+        return transition, input_vector
 
-            temp_atmo_list.append(temp_atmo)
-            temp_ocean_list.append(temp_ocean)
-
-        temp_atmo_list = np.array(temp_atmo_list)
-        temp_ocean_list = np.array(temp_ocean_list)
+    def compute_temp_atmo_ocean_dice(self):
+        """
+        Compute temperature of atmosphere and ocean for all years with the state-space formulation:
+        new_temp_ocean = temp_ocean + (transfer_lower / 5) * (temp_atmo - temp_ocean)
+        new_temp_atmo = temp_atmo + (climate_upper / 5) * (forcing - (forcing_eq_co2 / eq_temp_impact) * temp_atmo
+                                                            - (transfer_upper / 5) * (temp_atmo - temp_ocean))
+        Bounds are applied to the outputs only, the recurrence itself is not clipped
+        """
+        transition, input_vector = self.get_dice_state_space()
+        temperatures = solve_linear_state_space(np.array([self.init_temp_atmo, self.init_temp_ocean]),
+                                                self.temperature_df[GlossaryCore.Forcing].values,
+                                                transition, input_vector, input_lag=0)
+        temp_atmo_list = temperatures[:, 0]
+        temp_ocean_list = temperatures[:, 1]
+
+        # saturated years: derivatives wrt forcing are null
+        self.temp_atmo_saturated = np.real(temp_atmo_list) >= self.up_tatmo
+        self.temp_ocean_saturated = (np.real(temp_ocean_list) <= self.lo_tocean) | \
+                                    (np.real(temp_ocean_list) >= self.up_tocean)
 
         temp_ocean_list = np.maximum(temp_ocean_list, self.lo_tocean)
         temp_ocean_list = np.minimum(temp_ocean_list, self.up_tocean)
@@ -308,6 +400,38 @@ class TempChange(object):
 
         self.temperature_df['sea_level'] = sea_level
 
+    ######### FAIR ########
+    def get_fair_members_parameters(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Box parameters of the nominal member (first one) followed by the members of fair_ensemble_df
+        """
+        ensemble_df = self.fair_ensemble_df
+        if ensemble_df is None:
+            ensemble_df = DataFrame(columns=self.FAIR_ENSEMBLE_COLUMNS)
+        ecs = np.concatenate([[self.eq_temp_impact], ensemble_df[self.ECS].values])
+        tcr = np.concatenate([[self.transient_climate_response], ensemble_df[self.TCR].values])
+        timescales = np.concatenate([np.reshape(self.fair_response_timescales, (1, 2)),
+                                     ensemble_df[[self.FAST_TIMESCALE, self.SLOW_TIMESCALE]].values])
+        return get_fair_box_parameters(ecs, tcr, timescales.astype(float), self.forcing_eq_co2)
+
+    @staticmethod
+    def get_fair_member_column(member: int) -> str:
+        return f'member_{member}'
+
+    def compute_temp_fair(self):
+        """
+        Compute temperature of atmosphere for the nominal member and all the members of the ensemble in one call
+        """
+        q, decay = self.get_fair_members_parameters()
+        temperatures, self.d_temp_d_forcing_fair = compute_fair_temperature(
+            self.init_temp_atmo, self.temperature_df[GlossaryCore.Forcing].values, q, decay)
+
+        self.temperature_df[GlossaryCore.TempAtmo] = temperatures[0]
+        self.temperature_ensemble_df = DataFrame(
+            {GlossaryCore.Years: self.years_range,
+             **{self.get_fair_member_column(member): temperature for member, temperature in
+                enumerate(temperatures[1:])}})
+
     ######### CONSTRAINT ########
     def compute_temperature_year_end_constraint(self):
         """
@@ -495,50 +619,28 @@ class TempChange(object):
                                           }
         return dco2_forcing + dch4_forcing + dn2o_forcing
 
-    def compute_d_temp_atmo(self):
-
-        nb_years = len(self.years_range)
-
-        # derivative matrix initialization
-        d_tempocean_d_atmoconc = np.zeros((nb_years, nb_years))
+    def compute_d_temp_d_forcing_dice(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Jacobians of atmosphere and ocean temperatures wrt forcing for the DICE model:
+        d temp[t] / d forcing[s] = (A ** (t - s) @ b) for 1 <= s <= t, first year is fixed ==> grad is zero
+        Rows of saturated years (up_tatmo for atmosphere, lo_tocean/up_tocean for ocean) are null
+        """
+        transition, input_vector = self.get_dice_state_space()
+        d_temp_d_forcing = linear_state_space_jacobian(len(self.years_range), transition, input_vector, input_lag=0)
+        d_tempatmo_d_forcing, d_tempocean_d_forcing = d_temp_d_forcing
+        d_tempatmo_d_forcing[self.temp_atmo_saturated] = 0.
+        d_tempocean_d_forcing[self.temp_ocean_saturated] = 0.
+        return d_tempatmo_d_forcing, d_tempocean_d_forcing
 
-        # first line stays at zero since derivatives of initial values are zero
-        # second line is only equal to the derivative of forcing effect
+    def compute_d_temp_atmo(self):
+        """
+        Jacobians of atmosphere and ocean temperatures wrt atmospheric concentrations for the DICE model
+        """
         dforcing_datmo_conc = self.compute_d_forcing()
-
-        d_tempatmo_d_atmoconc = np.identity(nb_years) * self.climate_upper / 5.0 \
-            * dforcing_datmo_conc
-
-        d_tempatmo_d_atmoconc[0, 0] = 0.0
-
-        for i in range(2, nb_years):
-            j = 1
-
-            # if temp_atmo is saturated at up_tatmo, it won't depend on atmo_conc anymore
-            # so the derivative will be zero
-            # if temp_ocean is saturated it has no effect as it only depends on
-            # temp_atmo
-            if self.temperature_df[GlossaryCore.TempAtmo].values[i] == self.up_tatmo:
-                d_tempatmo_d_atmoconc[i, i] = 0
-
-            while j < i:
-                #-------atmo temp derivative------------
-                d_tempatmo_d_atmoconc[i, j] = d_tempatmo_d_atmoconc[i - 1, j] \
-                    - self.climate_upper / 5.0 * self.forcing_eq_co2 / self.eq_temp_impact * d_tempatmo_d_atmoconc[i - 1, j] \
-                    - self.climate_upper / 5.0 * self.transfer_upper / \
-                    5.0 * \
-                    (d_tempatmo_d_atmoconc[i - 1, j] -
-                     d_tempocean_d_atmoconc[i - 1, j])
-                #-------ocean temp derivative-----------
-                # if atmo temp is saturated
-                if self.temperature_df[GlossaryCore.TempAtmo].values[i] == self.up_tatmo:
-                    d_tempatmo_d_atmoconc[i, j] = 0
-
-                d_tempocean_d_atmoconc[i, j] = d_tempocean_d_atmoconc[i - 1, j] \
-                    + self.transfer_lower / 5.0 * \
-                    (d_tempatmo_d_atmoconc[i - 1, j] -
-                     d_tempocean_d_atmoconc[i - 1, j])
-                j = j + 1
+        d_tempatmo_d_forcing, d_tempocean_d_forcing = self.compute_d_temp_d_forcing_dice()
+        # forcing of year t only depends on concentrations of year t
+        d_tempatmo_d_atmoconc = d_tempatmo_d_forcing * dforcing_datmo_conc[np.newaxis, :]
+        d_tempocean_d_atmoconc = d_tempocean_d_forcing * dforcing_datmo_conc[np.newaxis, :]
 
         return d_tempatmo_d_atmoconc, d_tempocean_d_atmoconc
 
@@ -556,15 +658,16 @@ class TempChange(object):
 
         coeff = self.climate_sensitivity/(5.35*np.log(2)*e_folding_time)
         decay = (1-1/e_folding_time)
-        mat = np.diag(coeff*np.ones(len(self.years_range)))
 
-        for i in np.arange(1, len(self.years_range-1)):
-            coeff = coeff*decay
-            mat += np.diag(coeff*np.ones(len(self.years_range)-i), -i)
+        # T(t) = decay * T(t-1) + coeff * F(t), first year is from initial data and is fixed ==> grad is zero
+        return linear_recurrence_jacobian(len(self.years_range), decay=decay, input_coefficient=coeff, input_lag=0)
 
-        # first year is from initial data and is fixed ==> grad is zero
-        mat[:, 0] = 0.0
-        return mat
+    def compute_d_temp_d_forcing_fair(self) -> np.ndarray:
+        """
+        Jacobians of the FAIR temperature wrt forcing, shape (1 + n_members, n_years, n_years),
+        the first one is the nominal member
+        """
+        return self.d_temp_d_forcing_fair
 
     def compute(self, in_dict) -> DataFrame:
         """
@@ -584,7 +687,7 @@ class TempChange(object):
 
         elif self.temperature_model == 'FAIR':
 
-            raise NotImplementedError("FAIR Not implemented yet")
+            self.compute_temp_fair()
 
         self.compute_temperature_year_end_constraint()
         return self.temperature_df.fillna(0.0)
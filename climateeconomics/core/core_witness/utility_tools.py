@@ -22,6 +22,9 @@ from autograd import jacobian
 
 from climateeconomics.glossarycore import GlossaryCore
 
+# jacobian stored as (diagonal, first column), see year_start_jacobian_to_dense
+YearStartJacobian = Tuple[np.ndarray, np.ndarray]
+
 
 def get_inputs_for_utility_all_sectors(inputs_dict: dict):
     years = inputs_dict[GlossaryCore.PopulationDfValue][GlossaryCore.Years].to_numpy()
@@ -147,16 +150,19 @@ def compute_utility_quantities_bis(years: np.ndarray, consumption_pc: np.ndarray
 def compute_utility_quantities_der(quantity_name: str, years: np.ndarray, consumption: np.ndarray,
                                    energy_price: np.ndarray,
                                    population: np.ndarray, init_rate_time_pref: float,
-                                   scurve_shift: float, scurve_stretch: float) -> Tuple[
+                                   scurve_shift: float, scurve_stretch: float, use_autograd: bool = False) -> Tuple[
     np.ndarray, np.ndarray, np.ndarray]:
     args = (years, consumption, energy_price, population,
             init_rate_time_pref, scurve_shift, scurve_stretch)
 
-    jac_consumption = jacobian(lambda *args: compute_utility_quantities(*args)[quantity_name], 1)
-    jac_energy_price = jacobian(lambda *args: compute_utility_quantities(*args)[quantity_name], 2)
-    jac_population = jacobian(lambda *args: compute_utility_quantities(*args)[quantity_name], 3)
+    if use_autograd:
+        jac_consumption = jacobian(lambda *args: compute_utility_quantities(*args)[quantity_name], 1)
+        jac_energy_price = jacobian(lambda *args: compute_utility_quantities(*args)[quantity_name], 2)
+        jac_population = jacobian(lambda *args: compute_utility_quantities(*args)[quantity_name], 3)
+
+        return jac_consumption(*args), jac_energy_price(*args), jac_population(*args)
 
-    return jac_consumption(*args), jac_energy_price(*args), jac_population(*args)
+    return tuple(year_start_jacobian_to_dense(jac) for jac in compute_utility_quantities_sensitivities(*args)[quantity_name])
 
 
 def compute_utility_objective(years_range: np.ndarray, consumption: np.ndarray, energy_price: np.ndarray,
@@ -189,7 +195,7 @@ def compute_utility_objective_bis(years_range: np.ndarray, consumption_pc: np.nd
 
 def compute_utility_objective_der(years: np.ndarray, consumption: np.ndarray, energy_price: np.ndarray,
                                   population: np.ndarray, init_rate_time_pref: float,
-                                  scurve_shift: float, scurve_stretch: float) -> Tuple[
+                                  scurve_shift: float, scurve_stretch: float, use_autograd: bool = False) -> Tuple[
     np.ndarray, np.ndarray, np.ndarray]:
     """
     Compute the derivative of the utility objective function.
@@ -201,20 +207,35 @@ def compute_utility_objective_der(years: np.ndarray, consumption: np.ndarray, en
     :param init_rate_time_pref: Initial rate of time preference
     :param scurve_shift: S-curve shift parameter
     :param scurve_stretch: S-curve stretch parameter
+    :param use_autograd: compute the derivatives with autograd instead of the analytic formulas (validation)
     :return: Tuple of derivatives with respect to consumption, energy price, and population
     """
-    d_consumption = jacobian(compute_utility_objective, 1)
-    d_energy_price = jacobian(compute_utility_objective, 2)
-    d_population = jacobian(compute_utility_objective, 3)
-
     args = (years, consumption, energy_price, population,
             init_rate_time_pref, scurve_shift, scurve_stretch)
 
-    return d_consumption(*args), d_energy_price(*args), d_population(*args)
+    if use_autograd:
+        d_consumption = jacobian(compute_utility_objective, 1)
+        d_energy_price = jacobian(compute_utility_objective, 2)
+        d_population = jacobian(compute_utility_objective, 3)
+
+        return d_consumption(*args), d_energy_price(*args), d_population(*args)
+
+    # the objective is the bis objective multiplied by population with consumption per capita = consumption / population
+    d_consumption_pc, d_energy_price, d_population = compute_utility_objective_bis_sensitivities(
+        years, consumption / population, energy_price, population, init_rate_time_pref, scurve_shift, scurve_stretch,
+        True)
+    d_consumption_pc_d_consumption = (1 / population, np.zeros_like(population))
+    d_consumption_pc_d_population = (- consumption / population ** 2, np.zeros_like(population))
+    d_population = add_year_start_jacobians(d_population, scale_year_start_jacobian_columns(d_consumption_pc, d_consumption_pc_d_population))
+
+    return tuple(mean_gradient(jac) for jac in (scale_year_start_jacobian_columns(d_consumption_pc, d_consumption_pc_d_consumption),
+                                                 d_energy_price, d_population))
+
 
 def compute_utility_objective_bis_der(years: np.ndarray, consumption_pc: np.ndarray, energy_price: np.ndarray,
                                       population: np.ndarray, init_rate_time_pref: float,
-                                      scurve_shift: float, scurve_stretch: float, multiply_by_pop: bool) -> Tuple[
+                                      scurve_shift: float, scurve_stretch: float, multiply_by_pop: bool,
+                                      use_autograd: bool = False) -> Tuple[
     np.ndarray, np.ndarray, np.ndarray]:
     """
     Compute the derivative of the utility objective function.
@@ -226,31 +247,181 @@ def compute_utility_objective_bis_der(years: np.ndarray, consumption_pc: np.ndar
     :param init_rate_time_pref: Initial rate of time preference
     :param scurve_shift: S-curve shift parameter
     :param scurve_stretch: S-curve stretch parameter
+    :param use_autograd: compute the derivatives with autograd instead of the analytic formulas (validation)
     :return: Tuple of derivatives with respect to consumption, energy price, and population
     """
-    d_consumption = jacobian(compute_utility_objective_bis, 1)
-    d_energy_price = jacobian(compute_utility_objective_bis, 2)
-    d_population = jacobian(compute_utility_objective_bis, 3)
-
     args = (years, consumption_pc, energy_price, population,
             init_rate_time_pref, scurve_shift, scurve_stretch, multiply_by_pop)
 
-    return d_consumption(*args), d_energy_price(*args), d_population(*args)
+    if use_autograd:
+        d_consumption = jacobian(compute_utility_objective_bis, 1)
+        d_energy_price = jacobian(compute_utility_objective_bis, 2)
+        d_population = jacobian(compute_utility_objective_bis, 3)
+
+        return d_consumption(*args), d_energy_price(*args), d_population(*args)
+
+    return tuple(mean_gradient(jac) for jac in compute_utility_objective_bis_sensitivities(*args))
 
 
 def compute_utility_quantities_bis_der(quantity_name: str, years: np.ndarray, consumption_pc: np.ndarray,
                                        energy_price: np.ndarray,
                                        population: np.ndarray, init_rate_time_pref: float,
-                                       scurve_shift: float, scurve_stretch: float) -> Tuple[
+                                       scurve_shift: float, scurve_stretch: float, use_autograd: bool = False) -> Tuple[
     np.ndarray, np.ndarray, np.ndarray]:
     args = (years, consumption_pc, energy_price, population,
             init_rate_time_pref, scurve_shift, scurve_stretch)
 
-    jac_consumption = jacobian(lambda *args: compute_utility_quantities_bis(*args)[quantity_name], 1)
-    jac_energy_price = jacobian(lambda *args: compute_utility_quantities_bis(*args)[quantity_name], 2)
-    jac_population = jacobian(lambda *args: compute_utility_quantities_bis(*args)[quantity_name], 3)
+    if use_autograd:
+        jac_consumption = jacobian(lambda *args: compute_utility_quantities_bis(*args)[quantity_name], 1)
+        jac_energy_price = jacobian(lambda *args: compute_utility_quantities_bis(*args)[quantity_name], 2)
+        jac_population = jacobian(lambda *args: compute_utility_quantities_bis(*args)[quantity_name], 3)
+
+        return jac_consumption(*args), jac_energy_price(*args), jac_population(*args)
+
+    return tuple(year_start_jacobian_to_dense(jac) for jac in compute_utility_quantities_bis_sensitivities(*args)[quantity_name])
+
+
+def year_start_jacobian_to_dense(jac: YearStartJacobian) -> np.ndarray:
+    """
+    Utility quantities are elementwise in years, apart from the normalizations by year start values (quantity and
+    population), so their jacobians are a diagonal plus a first column. They are stored as (diagonal, first_column)
+    pairs and this returns the dense matrix diag(diagonal) + first_column in column 0
+    """
+    diagonal, first_column = jac
+    dense = np.diag(diagonal).astype(np.result_type(diagonal, first_column))
+    dense[:, 0] += first_column
+    return dense
+
+
+def scale_year_start_jacobian_rows(jac: YearStartJacobian, factor: np.ndarray) -> YearStartJacobian:
+    """jacobian of factor * y from the jacobian of y, factor being constant"""
+    diagonal, first_column = jac
+    return diagonal * factor, first_column * factor
+
+
+def scale_year_start_jacobian_columns(jac: YearStartJacobian, inner_jac_diagonal: YearStartJacobian) -> YearStartJacobian:
+    """chain rule J @ D when the inner jacobian D is diagonal (its first column is ignored)"""
+    diagonal, first_column = jac
+    return diagonal * inner_jac_diagonal[0], first_column * inner_jac_diagonal[0][0]
+
+
+def add_year_start_jacobians(jac_1: YearStartJacobian, jac_2: YearStartJacobian) -> YearStartJacobian:
+    return jac_1[0] + jac_2[0], jac_1[1] + jac_2[1]
+
+
+def mean_gradient(jac: YearStartJacobian) -> np.ndarray:
+    """gradient of the mean over years of y, from the jacobian of y"""
+    diagonal, first_column = jac
+    gradient = (diagonal / len(diagonal)).astype(np.result_type(diagonal, first_column))
+    gradient[0] += np.sum(first_column) / len(diagonal)
+    return gradient
+
+
+def compute_quantity_pc_sensitivities(consumption_pc: np.ndarray, energy_price: np.ndarray) -> Tuple[
+    np.ndarray, YearStartJacobian, YearStartJacobian]:
+    """
+    Quantity per capita (see compute_quantity_pc) and its jacobians wrt consumption per capita and energy price
+    """
+    quantity_year_start = consumption_pc[0] / energy_price[0]
+    quantity = consumption_pc / energy_price
+    utility_quantity_pc = quantity / quantity_year_start
+
+    d_quantity_pc_d_consumption_pc = (1 / energy_price / quantity_year_start,
+                                      - quantity / quantity_year_start ** 2 / energy_price[0])
+    d_quantity_pc_d_energy_price = (- consumption_pc / energy_price ** 2 / quantity_year_start,
+                                    quantity / quantity_year_start ** 2 * consumption_pc[0] / energy_price[0] ** 2)
+    return utility_quantity_pc, d_quantity_pc_d_consumption_pc, d_quantity_pc_d_energy_price
 
-    return jac_consumption(*args), jac_energy_price(*args), jac_population(*args)
+
+def compute_utility_quantities_bis_sensitivities(years: np.ndarray, consumption_pc: np.ndarray,
+                                                 energy_price: np.ndarray, population: np.ndarray,
+                                                 init_rate_time_pref: float, scurve_shift: float,
+                                                 scurve_stretch: float) -> dict:
+    """
+    Analytic jacobians of all the quantities of compute_utility_quantities_bis, computed in one pass.
+
+    :return: {quantity name: (d quantity / d consumption_pc, d quantity / d energy price, d quantity / d population)},
+        each jacobian being a (diagonal, first_column) pair (see year_start_jacobian_to_dense)
+    """
+    year_start = int(years[0])
+    year_end = int(years[-1])
+    years_range = np.arange(year_start, year_end + 1)
+
+    quantity_pc, d_quantity_pc_d_consumption_pc, d_quantity_pc_d_energy_price = \
+        compute_quantity_pc_sensitivities(consumption_pc, energy_price)
+    utility_pc = s_curve_function(quantity_pc, scurve_shift, scurve_stretch)
+    d_utility_pc_d_quantity_pc = s_curve_function_der(quantity_pc, scurve_shift, scurve_stretch)
+    discount_rate = compute_utility_discount_rate(years_range, year_start, init_rate_time_pref)
+    discounted_utility_pc = utility_pc * discount_rate
+    pop_ratio = population / population[0]
+    d_pop_ratio_d_population = (np.ones_like(population) / population[0], - population / population[0] ** 2)
+
+    null_jacobian = (np.zeros_like(quantity_pc), np.zeros_like(quantity_pc))
+    sensitivities = {
+        GlossaryCore.UtilityDiscountRate: (null_jacobian, null_jacobian, null_jacobian),
+        GlossaryCore.UtilityQuantity: (d_quantity_pc_d_consumption_pc, d_quantity_pc_d_energy_price, null_jacobian),
+    }
+    for quantity_name, factor in [
+        (GlossaryCore.PerCapitaUtilityQuantity, d_utility_pc_d_quantity_pc),
+        (GlossaryCore.DiscountedUtilityQuantityPerCapita, d_utility_pc_d_quantity_pc * discount_rate),
+        (GlossaryCore.DiscountedQuantityUtilityPopulation, pop_ratio * d_utility_pc_d_quantity_pc * discount_rate),
+    ]:
+        sensitivities[quantity_name] = (scale_year_start_jacobian_rows(d_quantity_pc_d_consumption_pc, factor),
+                                        scale_year_start_jacobian_rows(d_quantity_pc_d_energy_price, factor),
+                                        null_jacobian)
+    sensitivities[GlossaryCore.DiscountedQuantityUtilityPopulation] = \
+        sensitivities[GlossaryCore.DiscountedQuantityUtilityPopulation][:2] + \
+        (scale_year_start_jacobian_rows(d_pop_ratio_d_population, discounted_utility_pc),)
+
+    return sensitivities
+
+
+def compute_utility_quantities_sensitivities(years: np.ndarray, consumption: np.ndarray, energy_price: np.ndarray,
+                                             population: np.ndarray, init_rate_time_pref: float, scurve_shift: float,
+                                             scurve_stretch: float) -> dict:
+    """
+    Analytic jacobians of all the quantities of compute_utility_quantities, computed in one pass.
+    Same as compute_utility_quantities_bis_sensitivities with consumption per capita = consumption / population
+    """
+    sensitivities_bis = compute_utility_quantities_bis_sensitivities(
+        years, consumption / population, energy_price, population, init_rate_time_pref, scurve_shift, scurve_stretch)
+    d_consumption_pc_d_consumption = (1 / population, np.zeros_like(population))
+    d_consumption_pc_d_population = (- consumption / population ** 2, np.zeros_like(population))
+
+    sensitivities = {}
+    for quantity_name, (d_consumption_pc, d_energy_price, d_population) in sensitivities_bis.items():
+        sensitivities[quantity_name] = (
+            scale_year_start_jacobian_columns(d_consumption_pc, d_consumption_pc_d_consumption),
+            d_energy_price,
+            add_year_start_jacobians(d_population, scale_year_start_jacobian_columns(d_consumption_pc, d_consumption_pc_d_population)),
+        )
+    return sensitivities
+
+
+def compute_utility_objective_bis_sensitivities(years_range: np.ndarray, consumption_pc: np.ndarray,
+                                                energy_price: np.ndarray, population: np.ndarray,
+                                                init_rate_time_pref: float, scurve_shift: float, scurve_stretch: float,
+                                                multiply_by_pop: bool) -> Tuple[
+    YearStartJacobian, YearStartJacobian, YearStartJacobian]:
+    """
+    Analytic jacobians of the yearly terms of compute_utility_objective_bis (before the mean over years) wrt
+    consumption per capita, energy price and population, computed in one pass
+    """
+    quantity_pc, d_quantity_pc_d_consumption_pc, d_quantity_pc_d_energy_price = \
+        compute_quantity_pc_sensitivities(consumption_pc, energy_price)
+    utility_pc = 1 - s_curve_function(quantity_pc, scurve_shift, scurve_stretch)
+    discount_rate = compute_utility_discount_rate(years_range, years_range[0], init_rate_time_pref)
+    factor = - s_curve_function_der(quantity_pc, scurve_shift, scurve_stretch) * discount_rate
+    d_population = (np.zeros_like(population), np.zeros_like(population))
+    if multiply_by_pop:
+        pop_ratio = population[0] / population
+        factor = pop_ratio * factor
+        d_pop_ratio_d_population = (- population[0] / population ** 2, 1 / population)
+        d_population = scale_year_start_jacobian_rows(d_pop_ratio_d_population, utility_pc * discount_rate)
+
+    return (scale_year_start_jacobian_rows(d_quantity_pc_d_consumption_pc, factor),
+            scale_year_start_jacobian_rows(d_quantity_pc_d_energy_price, factor),
+            d_population)
 
 
 def compute_decreasing_gdp_obj(output_net_of_damage: np.ndarray):
@@ -308,6 +479,20 @@ def s_curve_function(x: np.ndarray, shift: float, stretch: float) -> np.ndarray:
     return 1.0 / (1.0 + s)
 
 
+def s_curve_function_der(x: np.ndarray, shift: float, stretch: float) -> np.ndarray:
+    """
+    Compute the derivative of the S-curve function wrt its input.
+
+    :param x: Input array
+    :param shift: Shift parameter
+    :param stretch: Stretch parameter
+    :return: S-curve function derivative values, stretch * s / (1 + s) ** 2 with s = exp(-(x - 1 - shift) * stretch)
+    """
+    y = (x - 1.0 - shift) * stretch
+    s = np.exp(-y)
+    return stretch * s / (1.0 + s) ** 2
+
+
 def plot_s_curve(x: np.ndarray, shift: float, stretch: float, show: bool = False) -> go.Figure:
     """
     Create a Plotly plot of the S-curve transformation.
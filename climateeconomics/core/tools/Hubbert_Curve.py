@@ -15,66 +15,93 @@ See the License for the specific language governing permissions and
 limitations under the License.
 '''
 
+import hashlib
+from collections import OrderedDict
+
 import numpy as np
-import pandas as pd
 
 from climateeconomics.glossarycore import GlossaryCore
 
+# Hubbert regressions only depend on the past production data, which almost never change between two computes.
+# Parameters and curves are kept in a cache shared by all the resource models of the process, keyed by a hash of the
+# content of the inputs and bounded to the HUBBERT_CACHE_SIZE last used regressions
+HUBBERT_CACHE_SIZE = 128
+_hubbert_cache = OrderedDict()
 
-def compute_Hubbert_regression(past_production, production_years, regression_start, resource_type):
-    
+
+def clear_Hubbert_cache():
     '''
-    Compute Hubbert Regression Curve from past production
+    Empty the cache of Hubbert regressions
     '''
-    # initialization
-    past_production_years=past_production[GlossaryCore.Years]
-    cumulative_production = pd.DataFrame(
-        {GlossaryCore.Years: past_production_years, f'{resource_type}': np.zeros(len(past_production_years))})
-    ratio_P_by_Q = pd.DataFrame({GlossaryCore.Years: past_production_years, f'{resource_type}': np.zeros(len(past_production_years))})
-    
-    # Cf documentation for the hubbert curve computing
-    Q = 0  # Q is the cumulative production at one precise year
-
-    # compute cumulative production, the production, and the ratio
-    # dataframe for each year
-    for i_year, pp_year in enumerate(past_production_years):
-        P = past_production.loc[i_year, resource_type]
-        cumulative_production.loc[i_year,
-                                       resource_type] = Q + P
-        Q = cumulative_production.loc[i_year, resource_type]
-        ratio_P_by_Q.loc[i_year, resource_type] = P / Q
-    
-    # keep only the part you want to make a regression on
-    cumulative_sample = cumulative_production.loc[
-        cumulative_production[GlossaryCore.Years] >= regression_start]
-    
+    _hubbert_cache.clear()
 
-    ratio_sample = ratio_P_by_Q.loc[ratio_P_by_Q[GlossaryCore.Years] >= regression_start]
 
-    fit = np.polyfit(
-        cumulative_sample[resource_type], ratio_sample[resource_type], 1)
+def get_Hubbert_cache_key(past_production_years, past_production, production_years, regression_start, resource_type):
+    '''
+    Hash of the content of the inputs of a Hubbert regression
+    '''
+    digest = hashlib.sha1()
+    for array in (past_production_years, past_production, production_years):
+        array = np.ascontiguousarray(array)
+        digest.update(array.dtype.str.encode())
+        digest.update(array.tobytes())
+    digest.update(f'{regression_start}|{resource_type}'.encode())
+    return digest.hexdigest()
+
 
-    w = fit[1]  # imaginary frequency
-    
+def compute_Hubbert_parameters(past_production_years, past_production, regression_start):
+    '''
+    Fit the Hubbert parameters from past production P:
+    the ratio P/Q is a linear function of the cumulative production Q, P/Q = w (1 - Q / Q_inf),
+    with w the imaginary frequency and Q_inf the sum of the available and recoverable reserve.
+    tho, year of the resource peak, is the mean of the values given by each year of the regression sample
+    '''
+    # Cf documentation for the hubbert curve computing
+    # Q is the cumulative production at each year
+    cumulative_production = np.cumsum(past_production)
+    ratio_P_by_Q = past_production / cumulative_production
+
+    # keep only the part you want to make a regression on
+    sample = past_production_years >= regression_start
+    cumulative_sample = cumulative_production[sample]
+    fit = np.polyfit(cumulative_sample, ratio_P_by_Q[sample], 1)
 
+    w = fit[1]  # imaginary frequency
     # sum of the available and recoverable reserve (predict by Hubbert
     # pyworld3 from the start of the exploitation to the end)
     Q_inf = -1 * (w / fit[0])
+    # compute of all the possible values of Tho according to Q and P and
+    # take the mean values
+    tho = np.mean(np.log((Q_inf / cumulative_sample - 1) * np.exp(past_production_years[sample] * w)) * (1 / w))
+    return Q_inf, w, tho
+
 
+def compute_Hubbert_curve(Q_inf, w, tho, production_years):
+    '''
+    Production of the Hubbert curve at each of the production years
+    '''
+    production_years = np.asarray(production_years)
+    return Q_inf * w * ((1 / (np.exp((-(w / 2)) * (tho - production_years)) + np.exp((w / 2) * (tho - production_years)))) ** 2)
 
-    tho = 0  # year of resource peak
 
-    # compute of all the possible values of Tho according to Q and P and
-    # take the mean values
-    for ind in cumulative_sample.index:
-        tho = tho + np.log((Q_inf / cumulative_sample.loc[ind, resource_type] - 1) * np.exp(
-            cumulative_sample.loc[ind, GlossaryCore.Years] * w)) * (1 / w)
-    tho = tho / len(cumulative_sample.index)
-
-    # compute hubbert curve values
-    predictable_production = []
-    for year in production_years:
-        predictable_production += [Q_inf * w * (
-                (1 / (np.exp((-(w / 2)) * (tho - year)) + np.exp((w / 2) * (tho - year)))) ** 2),]
+def compute_Hubbert_regression(past_production, production_years, regression_start, resource_type):
     
-    return predictable_production
\ No newline at end of file
+    '''
+    Compute Hubbert Regression Curve from past production
+    The curve is only computed once for given past production, production years and regression start
+    '''
+    past_production_years = past_production[GlossaryCore.Years].values
+    resource_past_production = past_production[resource_type].values
+    key = get_Hubbert_cache_key(past_production_years, resource_past_production, production_years,
+                                regression_start, resource_type)
+    if key in _hubbert_cache:
+        _hubbert_cache.move_to_end(key)
+    else:
+        Q_inf, w, tho = compute_Hubbert_parameters(past_production_years, resource_past_production, regression_start)
+        _hubbert_cache[key] = (Q_inf, w, tho), compute_Hubbert_curve(Q_inf, w, tho, production_years)
+        if len(_hubbert_cache) > HUBBERT_CACHE_SIZE:
+            _hubbert_cache.popitem(last=False)
+    _, predictable_production = _hubbert_cache[key]
+
+    # copy so that the cached curve cannot be modified by the caller
+    return predictable_production.copy()
@@ -0,0 +1,138 @@
+'''
+Copyright 2024 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+ZERO_BLOCK = 'zero'
+DIAGONAL_BLOCK = 'diagonal'
+DENSE_BLOCK = 'dense'
+
+
+# scalar types whose repr gives their exact value
+HASHABLE_SCALAR_TYPES = (str, bytes, bool, int, float, complex, np.number, np.bool_, type(None))
+
+
+def update_inputs_hash(sha, value) -> None:
+    """
+    feeds the content of an input value (dataframe, series, array, dict, list or scalar) to the hash.
+    Containers are hashed by their full content (no truncated repr), raises a TypeError for other types so that the
+    caller does not cache values it can not tell apart
+    """
+    if isinstance(value, pd.DataFrame):
+        sha.update(b'dataframe')
+        update_inputs_hash(sha, value.index.to_numpy())
+        for column in value.columns:
+            sha.update(str(column).encode())
+            update_inputs_hash(sha, value[column].to_numpy())
+    elif isinstance(value, pd.Series):
+        sha.update(b'series' + str(value.name).encode())
+        update_inputs_hash(sha, value.index.to_numpy())
+        update_inputs_hash(sha, value.to_numpy())
+    elif isinstance(value, np.ndarray) and value.dtype != object:
+        sha.update(str(value.dtype).encode() + str(value.shape).encode())
+        sha.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        sha.update(b'dict')
+        for key in sorted(value, key=str):
+            sha.update(str(key).encode())
+            update_inputs_hash(sha, value[key])
+    elif isinstance(value, (list, tuple, np.ndarray)):
+        sha.update(b'list' + str(len(value)).encode())
+        for element in value:
+            update_inputs_hash(sha, element)
+    elif isinstance(value, HASHABLE_SCALAR_TYPES):
+        sha.update(type(value).__name__.encode() + repr(value).encode())
+    else:
+        raise TypeError(f'Can not hash the content of a {type(value).__name__} input')
+
+
+def compact_partial_derivative(value) -> tuple:
+    """
+    Compact storage of a partial derivative : structurally zero blocks only keep their shape and dtype, diagonal
+    blocks their diagonal, other blocks are copied as they are
+    """
+    if isinstance(value, np.ndarray) and value.ndim == 2:
+        if not np.any(value):
+            return ZERO_BLOCK, (value.shape, value.dtype)
+        if value.shape[0] == value.shape[1]:
+            diagonal = np.diag(value)
+            if np.count_nonzero(value) == np.count_nonzero(diagonal):
+                return DIAGONAL_BLOCK, diagonal.copy()
+        return DENSE_BLOCK, value.copy()
+    return DENSE_BLOCK, value
+
+
+def expand_partial_derivative(block_type: str, data):
+    """partial derivative stored by compact_partial_derivative"""
+    if block_type == ZERO_BLOCK:
+        shape, dtype = data
+        return np.zeros(shape, dtype=dtype)
+    if block_type == DIAGONAL_BLOCK:
+        return np.diag(data)
+    return data.copy() if isinstance(data, np.ndarray) else data
+
+
+class JacobianCache:
+    """
+    LRU cache of the partial derivatives of a discipline, keyed by the content of its inputs.
+
+    Newton and GS iterations linearize the disciplines again even when their inputs did not change, the cached
+    partial derivatives are then set again instead of being recomputed. Entries are lists of
+    (y_key_column, x_key_column, value) as given to set_partial_derivative_for_other_types.
+    """
+
+    def __init__(self, max_size: int = 4):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def get_key(inputs: dict) -> str:
+        """key of the cache, sha1 of the content of the inputs. Raises a TypeError if an input can not be hashed"""
+        sha = hashlib.sha1()
+        update_inputs_hash(sha, inputs)
+        return sha.hexdigest()
+
+    def get(self, key: str) -> list | None:
+        """returns the cached partial derivatives, None if the key is not in the cache"""
+        if key not in self._entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return [(y_key_column, x_key_column, expand_partial_derivative(*compact_value))
+                for y_key_column, x_key_column, compact_value in self._entries[key]]
+
+    def put(self, key: str, partial_derivatives: list) -> None:
+        if not partial_derivatives:
+            raise ValueError('No partial derivative to cache, a cache hit would set zero gradients')
+        self._entries[key] = [(y_key_column, x_key_column, compact_partial_derivative(value))
+                              for y_key_column, x_key_column, value in partial_derivatives]
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
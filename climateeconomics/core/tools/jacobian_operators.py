@@ -0,0 +1,285 @@
+'''
+Copyright 2024 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from climateeconomics.core.tools.linear_recurrence import (
+    geometric_impulse_response,
+    geometric_recurrence_jacobian,
+)
+
+
+class JacobianOperator(ABC):
+    """
+    Square (nb_years x nb_years) jacobian that keeps track of its structure.
+
+    Gradients of the models are mostly diagonal (elementwise equations) or lower triangular (recurrences over years).
+    Chaining them as dense matrices costs O(n^3) per product, whereas the structured products below are O(n) for
+    diagonal/banded operators and O(n^2) for lower triangular ones.
+    Dense matrices should only be built with to_dense() when handing the result to the discipline.
+    Subclasses must implement to_dense and _scale, the generic operations below fall back on them.
+    """
+    # make numpy defer ndarray @ operator, ndarray + operator, ... to the reflected methods of the operator
+    __array_ufunc__ = None
+
+    def __init__(self, size: int):
+        self.size = size
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.size, self.size
+
+    @property
+    def is_lower(self) -> bool:
+        return False
+
+    @abstractmethod
+    def to_dense(self) -> np.ndarray:
+        """dense (size x size) matrix of the operator"""
+
+    @abstractmethod
+    def _scale(self, factor: float) -> JacobianOperator:
+        """operator multiplied by a scalar factor"""
+
+    def _add_operator(self, other: JacobianOperator) -> JacobianOperator | np.ndarray:
+        if self.is_lower and other.is_lower:
+            return LowerTriangularJacobian(self.to_dense() + other.to_dense())
+        return self.to_dense() + other.to_dense()
+
+    def _matmul_operator(self, other: JacobianOperator) -> JacobianOperator | np.ndarray:
+        if self.is_lower and other.is_lower:
+            return LowerTriangularJacobian(self.to_dense() @ other.to_dense())
+        return self.to_dense() @ other.to_dense()
+
+    def __matmul__(self, other):
+        if isinstance(other, JacobianOperator):
+            return self._matmul_operator(other)
+        return self.to_dense() @ other
+
+    def __rmatmul__(self, other):
+        if isinstance(other, JacobianOperator):
+            return other._matmul_operator(self)
+        return other @ self.to_dense()
+
+    def __add__(self, other):
+        if isinstance(other, JacobianOperator):
+            return self._add_operator(other)
+        return self.to_dense() + other
+
+    def __radd__(self, other):
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        return self + (-other)
+
+    def __rsub__(self, other):
+        return (-self) + other
+
+    def __neg__(self):
+        return self._scale(-1.)
+
+    def __mul__(self, other):
+        if np.isscalar(other):
+            return self._scale(other)
+        return NotImplemented
+
+    def __rmul__(self, other):
+        return self.__mul__(other)
+
+    def __truediv__(self, other):
+        if np.isscalar(other):
+            return self._scale(1. / other)
+        return NotImplemented
+
+
+class BandedJacobian(JacobianOperator):
+    """
+    Jacobian with a few non-zero diagonals.
+
+    bands maps an offset k to an array of length size such that J[i, i + k] = bands[k][i]
+    (same offset convention as np.diag). Entries of the array falling outside the matrix are ignored and kept at 0.
+    """
+
+    def __init__(self, bands: dict[int, np.ndarray], size: int):
+        super().__init__(size)
+        self.bands = {}
+        for offset, values in bands.items():
+            band = np.zeros(size, dtype=np.result_type(values, float))
+            valid_rows = self._valid_rows(offset, size)
+            band[valid_rows] = np.broadcast_to(values, (size,))[valid_rows]
+            self.bands[offset] = band
+
+    @staticmethod
+    def _valid_rows(offset: int, size: int) -> slice:
+        # empty slice when the band lies outside the matrix (abs(offset) >= size)
+        return slice(min(size, max(0, -offset)), max(0, min(size, size - offset)))
+
+    @property
+    def is_lower(self) -> bool:
+        return all(offset <= 0 for offset in self.bands)
+
+    def to_dense(self) -> np.ndarray:
+        dense = np.zeros(self.shape, dtype=np.result_type(float, *self.bands.values()))
+        rows = np.arange(self.size)
+        for offset, band in self.bands.items():
+            valid_rows = rows[self._valid_rows(offset, self.size)]
+            dense[valid_rows, valid_rows + offset] = band[valid_rows]
+        return dense
+
+    def _scale(self, factor: float) -> BandedJacobian:
+        return BandedJacobian({offset: factor * band for offset, band in self.bands.items()}, self.size)
+
+    def _shifted_band(self, offset: int, shift: int) -> np.ndarray:
+        """returns s such that s[i] = bands[offset][i + shift], 0 when i + shift is out of range"""
+        band = self.bands[offset]
+        shifted = np.zeros(self.size, dtype=band.dtype)
+        if abs(shift) >= self.size:
+            return shifted
+        if shift >= 0:
+            shifted[:self.size - shift] = band[shift:]
+        else:
+            shifted[-shift:] = band[:self.size + shift]
+        return shifted
+
+    def _add_operator(self, other):
+        if isinstance(other, BandedJacobian):
+            bands = dict(self.bands)
+            for offset, band in other.bands.items():
+                bands[offset] = bands[offset] + band if offset in bands else band
+            return BandedJacobian(bands, self.size)
+        return super()._add_operator(other)
+
+    def _matmul_operator(self, other):
+        if isinstance(other, BandedJacobian):
+            # (A @ B)[i, i + ka + kb] += A[i, i + ka] * B[i + ka, i + ka + kb]
+            bands = {}
+            for offset_a, band_a in self.bands.items():
+                for offset_b in other.bands:
+                    product = band_a * other._shifted_band(offset_b, offset_a)
+                    offset = offset_a + offset_b
+                    bands[offset] = bands[offset] + product if offset in bands else product
+            return BandedJacobian(bands, self.size)
+        if isinstance(other, LowerTriangularJacobian) and self.is_lower:
+            return LowerTriangularJacobian(self @ other.matrix)
+        return super()._matmul_operator(other)
+
+    def __matmul__(self, other):
+        if isinstance(other, np.ndarray):
+            result = np.zeros((self.size,) + other.shape[1:], dtype=np.result_type(other, *self.bands.values()))
+            for offset, band in self.bands.items():
+                valid_rows = self._valid_rows(offset, self.size)
+                valid_cols = slice(valid_rows.start + offset, valid_rows.stop + offset)
+                result[valid_rows] += (band[valid_rows] * other[valid_cols].T).T
+            return result
+        return super().__matmul__(other)
+
+
+class DiagonalJacobian(BandedJacobian):
+    """Jacobian of an elementwise (year by year) relation"""
+
+    def __init__(self, values: np.ndarray | float, size: int | None = None):
+        values = np.asarray(values)
+        if size is None:
+            size = len(values)
+        super().__init__({0: values}, size)
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.bands[0]
+
+    @classmethod
+    def identity(cls, size: int) -> DiagonalJacobian:
+        return cls(np.ones(size))
+
+    @classmethod
+    def zeros(cls, size: int) -> DiagonalJacobian:
+        return cls(np.zeros(size))
+
+    def to_dense(self) -> np.ndarray:
+        return np.diag(self.values)
+
+    def _scale(self, factor: float) -> DiagonalJacobian:
+        return DiagonalJacobian(factor * self.values)
+
+    def _add_operator(self, other):
+        if isinstance(other, DiagonalJacobian):
+            return DiagonalJacobian(self.values + other.values)
+        if isinstance(other, LowerTriangularJacobian):
+            return LowerTriangularJacobian(other.matrix + np.diag(self.values))
+        return super()._add_operator(other)
+
+    def _matmul_operator(self, other):
+        if isinstance(other, DiagonalJacobian):
+            return DiagonalJacobian(self.values * other.values)
+        if isinstance(other, LowerTriangularJacobian):
+            return LowerTriangularJacobian(self.values[:, np.newaxis] * other.matrix)
+        return super()._matmul_operator(other)
+
+    def __matmul__(self, other):
+        if isinstance(other, np.ndarray):
+            return (self.values * other.T).T
+        return super().__matmul__(other)
+
+    def __rmatmul__(self, other):
+        if isinstance(other, JacobianOperator):
+            return other._matmul_operator(self)
+        return other * self.values
+
+
+class LowerTriangularJacobian(JacobianOperator):
+    """Jacobian of a causal relation over years (value at year i only depends on inputs at years <= i)"""
+
+    def __init__(self, matrix: np.ndarray):
+        super().__init__(matrix.shape[0])
+        self.matrix = matrix
+
+    @property
+    def is_lower(self) -> bool:
+        return True
+
+    @classmethod
+    def geometric_recurrence(cls, decay: float, size: int) -> LowerTriangularJacobian:
+        """
+        Jacobian of x wrt u for the recurrence x[0] = cst, x[t] = decay * x[t-1] + u[t-1]:
+        J[i, j] = decay ** (i - 1 - j) for j < i, 0 elsewhere, built as a Toeplitz matrix of the powers of decay
+        """
+        return cls(geometric_recurrence_jacobian(geometric_impulse_response(size, decay)))
+
+    def to_dense(self) -> np.ndarray:
+        return self.matrix
+
+    def _scale(self, factor: float) -> LowerTriangularJacobian:
+        return LowerTriangularJacobian(factor * self.matrix)
+
+    def _add_operator(self, other):
+        if isinstance(other, DiagonalJacobian):
+            return other._add_operator(self)
+        return super()._add_operator(other)
+
+    def _matmul_operator(self, other):
+        if isinstance(other, DiagonalJacobian):
+            return LowerTriangularJacobian(self.matrix * other.values)
+        return super()._matmul_operator(other)
+
+
+def to_dense(jacobian: JacobianOperator | np.ndarray) -> np.ndarray:
+    """Dense matrix of a jacobian, whether it is a structured operator or already an array"""
+    if isinstance(jacobian, JacobianOperator):
+        return jacobian.to_dense()
+    return jacobian
@@ -0,0 +1,208 @@
+'''
+Copyright 2024 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+from __future__ import annotations
+
+from typing import Union
+
+import numpy as np
+from scipy.signal import lfilter
+
+Coefficient = Union[float, np.ndarray]
+
+
+def linear_recurrence_transition(size: int, decay: Coefficient) -> np.ndarray:
+    """
+    Transition products of the recurrence x[t] = a[t] * x[t-1] + ...
+
+    returns P such that P[t, m] = a[m+1] * ... * a[t] = d x[t] / d x[m] for t >= m (P[t, t] = 1), and 0 for t < m.
+    A constant decay gives the geometric Toeplitz matrix a ** (t - m), a time-varying one is built with a cumulative
+    product over years (no division, so null coefficients are handled).
+    """
+    lag = np.subtract.outer(np.arange(size), np.arange(size))
+    if np.ndim(decay) == 0:
+        return np.where(lag >= 0, np.asarray(decay, dtype=float) ** np.maximum(lag, 0), 0.)
+    decay = np.asarray(decay)
+    factors = np.where(lag > 0, decay[:, np.newaxis], 1.)
+    return np.where(lag >= 0, np.cumprod(factors, axis=0), 0.)
+
+
+def linear_recurrence_jacobian(size: int,
+                               decay: Coefficient,
+                               input_coefficient: Coefficient = 1.,
+                               input_lag: int = 1,
+                               saturated_steps: np.ndarray | list | None = None,
+                               clipped_rows: np.ndarray | list | None = None) -> np.ndarray:
+    """
+    Exact jacobian d x / d u of the first order linear recurrence
+
+        x[0] fixed
+        x[t] = a[t] * x[t-1] + b[t] * u[t - input_lag]   for t >= 1
+
+    a (decay) and b (input_coefficient) are scalars or arrays of length size.
+    J[t, s] = b[s + input_lag] * a[s + input_lag + 1] * ... * a[t] for 1 <= s + input_lag <= t, 0 elsewhere.
+
+    :param saturated_steps: years where the recurrence is clipped (x[t] set to a bound), derivatives do not flow
+        through these years
+    :param clipped_rows: years where only the output is clipped, the recurrence itself goes on unclipped
+    """
+    input_coefficient = np.broadcast_to(np.asarray(input_coefficient, dtype=float), (size,)).copy()
+    if saturated_steps is not None and len(saturated_steps) > 0:
+        decay = np.broadcast_to(np.asarray(decay, dtype=float), (size,)).copy()
+        decay[saturated_steps] = 0.
+        input_coefficient[saturated_steps] = 0.
+    # year at which the input u[s] enters the recurrence
+    entry_year = np.arange(size) + input_lag
+    valid_columns = (entry_year >= 1) & (entry_year < size)
+
+    jacobian = np.zeros((size, size))
+    transition = linear_recurrence_transition(size, decay)
+    jacobian[:, valid_columns] = transition[:, entry_year[valid_columns]] * input_coefficient[entry_year[valid_columns]]
+    if clipped_rows is not None:
+        jacobian[clipped_rows, :] = 0.
+    return jacobian
+
+
+def solve_linear_recurrence(initial_value: float,
+                            inputs: np.ndarray,
+                            decay: Coefficient,
+                            input_coefficient: Coefficient = 1.,
+                            input_lag: int = 1,
+                            constant: Coefficient = 0.) -> np.ndarray:
+    """
+    Trajectory of x[0] = initial_value, x[t] = a[t] * x[t-1] + b[t] * u[t - input_lag] + c[t], without loop on years
+    """
+    size = len(inputs)
+    transition = linear_recurrence_transition(size, decay)
+    constant_term = np.broadcast_to(np.asarray(constant, dtype=float), (size,)).copy()
+    constant_term[0] = 0.
+    return transition[:, 0] * initial_value + \
+        linear_recurrence_jacobian(size, decay, input_coefficient, input_lag) @ inputs + \
+        transition @ constant_term
+
+
+def matrix_powers(matrix: np.ndarray, nb_powers: int) -> np.ndarray:
+    """
+    Powers matrix ** k for k in 0..nb_powers-1, of shape (nb_powers, dim, dim).
+    Computed by doubling: the k first powers times matrix ** k give the k next ones, so only log2(nb_powers) batched
+    matrix products are needed (no loop on years)
+    """
+    matrix = np.asarray(matrix)
+    dim = matrix.shape[0]
+    powers = np.zeros((nb_powers, dim, dim), dtype=np.result_type(matrix, float))
+    powers[0] = np.identity(dim)
+    nb_filled = 1
+    # power_block = matrix ** nb_filled
+    power_block = matrix
+    while nb_filled < nb_powers:
+        nb_new = min(nb_filled, nb_powers - nb_filled)
+        powers[nb_filled:nb_filled + nb_new] = powers[:nb_new] @ power_block
+        nb_filled += nb_new
+        power_block = power_block @ power_block
+    return powers
+
+
+def lower_triangular_toeplitz(first_columns: np.ndarray) -> np.ndarray:
+    """
+    Lower triangular Toeplitz matrices T[..., t, m] = c[..., t - m] for t >= m, 0 elsewhere, from their first
+    columns c of shape (..., size).
+    Returned as a read-only strided view on the columns (no copy), copy it before writing into it
+    """
+    first_columns = np.asarray(first_columns)
+    size = first_columns.shape[-1]
+    padded = np.concatenate([np.zeros(first_columns.shape[:-1] + (size - 1,), dtype=first_columns.dtype),
+                             first_columns], axis=-1)
+    return np.lib.stride_tricks.sliding_window_view(padded, size, axis=-1)[..., ::-1]
+
+
+def linear_state_space_jacobian(size: int,
+                                transition: np.ndarray,
+                                input_vector: np.ndarray,
+                                input_lag: int = 1) -> np.ndarray:
+    """
+    Exact jacobian d x / d u of the multidimensional first order linear recurrence
+
+        x[0] fixed
+        x[t] = A @ x[t-1] + b * u[t - input_lag]   for t >= 1
+
+    with x a state of dimension d, A (transition) a (d, d) constant matrix and b (input_vector) of length d.
+    returns J of shape (d, size, size) with J[k, t, s] = (A ** (t - s - input_lag) @ b)[k] for 1 <= s + input_lag <= t
+    """
+    # impulse response A ** k @ b for each lag k, shape (d, size)
+    impulse_response = (matrix_powers(transition, size) @ np.asarray(input_vector)).T
+    toeplitz = lower_triangular_toeplitz(impulse_response)
+    # year at which the input u[s] enters the recurrence
+    entry_year = np.arange(size) + input_lag
+    valid_columns = (entry_year >= 1) & (entry_year < size)
+    jacobian = np.zeros((len(impulse_response), size, size), dtype=impulse_response.dtype)
+    jacobian[:, :, valid_columns] = toeplitz[:, :, entry_year[valid_columns]]
+    return jacobian
+
+
+def solve_linear_state_space(initial_state: np.ndarray,
+                             inputs: np.ndarray,
+                             transition: np.ndarray,
+                             input_vector: np.ndarray,
+                             input_lag: int = 1) -> np.ndarray:
+    """
+    Trajectory of x[0] = initial_state, x[t] = A @ x[t-1] + b * u[t - input_lag], without loop on years
+    returns an array of shape (size, d)
+    """
+    size = len(inputs)
+    free_response = matrix_powers(transition, size) @ np.asarray(initial_state)
+    forced_response = linear_state_space_jacobian(size, transition, input_vector, input_lag) @ inputs
+    return free_response + forced_response.T
+
+
+def geometric_impulse_response(size: int, decay: float, input_coefficient: float = 1., input_lag: int = 1) -> np.ndarray:
+    """
+    Impulse response of the constant coefficient recurrence x[t] = a * x[t-1] + b * u[t - input_lag]:
+    h[k] = d x[t] / d u[t - k] = b * a ** (k - input_lag) for k >= input_lag, 0 before
+    """
+    lags = np.arange(size) - input_lag
+    return np.where(lags >= 0, input_coefficient * np.asarray(decay) ** np.maximum(lags, 0), 0.)
+
+
+def geometric_recurrence_jacobian(impulse_response: np.ndarray, input_lag: int = 1) -> np.ndarray:
+    """
+    Jacobian d x / d u of a constant coefficient recurrence from its impulse response h (..., size):
+    J[..., t, s] = h[..., t - s], the input of the first year is not used when input_lag = 0 (x[0] is fixed)
+    """
+    jacobian = lower_triangular_toeplitz(impulse_response).copy()
+    if input_lag == 0:
+        jacobian[..., 0] = 0.
+    return jacobian
+
+
+def solve_geometric_recurrence(initial_value: float | np.ndarray,
+                               inputs: np.ndarray,
+                               decay: float,
+                               input_coefficient: float = 1.,
+                               input_lag: int = 1,
+                               equilibrium: float = 0.) -> np.ndarray:
+    """
+    Trajectories of x[0] = initial_value, x[t] = a * x[t-1] + b * u[t - input_lag] + (1 - a) * equilibrium
+    with constant coefficients, as the sum of the free response and of the convolution of the inputs with the impulse
+    response (no python loop on years). inputs of shape (..., size) give stacked trajectories of the same shape.
+    The discounted convolution with the geometric impulse response is run as a first order IIR filter, which is exact
+    for complex step derivatives, unlike FFT convolutions
+    """
+    size = inputs.shape[-1]
+    free_response = np.asarray(decay) ** np.arange(size)
+    # input entering the recurrence at year t, x[0] is fixed so the inputs entering before year 1 are not used
+    lagged_inputs = np.zeros_like(inputs)
+    lagged_inputs[..., max(input_lag, 1):] = inputs[..., max(1 - input_lag, 0):size - input_lag]
+    forced_response = lfilter([input_coefficient], [1., -decay], lagged_inputs, axis=-1)
+    return equilibrium + (np.asarray(initial_value)[..., np.newaxis] - equilibrium) * free_response + forced_response
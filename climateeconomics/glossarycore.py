@@ -77,6 +77,7 @@ class GlossaryCore:
     InvestmentsValue = "investment"
     ccus_type = "CCUS"
     CheckRangeBeforeRunBoolName = "check_range_before_run_bool_name"
+    DeferDiagnosticOutputsName = "defer_diagnostic_outputs"
     SectorGdpPart = "Part of the GDP per sector [T$]"
     ChartSectorGDPPercentage = "Part of the GDP per sector [%]"
     SectionGdpPart = "Part of the GDP per section [T$]"
@@ -1158,6 +1159,15 @@ class GlossaryCore:
         },
     }
 
+    TemperatureEnsembleDfValue = "temperature_ensemble_df"
+    TemperatureEnsembleDf = {
+        "var_name": TemperatureEnsembleDfValue,
+        "type": "dataframe",
+        "unit": "°C",
+        "description": "Atmospheric temperature increase of each member of the FAIR parameters ensemble, one column per member",
+        "dynamic_dataframe_columns": True,
+    }
+
     UtilityQuantity = "utility_quantity"
     UtilityDiscountRate = "u_discount_rate"
     DiscountedQuantityUtilityPopulation = "Discounted quantity utility population"
@@ -1693,6 +1703,16 @@ class GlossaryCore:
         "default": False,
     }
 
+    DeferDiagnosticOutputs = {
+        "var_name": DeferDiagnosticOutputsName,
+        "type": "bool",
+        "default": False,
+        "user_level": 3,
+        "structuring": True,
+        "description": "If True, outputs only used for post-processing (GDP per group of countries and per country) "
+                       "are not outputs of the discipline, post-processings compute them from the economics detail",
+    }
+
     # objective functions
     CO2EmissionsObjectiveValue = "CO2EmissionsObjective"
     CO2EmissionsObjective = {
@@ -20,6 +20,9 @@ from sostrades_core.tools.post_processing.charts.two_axes_instanciated_chart imp
     TwoAxesInstanciatedChart,
 )
 
+from climateeconomics.core.core_witness.macroeconomics_model_v1 import (
+    compute_regionalised_gdp,
+)
 from climateeconomics.core.tools.post_proc import get_scenario_value
 from climateeconomics.glossarycore import GlossaryCore
 
@@ -59,12 +62,20 @@ def post_processings(execution_engine, scenario_name, chart_filters=None):
             if chart_filter.filter_key == 'Charts':
                 chart_list = chart_filter.selected_values
 
-    if GlossaryCore.ChartGDPPerGroup in chart_list:
-
-        # get variable with total gdp per region
+    # get variables with gdp per region and per country
+    economics_df = get_scenario_value(execution_engine, f'Macroeconomics.{GlossaryCore.EconomicsDetailDfValue}', scenario_name)
+    defer_diagnostic_outputs = get_scenario_value(execution_engine, f'Macroeconomics.{GlossaryCore.DeferDiagnosticOutputsName}', scenario_name)
+    if defer_diagnostic_outputs:
+        # not outputs of the macroeconomics discipline, compute them from the total gdp
+        total_gdp_per_region_df, total_percentage_per_region_df, total_gdp_per_countries_df = compute_regionalised_gdp(
+            economics_df[GlossaryCore.Years].values, economics_df[GlossaryCore.OutputNetOfDamage].values)
+    else:
         total_gdp_per_region_df = get_scenario_value(execution_engine, GlossaryCore.TotalGDPGroupDFName, scenario_name)
+        total_percentage_per_region_df = get_scenario_value(execution_engine, GlossaryCore.PercentageGDPGroupDFName, scenario_name)
+        total_gdp_per_countries_df = get_scenario_value(execution_engine, GlossaryCore.GDPCountryDFName, scenario_name)
+    years = list(total_gdp_per_region_df[GlossaryCore.Years])
 
-        years = list(total_gdp_per_region_df[GlossaryCore.Years])
+    if GlossaryCore.ChartGDPPerGroup in chart_list:
 
         chart_name = 'GDP-PPP adjusted per group of countries in T$2020'
         # create new chart
@@ -86,9 +97,6 @@ def post_processings(execution_engine, scenario_name, chart_filters=None):
 
     if GlossaryCore.ChartPercentagePerGroup in chart_list:
 
-        # get variable with total gdp per region
-        total_percentage_per_region_df = get_scenario_value(execution_engine, GlossaryCore.PercentageGDPGroupDFName, scenario_name)
-
         chart_name = 'Percentage of GDP-PPP adjusted per group of countries in [%]'
         # create new chart
         new_chart = TwoAxesInstanciatedChart(GlossaryCore.Years, 'Percentage of GDP per group of countries in [%]',
@@ -110,9 +118,6 @@ def post_processings(execution_engine, scenario_name, chart_filters=None):
 
     # The ten of countries with the highest GDP per year
     if GlossaryCore.ChartGDPBiggestEconomies in chart_list:
-        # get variable with total GDP per countries
-        total_gdp_per_countries_df = get_scenario_value(execution_engine, GlossaryCore.GDPCountryDFName, scenario_name)
-        economics_df = get_scenario_value(execution_engine, f'Macroeconomics.{GlossaryCore.EconomicsDetailDfValue}', scenario_name)
         # Take the year 2020 as a reference to determine the ten biggest countries in terms of GDP
         # Rank GDP in descending order to select the x countries with the biggest GDP
         # Find the name of the x biggest  countries
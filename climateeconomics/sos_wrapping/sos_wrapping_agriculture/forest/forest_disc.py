@@ -14,6 +14,7 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 '''
+import logging
 
 from energy_models.core.stream_type.energy_models.biomass_dry import BiomassDry
 from sostrades_core.tools.post_processing.charts.chart_filter import ChartFilter
@@ -29,6 +30,7 @@ from climateeconomics.core.core_forest.forest import ForestAutodiff
 from climateeconomics.core.core_witness.climateeco_discipline import (
     ClimateEcoDiscipline,
 )
+from climateeconomics.core.tools.jacobian_cache import JacobianCache
 from climateeconomics.database import DatabaseWitnessCore
 from climateeconomics.glossarycore import GlossaryCore
 
@@ -270,6 +272,12 @@ class ForestDiscipline(AutodifferentiedDisc):
     }
 
     FOREST_CHARTS = 'Forest chart'
+    JACOBIAN_CACHE_SIZE = 4
+
+    def __init__(self, sos_name, logger: logging.Logger):
+        super().__init__(sos_name, logger)
+        self.jacobian_cache = JacobianCache(self.JACOBIAN_CACHE_SIZE)
+        self.recorded_partial_derivatives = None
 
     def setup_sos_disciplines(self):
         self.update_default_values()
@@ -284,6 +292,38 @@ class ForestDiscipline(AutodifferentiedDisc):
     def init_execution(self):
         self.model = ForestAutodiff()
 
+    def compute_sos_jacobian(self):
+        """
+        Autodiff gradients are cached by inputs content, Newton and GS iterations often linearize the discipline
+        again with unchanged inputs
+        """
+        try:
+            cache_key = self.jacobian_cache.get_key(self.get_sosdisc_inputs())
+        except TypeError:
+            # an input can not be hashed by content, gradients are not cached
+            super().compute_sos_jacobian()
+            return
+        cached_partial_derivatives = self.jacobian_cache.get(cache_key)
+        if cached_partial_derivatives is not None:
+            for y_key_column, x_key_column, value in cached_partial_derivatives:
+                self.set_partial_derivative_for_other_types(y_key_column, x_key_column, value)
+            return
+
+        self.recorded_partial_derivatives = []
+        try:
+            super().compute_sos_jacobian()
+            # gradients set through another path than set_partial_derivative_for_other_types are not recorded,
+            # nothing is cached rather than replaying zero gradients
+            if self.recorded_partial_derivatives:
+                self.jacobian_cache.put(cache_key, self.recorded_partial_derivatives)
+        finally:
+            self.recorded_partial_derivatives = None
+
+    def set_partial_derivative_for_other_types(self, y_key_column, x_key_column, value):
+        if self.recorded_partial_derivatives is not None:
+            self.recorded_partial_derivatives.append((y_key_column, x_key_column, value))
+        super().set_partial_derivative_for_other_types(y_key_column, x_key_column, value)
+
     def get_chart_filter_list(self):
 
         # For the outputs, making a graph for tco vs year for each range and for specific
@@ -282,20 +282,9 @@ class GHGemissionsDiscipline(ClimateEcoDiscipline):
             (GlossaryCore.EnergyProductionValue, GlossaryCore.TotalProductionValue),
             d_carbon_intensity_d_energy_prod)
 
-        d_sector_energy_emissions_d_ghg_emissions = {}
-        d_sector_energy_emissions_d_energy_prod = {}
         d_section_energy_emissions_d_section_energy_consumption = self.emissions_model.d_section_energy_emissions_d_section_energy_consumption()
         for sector in self.emissions_model.economic_sectors_except_agriculture:
-            d_sector_energy_emissions_d_ghg_emissions[sector] = {}
-            d_energy_emissions_sections_d_energy_prod_list = []
-
-            d_sections_energy_emissions_d_ghg_emisssions = {ghg: [] for ghg in GlossaryCore.GreenHouseGases}
-            #d_sections_non_energy_emissions_d_gdp_sections = {ghg: [] for ghg in GlossaryCore.GreenHouseGases}
             for section in GlossaryCore.SectionDictSectors[sector]:
-
-                d_section_energy_emissions_d_energy_prod = self.emissions_model.d_section_energy_emissions_d_user_input(section_name=section, sector_name=sector, d_carbon_intensity_d_user_input=d_carbon_intensity_d_energy_prod)
-                d_energy_emissions_sections_d_energy_prod_list.append(d_section_energy_emissions_d_energy_prod)
-
                 self.set_partial_derivative_for_other_types(
                     (GlossaryCore.EconomicsEmissionDfValue, GlossaryCore.EnergyEmissions),
                     (f"{sector}.{GlossaryCore.SectionEnergyConsumptionDfValue}", section),
@@ -326,38 +315,33 @@ class GHGemissionsDiscipline(ClimateEcoDiscipline):
                     d_sector_section_non_energy_emissions_d_section_gdp)
 
                 for ghg in GlossaryCore.GreenHouseGases:
-                    d_sections_energy_emissions_d_ghg_emisssions[ghg].append(self.emissions_model.d_section_energy_emissions_d_user_input(section_name=section, sector_name=sector, d_carbon_intensity_d_user_input=d_energy_carbon_intensity_d_ghg_total_emissions[ghg]))
                     self.set_partial_derivative_for_other_types(
                         (f"{sector}.{GlossaryCore.SectionEnergyEmissionDfValue}", section),
                         ('GHG_total_energy_emissions', GlossaryCore.insertGHGTotalEmissions.format(ghg)),
-                        d_sections_energy_emissions_d_ghg_emisssions[ghg][-1])
-
-            d_sector_energy_emissions_d_energy_prod[sector] = np.sum(d_energy_emissions_sections_d_energy_prod_list, axis=0)
-
-            for ghg in GlossaryCore.GreenHouseGases:
-                d_sector_energy_emissions_d_ghg_emissions[sector][ghg] = np.sum(d_sections_energy_emissions_d_ghg_emisssions[ghg], axis=0)
+                        self.emissions_model.d_section_energy_emissions_d_user_input(section_name=section, sector_name=sector, d_carbon_intensity_d_user_input=d_energy_carbon_intensity_d_ghg_total_emissions[ghg]))
 
         if self.emissions_model.economic_sectors_except_agriculture:
+            d_economics_energy_emissions_d_energy_prod = self.emissions_model.d_economics_energy_emissions_d_user_input(d_carbon_intensity_d_energy_prod)
             self.set_partial_derivative_for_other_types(
                 (GlossaryCore.EconomicsEmissionDfValue, GlossaryCore.EnergyEmissions),
                 (GlossaryCore.EnergyProductionValue, GlossaryCore.TotalProductionValue),
-                np.sum(list(d_sector_energy_emissions_d_energy_prod.values()), axis=0))
+                d_economics_energy_emissions_d_energy_prod)
 
             self.set_partial_derivative_for_other_types(
                 (GlossaryCore.EconomicsEmissionDfValue, GlossaryCore.TotalEmissions),
                 (GlossaryCore.EnergyProductionValue, GlossaryCore.TotalProductionValue),
-                np.sum(list(d_sector_energy_emissions_d_energy_prod.values()), axis=0))
+                d_economics_energy_emissions_d_energy_prod)
 
             for ghg in GlossaryCore.GreenHouseGases:
-                temp = [d_sector_energy_emissions_d_ghg_emissions[sector][ghg] for sector in self.emissions_model.economic_sectors_except_agriculture]
+                d_economics_energy_emissions_d_ghg_emissions = self.emissions_model.d_economics_energy_emissions_d_user_input(d_energy_carbon_intensity_d_ghg_total_emissions[ghg])
                 self.set_partial_derivative_for_other_types(
                     (GlossaryCore.EconomicsEmissionDfValue, GlossaryCore.EnergyEmissions),
                     ('GHG_total_energy_emissions', GlossaryCore.insertGHGTotalEmissions.format(ghg)),
-                    np.sum(temp, axis=0))
+                    d_economics_energy_emissions_d_ghg_emissions)
                 self.set_partial_derivative_for_other_types(
                     (GlossaryCore.EconomicsEmissionDfValue, GlossaryCore.TotalEmissions),
                     ('GHG_total_energy_emissions', GlossaryCore.insertGHGTotalEmissions.format(ghg)),
-                    np.sum(temp, axis=0))
+                    d_economics_energy_emissions_d_ghg_emissions)
 
     def get_chart_filter_list(self):
 
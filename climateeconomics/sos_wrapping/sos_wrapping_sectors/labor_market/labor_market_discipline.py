@@ -16,6 +16,7 @@ limitations under the License.
 '''
 from copy import deepcopy
 
+import numpy as np
 from sostrades_core.tools.post_processing.charts.chart_filter import ChartFilter
 from sostrades_core.tools.post_processing.charts.two_axes_instanciated_chart import (
     InstanciatedSeries,
@@ -114,17 +115,22 @@ class LaborMarketDiscipline(ClimateEcoDiscipline):
         net_output and invest wrt sector net_output 
         """
         sector_list = self.get_sosdisc_inputs(GlossaryCore.SectorListValue)
-        # Gradient wrt working age population
-        grad_workforcetotal = self.labor_model.compute_dworkforcetotal_dworkagepop()
+        # Gradient wrt working age population and workforce shares, diagonal blocks
+        d_sectors_workforce_d_wap, d_workforce_total_d_wap = self.labor_model.d_workforce_d_working_age_population()
+        d_workforce_d_share = np.diag(self.labor_model.d_workforce_d_workforce_share())
         self.set_partial_derivative_for_other_types((GlossaryCore.WorkforceDfValue, GlossaryCore.Workforce),
                                                         (GlossaryCore.WorkingAgePopulationDfValue, GlossaryCore.Population1570),
-                                                        grad_workforcetotal)
+                                                        np.diag(d_workforce_total_d_wap))
         for sector in sector_list:
-            grad_workforcesector = self.labor_model.compute_dworkforcesector_dworkagepop(sector)
             self.set_partial_derivative_for_other_types((GlossaryCore.WorkforceDfValue, sector),
                                                         (GlossaryCore.WorkingAgePopulationDfValue, GlossaryCore.Population1570),
-                                                        grad_workforcesector)
-            
+                                                        np.diag(d_sectors_workforce_d_wap[self.labor_model.SECTORS_LIST.index(sector)]))
+            self.set_partial_derivative_for_other_types((GlossaryCore.WorkforceDfValue, sector),
+                                                        ('workforce_share_per_sector', sector),
+                                                        d_workforce_d_share)
+            self.set_partial_derivative_for_other_types((GlossaryCore.WorkforceDfValue, GlossaryCore.Workforce),
+                                                        ('workforce_share_per_sector', sector),
+                                                        d_workforce_d_share)
 
     def get_chart_filter_list(self):
 
@@ -32,6 +32,7 @@ from climateeconomics.core.core_sectorization.sector_model import SectorModel
 from climateeconomics.core.core_witness.climateeco_discipline import (
     ClimateEcoDiscipline,
 )
+from climateeconomics.core.tools.jacobian_operators import to_dense
 from climateeconomics.glossarycore import GlossaryCore
 
 
@@ -253,11 +254,11 @@ class SectorDiscipline(ClimateEcoDiscipline):
         self.set_partial_derivative_for_other_types(
             (f"{self.sector_name}.{GlossaryCore.CapitalDfValue}", GlossaryCore.Capital),
             (invest_df, GlossaryCore.InvestmentsValue),
-            d_capital_d_invests)
+            to_dense(d_capital_d_invests))
         self.set_partial_derivative_for_other_types(
             (f"{self.sector_name}.{GlossaryCore.ConstraintUpperBoundUsableCapital}",),
             (invest_df, GlossaryCore.InvestmentsValue),
-            d_ku_constraint_d_invests)
+            to_dense(d_ku_constraint_d_invests))
 
         # gradients wrt energy production
         d_gross_output_d_energy, d_net_output_d_energy, d_damages_d_energy, d_estimated_damages_d_energy,\
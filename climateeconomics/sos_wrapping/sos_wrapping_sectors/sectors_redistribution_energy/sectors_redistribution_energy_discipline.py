@@ -21,6 +21,7 @@ from sostrades_core.tools.post_processing.charts.two_axes_instanciated_chart imp
     TwoAxesInstanciatedChart,
 )
 
+from climateeconomics.core.tools.jacobian_operators import to_dense
 from climateeconomics.glossarycore import GlossaryCore
 from climateeconomics.sos_wrapping.sos_wrapping_sectors.sectors_redistribution_energy.sectors_redistribution_energy_model import (
     SectorRedistributionEnergyModel,
@@ -99,75 +100,69 @@ class SectorsRedistributionEnergyDiscipline(SoSWrapp):
     def compute_sos_jacobian(self):
         """compute gradients"""
         inputs = self.get_sosdisc_inputs()
-        deduced_sector = GlossaryCore.get_deduced_sector()
+        model = SectorRedistributionEnergyModel()
+        model.configure(inputs)
+        model.compute_energy_redistribution_arrays()
+        deduced_sector = model.deduced_sector
+        nb_years = len(model.total_energy_production)
 
-        total_energy_production = inputs[GlossaryCore.EnergyProductionValue][GlossaryCore.TotalProductionValue].values
+        d_categories_energy_d_total_energy = model.d_categories_energy_d_total_energy_production()
+        d_category_energy_d_share = to_dense(model.d_categories_energy_d_shares())
 
-        sum_share_other_sectors = []
         for sector in GlossaryCore.SectorsValueOptim:
-            sector_share_energy = inputs[f'{sector}.{GlossaryCore.ShareSectorEnergyDfValue}'][GlossaryCore.ShareSectorEnergy].values
-
             self.set_partial_derivative_for_other_types(
                 (GlossaryCore.AllSectorsShareEnergyDfValue, sector),
                 (f'{sector}.{GlossaryCore.ShareSectorEnergyDfValue}', GlossaryCore.ShareSectorEnergy),
-                np.identity(len(total_energy_production))
+                np.identity(nb_years)
             )
 
             self.set_partial_derivative_for_other_types(
                 (GlossaryCore.AllSectorsShareEnergyDfValue, deduced_sector),
                 (f'{sector}.{GlossaryCore.ShareSectorEnergyDfValue}', GlossaryCore.ShareSectorEnergy),
-                - np.identity(len(total_energy_production))
+                - np.identity(nb_years)
             )
 
-            sum_share_other_sectors.append(sector_share_energy)
             self.set_partial_derivative_for_other_types(
                 (f'{sector}.{GlossaryCore.EnergyProductionValue}', GlossaryCore.TotalProductionValue),
                 (GlossaryCore.EnergyProductionValue, GlossaryCore.TotalProductionValue),
-                np.diag(sector_share_energy / 100.)
+                to_dense(d_categories_energy_d_total_energy[sector])
             )
 
             self.set_partial_derivative_for_other_types(
                 (f'{sector}.{GlossaryCore.EnergyProductionValue}', GlossaryCore.TotalProductionValue),
                 (f'{sector}.{GlossaryCore.ShareSectorEnergyDfValue}', GlossaryCore.ShareSectorEnergy),
-                np.diag(total_energy_production / 100.)
+                d_category_energy_d_share
             )
 
             self.set_partial_derivative_for_other_types(
                 (f'{deduced_sector}.{GlossaryCore.EnergyProductionValue}', GlossaryCore.TotalProductionValue),
                 (f'{sector}.{GlossaryCore.ShareSectorEnergyDfValue}', GlossaryCore.ShareSectorEnergy),
-                np.diag(-total_energy_production / 100.)
+                - d_category_energy_d_share
             )
         #For residential
-        res_share_energy = inputs[f'{GlossaryCore.ShareResidentialEnergyDfValue}'][GlossaryCore.ShareSectorEnergy].values
         self.set_partial_derivative_for_other_types(
             (f'{GlossaryCore.ResidentialEnergyConsumptionDfValue}', GlossaryCore.TotalProductionValue),
             (GlossaryCore.EnergyProductionValue, GlossaryCore.TotalProductionValue),
-            np.diag(res_share_energy / 100.)
+            to_dense(d_categories_energy_d_total_energy[GlossaryCore.ResidentialCategory])
         )
 
         self.set_partial_derivative_for_other_types(
             (f'{GlossaryCore.ResidentialEnergyConsumptionDfValue}', GlossaryCore.TotalProductionValue),
             (f'{GlossaryCore.ShareResidentialEnergyDfValue}', GlossaryCore.ShareSectorEnergy),
-            np.diag(total_energy_production / 100.)
+            d_category_energy_d_share
         )
 
         self.set_partial_derivative_for_other_types(
             (f'{deduced_sector}.{GlossaryCore.EnergyProductionValue}', GlossaryCore.TotalProductionValue),
             (f'{GlossaryCore.ShareResidentialEnergyDfValue}', GlossaryCore.ShareSectorEnergy),
-            np.diag(-total_energy_production / 100.)
+            - d_category_energy_d_share
         )
-        sum_share_other_sectors.append(res_share_energy)
 
         #Deduced sector
-        other_share_energy = inputs[f'{GlossaryCore.ShareOtherEnergyDfValue}'][
-            GlossaryCore.ShareSectorEnergy].values
-        sum_share_other_sectors.append(other_share_energy)
-        sum_share_other_sectors = np.sum(sum_share_other_sectors, axis=0)
-
         self.set_partial_derivative_for_other_types(
             (f'{deduced_sector}.{GlossaryCore.EnergyProductionValue}', GlossaryCore.TotalProductionValue),
             (GlossaryCore.EnergyProductionValue, GlossaryCore.TotalProductionValue),
-            np.diag(1 - sum_share_other_sectors / 100.)
+            to_dense(model.d_deduced_sector_energy_d_total_energy_production())
         )
 
     def get_chart_filter_list(self):
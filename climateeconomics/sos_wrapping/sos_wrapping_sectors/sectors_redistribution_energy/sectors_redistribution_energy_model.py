@@ -15,9 +15,11 @@ limitations under the License.
 '''
 from typing import Any, Union
 
+import numpy as np
 import pandas as pd
 from pandas import DataFrame
 
+from climateeconomics.core.tools.jacobian_operators import DiagonalJacobian
 from climateeconomics.glossarycore import GlossaryCore
 
 
@@ -29,6 +31,32 @@ class SectorRedistributionEnergyModel:
         self.sectors = list()
         self.deduced_sector = ""
         self.missing_sector_share = None
+        self.computed_sectors = list()
+        self.total_energy_production = None
+        self.categories_shares = None
+        self.categories_energy = None
+        self.missing_sector_energy = None
+
+    def compute_energy_redistribution_arrays(self):
+        """
+        Energy of the computed sectors, residential and "other" categories as one (n_categories, n_years) array :
+        category_energy = category_share (%) / 100 x total_energy_production.
+        The deduced sector gets the leftover energy
+        """
+        self.computed_sectors = [sector for sector in self.sectors if sector != self.deduced_sector]
+        self.total_energy_production = self.inputs[GlossaryCore.EnergyProductionValue][GlossaryCore.TotalProductionValue].values
+        shares_dfs = [self.inputs[f"{sector}.{GlossaryCore.ShareSectorEnergyDfValue}"] for sector in self.computed_sectors] + \
+                     [self.inputs[GlossaryCore.ShareResidentialEnergyDfValue], self.inputs[GlossaryCore.ShareOtherEnergyDfValue]]
+        self.categories_shares = np.array([share_df[GlossaryCore.ShareSectorEnergy].values for share_df in shares_dfs])
+        self.categories_energy = self.categories_shares / 100.0 * self.total_energy_production
+
+        # Compute leftover energy for last sector
+        self.missing_sector_energy = self.total_energy_production - self.categories_energy.sum(axis=0)
+        if self.missing_sector_energy.min() < 0:
+            raise ValueError("Shares of energy distribution between sectors are not good : they led to negative energy attribution for deduced sector")
+
+        # Compute leftover share as the ratio of sector energy and total energy production x 100
+        self.missing_sector_share = (self.missing_sector_energy / self.total_energy_production) * 100.0
 
     def compute_energy_redistribution(self) -> tuple[
         dict[Union[str, Any], DataFrame], DataFrame, DataFrame, DataFrame]:
@@ -36,105 +64,36 @@ class SectorRedistributionEnergyModel:
         Distribute total energy production between sectors using sector list and share per sector input
         In addition to sectors list energy is distributed for residential and "other" category
         """
-        total_energy_production: pd.DataFrame = self.inputs[
-            GlossaryCore.EnergyProductionValue
-        ]
-        total_energy_production_values = total_energy_production[
-            GlossaryCore.TotalProductionValue
-        ].values
-        all_sectors_energy_df = DataFrame({
-            GlossaryCore.Years: total_energy_production[GlossaryCore.Years]
-        })
-
-        all_sectors_share_df = DataFrame({
-            GlossaryCore.Years: total_energy_production[GlossaryCore.Years]
-        })
-
-        sectors_energy = {}
-        computed_sectors = list(
-            filter(lambda x: x != self.deduced_sector, self.sectors)
-        )
-        for sector in computed_sectors:
-            # Add sector share to dataframe
-            all_sectors_share_df[sector] = self.inputs[
-                f"{sector}.{GlossaryCore.ShareSectorEnergyDfValue}"
-            ][GlossaryCore.ShareSectorEnergy].values
-
-            # Compute energy for the sector
-            sector_energy_values = (
-                self.inputs[f"{sector}.{GlossaryCore.ShareSectorEnergyDfValue}"][
-                    GlossaryCore.ShareSectorEnergy
-                ].values
-                / 100.0
-                * total_energy_production_values
-            )
-
-            all_sectors_energy_df[sector] = sector_energy_values
-
-            sector_energy_df = pd.DataFrame(
-                {
-                    GlossaryCore.Years: total_energy_production[
-                        GlossaryCore.Years
-                    ].values,
-                    GlossaryCore.TotalProductionValue: sector_energy_values,
-                }
-            )
-
-            sectors_energy[sector] = sector_energy_df
-
-        # Residential energy
-        residential_energy_values = (
-            self.inputs[GlossaryCore.ShareResidentialEnergyDfValue][
-                GlossaryCore.ShareSectorEnergy
-            ].values
-            / 100
-            * total_energy_production_values
-        )
-
-        residential_energy_df = pd.DataFrame(
-            {
-                GlossaryCore.Years: total_energy_production[GlossaryCore.Years].values,
-                GlossaryCore.TotalProductionValue: residential_energy_values,
-            }
-        )
-        all_sectors_energy_df[GlossaryCore.ResidentialCategory] = (
-            residential_energy_values
-        )
+        self.compute_energy_redistribution_arrays()
+        energy_production_df: pd.DataFrame = self.inputs[GlossaryCore.EnergyProductionValue]
+        years = energy_production_df[GlossaryCore.Years].values
+        nb_computed_sectors = len(self.computed_sectors)
+        computed_sectors_energy = self.categories_energy[:nb_computed_sectors]
+        residential_energy_values, other_energy_values = self.categories_energy[nb_computed_sectors:]
+
+        # dataframes are only built for the outputs
+        sectors_energy = {sector: pd.DataFrame({GlossaryCore.Years: years,
+                                                GlossaryCore.TotalProductionValue: sector_energy_values})
+                          for sector, sector_energy_values in zip(self.computed_sectors, computed_sectors_energy)}
+        sectors_energy[self.deduced_sector] = pd.DataFrame({GlossaryCore.Years: years,
+                                                            GlossaryCore.TotalProductionValue: self.missing_sector_energy})
 
-        # Other category
-        other_energy_values = (
-            self.inputs[GlossaryCore.ShareOtherEnergyDfValue][
-                GlossaryCore.ShareSectorEnergy
-            ].values
-            / 100
-            * total_energy_production_values
-        )
-        all_sectors_energy_df[GlossaryCore.OtherEnergyCategory] = other_energy_values
-
-        # Compute leftover energy for last sector
-        missing_sector_energy = (
-            total_energy_production_values
-            - all_sectors_energy_df.loc[
-                :, all_sectors_energy_df.columns != GlossaryCore.Years
-            ]
-            .sum(axis=1)
-            .values
-        )
-        if missing_sector_energy.min() < 0:
-            raise ValueError("Shares of energy distribution between sectors are not good : they led to negative energy attribution for deduced sector")
+        all_sectors_energy_df = DataFrame({
+            GlossaryCore.Years: years,
+            **dict(zip(self.computed_sectors, computed_sectors_energy)),
+            GlossaryCore.ResidentialCategory: residential_energy_values,
+            GlossaryCore.OtherEnergyCategory: other_energy_values,
+            self.deduced_sector: self.missing_sector_energy,
+        }, index=energy_production_df.index)
 
-        all_sectors_energy_df[self.deduced_sector] = missing_sector_energy
-        sectors_energy[self.deduced_sector] = pd.DataFrame(
-            {
-                GlossaryCore.Years: total_energy_production[GlossaryCore.Years].values,
-                GlossaryCore.TotalProductionValue: missing_sector_energy,
-            }
-        )
+        residential_energy_df = pd.DataFrame({GlossaryCore.Years: years,
+                                              GlossaryCore.TotalProductionValue: residential_energy_values})
 
-        # Compute leftover share as the ratio of sector energy and total energy production x 100
-        all_sectors_share_df[self.deduced_sector] = (
-            missing_sector_energy / total_energy_production_values
-        ) * 100.0
+        all_sectors_share_df = DataFrame({
+            GlossaryCore.Years: years,
+            **dict(zip(self.computed_sectors, self.categories_shares[:nb_computed_sectors])),
+            self.deduced_sector: self.missing_sector_share,
+        }, index=energy_production_df.index)
 
         return (
             sectors_energy,
@@ -143,13 +102,16 @@ class SectorRedistributionEnergyModel:
             all_sectors_share_df,
         )
 
-    def compute(
-        self, inputs: dict
-    ) -> tuple[dict[Union[str, Any], DataFrame], DataFrame, DataFrame, DataFrame]:
+    def configure(self, inputs: dict):
         self.inputs = inputs
         self.sectors = GlossaryCore.SectorsPossibleValues
         self.deduced_sector = GlossaryCore.get_deduced_sector()
 
+    def compute(
+        self, inputs: dict
+    ) -> tuple[dict[Union[str, Any], DataFrame], DataFrame, DataFrame, DataFrame]:
+        self.configure(inputs)
+
         (
             sectors_energy,
             all_sectors_energy_df,
@@ -163,3 +125,22 @@ class SectorRedistributionEnergyModel:
             residential_energy_df,
             all_sectors_share_df,
         )
+
+    def d_categories_energy_d_total_energy_production(self) -> dict[str, DiagonalJacobian]:
+        """
+        gradients of the energy of the computed sectors, residential and "other" categories wrt total energy production
+        """
+        categories = self.computed_sectors + [GlossaryCore.ResidentialCategory, GlossaryCore.OtherEnergyCategory]
+        return {category: DiagonalJacobian(category_shares / 100.)
+                for category, category_shares in zip(categories, self.categories_shares)}
+
+    def d_deduced_sector_energy_d_total_energy_production(self) -> DiagonalJacobian:
+        """gradient of the deduced sector energy wrt total energy production"""
+        return DiagonalJacobian(1 - self.categories_shares.sum(axis=0) / 100.)
+
+    def d_categories_energy_d_shares(self) -> DiagonalJacobian:
+        """
+        gradient of the energy of a category wrt its share (%), the same for all the categories, the opposite for the
+        deduced sector
+        """
+        return DiagonalJacobian(self.total_energy_production / 100.)
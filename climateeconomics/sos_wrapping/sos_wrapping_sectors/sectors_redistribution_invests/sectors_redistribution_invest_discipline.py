@@ -23,6 +23,7 @@ from sostrades_core.tools.post_processing.charts.two_axes_instanciated_chart imp
     TwoAxesInstanciatedChart,
 )
 
+from climateeconomics.core.tools.jacobian_operators import to_dense
 from climateeconomics.glossarycore import GlossaryCore
 from climateeconomics.sos_wrapping.sos_wrapping_sectors.sectors_redistribution_invests.sectors_redistribution_invests_model import (
     SectorRedistributionInvestsModel,
@@ -107,19 +108,22 @@ class SectorsRedistributionInvestsDiscipline(SoSWrapp):
                     np.eye(len(inputs[f'{sector}.invest_mdo_df'][GlossaryCore.InvestmentsValue].values))
                 )
         else:
-            net_output = inputs[GlossaryCore.EconomicsDfValue][GlossaryCore.OutputNetOfDamage].values
+            model = SectorRedistributionInvestsModel()
+            model.configure(inputs)
+            model.compute_invest_redistribution_arrays()
+            d_sectors_invests_d_net_output = model.d_sectors_invests_d_net_output()
+            d_sector_invests_d_share = to_dense(model.d_sectors_invests_d_shares())
             for sector in sectors_list:
-                sector_share_invests = inputs[f'{sector}.{GlossaryCore.ShareSectorInvestmentDfValue}'][GlossaryCore.ShareInvestment].values
                 self.set_partial_derivative_for_other_types(
                     (f'{sector}.{GlossaryCore.InvestmentDfValue}', GlossaryCore.InvestmentsValue),
                     (GlossaryCore.EconomicsDfValue, GlossaryCore.OutputNetOfDamage),
-                    np.diag(sector_share_invests/ 100.)
+                    to_dense(d_sectors_invests_d_net_output[sector])
                 )
 
                 self.set_partial_derivative_for_other_types(
                     (f'{sector}.{GlossaryCore.InvestmentDfValue}', GlossaryCore.InvestmentsValue),
                     (f'{sector}.{GlossaryCore.ShareSectorInvestmentDfValue}', GlossaryCore.ShareInvestment),
-                    np.diag(net_output) / 100.
+                    d_sector_invests_d_share
                 )
 
     def get_chart_filter_list(self):
@@ -13,8 +13,10 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 '''
+import numpy as np
 import pandas as pd
 
+from climateeconomics.core.tools.jacobian_operators import DiagonalJacobian
 from climateeconomics.glossarycore import GlossaryCore
 
 
@@ -22,38 +24,63 @@ class SectorRedistributionInvestsModel:
     """model for energy and investment redistribution between economy sectors"""
     def __init__(self):
         self.inputs = dict()
+        self.sectors = GlossaryCore.SectorsPossibleValues
+        self.years = None
+        self.net_output = None
+        self.sectors_shares = None
+        self.sectors_invests = None
+        self.total_invests = None
+
+    def compute_invest_redistribution_arrays(self):
+        """
+        Investments of all the sectors as one (n_sectors, n_years) array :
+        sector_invest = sector_share_invest (%) / 100 x net_output, or investments given by the mdo in mdo mode
+        """
+        if not self.inputs["mdo_mode"]:
+            economics_df: pd.DataFrame = self.inputs[GlossaryCore.EconomicsDfValue]
+            self.years = economics_df[GlossaryCore.Years].values
+            self.net_output = economics_df[GlossaryCore.OutputNetOfDamage].values
+            self.sectors_shares = np.array([self.inputs[f'{sector}.{GlossaryCore.ShareSectorInvestmentDfValue}'][GlossaryCore.ShareInvestment].values
+                                            for sector in self.sectors])
+            self.sectors_invests = self.sectors_shares / 100. * self.net_output
+        else:
+            self.years = self.inputs[f'{self.sectors[-1]}.invest_mdo_df'][GlossaryCore.Years].values
+            self.sectors_invests = np.array([self.inputs[f'{sector}.invest_mdo_df'][GlossaryCore.InvestmentsValue].values
+                                             for sector in self.sectors])
+        self.total_invests = self.sectors_invests.sum(axis=0)
 
     def compute_invest_redistribution(self) -> tuple[dict, pd.DataFrame]:
         """distrubute total energy production between sectors"""
+        self.compute_invest_redistribution_arrays()
 
-        sectors_invests = {}
-        all_sectors_invests_df = {}
-        for sector in GlossaryCore.SectorsPossibleValues:
-            if not self.inputs["mdo_mode"]:
-                economics_df: pd.DataFrame = self.inputs[GlossaryCore.EconomicsDfValue]
-                net_output = economics_df[GlossaryCore.OutputNetOfDamage].values
-                sector_invests_values = self.inputs[f'{sector}.{GlossaryCore.ShareSectorInvestmentDfValue}'][
-                                            GlossaryCore.ShareInvestment].values / 100. * net_output
-                sector_invests_df = pd.DataFrame(
-                    {GlossaryCore.Years: economics_df[GlossaryCore.Years].values,
-                     GlossaryCore.InvestmentsValue: sector_invests_values}
-                )
-            else:
-                sector_invests_df = self.inputs[f'{sector}.invest_mdo_df']
-
-            all_sectors_invests_df[sector] = sector_invests_df[GlossaryCore.InvestmentsValue].values
-            all_sectors_invests_df[GlossaryCore.Years] = sector_invests_df[GlossaryCore.Years].values
-
-            sectors_invests[sector] = sector_invests_df
+        # sector dataframes are only built for the outputs
+        sectors_invests = {sector: pd.DataFrame({GlossaryCore.Years: self.years,
+                                                 GlossaryCore.InvestmentsValue: sector_invests})
+                           for sector, sector_invests in zip(self.sectors, self.sectors_invests)}
 
+        all_sectors_invests_df = {self.sectors[0]: self.sectors_invests[0], GlossaryCore.Years: self.years}
+        all_sectors_invests_df.update(zip(self.sectors[1:], self.sectors_invests[1:]))
+        all_sectors_invests_df[GlossaryCore.InvestmentsValue] = self.total_invests
         all_sectors_invests_df = pd.DataFrame(all_sectors_invests_df)
-        all_sectors_invests_df[GlossaryCore.InvestmentsValue] = all_sectors_invests_df[GlossaryCore.SectorsPossibleValues].sum(axis=1)
 
         return sectors_invests, all_sectors_invests_df
 
-    def compute(self, inputs: dict):
+    def configure(self, inputs: dict):
         self.inputs = inputs
 
+    def compute(self, inputs: dict):
+        self.configure(inputs)
+
         sectors_invests, all_sectors_invests_df = self.compute_invest_redistribution()
 
         return sectors_invests, all_sectors_invests_df
+
+    def d_sectors_invests_d_net_output(self) -> dict[str, DiagonalJacobian]:
+        """gradients of the investment of each sector wrt net output"""
+        return {sector: DiagonalJacobian(sector_shares / 100.) for sector, sector_shares in zip(self.sectors, self.sectors_shares)}
+
+    def d_sectors_invests_d_shares(self) -> DiagonalJacobian:
+        """
+        gradient of the investment of a sector wrt its share (%), the same for all the sectors
+        """
+        return DiagonalJacobian(self.net_output / 100.)
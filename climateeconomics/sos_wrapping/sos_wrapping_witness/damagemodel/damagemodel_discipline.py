@@ -27,6 +27,7 @@ from climateeconomics.core.core_witness.climateeco_discipline import (
     ClimateEcoDiscipline,
 )
 from climateeconomics.core.core_witness.damage_model import DamageModel
+from climateeconomics.core.tools.jacobian_operators import to_dense
 from climateeconomics.glossarycore import GlossaryCore
 
 
@@ -95,6 +96,8 @@ class DamageDiscipline(ClimateEcoDiscipline):
         'tp_a4': {'type': 'float', 'default': 6.754, 'user_level': 3, 'unit': '-'},
         'total_emissions_damage_ref': {'type': 'float', 'default': 60.0, 'unit': 'Gt', 'user_level': 2},
         'co2_damage_price_dev_formula': {'type': 'bool', 'default': False, 'visibility': 'Shared', 'namespace': GlossaryCore.NS_WITNESS},
+        'co2_damage_price_window': {'type': 'int', 'default': 25, 'unit': 'years', 'user_level': 3,
+                                    'description': 'number of years of damages averaged in the CO2 damage price'},
         GlossaryCore.FractionDamageToProductivityValue: {'type': 'float', 'default': 0.30, 'unit': '-', 'visibility': 'Shared', 'namespace': GlossaryCore.NS_WITNESS, 'user_level': 2},
         GlossaryCore.DamageDfValue: GlossaryCore.DamageDf,
         GlossaryCore.TemperatureDfValue: GlossaryCore.TemperatureDf,
@@ -215,7 +218,7 @@ class DamageDiscipline(ClimateEcoDiscipline):
             self.set_partial_derivative_for_other_types(
                 (GlossaryCore.CO2DamagePrice, GlossaryCore.CO2DamagePrice),
                 (GlossaryCore.DamageDfValue, GlossaryCore.EstimatedDamages),
-                self.model.d_co2_damage_price_d_damages())
+                to_dense(self.model.d_co2_damage_price_d_damages()))
 
     def get_chart_filter_list(self):
 
@@ -35,6 +35,7 @@ from climateeconomics.core.core_witness.climateeco_discipline import (
     ClimateEcoDiscipline,
 )
 from climateeconomics.core.core_witness.macroeconomics_model_v1 import MacroEconomics
+from climateeconomics.core.tools.jacobian_operators import to_dense
 from climateeconomics.database.database_witness_core import DatabaseWitnessCore
 from climateeconomics.glossarycore import GlossaryCore
 
@@ -122,6 +123,7 @@ class MacroeconomicsDiscipline(ClimateEcoDiscipline):
         GlossaryCore.UsableCapitalObjectiveRefName: GlossaryCore.UsableCapitalObjectiveRef,
         GlossaryCore.ConsumptionObjectiveRefValue: GlossaryCore.ConsumptionObjectiveRef,
         GlossaryCore.CheckRangeBeforeRunBoolName: GlossaryCore.CheckRangeBeforeRunBool,
+        GlossaryCore.DeferDiagnosticOutputsName: GlossaryCore.DeferDiagnosticOutputs,
         GlossaryCore.PandemicParamDfValue: GlossaryCore.PandemicParamDf,
         GlossaryCore.SectorEnergyConsumptionPercentageDfName: GlossaryCore.SectorEnergyConsumptionPercentageDf,
     }
@@ -150,9 +152,6 @@ class MacroeconomicsDiscipline(ClimateEcoDiscipline):
                                             'visibility': ClimateEcoDiscipline.SHARED_VISIBILITY,
                                             'namespace': GlossaryCore.NS_FUNCTIONS},
         GlossaryCore.UsableCapitalObjectiveName: GlossaryCore.UsableCapitalObjective,
-        GlossaryCore.TotalGDPGroupDFName: GlossaryCore.TotalGDPGroupDF,
-        GlossaryCore.PercentageGDPGroupDFName: GlossaryCore.PercentageGDPGroupDF,
-        GlossaryCore.GDPCountryDFName: GlossaryCore.GDPCountryDF,
         GlossaryCore.ResidentialEnergyConsumptionDfValue: GlossaryCore.ResidentialEnergyConsumptionDf,
         GlossaryCore.TempOutput: GlossaryCore.TempOutputDf,
     }
@@ -183,6 +182,14 @@ class MacroeconomicsDiscipline(ClimateEcoDiscipline):
                                                                'dataframe_edition_locked': False,
                                                                'namespace': GlossaryCore.NS_WITNESS}})
 
+            # outputs only used by post-processings, not declared if defer_diagnostic_outputs is True
+            # (post-processings then compute them from economics_detail_df)
+            if GlossaryCore.DeferDiagnosticOutputsName in self.get_data_in():
+                if not self.get_sosdisc_inputs(GlossaryCore.DeferDiagnosticOutputsName):
+                    dynamic_outputs.update({GlossaryCore.TotalGDPGroupDFName: GlossaryCore.TotalGDPGroupDF,
+                                            GlossaryCore.PercentageGDPGroupDFName: GlossaryCore.PercentageGDPGroupDF,
+                                            GlossaryCore.GDPCountryDFName: GlossaryCore.GDPCountryDF})
+
             if GlossaryCore.SectorListValue in self.get_data_in():
                 sectorlist = self.get_sosdisc_inputs(GlossaryCore.SectorListValue)
 
@@ -340,13 +347,15 @@ class MacroeconomicsDiscipline(ClimateEcoDiscipline):
                        GlossaryCore.ConstraintUpperBoundUsableCapital: self.macro_model.usable_capital_upper_bound_constraint,
                        GlossaryCore.ConsumptionObjective: self.macro_model.consommation_objective,
                        GlossaryCore.UsableCapitalObjectiveName: self.macro_model.usable_capital_objective,
-                       GlossaryCore.TotalGDPGroupDFName: self.macro_model.total_gdp_per_group_df,
-                       GlossaryCore.PercentageGDPGroupDFName: self.macro_model.percentage_gdp_per_group_df,
-                       GlossaryCore.GDPCountryDFName: self.macro_model.df_gdp_per_country,
                        GlossaryCore.ResidentialEnergyConsumptionDfValue: self.macro_model.energy_consumption_households_df,
                        GlossaryCore.AllSectionsGdpDfValue: self.macro_model.section_gdp_df,
                        GlossaryCore.TempOutput: self.macro_model.capital_df[GlossaryCore.TempOutputDf["dataframe_descriptor"].keys()],
                    }
+        if not param[GlossaryCore.DeferDiagnosticOutputsName]:
+            dict_values.update({GlossaryCore.TotalGDPGroupDFName: self.macro_model.total_gdp_per_group_df,
+                                GlossaryCore.PercentageGDPGroupDFName: self.macro_model.percentage_gdp_per_group_df,
+                                GlossaryCore.GDPCountryDFName: self.macro_model.df_gdp_per_country})
+
         dict_values.update({
             f"{sector}.{GlossaryCore.SectionEnergyConsumptionDfValue}": self.macro_model.dict_energy_consumption_detailed[sector]['detailed'] # todo : delete detailed and total
             for sector in self.macro_model.sector_list
@@ -375,35 +384,35 @@ class MacroeconomicsDiscipline(ClimateEcoDiscipline):
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.CapitalDfValue, GlossaryCore.UsableCapital),
             (GlossaryCore.EnergyProductionValue, GlossaryCore.TotalProductionValue),
-            d_usable_capital_d_energy)
+            to_dense(d_usable_capital_d_energy))
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.EconomicsDfValue, GlossaryCore.GrossOutput),
             (GlossaryCore.EnergyProductionValue, GlossaryCore.TotalProductionValue),
-            d_gross_output_d_energy)
+            to_dense(d_gross_output_d_energy))
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.EconomicsDfValue, GlossaryCore.OutputNetOfDamage),
             (GlossaryCore.EnergyProductionValue, GlossaryCore.TotalProductionValue),
-            d_net_output_d_energy)
+            to_dense(d_net_output_d_energy))
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.EconomicsDfValue, GlossaryCore.PerCapitaConsumption),
             (GlossaryCore.EnergyProductionValue, GlossaryCore.TotalProductionValue),
-            d_consumption_pc_d_energy)
+            to_dense(d_consumption_pc_d_energy))
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.DamageDfValue, GlossaryCore.Damages),
             (GlossaryCore.EnergyProductionValue, GlossaryCore.TotalProductionValue),
-            d_damages_d_energy)
+            to_dense(d_damages_d_energy))
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.DamageDfValue, GlossaryCore.EstimatedDamages),
             (GlossaryCore.EnergyProductionValue, GlossaryCore.TotalProductionValue),
-            d_estimated_damages_d_energy)
+            to_dense(d_estimated_damages_d_energy))
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.UsableCapitalObjectiveName,),
             (GlossaryCore.EnergyProductionValue, GlossaryCore.TotalProductionValue),
-            d_ku_obj_d_energy)
+            to_dense(d_ku_obj_d_energy))
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.ConstraintUpperBoundUsableCapital, GlossaryCore.ConstraintUpperBoundUsableCapital),
             (GlossaryCore.EnergyProductionValue, GlossaryCore.TotalProductionValue),
-            d_ku_ub_contraint)
+            to_dense(d_ku_ub_contraint))
 
         d_gross_output_d_dfo, d_net_output_d_dfo, d_consumption_pc_d_dfo, d_estimated_damages_d_dfo,\
         d_damages_d_dfo, d_energy_investment_d_dfo, dku_obj_d_dfo, dku_ub_constraint_d_dfo = self.macro_model.d_damage_frac_output()
@@ -411,46 +420,46 @@ class MacroeconomicsDiscipline(ClimateEcoDiscipline):
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.EconomicsDfValue, GlossaryCore.GrossOutput),
             (GlossaryCore.DamageFractionDfValue, GlossaryCore.DamageFractionOutput),
-            d_gross_output_d_dfo)
+            to_dense(d_gross_output_d_dfo))
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.EconomicsDfValue, GlossaryCore.OutputNetOfDamage),
             (GlossaryCore.DamageFractionDfValue, GlossaryCore.DamageFractionOutput),
-            d_net_output_d_dfo)
+            to_dense(d_net_output_d_dfo))
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.EconomicsDfValue, GlossaryCore.PerCapitaConsumption),
             (GlossaryCore.DamageFractionDfValue, GlossaryCore.DamageFractionOutput),
-            d_consumption_pc_d_dfo)
+            to_dense(d_consumption_pc_d_dfo))
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.DamageDfValue, GlossaryCore.Damages),
             (GlossaryCore.DamageFractionDfValue, GlossaryCore.DamageFractionOutput),
-            d_damages_d_dfo)
+            to_dense(d_damages_d_dfo))
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.DamageDfValue, GlossaryCore.EstimatedDamages),
             (GlossaryCore.DamageFractionDfValue, GlossaryCore.DamageFractionOutput),
-            d_estimated_damages_d_dfo)
+            to_dense(d_estimated_damages_d_dfo))
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.UsableCapitalObjectiveName,),
             (GlossaryCore.DamageFractionDfValue, GlossaryCore.DamageFractionOutput),
-            dku_obj_d_dfo)
+            to_dense(dku_obj_d_dfo))
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.ConstraintUpperBoundUsableCapital, GlossaryCore.ConstraintUpperBoundUsableCapital),
             (GlossaryCore.DamageFractionDfValue, GlossaryCore.DamageFractionOutput),
-            dku_ub_constraint_d_dfo)
+            to_dense(dku_ub_constraint_d_dfo))
 
         d_consumption_pc_d_snei, d_ine_dsnei, d_ku_obj_d_snei, d_ku_ub_constraint_d_snei = self.macro_model.d_share_invest_non_energy()
 
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.EconomicsDfValue, GlossaryCore.PerCapitaConsumption),
             (GlossaryCore.ShareNonEnergyInvestmentsValue, GlossaryCore.ShareNonEnergyInvestmentsValue),
-            d_consumption_pc_d_snei)
+            to_dense(d_consumption_pc_d_snei))
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.UsableCapitalObjectiveName,),
             (GlossaryCore.ShareNonEnergyInvestmentsValue, GlossaryCore.ShareNonEnergyInvestmentsValue),
-            d_ku_obj_d_snei)
+            to_dense(d_ku_obj_d_snei))
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.ConstraintUpperBoundUsableCapital, GlossaryCore.ConstraintUpperBoundUsableCapital),
             (GlossaryCore.ShareNonEnergyInvestmentsValue, GlossaryCore.ShareNonEnergyInvestmentsValue),
-            d_ku_ub_constraint_d_snei)
+            to_dense(d_ku_ub_constraint_d_snei))
 
         d_workforce_d_wap = self.macro_model.d_workforce_d_workagepop()
         d_gross_output_d_wap, d_net_output_d_wap, d_consumption_pc_d_wap,\
@@ -459,49 +468,49 @@ class MacroeconomicsDiscipline(ClimateEcoDiscipline):
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.WorkforceDfValue, GlossaryCore.Workforce),
             (GlossaryCore.WorkingAgePopulationDfValue, GlossaryCore.Population1570),
-            d_workforce_d_wap)
+            to_dense(d_workforce_d_wap))
 
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.EconomicsDfValue, GlossaryCore.GrossOutput),
             (GlossaryCore.WorkingAgePopulationDfValue, GlossaryCore.Population1570),
-            d_gross_output_d_wap)
+            to_dense(d_gross_output_d_wap))
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.EconomicsDfValue, GlossaryCore.OutputNetOfDamage),
             (GlossaryCore.WorkingAgePopulationDfValue, GlossaryCore.Population1570),
-            d_net_output_d_wap)
+            to_dense(d_net_output_d_wap))
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.EconomicsDfValue, GlossaryCore.PerCapitaConsumption),
             (GlossaryCore.WorkingAgePopulationDfValue, GlossaryCore.Population1570),
-            d_consumption_pc_d_wap)
+            to_dense(d_consumption_pc_d_wap))
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.TempOutput, GlossaryCore.PerCapitaConsumption),
             (GlossaryCore.WorkingAgePopulationDfValue, GlossaryCore.Population1570),
-            d_consumption_pc_d_wap)
+            to_dense(d_consumption_pc_d_wap))
 
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.DamageDfValue, GlossaryCore.Damages),
             (GlossaryCore.WorkingAgePopulationDfValue, GlossaryCore.Population1570),
-            d_damages_d_wap)
+            to_dense(d_damages_d_wap))
 
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.DamageDfValue, GlossaryCore.EstimatedDamages),
             (GlossaryCore.WorkingAgePopulationDfValue, GlossaryCore.Population1570),
-            d_estimated_damages_d_wap)
+            to_dense(d_estimated_damages_d_wap))
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.UsableCapitalObjectiveName,),
             (GlossaryCore.WorkingAgePopulationDfValue, GlossaryCore.Population1570),
-            d_ku_obj_d_wap)
+            to_dense(d_ku_obj_d_wap))
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.ConstraintUpperBoundUsableCapital, GlossaryCore.ConstraintUpperBoundUsableCapital),
             (GlossaryCore.WorkingAgePopulationDfValue, GlossaryCore.Population1570),
-            d_ku_constraint_d_wap)
+            to_dense(d_ku_constraint_d_wap))
 
         # # Compute gradients wrt population_df
         d_consumption_pc_d_population = self.macro_model.d_consumption_pc_d_population()
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.EconomicsDfValue, GlossaryCore.PerCapitaConsumption),
             (GlossaryCore.PopulationDfValue, GlossaryCore.PopulationValue),
-            d_consumption_pc_d_population)
+            to_dense(d_consumption_pc_d_population))
 
         # # Compute gradients with respect to energy_investment
         d_investment_d_energy_investment_wo_tax, d_energy_investment_d_energy_investment_wo_tax, \
@@ -517,7 +526,7 @@ class MacroeconomicsDiscipline(ClimateEcoDiscipline):
         self.set_partial_derivative_for_other_types(
              (GlossaryCore.EconomicsDfValue, GlossaryCore.PerCapitaConsumption),
              (GlossaryCore.EnergyInvestmentsWoTaxValue, GlossaryCore.EnergyInvestmentsWoTaxValue),
-             dconsumption_pc)
+             to_dense(dconsumption_pc))
 
         # # Compute gradient CO2 Taxes
         d_gross_output_dict = {
@@ -532,7 +541,7 @@ class MacroeconomicsDiscipline(ClimateEcoDiscipline):
                     self.set_partial_derivative_for_other_types(
                         (f"{sector}.{GlossaryCore.SectionGdpDfValue}", section),
                         (inputvar, column_name),
-                        d_section_d_gdp)
+                        to_dense(d_section_d_gdp))
 
         for sector in GlossaryCore.SectorsPossibleValues:
             for section in GlossaryCore.SectionDictSectors[sector]:
@@ -540,12 +549,12 @@ class MacroeconomicsDiscipline(ClimateEcoDiscipline):
                 self.set_partial_derivative_for_other_types(
                     (f"{sector}.{GlossaryCore.SectionEnergyConsumptionDfValue}", section),
                     (GlossaryCore.EnergyProductionValue, GlossaryCore.TotalProductionValue),
-                    d_section_energy_consumption_d_energy)
+                    to_dense(d_section_energy_consumption_d_energy))
 
         self.set_partial_derivative_for_other_types(
             (GlossaryCore.ResidentialEnergyConsumptionDfValue, GlossaryCore.TotalProductionValue),
             (GlossaryCore.EnergyProductionValue, GlossaryCore.TotalProductionValue),
-            self.macro_model.d_residential_energy_consumption_d_energy_prod())
+            to_dense(self.macro_model.d_residential_energy_consumption_d_energy_prod()))
 
     def get_chart_filter_list(self):
 
@@ -19,6 +19,7 @@ from copy import deepcopy
 
 import numpy as np
 import sostrades_core.tools.post_processing.post_processing_tools as ppt
+from pandas import DataFrame
 from sostrades_core.tools.post_processing.charts.chart_filter import ChartFilter
 from sostrades_core.tools.post_processing.charts.two_axes_instanciated_chart import (
     InstanciatedSeries,
@@ -106,6 +107,7 @@ class TempChangeDiscipline(ClimateEcoDiscipline):
 
     def setup_sos_disciplines(self):
         dynamic_inputs = {}
+        dynamic_outputs = {}
         self.update_default_values()
         if 'temperature_model' in self.get_data_in():
             temperature_model = self.get_sosdisc_inputs('temperature_model')
@@ -147,11 +149,24 @@ class TempChangeDiscipline(ClimateEcoDiscipline):
                     'type': 'float', 'default': 722., 'unit': 'ppm', 'user_level': 2}
                 dynamic_inputs['pre_indus_n2o_concentration_ppm'] = {
                     'type': 'float', 'default': 273., 'unit': 'ppm', 'user_level': 2}
+                dynamic_inputs['transient_climate_response'] = {
+                    'type': 'float', 'default': 1.6, 'unit': '°C', 'user_level': 3}
+                dynamic_inputs['fair_response_timescales'] = {
+                    'type': 'array', 'default': np.array([4.1, 239.]), 'unit': 'years', 'user_level': 3,
+                    'description': 'response timescales of the fast and slow thermal boxes'}
+                # each row is a member evaluated in the same call as the nominal parameters
+                dynamic_inputs['fair_ensemble_df'] = {
+                    'type': 'dataframe', 'unit': '-', 'user_level': 3,
+                    'default': DataFrame(columns=TempChange.FAIR_ENSEMBLE_COLUMNS, dtype=float),
+                    'dataframe_descriptor': {column: ('float', [0., 1e4], True) for column in TempChange.FAIR_ENSEMBLE_COLUMNS},
+                    'dataframe_edition_locked': False}
+                dynamic_outputs[GlossaryCore.TemperatureEnsembleDfValue] = GlossaryCore.get_dynamic_variable(GlossaryCore.TemperatureEnsembleDf)
         # var_names = ['forcing_model','init_forcing_nonco','hundred_forcing_nonco','pre_indus_ch4_concentration_ppm','pre_indus_n2o_concentration_ppm']
         # for var_name in var_names:
         #     if var_name in self.get_data_in():
         #         self.clean_variables([var_name], self.IO_TYPE_IN)
         self.add_inputs(dynamic_inputs)
+        self.add_outputs(dynamic_outputs)
 
     def init_execution(self):
         in_dict = self.get_sosdisc_inputs()
@@ -173,7 +188,9 @@ class TempChangeDiscipline(ClimateEcoDiscipline):
                     GlossaryCore.TemperatureDfValue: temperature_df[GlossaryCore.TemperatureDf['dataframe_descriptor'].keys()],
                     'forcing_detail_df': self.model.forcing_df,
                     'temperature_constraint': self.model.temperature_end_constraint}
-        
+        if self.model.temperature_ensemble_df is not None:
+            out_dict[GlossaryCore.TemperatureEnsembleDfValue] = self.model.temperature_ensemble_df
+
         self.store_sos_outputs_values(out_dict)
 
     def compute_sos_jacobian(self):
@@ -238,62 +255,70 @@ class TempChangeDiscipline(ClimateEcoDiscipline):
                 (GlossaryCore.TemperatureDfValue, GlossaryCore.TempAtmo), (GlossaryCore.GHGCycleDfValue, GlossaryCore.CO2Concentration), d_tempatmo_d_atmoconc, )
 
             # temperature_constraint
-            d_tempatmo_d_atmoconc, _ = self.model.compute_d_temp_atmo()
             self.set_partial_derivative_for_other_types(
                 ('temperature_constraint',), (GlossaryCore.GHGCycleDfValue, GlossaryCore.CO2Concentration),
                 -d_tempatmo_d_atmoconc[-1] / temperature_constraint_ref, )
 
-        elif temperature_model == 'FUND':
+        elif temperature_model in ['FUND', 'FAIR']:
 
             # temperature_df
-            d_temp_d_forcing_fund = self.model.compute_d_temp_d_forcing_fund()
-
-            if forcing_model == 'Myhre':
-                d_temp_d_co2_ppm = np.matmul(d_temp_d_forcing_fund, identity * d_forcing_datmo_conc['CO2 forcing'])
-                d_temp_d_ch4_ppm = np.matmul(d_temp_d_forcing_fund, identity * d_forcing_datmo_conc['CH4 forcing'])
-                d_temp_d_n2o_ppm = np.matmul(d_temp_d_forcing_fund, identity * d_forcing_datmo_conc['N2O forcing'])
-
-            elif forcing_model == 'Etminan' or forcing_model == 'Meinshausen':
-
-                d_temp_d_co2_ppm = np.matmul(d_temp_d_forcing_fund, identity * (
-                            d_forcing_datmo_conc['CO2 forcing CO2 ppm'] + d_forcing_datmo_conc['N2O forcing CO2 ppm']))
-                d_temp_d_ch4_ppm = np.matmul(d_temp_d_forcing_fund, identity * (
-                            d_forcing_datmo_conc['CH4 forcing CH4 ppm'] + d_forcing_datmo_conc['N2O forcing CH4 ppm']))
-                d_temp_d_n2o_ppm = np.matmul(d_temp_d_forcing_fund, identity * (
-                            d_forcing_datmo_conc['CO2 forcing N2O ppm'] + d_forcing_datmo_conc['CH4 forcing N2O ppm'] +
-                            d_forcing_datmo_conc['N2O forcing N2O ppm']))
-
+            if temperature_model == 'FUND':
+                d_temp_d_forcing = self.model.compute_d_temp_d_forcing_fund()
             else:
+                # nominal member first, then the members of the ensemble
+                d_temp_d_forcing_members = self.model.compute_d_temp_d_forcing_fair()
+                d_temp_d_forcing = d_temp_d_forcing_members[0]
+
+            d_temp_d_ppm = self.compute_d_temp_d_concentrations(d_temp_d_forcing, forcing_model, d_forcing_datmo_conc)
+            for concentration, d_temp_d_conc in d_temp_d_ppm.items():
+                self.set_partial_derivative_for_other_types(
+                    (GlossaryCore.TemperatureDfValue, GlossaryCore.TempAtmo), (GlossaryCore.GHGCycleDfValue, concentration),
+                    d_temp_d_conc, )
+
+                # temperature_constraint
+                self.set_partial_derivative_for_other_types(
+                    ('temperature_constraint',), (GlossaryCore.GHGCycleDfValue, concentration),
+                    -d_temp_d_conc[-1] / temperature_constraint_ref, )
+
+            if temperature_model == 'FAIR':
+                # temperature_ensemble_df, all members are chained with the forcing gradients at once
+                d_temp_d_ppm_members = self.compute_d_temp_d_concentrations(
+                    d_temp_d_forcing_members[1:], forcing_model, d_forcing_datmo_conc)
+                for concentration, d_temp_d_conc_members in d_temp_d_ppm_members.items():
+                    for member, d_temp_d_conc in enumerate(d_temp_d_conc_members):
+                        self.set_partial_derivative_for_other_types(
+                            (GlossaryCore.TemperatureEnsembleDfValue, self.model.get_fair_member_column(member)),
+                            (GlossaryCore.GHGCycleDfValue, concentration), d_temp_d_conc, )
+
+    @staticmethod
+    def compute_d_temp_d_concentrations(d_temp_d_forcing: np.ndarray, forcing_model: str,
+                                        d_forcing_datmo_conc: dict) -> dict:
+        """
+        Chain jacobians of temperature wrt forcing, of shape (..., n_years, n_years) to stack several members,
+        with the derivatives of forcing wrt atmospheric concentrations of each gas
+        """
+        if forcing_model == 'Myhre':
+            d_forcing_d_ppm = {GlossaryCore.CO2Concentration: d_forcing_datmo_conc['CO2 forcing'],
+                               GlossaryCore.CH4Concentration: d_forcing_datmo_conc['CH4 forcing'],
+                               GlossaryCore.N2OConcentration: d_forcing_datmo_conc['N2O forcing']}
 
-                raise Exception("forcing model not in available models")
+        elif forcing_model == 'Etminan' or forcing_model == 'Meinshausen':
+            d_forcing_d_ppm = {
+                GlossaryCore.CO2Concentration: d_forcing_datmo_conc['CO2 forcing CO2 ppm'] +
+                                               d_forcing_datmo_conc['N2O forcing CO2 ppm'],
+                GlossaryCore.CH4Concentration: d_forcing_datmo_conc['CH4 forcing CH4 ppm'] +
+                                               d_forcing_datmo_conc['N2O forcing CH4 ppm'],
+                GlossaryCore.N2OConcentration: d_forcing_datmo_conc['CO2 forcing N2O ppm'] +
+                                               d_forcing_datmo_conc['CH4 forcing N2O ppm'] +
+                                               d_forcing_datmo_conc['N2O forcing N2O ppm']}
 
-            self.set_partial_derivative_for_other_types(
-                (GlossaryCore.TemperatureDfValue, GlossaryCore.TempAtmo), (GlossaryCore.GHGCycleDfValue, GlossaryCore.CO2Concentration), d_temp_d_co2_ppm, )
-            self.set_partial_derivative_for_other_types(
-                (GlossaryCore.TemperatureDfValue, GlossaryCore.TempAtmo), (GlossaryCore.GHGCycleDfValue, GlossaryCore.CH4Concentration), d_temp_d_ch4_ppm, )
-            self.set_partial_derivative_for_other_types(
-                (GlossaryCore.TemperatureDfValue, GlossaryCore.TempAtmo), (GlossaryCore.GHGCycleDfValue, GlossaryCore.N2OConcentration), d_temp_d_n2o_ppm, )
+        else:
 
-            # temperature_constraint
-            self.set_partial_derivative_for_other_types(
-                ('temperature_constraint',), (GlossaryCore.GHGCycleDfValue, GlossaryCore.CO2Concentration),
-                -d_temp_d_co2_ppm[-1] / temperature_constraint_ref, )
-            self.set_partial_derivative_for_other_types(
-                ('temperature_constraint',), (GlossaryCore.GHGCycleDfValue, GlossaryCore.CH4Concentration),
-                -d_temp_d_ch4_ppm[-1] / temperature_constraint_ref, )
-            self.set_partial_derivative_for_other_types(
-                ('temperature_constraint',), (GlossaryCore.GHGCycleDfValue, GlossaryCore.N2OConcentration),
-                -d_temp_d_n2o_ppm[-1] / temperature_constraint_ref, )
+            raise Exception("forcing model not in available models")
 
-        elif temperature_model == 'FAIR':
-            # temperature df
-
-            # temperature_constraint
-            d_tempatmo_d_atmoconc, _ = self.model.compute_d_temp_atmo()
-            d_tempatmoobj_d_temp_atmo = self.model.compute_d_temp_atmo_objective()
-            self.set_partial_derivative_for_other_types(
-                ('temperature_constraint',), (GlossaryCore.GHGCycleDfValue, GlossaryCore.CO2Concentration),
-                -d_tempatmo_d_atmoconc[-1] / temperature_constraint_ref, )
+        # forcing of year t only depends on concentrations of year t
+        return {concentration: d_temp_d_forcing * d_forcing[np.newaxis, :]
+                for concentration, d_forcing in d_forcing_d_ppm.items()}
 
     def get_chart_filter_list(self):
 
@@ -331,6 +356,12 @@ class TempChangeDiscipline(ClimateEcoDiscipline):
 
             instanciated_charts = temperature_evolution(model, temperature_df, instanciated_charts)
 
+            if model == 'FAIR':
+                temperature_ensemble_df = self.get_sosdisc_outputs(GlossaryCore.TemperatureEnsembleDfValue)
+                if len(temperature_ensemble_df.columns) > 1:
+                    instanciated_charts = temperature_ensemble(temperature_df, temperature_ensemble_df,
+                                                               instanciated_charts)
+
         if 'Radiative forcing' in chart_list:
 
             forcing_df = self.get_sosdisc_outputs('forcing_detail_df')
@@ -350,7 +381,8 @@ def temperature_evolution(model, temperature_df, instanciated_charts):
         legend = {GlossaryCore.TempAtmo: 'Atmosphere'}
 
     elif model == 'FAIR':
-        raise NotImplementedError('Model not implemented yet')
+        to_plot = [GlossaryCore.TempAtmo]
+        legend = {GlossaryCore.TempAtmo: 'Atmosphere'}
 
     else:
         raise Exception("forcing model not in available models")
@@ -436,6 +468,28 @@ def temperature_evolution(model, temperature_df, instanciated_charts):
 
     return instanciated_charts
 
+def temperature_ensemble(temperature_df, temperature_ensemble_df, instanciated_charts):
+    years = temperature_df[GlossaryCore.Years].values.tolist()
+
+    chart_name = 'Atmosphere temperature anomaly of the FAIR ensemble'
+
+    new_chart = TwoAxesInstanciatedChart(GlossaryCore.Years, '°C', chart_name=chart_name)
+
+    new_series = InstanciatedSeries(
+        years, temperature_df[GlossaryCore.TempAtmo].values.tolist(), 'Nominal', 'lines')
+    new_chart.series.append(new_series)
+
+    for member in temperature_ensemble_df.columns:
+        if member != GlossaryCore.Years:
+            new_series = InstanciatedSeries(
+                years, temperature_ensemble_df[member].values.tolist(), member, 'dash_lines')
+
+            new_chart.series.append(new_series)
+
+    instanciated_charts.append(new_chart)
+
+    return instanciated_charts
+
 def radiative_forcing(forcing_df, instanciated_charts):
     years = forcing_df[GlossaryCore.Years].values.tolist()
 
@@ -0,0 +1,67 @@
+'''
+Copyright 2024 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from climateeconomics.core.core_sectorization.agriculture_economy_model import (
+    AgricultureEconomyModel,
+)
+from climateeconomics.glossarycore import GlossaryCore
+
+
+class AgricultureEconomyJacobiansTestCase(unittest.TestCase):
+    """
+    Analytic diagonal jacobians of the agriculture economy model are compared to the autograd ones
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        years = np.arange(2021, 2031)
+        food_types = GlossaryCore.DefaultFoodTypesV2[:3]
+        self.model = AgricultureEconomyModel()
+        self.inputs = {
+            GlossaryCore.YearStart: years[0],
+            GlossaryCore.YearEnd: years[-1],
+            GlossaryCore.FoodTypesName: food_types,
+            GlossaryCore.EnergyMeanPriceValue: pd.DataFrame({GlossaryCore.Years: years,
+                                                             GlossaryCore.EnergyPriceValue: 50. + rng.random(len(years))}),
+        }
+        for varname in self.model.mapping_coupling_inputs_argument_number_food_types.values():
+            self.inputs[varname] = pd.DataFrame({GlossaryCore.Years: years,
+                                                 **{food_type: 10. * rng.random(len(years)) for food_type in food_types}})
+        for param in self.model.params_for_food_types:
+            self.inputs[param] = {food_type: 100. * rng.random() for food_type in food_types}
+        self.inputs[GlossaryCore.FoodTypesPriceMarginShareName] = {food_type: 30. * rng.random() for food_type in food_types}
+
+    def test_01_analytic_vs_autograd(self):
+        self.model.compute(self.inputs)
+        gradients = self.model.jacobians()
+        gradients_autograd = self.model.jacobians(use_autograd=True)
+        self.assertEqual(gradients.keys(), gradients_autograd.keys())
+        for ci_varname, gradients_input in gradients_autograd.items():
+            self.assertEqual(gradients[ci_varname].keys(), gradients_input.keys())
+            for ci_colname, gradients_input_column in gradients_input.items():
+                self.assertEqual(gradients[ci_varname][ci_colname].keys(), gradients_input_column.keys())
+                for co_varname, gradients_output in gradients_input_column.items():
+                    for co_colname, value in gradients_output.items():
+                        np.testing.assert_allclose(gradients[ci_varname][ci_colname][co_varname][co_colname], value,
+                                                   rtol=1e-12, atol=1e-15)
+
+
+if '__main__' == __name__:
+    unittest.main()
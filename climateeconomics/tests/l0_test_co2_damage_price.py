@@ -0,0 +1,66 @@
+'''
+Copyright 2024 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from climateeconomics.core.core_witness.damage_model import DamageModel
+from climateeconomics.glossarycore import GlossaryCore
+
+
+class CO2DamagePriceTestCase(unittest.TestCase):
+    """
+    Rolling mean CO2 damage price is compared to the mean over each window and its banded derivative to
+    finite differences
+    """
+
+    def setUp(self):
+        self.year_end = 2060
+        self.years = np.arange(2020, self.year_end + 1)
+        self.window = 10
+        self.param = {GlossaryCore.YearStart: 2020, GlossaryCore.YearEnd: self.year_end,
+                      'damag_int': 0., 'damag_quad': 0.0022, 'damag_expo': 2., 'tipping_point': True,
+                      'tp_a1': 20.46, 'tp_a2': 2, 'tp_a3': 3.5, 'tp_a4': 6.754,
+                      GlossaryCore.FractionDamageToProductivityValue: 0.3,
+                      'damage_constraint_factor': np.ones(len(self.years)),
+                      'total_emissions_damage_ref': 60., GlossaryCore.CO2DamagePriceInitValue: 25.,
+                      'co2_damage_price_window': self.window}
+        self.damages = np.random.default_rng(0).random(len(self.years))
+
+    def compute_co2_damage_price(self, damages):
+        model = DamageModel(self.param)
+        model.damage_df = pd.DataFrame({GlossaryCore.Years: self.years, GlossaryCore.EstimatedDamages: damages})
+        model.compute_CO2_damage_price()
+        return model, model.co2_damage_price_df[GlossaryCore.CO2DamagePrice].values
+
+    def test_01_rolling_mean(self):
+        _, co2_damage_price = self.compute_co2_damage_price(self.damages)
+        for i, year in enumerate(self.years):
+            window_length = max(min(self.window, self.year_end - year), 1)
+            expected = 1e3 * 1.01 ** i * np.mean(self.damages[i:i + window_length]) / 60.
+            self.assertAlmostEqual(co2_damage_price[i], expected, places=10)
+
+    def test_02_derivative(self):
+        epsilon = 1e-7
+        model, reference = self.compute_co2_damage_price(self.damages)
+        finite_differences = np.array([(self.compute_co2_damage_price(self.damages + epsilon * e)[1] - reference)
+                                       / epsilon for e in np.eye(len(self.years))]).T
+        np.testing.assert_allclose(model.d_co2_damage_price_d_damages().to_dense(), finite_differences, atol=1e-5)
+
+
+if '__main__' == __name__:
+    unittest.main()
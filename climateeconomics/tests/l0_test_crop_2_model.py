@@ -0,0 +1,117 @@
+'''
+Copyright 2024 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+
+import numpy as np
+import pandas as pd
+from autograd import jacobian
+
+from climateeconomics.core.core_agriculture.crop_2 import Crop
+from climateeconomics.glossarycore import GlossaryCore
+
+
+class Crop2ModelTestCase(unittest.TestCase):
+    """
+    Food types computed at once along an array axis and their forward mode jacobians are compared to one food type
+    at a time with reverse mode autograd jacobians
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.years = np.arange(2021, 2041)
+        nb_years = len(self.years)
+        self.food_types = GlossaryCore.DefaultFoodTypesV2[:3]
+        self.crop = Crop()
+        inputs = {GlossaryCore.YearStart: self.years[0],
+                  GlossaryCore.YearEnd: self.years[-1],
+                  GlossaryCore.FoodTypesName: self.food_types}
+        for varname, colname in self.crop.mapping_coupling_inputs_argument_number.values():
+            inputs[varname] = pd.DataFrame({GlossaryCore.Years: self.years, colname: 1. + rng.random(nb_years)})
+        inputs[GlossaryCore.DamageFractionDfValue][GlossaryCore.DamageFractionOutput] *= 0.1
+        inputs[GlossaryCore.FoodTypesInvestName] = pd.DataFrame({GlossaryCore.Years: self.years,
+                                                                 **{food_type: 10. * rng.random(nb_years) for food_type in self.food_types}})
+        # parameters differ between food types, the shares dedicated to energy streams are time series
+        for param in self.crop.params_for_food_types:
+            if 'share' in param and 'stream' in param:
+                inputs[param] = pd.DataFrame({GlossaryCore.Years: self.years,
+                                              **{food_type: 20. * rng.random(nb_years) for food_type in self.food_types}})
+            else:
+                inputs[param] = {food_type: 1. + rng.random() for food_type in self.food_types}
+        inputs[GlossaryCore.FoodTypeCapitalStartName] = {food_type: 20. + 10. * i for i, food_type in enumerate(self.food_types)}
+        inputs[GlossaryCore.FoodTypeCapitalDepreciationRateName] = {food_type: 3. + 2. * i for i, food_type in enumerate(self.food_types)}
+        self.inputs = inputs
+
+    def get_food_type_args(self, args: tuple, index: int) -> tuple:
+        """arguments of compute_food_types restricted to one food type"""
+        *coupling_inputs, invest_food_types, params = args
+        return tuple(coupling_inputs) + (invest_food_types[index:index + 1], {param: value[index:index + 1] for param, value in params.items()})
+
+    def test_01_food_types_outputs(self):
+        self.crop.compute(self.inputs)
+        args = self.crop.get_args()
+        for index, food_type in enumerate(self.food_types):
+            outputs_food_type = Crop.compute_food_types(*self.get_food_type_args(args, index))
+            for varname, value in outputs_food_type.items():
+                np.testing.assert_allclose(self.crop.outputs[varname][food_type].values, value[0], rtol=1e-12)
+
+            # capital(t) = (1 - depreciation) * capital(t-1) + invest(t-1)
+            depreciation_factor = 1. - self.inputs[GlossaryCore.FoodTypeCapitalDepreciationRateName][food_type] / 100.
+            invest = self.inputs[GlossaryCore.FoodTypesInvestName][food_type].values
+            capital = [self.inputs[GlossaryCore.FoodTypeCapitalStartName][food_type]]
+            for invest_previous_year in invest[:-1]:
+                capital.append(depreciation_factor * capital[-1] + invest_previous_year)
+            np.testing.assert_allclose(self.crop.outputs[GlossaryCore.FoodTypeCapitalName][food_type].values, capital, rtol=1e-12)
+
+        for varname, (total_varname, total_column) in self.crop.dataframes_to_totalize_by_food_type.items():
+            np.testing.assert_allclose(self.crop.outputs[total_varname][total_column].values,
+                                       self.crop.outputs[varname][self.food_types].values.sum(axis=1), rtol=1e-12)
+
+    def test_02_jacobians(self):
+        self.crop.compute(self.inputs)
+        gradients = self.crop.jacobians()
+        args = self.crop.get_args()
+        output_names = list(self.crop.dataframes_to_totalize_by_food_type_couplings.keys()) + self.crop.coupling_dataframes_not_totalized
+
+        def wrapped_compute(*food_type_args):
+            return self.crop.wrap_outputs_to_arrays(Crop.compute_food_types(*food_type_args))
+
+        reference_gradients = {}
+        for index, food_type in enumerate(self.food_types):
+            food_type_args = self.get_food_type_args(args, index)
+            for argnum, (ci_varname, ci_column) in list(self.crop.mapping_coupling_inputs_argument_number.items()) + \
+                                                   [(5, (GlossaryCore.FoodTypesInvestName, food_type))]:
+                # (n_outputs, 1, n_years) + shape of the input
+                food_type_jacobian = jacobian(wrapped_compute, argnum)(*food_type_args)
+                if argnum == 5:
+                    food_type_jacobian = food_type_jacobian[:, :, :, 0]
+                for varname, value in zip(output_names, food_type_jacobian[:, 0]):
+                    co_varname, co_column = self.crop.dataframes_to_totalize_by_food_type_couplings.get(varname, (varname, food_type))
+                    key = (ci_varname, ci_column, co_varname, co_column)
+                    reference_gradients[key] = reference_gradients.get(key, 0.) + value
+
+        nb_gradients = 0
+        for ci_varname, ci_gradients in gradients.items():
+            for ci_column, co_gradients in ci_gradients.items():
+                for co_varname, co_column_gradients in co_gradients.items():
+                    for co_column, gradient in co_column_gradients.items():
+                        np.testing.assert_allclose(gradient, reference_gradients[(ci_varname, ci_column, co_varname, co_column)],
+                                                   rtol=1e-10, atol=1e-12)
+                        nb_gradients += 1
+        self.assertEqual(nb_gradients, len(reference_gradients))
+
+
+if '__main__' == __name__:
+    unittest.main()
@@ -28,6 +28,46 @@ from climateeconomics.sos_wrapping.sos_wrapping_agriculture.crop.crop_disc impor
 )
 
 
+def reference_vintage_production(crop: Crop) -> np.ndarray:
+    """
+    Production of crop with one dataframe row per year and age, filtered on ages lower than lifetime
+    (implementation replaced by the convolution of compute_aging_distribution_production)
+    """
+    len_years = len(crop.years)
+    prod_from_invest = crop.compute_prod_from_invest(construction_delay=crop.construction_delay)['prod_from_invest'].values
+    range_years = np.arange(crop.year_start, crop.year_end + len_years)
+    new_prod_aged = pd.DataFrame({
+        GlossaryCore.Years: np.concatenate([range_years[i:i + len_years] for i in range(len_years)]),
+        'age': np.concatenate([np.ones(len_years) * (len_years - i) for i in range(len_years, 0, -1)]),
+        'distrib_prod (TWh)': prod_from_invest.tolist() * len_years})
+    initial_ages = crop.initial_age_distrib['age'].values
+    old_prod_aged = pd.DataFrame({
+        GlossaryCore.Years: np.repeat(crop.years, len(initial_ages)),
+        'age': np.concatenate([initial_ages + i for i in range(len_years)]),
+        'distrib_prod (TWh)': (crop.initial_age_distrib['distrib'].values * crop.initial_production / 100.0).tolist() * len_years})
+    age_distrib_prod_df = pd.concat([new_prod_aged, old_prod_aged], ignore_index=True)
+    age_distrib_prod_df = age_distrib_prod_df.loc[(age_distrib_prod_df['age'] < crop.lifetime) &
+                                                  (age_distrib_prod_df[GlossaryCore.Years] < crop.year_end + 1)]
+    production = age_distrib_prod_df.groupby(GlossaryCore.Years)['distrib_prod (TWh)'].sum()
+    return production.reindex(crop.years, fill_value=0.).values
+
+
+def reference_dprod_dinvest(crop: Crop) -> np.ndarray:
+    """Jacobian of the production wrt investment filled column by column"""
+    nb_years = len(crop.years)
+    dprod_dinvest = np.zeros((nb_years, nb_years))
+    for i in range(nb_years):
+        len_non_zeros = min(max(0, nb_years - crop.construction_delay - i), crop.lifetime)
+        first_len_zeros = min(i + crop.construction_delay, nb_years)
+        last_len_zeros = max(0, nb_years - len_non_zeros - first_len_zeros)
+        dpprod_dpinvest = 1 / crop.cost_details['Capex ($/MWh)'].values[i] / crop.data_fuel_dict['calorific_value']
+        is_invest_negative = max(np.sign(crop.cost_details[GlossaryCore.InvestmentsValue].values[i] + np.finfo(float).eps), 0.0)
+        dprod_dinvest[:, i] = np.hstack((np.zeros(first_len_zeros),
+                                         np.ones(len_non_zeros) * dpprod_dpinvest * is_invest_negative,
+                                         np.zeros(last_len_zeros)))
+    return dprod_dinvest
+
+
 class CropTestCase(unittest.TestCase):
 
     def setUp(self):
@@ -296,3 +336,37 @@ class CropTestCase(unittest.TestCase):
         graph_list = disc.get_post_processing_list(filter)
         #for graph in graph_list:
         #    graph.to_plotly().show()
+
+    def test_vintage_production(self):
+        """
+        Production from investments and initial age distribution and its jacobian wrt investment are compared to
+        the dataframe and column by column implementations, for several lifetimes, construction delays and initial
+        age distributions (unsorted, older than lifetime, zero lifetime)
+        """
+        rng = np.random.default_rng(0)
+        cases = [(50, 3, np.arange(1, 50)),
+                 (20, 0, np.arange(0, 20)),
+                 (30, 5, np.array([5, 1, 12, 3, 40])),
+                 (5, 2, np.arange(1, 3)),
+                 (0, 3, np.arange(1, 10))]
+        for lifetime, construction_delay, initial_ages in cases:
+            with self.subTest(lifetime=lifetime, construction_delay=construction_delay):
+                crop = Crop({**self.param, GlossaryCore.LifetimeName: lifetime})
+                crop.lifetime = lifetime
+                crop.construction_delay = construction_delay
+                distrib = rng.random(len(initial_ages))
+                crop.initial_age_distrib = pd.DataFrame({'age': initial_ages, 'distrib': 100. * distrib / distrib.sum()})
+                invest = 10. * rng.random(len(crop.years))
+                invest[[3, 5]] = [0., -1.]
+                crop.cost_details = pd.DataFrame({GlossaryCore.Years: crop.years,
+                                                  GlossaryCore.InvestmentsValue: invest,
+                                                  'Capex ($/MWh)': 5. + rng.random(len(crop.years))})
+                crop.compute_primary_energy_production()
+                np.testing.assert_allclose(crop.production['biomass_dry (TWh)'].values,
+                                           reference_vintage_production(crop), rtol=1e-12, atol=1e-12)
+                np.testing.assert_allclose(crop.compute_dprod_from_dinvest(), reference_dprod_dinvest(crop),
+                                           rtol=1e-12, atol=0.)
+
+
+if '__main__' == __name__:
+    unittest.main()
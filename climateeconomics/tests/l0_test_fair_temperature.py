@@ -0,0 +1,68 @@
+'''
+Copyright 2024 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+
+import numpy as np
+
+from climateeconomics.core.core_witness.tempchange_model_v2 import (
+    compute_fair_temperature,
+    get_fair_box_parameters,
+)
+
+
+class FairTemperatureTestCase(unittest.TestCase):
+    """
+    Batched FAIR emulator is compared to the two-box recurrence member by member, its jacobian to finite differences
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.nb_members = 4
+        self.forcing = np.linspace(2.5, 5., 30) + 0.2 * rng.random(30)
+        self.ecs = rng.uniform(2., 5., self.nb_members)
+        self.tcr = rng.uniform(1.2, 2., self.nb_members)
+        self.timescales = np.stack([rng.uniform(3., 6., self.nb_members), rng.uniform(150., 300., self.nb_members)],
+                                   axis=1)
+        self.q, self.decay = get_fair_box_parameters(self.ecs, self.tcr, self.timescales, 3.74)
+
+    def test_01_equilibrium_climate_sensitivity(self):
+        np.testing.assert_allclose(np.sum(self.q, axis=1) * 3.74, self.ecs)
+
+    def test_02_temperature(self):
+        temperatures, _ = compute_fair_temperature(1.1, self.forcing, self.q, self.decay)
+        for member in range(self.nb_members):
+            q, decay = self.q[member], self.decay[member]
+            boxes = 1.1 * q / np.sum(q)
+            temperature = [1.1]
+            for forcing in self.forcing[1:]:
+                boxes = decay * boxes + q * (1. - decay) * forcing
+                temperature.append(np.sum(boxes))
+            np.testing.assert_allclose(temperatures[member], temperature)
+
+    def test_03_jacobian(self):
+        epsilon = 1e-6
+        reference, jacobian = compute_fair_temperature(1.1, self.forcing, self.q, self.decay)
+        finite_differences = np.zeros(jacobian.shape)
+        for year in range(len(self.forcing)):
+            forcing = self.forcing.copy()
+            forcing[year] += epsilon
+            finite_differences[:, :, year] = (compute_fair_temperature(1.1, forcing, self.q, self.decay)[0] -
+                                              reference) / epsilon
+        np.testing.assert_allclose(jacobian, finite_differences, atol=1e-6)
+
+
+if '__main__' == __name__:
+    unittest.main()
@@ -0,0 +1,161 @@
+'''
+Copyright 2024 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from climateeconomics.core.core_emissions.ghg_emissions_model import GHGEmissions
+from climateeconomics.glossarycore import GlossaryCore
+
+
+class GHGEmissionsModelTestCase(unittest.TestCase):
+    """
+    Sections emissions stored as sector x section x year arrays are compared to the sector by sector dataframes
+    """
+
+    def setUp(self):
+        self.years = np.arange(GlossaryCore.YearStartDefault, GlossaryCore.YearEndDefault + 1)
+        self.rng = np.random.default_rng(0)
+
+    def build_inputs(self, sector_list: list) -> dict:
+        nb_years = len(self.years)
+        inputs = {GlossaryCore.YearStart: GlossaryCore.YearStartDefault,
+                  GlossaryCore.YearEnd: GlossaryCore.YearEndDefault,
+                  GlossaryCore.SectorListValue: sector_list,
+                  'constraint_nze_2050_ref': 1.,
+                  'affine_co2_objective': False,
+                  'GHG_global_warming_potential20': {GlossaryCore.CO2: 1., GlossaryCore.CH4: 85., GlossaryCore.N2O: 265.},
+                  'GHG_global_warming_potential100': {GlossaryCore.CO2: 1., GlossaryCore.CH4: 28., GlossaryCore.N2O: 273.},
+                  GlossaryCore.CO2EmissionsRef['var_name']: 6.49,
+                  'GHG_total_energy_emissions': pd.DataFrame({
+                      GlossaryCore.Years: self.years,
+                      **{GlossaryCore.insertGHGTotalEmissions.format(ghg): self.rng.random(nb_years)
+                         for ghg in GlossaryCore.GreenHouseGases}}),
+                  GlossaryCore.EnergyProductionValue: pd.DataFrame({
+                      GlossaryCore.Years: self.years, GlossaryCore.TotalProductionValue: 1. + self.rng.random(nb_years)}),
+                  GlossaryCore.ResidentialEnergyConsumptionDfValue: pd.DataFrame({
+                      GlossaryCore.Years: self.years, GlossaryCore.TotalProductionValue: self.rng.random(nb_years)}),
+                  }
+        for ghg in GlossaryCore.GreenHouseGases:
+            inputs[GlossaryCore.insertGHGAgriLandEmissions.format(ghg)] = pd.DataFrame({
+                GlossaryCore.Years: self.years, 'Crop': self.rng.random(nb_years), 'Forest': self.rng.random(nb_years)})
+        for sector in sector_list:
+            for input_name in [GlossaryCore.SectionEnergyConsumptionDfValue, GlossaryCore.SectionNonEnergyEmissionGdpDfValue,
+                               GlossaryCore.SectionGdpDfValue]:
+                inputs[f"{sector}.{input_name}"] = pd.DataFrame({
+                    GlossaryCore.Years: self.years,
+                    **{section: self.rng.random(nb_years) for section in GlossaryCore.SectionDictSectors[sector]}})
+        return inputs
+
+    def reference_sections_emissions(self, inputs: dict, carbon_intensity: np.ndarray):
+        """energy and non energy emissions per section, built section by section in one dataframe per sector"""
+        sections_energy_emissions = {}
+        sections_non_energy_emissions = {}
+        for sector in inputs[GlossaryCore.SectorListValue]:
+            energy_consumption = inputs[f"{sector}.{GlossaryCore.SectionEnergyConsumptionDfValue}"]
+            non_energy_emission_gdp = inputs[f"{sector}.{GlossaryCore.SectionNonEnergyEmissionGdpDfValue}"]
+            sections_gdp = inputs[f"{sector}.{GlossaryCore.SectionGdpDfValue}"]
+            energy_emissions = {GlossaryCore.Years: self.years}
+            non_energy_emissions = {GlossaryCore.Years: self.years}
+            for section in GlossaryCore.SectionDictSectors[sector]:
+                energy_emissions[section] = energy_consumption[section].values * carbon_intensity
+                non_energy_emissions[section] = non_energy_emission_gdp[section].values * sections_gdp[section].values / 1000.
+            sections_energy_emissions[sector] = pd.DataFrame(energy_emissions)
+            sections_non_energy_emissions[sector] = pd.DataFrame(non_energy_emissions)
+        return sections_energy_emissions, sections_non_energy_emissions
+
+    def run_model(self, inputs: dict) -> GHGEmissions:
+        model = GHGEmissions(inputs)
+        model.configure_parameters_update(inputs)
+        model.compute(inputs)
+        return model
+
+    def test_01_sections_dataframes(self):
+        sector_lists = [GlossaryCore.DefaultSectorListGHGEmissions,
+                        [GlossaryCore.SectorIndustry, GlossaryCore.SectorAgriculture, GlossaryCore.SectorServices]]
+        for sector_list in sector_lists:
+            with self.subTest(sector_list=sector_list):
+                inputs = self.build_inputs(sector_list)
+                model = self.run_model(inputs)
+                carbon_intensity = model.carbon_intensity_of_energy_mix[GlossaryCore.EnergyCarbonIntensityDfValue].values
+                ref_energy_emissions, ref_non_energy_emissions = self.reference_sections_emissions(inputs, carbon_intensity)
+
+                for sector in sector_list:
+                    pd.testing.assert_frame_equal(model.get_sections_dataframe(model.sections_energy_emissions, sector),
+                                                  ref_energy_emissions[sector], rtol=1e-14)
+                    pd.testing.assert_frame_equal(model.dict_sector_sections_energy_emissions[sector],
+                                                  ref_energy_emissions[sector], rtol=1e-14)
+                    pd.testing.assert_frame_equal(model.dict_sector_sections_non_energy_emissions[sector],
+                                                  ref_non_energy_emissions[sector], rtol=1e-14)
+
+                    sections = GlossaryCore.SectionDictSectors[sector]
+                    ref_energy = ref_energy_emissions[sector][sections].values.sum(axis=1)
+                    ref_non_energy = ref_non_energy_emissions[sector][sections].values.sum(axis=1)
+                    pd.testing.assert_frame_equal(model.dict_sector_emissions[sector], pd.DataFrame({
+                        GlossaryCore.Years: self.years,
+                        GlossaryCore.EnergyEmissions: ref_energy,
+                        GlossaryCore.NonEnergyEmissions: ref_non_energy,
+                        GlossaryCore.TotalEmissions: ref_energy + ref_non_energy}), rtol=1e-14)
+
+                    if sector != GlossaryCore.SectorAgriculture:
+                        ref_emissions = pd.DataFrame({GlossaryCore.Years: self.years,
+                                                      **{section: ref_energy_emissions[sector][section].values +
+                                                                  ref_non_energy_emissions[sector][section].values
+                                                         for section in sections}})
+                        pd.testing.assert_frame_equal(model.dict_sector_sections_emissions[sector], ref_emissions,
+                                                      rtol=1e-14)
+
+                # agriculture section emissions are the land emissions weighted by their GWP100
+                ref_agriculture_emissions = sum(model.ghg_emissions_df[GlossaryCore.insertGHGAgriLandEmissions.format(ghg)].values *
+                                                inputs['GHG_global_warming_potential100'][ghg]
+                                                for ghg in [GlossaryCore.CO2, GlossaryCore.CH4, GlossaryCore.N2O])
+                pd.testing.assert_frame_equal(model.dict_sector_sections_emissions[GlossaryCore.SectorAgriculture],
+                                              pd.DataFrame({GlossaryCore.Years: self.years,
+                                                            GlossaryCore.SectionA: ref_agriculture_emissions}),
+                                              rtol=1e-14)
+
+                economic_sectors = model.economic_sectors_except_agriculture
+                for column in [GlossaryCore.EnergyEmissions, GlossaryCore.NonEnergyEmissions, GlossaryCore.TotalEmissions]:
+                    np.testing.assert_allclose(model.total_economics_emisssions[column].values,
+                                               np.sum([model.dict_sector_emissions[sector][column].values
+                                                       for sector in economic_sectors], axis=0), rtol=1e-14)
+
+                ref_all_sections = pd.concat([df.drop(columns=GlossaryCore.Years).mul(1000)
+                                              for df in model.dict_sector_sections_emissions.values()], axis=1)
+                ref_all_sections.insert(0, GlossaryCore.Years, self.years)
+                pd.testing.assert_frame_equal(model.all_sections_emissions_df, ref_all_sections, rtol=1e-14)
+
+    def test_02_economics_energy_emissions_gradient(self):
+        """reduced economics energy emissions derivative is the sum of the derivatives of the sections"""
+        inputs = self.build_inputs(GlossaryCore.DefaultSectorListGHGEmissions)
+        model = self.run_model(inputs)
+        d_carbon_intensity_d_energy_prod = model.d_carbon_intensity_of_energy_mix_d_energy_production()
+        reference = np.zeros((len(self.years), len(self.years)))
+        for sector in model.economic_sectors_except_agriculture:
+            energy_consumption = inputs[f"{sector}.{GlossaryCore.SectionEnergyConsumptionDfValue}"]
+            for section in GlossaryCore.SectionDictSectors[sector]:
+                section_gradient = np.diag(energy_consumption[section].values) @ d_carbon_intensity_d_energy_prod
+                np.testing.assert_allclose(
+                    model.d_section_energy_emissions_d_user_input(d_carbon_intensity_d_energy_prod, sector, section),
+                    section_gradient, rtol=1e-14)
+                reference += section_gradient
+        np.testing.assert_allclose(model.d_economics_energy_emissions_d_user_input(d_carbon_intensity_d_energy_prod),
+                                   reference, rtol=1e-13)
+
+
+if '__main__' == __name__:
+    unittest.main()
@@ -0,0 +1,81 @@
+'''
+Copyright 2024 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+from os.path import dirname, join
+
+import numpy as np
+import pandas as pd
+
+from climateeconomics.core.tools import Hubbert_Curve
+from climateeconomics.core.tools.Hubbert_Curve import (
+    clear_Hubbert_cache,
+    compute_Hubbert_regression,
+)
+from climateeconomics.glossarycore import GlossaryCore
+
+
+class HubbertCurveTestCase(unittest.TestCase):
+    """
+    Vectorized Hubbert regression is compared to the loop over past production years, and its cache checked
+    """
+
+    def setUp(self):
+        self.past_production = pd.read_csv(join(dirname(__file__), '..', 'core', 'core_resources', 'models',
+                                                'resources_data', 'oil_resource_production_data.csv'))
+        self.production_years = np.arange(1990, 2101)
+        clear_Hubbert_cache()
+
+    def hubbert_loop(self, regression_start, resource_type):
+        cumulative, ratio = [], []
+        Q = 0.
+        for P in self.past_production[resource_type].values:
+            Q += P
+            cumulative.append(Q)
+            ratio.append(P / Q)
+        years = self.past_production[GlossaryCore.Years].values
+        sample = [i for i, year in enumerate(years) if year >= regression_start]
+        fit = np.polyfit([cumulative[i] for i in sample], [ratio[i] for i in sample], 1)
+        w = fit[1]
+        Q_inf = - w / fit[0]
+        tho = sum(np.log((Q_inf / cumulative[i] - 1) * np.exp(years[i] * w)) / w for i in sample) / len(sample)
+        return [Q_inf * w / (np.exp(- w / 2 * (tho - year)) + np.exp(w / 2 * (tho - year))) ** 2
+                for year in self.production_years]
+
+    def test_01_regression(self):
+        for resource_type in ['light', 'medium', 'heavy']:
+            np.testing.assert_allclose(compute_Hubbert_regression(self.past_production, self.production_years, 1990,
+                                                                  resource_type),
+                                       self.hubbert_loop(1990, resource_type), rtol=1e-12)
+
+    def test_02_cache(self):
+        production = compute_Hubbert_regression(self.past_production, self.production_years, 1990, 'light')
+        production[:] = 0.
+        # the cached curve is not modified by the caller, and a new content gives a new entry
+        self.assertTrue(np.all(compute_Hubbert_regression(self.past_production, self.production_years, 1990,
+                                                          'light') > 0.))
+        self.assertEqual(len(Hubbert_Curve._hubbert_cache), 1)
+        modified_production = self.past_production.copy()
+        modified_production['light'] *= 1.1
+        compute_Hubbert_regression(modified_production, self.production_years, 1990, 'light')
+        self.assertEqual(len(Hubbert_Curve._hubbert_cache), 2)
+        # the cache is bounded
+        for year_end in range(2101, 2101 + Hubbert_Curve.HUBBERT_CACHE_SIZE):
+            compute_Hubbert_regression(self.past_production, np.arange(1990, year_end + 1), 1990, 'medium')
+        self.assertEqual(len(Hubbert_Curve._hubbert_cache), Hubbert_Curve.HUBBERT_CACHE_SIZE)
+
+
+if '__main__' == __name__:
+    unittest.main()
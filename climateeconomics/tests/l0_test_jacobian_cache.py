@@ -0,0 +1,104 @@
+'''
+Copyright 2024 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import copy
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from climateeconomics.core.tools.jacobian_cache import (
+    DENSE_BLOCK,
+    DIAGONAL_BLOCK,
+    ZERO_BLOCK,
+    JacobianCache,
+    compact_partial_derivative,
+)
+
+
+class JacobianCacheTestCase(unittest.TestCase):
+    """
+    Partial derivatives cache keyed by the content of the inputs of a discipline
+    """
+
+    def setUp(self):
+        years = np.arange(2020, 2031)
+        self.inputs = {
+            'year_start': 2020,
+            'invest': pd.DataFrame({'years': years, 'invest': np.linspace(1., 2., len(years))}),
+            'params': {'a': 1., 'b': [1, 2]},
+        }
+        rng = np.random.default_rng(0)
+        self.partial_derivatives = [
+            (('surface', 'total'), ('invest', 'invest'), np.zeros((len(years), len(years)))),
+            (('production', 'total'), ('invest', 'invest'), np.diag(rng.random(len(years)))),
+            (('capital', 'total'), ('invest', 'invest'), np.tril(rng.random((len(years), len(years))))),
+        ]
+
+    def test_01_key_depends_on_content(self):
+        key = JacobianCache.get_key(self.inputs)
+        inputs = copy.deepcopy(self.inputs)
+        self.assertEqual(JacobianCache.get_key(inputs), key)
+        inputs['invest'].loc[3, 'invest'] += 1e-12
+        self.assertNotEqual(JacobianCache.get_key(inputs), key)
+        inputs = copy.deepcopy(self.inputs)
+        inputs['params']['b'] = [1, 3]
+        self.assertNotEqual(JacobianCache.get_key(inputs), key)
+
+    def test_02_compact_storage(self):
+        block_types = [compact_partial_derivative(value)[0] for _, _, value in self.partial_derivatives]
+        self.assertEqual(block_types, [ZERO_BLOCK, DIAGONAL_BLOCK, DENSE_BLOCK])
+
+        cache = JacobianCache()
+        key = cache.get_key(self.inputs)
+        self.assertIsNone(cache.get(key))
+        cache.put(key, self.partial_derivatives)
+        for (y_key, x_key, value), (y_cached, x_cached, value_cached) in zip(self.partial_derivatives, cache.get(key)):
+            self.assertEqual((y_key, x_key), (y_cached, x_cached))
+            np.testing.assert_array_equal(value, value_cached)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_03_lru_eviction(self):
+        cache = JacobianCache(max_size=2)
+        for key in ['a', 'b']:
+            cache.put(key, self.partial_derivatives)
+        cache.get('a')
+        cache.put('c', self.partial_derivatives)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+
+    def test_04_key_of_long_containers(self):
+        """long series, dataframes and object arrays have truncated reprs, their keys must still differ"""
+        values = np.linspace(0., 1., 1000)
+        perturbed_values = values.copy()
+        perturbed_values[500] += 1e-3
+        for build in [pd.Series, lambda x: pd.DataFrame({'x': x}), lambda x: x.astype(object), list]:
+            self.assertNotEqual(JacobianCache.get_key({'x': build(values)}), JacobianCache.get_key({'x': build(perturbed_values)}))
+        self.assertNotEqual(JacobianCache.get_key({'x': pd.Series(values)}),
+                            JacobianCache.get_key({'x': pd.Series(values, index=np.arange(1000) + 1)}))
+        self.assertNotEqual(JacobianCache.get_key({'x': {'a': [1, 2]}}), JacobianCache.get_key({'x': {'a': [1, 2.]}}))
+
+    def test_05_unhashable_inputs_and_empty_entries(self):
+        with self.assertRaises(TypeError):
+            JacobianCache.get_key({'x': object()})
+        with self.assertRaises(TypeError):
+            JacobianCache.get_key({'x': [1, {2, 3}]})
+        with self.assertRaises(ValueError):
+            JacobianCache().put('a', [])
+
+
+if '__main__' == __name__:
+    unittest.main()
@@ -0,0 +1,103 @@
+'''
+Copyright 2024 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+
+import numpy as np
+
+from climateeconomics.core.tools.jacobian_operators import (
+    BandedJacobian,
+    DiagonalJacobian,
+    JacobianOperator,
+    LowerTriangularJacobian,
+    to_dense,
+)
+
+
+class JacobianOperatorsTestCase(unittest.TestCase):
+    """
+    Structured jacobian operators must give the same results as the dense matrices they represent
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.size = 7
+        self.operators = [
+            DiagonalJacobian(rng.random(self.size)),
+            BandedJacobian({-2: rng.random(self.size), 0: rng.random(self.size), 1: rng.random(self.size)}, self.size),
+            LowerTriangularJacobian(np.tril(rng.random((self.size, self.size)))),
+        ]
+        self.dense = rng.random((self.size, self.size))
+
+    def test_01_products_and_sums(self):
+        for op_a in self.operators:
+            for op_b in self.operators + [self.dense]:
+                dense_a, dense_b = op_a.to_dense(), to_dense(op_b)
+                np.testing.assert_allclose(to_dense(op_a @ op_b), dense_a @ dense_b)
+                np.testing.assert_allclose(to_dense(op_b @ op_a), dense_b @ dense_a)
+                np.testing.assert_allclose(to_dense(op_a + op_b), dense_a + dense_b)
+                np.testing.assert_allclose(to_dense(op_b - op_a), dense_b - dense_a)
+            np.testing.assert_allclose((- 2. * op_a / 3.).to_dense(), - 2. * op_a.to_dense() / 3.)
+
+    def test_02_structure_is_kept(self):
+        diagonal, banded, lower = self.operators
+        self.assertIsInstance(diagonal @ diagonal, DiagonalJacobian)
+        self.assertIsInstance(diagonal @ banded, BandedJacobian)
+        self.assertIsInstance(diagonal @ lower, LowerTriangularJacobian)
+        self.assertIsInstance(lower @ diagonal - diagonal, LowerTriangularJacobian)
+
+    def test_03_geometric_recurrence(self):
+        decay = 0.93
+        inputs = np.linspace(1., 2., self.size)
+
+        def recurrence(u):
+            x = [3.]
+            for u_prev in u[:-1]:
+                x.append(decay * x[-1] + u_prev)
+            return np.array(x)
+
+        epsilon = 1e-6
+        finite_differences = np.array([(recurrence(inputs + epsilon * e) - recurrence(inputs)) / epsilon
+                                       for e in np.eye(self.size)]).T
+        jacobian = LowerTriangularJacobian.geometric_recurrence(decay, self.size)
+        np.testing.assert_allclose(jacobian.to_dense(), finite_differences, atol=1e-6)
+
+    def test_04_incomplete_operator(self):
+        class IncompleteJacobian(JacobianOperator):
+            def to_dense(self):
+                return np.eye(self.size)
+
+        with self.assertRaises(TypeError):
+            IncompleteJacobian(self.size)
+
+    def test_05_bands_outside_matrix(self):
+        rng = np.random.default_rng(1)
+        band_values = rng.random(self.size)
+        for offset in [self.size - 1, self.size, self.size + 2, -self.size + 1, -self.size, -self.size - 2]:
+            with self.subTest(offset=offset):
+                banded = BandedJacobian({offset: band_values, 0: band_values}, self.size)
+                # J[i, i + offset] = band_values[i], entries outside the matrix are dropped
+                dense = np.diag(band_values)
+                for i in range(self.size):
+                    if 0 <= i + offset < self.size:
+                        dense[i, i + offset] += band_values[i]
+                np.testing.assert_allclose(banded.to_dense(), dense)
+                np.testing.assert_allclose(banded @ self.dense, dense @ self.dense)
+                np.testing.assert_allclose(to_dense(banded @ banded), dense @ dense)
+
+
+
+if '__main__' == __name__:
+    unittest.main()
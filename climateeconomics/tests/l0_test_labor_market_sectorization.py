@@ -21,6 +21,9 @@ import pandas as pd
 from pandas import DataFrame
 from sostrades_core.execution_engine.execution_engine import ExecutionEngine
 
+from climateeconomics.core.core_sectorization.labor_market_sectorisation import (
+    LaborMarketModel,
+)
 from climateeconomics.glossarycore import GlossaryCore
 
 
@@ -125,4 +128,58 @@ class LaborMarketTestCase(unittest.TestCase):
         graph_list = disc.get_post_processing_list(filter)
 #         for graph in graph_list:
 #             graph.to_plotly().show()
-            
+
+    def get_model_inputs(self, workforce_share: DataFrame) -> dict:
+        return {GlossaryCore.YearStart: self.year_start,
+                GlossaryCore.YearEnd: self.year_end,
+                'employment_a_param': 0.6335,
+                'employment_power_param': 0.0156,
+                'employment_rate_base_value': 0.659,
+                'workforce_share_per_sector': workforce_share,
+                GlossaryCore.WorkingAgePopulationDfValue: self.working_age_pop_df.copy()}
+
+    def reference_workforce(self, inputs: dict, employment_rate: np.ndarray) -> DataFrame:
+        """workforce per sector computed column by column on the shares dataframe"""
+        working_age_pop = inputs[GlossaryCore.WorkingAgePopulationDfValue][GlossaryCore.Population1570].values
+        workforce_df = inputs['workforce_share_per_sector'].drop(columns=[GlossaryCore.Years])
+        workforce_df = workforce_df.apply(lambda x: x / 100 * employment_rate * working_age_pop)
+        workforce_df[GlossaryCore.Workforce] = workforce_df.sum(axis=1)
+        workforce_df.insert(0, GlossaryCore.Years, self.years)
+        return workforce_df
+
+    def test_workforce_persector_model(self):
+        '''
+        Check workforce per sector against the dataframe computation and its gradients against finite differences,
+        with shares that do not sum to 100%
+        '''
+        workforce_share = self.workforce_share.copy()
+        workforce_share[GlossaryCore.SectorAgriculture] = 27.4 * 0.99 ** np.arange(len(self.years))
+        inputs = self.get_model_inputs(workforce_share)
+        model = LaborMarketModel(inputs)
+        workforce_df, employment_df = model.compute(inputs)
+
+        reference_df = self.reference_workforce(inputs, employment_df[GlossaryCore.EmploymentRate].values)
+        pd.testing.assert_frame_equal(workforce_df, reference_df[workforce_df.columns], rtol=1e-14)
+        self.assertSetEqual(set(workforce_df.columns), set(reference_df.columns))
+
+        step = 1e-6
+        d_sectors_workforce, d_total_workforce = model.d_workforce_d_working_age_population()
+        working_age_pop_df = inputs[GlossaryCore.WorkingAgePopulationDfValue]
+        perturbed_inputs = {**inputs, GlossaryCore.WorkingAgePopulationDfValue: working_age_pop_df.assign(
+            **{GlossaryCore.Population1570: working_age_pop_df[GlossaryCore.Population1570].values + step})}
+        perturbed_workforce_df = LaborMarketModel(perturbed_inputs).compute(perturbed_inputs)[0]
+        for i, sector in enumerate(LaborMarketModel.SECTORS_LIST):
+            np.testing.assert_allclose((perturbed_workforce_df[sector] - workforce_df[sector]).values / step,
+                                       d_sectors_workforce[i], rtol=1e-5)
+        np.testing.assert_allclose((perturbed_workforce_df[GlossaryCore.Workforce] - workforce_df[GlossaryCore.Workforce]).values / step,
+                                   d_total_workforce, rtol=1e-5)
+
+        d_workforce_d_share = model.d_workforce_d_workforce_share()
+        for sector in LaborMarketModel.SECTORS_LIST:
+            perturbed_share = workforce_share.copy()
+            perturbed_share[sector] = perturbed_share[sector] + step
+            perturbed_inputs = {**inputs, 'workforce_share_per_sector': perturbed_share}
+            perturbed_workforce_df = LaborMarketModel(perturbed_inputs).compute(perturbed_inputs)[0]
+            for column in [sector, GlossaryCore.Workforce]:
+                np.testing.assert_allclose((perturbed_workforce_df[column] - workforce_df[column]).values / step,
+                                           d_workforce_d_share, rtol=1e-5)
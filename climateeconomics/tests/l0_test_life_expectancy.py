@@ -0,0 +1,57 @@
+'''
+Copyright 2024 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+
+import numpy as np
+
+from climateeconomics.core.core_witness.population_model import (
+    compute_d_life_expectancy_d_death_rate,
+    compute_life_expectancy,
+)
+
+
+class LifeExpectancyTestCase(unittest.TestCase):
+    """
+    Vectorized life expectancy is compared to the loop over ages and its derivative to finite differences
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        # 4 years, 21 age ranges (0-4, ..., 95-99, 100+)
+        self.death_rate = 0.2 * rng.random((4, 21)) ** 3
+
+    def test_01_life_expectancy(self):
+        for year, death_rate in enumerate(self.death_rate):
+            full_death_rate = list(np.repeat(death_rate[:-1], 5)) + [death_rate[-1]]
+            pop = [1.]
+            for i in range(100):
+                pop.append(pop[-1] * (1 - full_death_rate[i]))
+            self.assertAlmostEqual(compute_life_expectancy(self.death_rate)[year], np.sum(pop), places=10)
+
+    def test_02_derivative(self):
+        epsilon = 1e-7
+        reference = compute_life_expectancy(self.death_rate)
+        finite_differences = np.zeros(self.death_rate.shape)
+        for age_range in range(self.death_rate.shape[1]):
+            death_rate = self.death_rate.copy()
+            death_rate[:, age_range] += epsilon
+            finite_differences[:, age_range] = (compute_life_expectancy(death_rate) - reference) / epsilon
+        np.testing.assert_allclose(compute_d_life_expectancy_d_death_rate(self.death_rate), finite_differences,
+                                   rtol=1e-5, atol=1e-6)
+
+
+if '__main__' == __name__:
+    unittest.main()
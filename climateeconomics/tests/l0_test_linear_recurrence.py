@@ -0,0 +1,122 @@
+'''
+Copyright 2024 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+
+import numpy as np
+
+from climateeconomics.core.tools.linear_recurrence import (
+    geometric_impulse_response,
+    geometric_recurrence_jacobian,
+    linear_recurrence_jacobian,
+    linear_state_space_jacobian,
+    matrix_powers,
+    solve_geometric_recurrence,
+    solve_linear_recurrence,
+    solve_linear_state_space,
+)
+
+
+class LinearRecurrenceTestCase(unittest.TestCase):
+    """
+    Closed form jacobians of linear recurrences are compared to finite differences on the explicit loop
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.size = 12
+        self.inputs = rng.random(self.size)
+        self.constant = rng.random(self.size)
+        self.coefficients = [(0.93, 1.), (rng.random(self.size), 2.), (0.8, rng.random(self.size))]
+
+    def recurrence_loop(self, inputs, decay, input_coefficient, input_lag, saturated_steps=()):
+        decay = np.broadcast_to(decay, (self.size,))
+        input_coefficient = np.broadcast_to(input_coefficient, (self.size,))
+        x = [3.]
+        for t in range(1, self.size):
+            value = decay[t] * x[-1] + self.constant[t]
+            if 0 <= t - input_lag < self.size:
+                value += input_coefficient[t] * inputs[t - input_lag]
+            x.append(10. if t in saturated_steps else value)
+        return np.array(x)
+
+    def finite_differences(self, *args):
+        epsilon = 1e-6
+        reference = self.recurrence_loop(self.inputs, *args)
+        return np.array([(self.recurrence_loop(self.inputs + epsilon * e, *args) - reference) / epsilon
+                         for e in np.eye(self.size)]).T
+
+    def test_01_jacobian(self):
+        for decay, input_coefficient in self.coefficients:
+            for input_lag in [0, 1, 2]:
+                jacobian = linear_recurrence_jacobian(self.size, decay, input_coefficient, input_lag)
+                np.testing.assert_allclose(jacobian, self.finite_differences(decay, input_coefficient, input_lag),
+                                           atol=1e-6)
+
+    def test_02_saturated_steps(self):
+        saturated_steps = [4, 7]
+        jacobian = linear_recurrence_jacobian(self.size, 0.9, 1.5, 1, saturated_steps=saturated_steps)
+        np.testing.assert_allclose(jacobian, self.finite_differences(0.9, 1.5, 1, saturated_steps), atol=1e-6)
+
+    def test_03_trajectory(self):
+        for decay, input_coefficient in self.coefficients:
+            trajectory = solve_linear_recurrence(3., self.inputs, decay, input_coefficient, 1, self.constant)
+            np.testing.assert_allclose(trajectory, self.recurrence_loop(self.inputs, decay, input_coefficient, 1))
+
+    def state_space_loop(self, inputs, transition, input_vector, input_lag):
+        x = [np.array([1., 0.5])]
+        for t in range(1, self.size):
+            value = transition @ x[-1]
+            if 0 <= t - input_lag < self.size:
+                value = value + input_vector * inputs[t - input_lag]
+            x.append(value)
+        return np.array(x)
+
+    def test_04_state_space(self):
+        transition = np.array([[0.8, 0.15], [0.05, 0.9]])
+        input_vector = np.array([0.3, 0.])
+        np.testing.assert_allclose(matrix_powers(transition, 5)[3], np.linalg.matrix_power(transition, 3))
+        epsilon = 1e-6
+        for input_lag in [0, 1, 2]:
+            reference = self.state_space_loop(self.inputs, transition, input_vector, input_lag)
+            trajectory = solve_linear_state_space(np.array([1., 0.5]), self.inputs, transition, input_vector, input_lag)
+            np.testing.assert_allclose(trajectory, reference)
+            finite_differences = np.array([
+                (self.state_space_loop(self.inputs + epsilon * e, transition, input_vector, input_lag) - reference)
+                / epsilon for e in np.eye(self.size)]).transpose(2, 1, 0)
+            jacobian = linear_state_space_jacobian(self.size, transition, input_vector, input_lag)
+            np.testing.assert_allclose(jacobian, finite_differences, atol=1e-6)
+
+    def test_05_geometric_recurrence(self):
+        # stacked scenarios, each with its own initial value, relaxing towards an equilibrium
+        inputs = np.stack([self.inputs, 2. * self.inputs - 1.])
+        initial_values = np.array([3., -1.])
+        for input_lag in [0, 1, 2]:
+            trajectories = solve_geometric_recurrence(initial_values, inputs, 0.9, 1.5, input_lag, equilibrium=0.5)
+            for trajectory, initial_value, scenario_inputs in zip(trajectories, initial_values, inputs):
+                x = [initial_value]
+                for t in range(1, self.size):
+                    value = 0.9 * x[-1] + 0.1 * 0.5
+                    if t - input_lag >= 0:
+                        value += 1.5 * scenario_inputs[t - input_lag]
+                    x.append(value)
+                np.testing.assert_allclose(trajectory, x)
+            jacobian = geometric_recurrence_jacobian(geometric_impulse_response(self.size, 0.9, 1.5, input_lag),
+                                                     input_lag)
+            np.testing.assert_allclose(jacobian, linear_recurrence_jacobian(self.size, 0.9, 1.5, input_lag))
+
+
+if '__main__' == __name__:
+    unittest.main()
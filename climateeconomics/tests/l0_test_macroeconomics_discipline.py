@@ -22,7 +22,11 @@ import pandas as pd
 from pandas import DataFrame
 from sostrades_core.execution_engine.execution_engine import ExecutionEngine
 
+from climateeconomics.core.core_witness.macroeconomics_model_v1 import (
+    compute_regionalised_gdp,
+)
 from climateeconomics.glossarycore import GlossaryCore
+from climateeconomics.sos_wrapping.post_procs import regions
 
 
 class MacroDiscTest(unittest.TestCase):
@@ -48,7 +52,8 @@ class MacroDiscTest(unittest.TestCase):
             GlossaryCore.TotalCO2Emissions: np.linspace(1035, 0, len(self.years)),
         })
 
-    def test_execute(self):
+    def run_macroeconomics(self, defer_diagnostic_outputs: bool = False):
+        """configure and execute the macroeconomics discipline"""
         self.model_name = 'Macroeconomics'
         ns_dict = {GlossaryCore.NS_WITNESS: f'{self.name}',
                    GlossaryCore.NS_ENERGY_MIX: f'{self.name}',
@@ -177,11 +182,15 @@ class MacroDiscTest(unittest.TestCase):
                            'activate_climate_effect_population': True,
                            'activate_pandemic_effects': True,
                            },
-                       f'{self.name}.{GlossaryCore.EnergyCarbonIntensityDfValue}': carbon_intensity_energy
+                       f'{self.name}.{GlossaryCore.EnergyCarbonIntensityDfValue}': carbon_intensity_energy,
+                       f'{self.name}.{self.model_name}.{GlossaryCore.DeferDiagnosticOutputsName}': defer_diagnostic_outputs,
                        }
 
         self.ee.load_study_from_input_dict(values_dict)
         self.ee.execute()
+
+    def test_execute(self):
+        self.run_macroeconomics()
         disc = self.ee.dm.get_disciplines_with_name(
             f'{self.name}.{self.model_name}')[0]
         filterr = disc.get_chart_filter_list()
@@ -190,3 +199,61 @@ class MacroDiscTest(unittest.TestCase):
             #graph.to_plotly().show()
             pass
 
+    def test_defer_diagnostic_outputs(self):
+        """
+        Gdp per group of countries and per country are outputs of the discipline unless they are deferred,
+        the regions post-processing gives the same charts in both cases
+        """
+        diagnostic_outputs = [GlossaryCore.TotalGDPGroupDFName,
+                              GlossaryCore.PercentageGDPGroupDFName,
+                              GlossaryCore.GDPCountryDFName]
+        charts_ordinates = {}
+        for defer_diagnostic_outputs in [False, True]:
+            self.ee = ExecutionEngine(self.name)
+            self.run_macroeconomics(defer_diagnostic_outputs)
+            economics_detail_df = self.ee.dm.get_value(f'{self.name}.{self.model_name}.{GlossaryCore.EconomicsDetailDfValue}')
+            if defer_diagnostic_outputs:
+                for var_name in diagnostic_outputs:
+                    self.assertListEqual(self.ee.dm.get_all_namespaces_from_var_name(var_name), [])
+            else:
+                expected_outputs = compute_regionalised_gdp(economics_detail_df[GlossaryCore.Years].values,
+                                                            economics_detail_df[GlossaryCore.OutputNetOfDamage].values)
+                for var_name, expected_output in zip(diagnostic_outputs, expected_outputs):
+                    output = self.ee.dm.get_value(self.ee.dm.get_all_namespaces_from_var_name(var_name)[0])
+                    pd.testing.assert_frame_equal(output.reset_index(drop=True), expected_output)
+
+            chart_filters = regions.post_processing_filters(self.ee, self.name)
+            charts = regions.post_processings(self.ee, self.name, chart_filters)
+            charts_ordinates[defer_diagnostic_outputs] = [[serie.ordinate for serie in chart.series] for chart in charts]
+
+        self.assertEqual(len(charts_ordinates[False]), 3)
+        for ordinates, ordinates_deferred in zip(charts_ordinates[False], charts_ordinates[True]):
+            np.testing.assert_allclose(np.array(ordinates), np.array(ordinates_deferred))
+
+    def test_change_defer_diagnostic_outputs(self):
+        """
+        Changing defer_diagnostic_outputs on a configured study declares or removes the gdp per group of countries
+        and per country outputs at the next configure
+        """
+        diagnostic_outputs = [GlossaryCore.TotalGDPGroupDFName,
+                              GlossaryCore.PercentageGDPGroupDFName,
+                              GlossaryCore.GDPCountryDFName]
+        defer_diagnostic_outputs_name = f'{self.name}.{self.model_name}.{GlossaryCore.DeferDiagnosticOutputsName}'
+        self.run_macroeconomics(defer_diagnostic_outputs=False)
+        for defer_diagnostic_outputs in [True, False]:
+            self.ee.load_study_from_input_dict({defer_diagnostic_outputs_name: defer_diagnostic_outputs})
+            self.ee.execute()
+            economics_detail_df = self.ee.dm.get_value(f'{self.name}.{self.model_name}.{GlossaryCore.EconomicsDetailDfValue}')
+            if defer_diagnostic_outputs:
+                for var_name in diagnostic_outputs:
+                    self.assertListEqual(self.ee.dm.get_all_namespaces_from_var_name(var_name), [])
+            else:
+                expected_outputs = compute_regionalised_gdp(economics_detail_df[GlossaryCore.Years].values,
+                                                            economics_detail_df[GlossaryCore.OutputNetOfDamage].values)
+                for var_name, expected_output in zip(diagnostic_outputs, expected_outputs):
+                    output = self.ee.dm.get_value(self.ee.dm.get_all_namespaces_from_var_name(var_name)[0])
+                    pd.testing.assert_frame_equal(output.reset_index(drop=True), expected_output)
+
+
+if '__main__' == __name__:
+    unittest.main()
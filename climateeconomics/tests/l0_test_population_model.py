@@ -0,0 +1,201 @@
+'''
+Copyright 2024 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+from os.path import dirname, join
+
+import numpy as np
+import pandas as pd
+
+from climateeconomics.core.core_witness.population_model import Population
+from climateeconomics.database.database_witness_core import DatabaseWitnessCore
+from climateeconomics.glossarycore import GlossaryCore
+
+# climate effect on population activated or not, kcal per capita low enough for the diet death rate to be unclipped
+# or high enough for it to be clipped (total death rate kept below 1)
+REGIMES = {
+    'climate': {'climate': True, 'kcal_pc': (1900., 2600.)},
+    'no_climate': {'climate': False, 'kcal_pc': (1900., 2600.)},
+    'clipped_diet': {'climate': True, 'kcal_pc': (1200., 60000.)},
+}
+DEATH_EFFECTS = ['base', 'climate', 'diet', 'pandemic', 'total']
+
+
+def build_population_inputs(regime: str, year_end: int = 2050) -> dict:
+    """inputs of the population model for one of the REGIMES"""
+    data_dir = join(dirname(dirname(__file__)), 'data')
+    year_start = GlossaryCore.YearStartDefault
+    years = np.arange(year_start, year_end + 1)
+    nb_years = len(years)
+    return {
+        GlossaryCore.YearStart: year_start,
+        GlossaryCore.YearEnd: year_end,
+        GlossaryCore.PopulationStart: DatabaseWitnessCore.PopulationYearStart.get_df_at_year(year_start),
+        'climate_mortality_param_df': pd.read_csv(join(data_dir, 'climate_additional_deaths_V2.csv')),
+        'calibration_temperature_increase': 2.5,
+        'theta': 2,
+        'death_rate_param': pd.read_csv(join(data_dir, 'death_rate_params_v2.csv')),
+        'birth_rate_upper': 1.12545946e-01,
+        'birth_rate_lower': 2.02192894e-02,
+        'birth_rate_delta': 6.19058508e-04,
+        'birth_rate_phi': 4.03360000e+03,
+        'birth_rate_nu': 1.75808789e-01,
+        'lower_knowledge': 10,
+        'upper_knowledge': 100,
+        'delta_knowledge': 0.0293357,
+        'phi_knowledge': 149.7919,
+        'nu_knowledge': 1.144062855,
+        'constant_birthrate_know': 1.99999838e-02,
+        'alpha_birthrate_know': 1.02007061e-01,
+        'beta_birthrate_know': 8.01923418e-01,
+        'share_know_birthrate': 7.89207064e-01,
+        'assumptions_dict': {'compute_gdp': True,
+                             'compute_climate_impact_on_gdp': True,
+                             'activate_climate_effect_population': REGIMES[regime]['climate'],
+                             'activate_pandemic_effects': False},
+        GlossaryCore.CaloriesPerCapitaValue: pd.DataFrame({GlossaryCore.Years: years,
+                                                           'kcal_pc': np.linspace(*REGIMES[regime]['kcal_pc'], nb_years)}),
+        'diet_mortality_param_df': pd.read_csv(join(data_dir, 'diet_mortality_param.csv')),
+        'theta_diet': 5.0,
+        'kcal_pc_ref': 2000.0,
+        GlossaryCore.PandemicParamDfValue: DatabaseWitnessCore.PandemicParamsDf.value.copy(),
+        GlossaryCore.EconomicsDfValue: pd.DataFrame({GlossaryCore.Years: years,
+                                                     GlossaryCore.OutputNetOfDamage: np.linspace(130., 220., nb_years)}),
+        GlossaryCore.TemperatureDfValue: pd.DataFrame({GlossaryCore.Years: years,
+                                                       GlossaryCore.TempAtmo: np.linspace(1.1, 2.6, nb_years)}),
+    }
+
+
+def get_population_outputs(inputs: dict) -> pd.DataFrame:
+    """
+    Outputs of the population model compared to the reference: population per age, working age population, births,
+    deaths per effect and life expectancy, one row per year
+    """
+    population_df, _, _, birth_df, death_dict, life_expectancy_df, working_age_population_df = \
+        Population(inputs).compute(inputs)
+    outputs = population_df.reset_index(drop=True)
+    outputs[GlossaryCore.Population1570] = working_age_population_df[GlossaryCore.Population1570].values
+    outputs['number_of_birth'] = birth_df['number_of_birth'].values
+    outputs['life_expectancy'] = life_expectancy_df['life_expectancy'].values
+    for effect in DEATH_EFFECTS:
+        outputs[f'death_{effect}'] = death_dict[effect]['total'].values
+    return outputs
+
+
+class PopulationModelTestCase(unittest.TestCase):
+    """
+    Outputs of the population model are compared to reference outputs of the year by year dataframe implementation
+    """
+
+    def setUp(self):
+        self.reference_outputs = pd.read_csv(join(dirname(__file__), 'data', 'population_reference_outputs.csv'))
+
+    def test_01_reference_outputs(self):
+        for regime in REGIMES:
+            with self.subTest(regime=regime):
+                outputs = get_population_outputs(build_population_inputs(regime))
+                reference = self.reference_outputs[self.reference_outputs['regime'] == regime].drop(columns='regime')
+                pd.testing.assert_frame_equal(outputs, reference.reset_index(drop=True),
+                                              check_exact=False, rtol=1e-10, check_dtype=False)
+
+    def test_02_regimes(self):
+        for regime in REGIMES:
+            inputs = build_population_inputs(regime)
+            model = Population(inputs)
+            model.compute(inputs)
+            self.assertEqual(model.diet_clipped.any(), regime == 'clipped_diet')
+            self.assertEqual((model.death_rate_arrays['climate'] > 0).any(), regime != 'no_climate')
+
+    def test_03_deprecated_rates(self):
+        inputs = build_population_inputs('climate')
+        model = Population(inputs)
+        population_df = model.compute(inputs)[0]
+        year = 2030
+        gdp = inputs[GlossaryCore.EconomicsDfValue].set_index(GlossaryCore.Years).loc[year, GlossaryCore.OutputNetOfDamage]
+        gdp_per_capita = gdp * 1e12 / population_df.loc[year, 'total']
+        with self.assertWarns(DeprecationWarning):
+            birth_rate = model.compute_birth_rate_v1(year)
+        expected_birth_rate = Population.logistic_rate(inputs['birth_rate_upper'], inputs['birth_rate_lower'],
+                                                       inputs['birth_rate_delta'], inputs['birth_rate_phi'],
+                                                       inputs['birth_rate_nu'], gdp_per_capita)
+        self.assertAlmostEqual(birth_rate, expected_birth_rate, places=12)
+        with self.assertWarns(DeprecationWarning):
+            death_rate = model.compute_death_rate(year)
+        param = inputs['death_rate_param']
+        expected_death_rate = Population.logistic_rate(param['death_rate_upper'], param['death_rate_lower'],
+                                                       param['death_rate_delta'], param['death_rate_phi'],
+                                                       param['death_rate_nu'], gdp_per_capita)
+        np.testing.assert_allclose(death_rate.values, expected_death_rate.values, rtol=1e-12)
+    def test_04_gradients_complex_step(self):
+        """
+        Derivatives of total and working age population wrt output, temperature and kcal per capita are compared to
+        complex step derivatives, for unclipped and clipped diet death rates and without climate effect
+        """
+        step = 1e-30
+        gradient_inputs = {'compute_d_pop_d_output': (GlossaryCore.EconomicsDfValue, GlossaryCore.OutputNetOfDamage),
+                           'compute_d_pop_d_temp': (GlossaryCore.TemperatureDfValue, GlossaryCore.TempAtmo),
+                           'compute_d_pop_d_kcal_pc': (GlossaryCore.CaloriesPerCapitaValue, 'kcal_pc')}
+        for regime in REGIMES:
+            inputs = build_population_inputs(regime)
+            model = Population(inputs)
+            model.compute(inputs)
+            for gradient_method, (df_name, column) in gradient_inputs.items():
+                with self.subTest(regime=regime, gradient=gradient_method):
+                    d_pop, d_working_pop = getattr(model, gradient_method)()
+                    nb_years = len(inputs[df_name])
+                    d_pop_complex_step = np.zeros((nb_years, nb_years))
+                    d_working_pop_complex_step = np.zeros((nb_years, nb_years))
+                    for iyear in range(nb_years):
+                        perturbed_df = inputs[df_name].copy()
+                        perturbed_df[column] = perturbed_df[column].values + 1j * step * np.eye(nb_years)[iyear]
+                        perturbed_inputs = {**inputs, df_name: perturbed_df}
+                        population_df, _, _, _, _, _, working_age_population_df = \
+                            Population(perturbed_inputs).compute(perturbed_inputs)
+                        d_pop_complex_step[:, iyear] = np.imag(population_df['total'].values) / step
+                        d_working_pop_complex_step[:, iyear] = np.imag(
+                            working_age_population_df[GlossaryCore.Population1570].values) / step
+                    np.testing.assert_allclose(d_pop, d_pop_complex_step, rtol=1e-10, atol=1e-8)
+                    np.testing.assert_allclose(d_working_pop, d_working_pop_complex_step, rtol=1e-10, atol=1e-8)
+                    if regime == 'no_climate' and gradient_method == 'compute_d_pop_d_temp':
+                        self.assertFalse(d_pop.any())
+
+    def test_05_life_expectancy_gradients(self):
+        """
+        Derivatives of life expectancy are only computed on request, they are compared to complex step derivatives
+        """
+        step = 1e-30
+        inputs = build_population_inputs('clipped_diet')
+        model = Population(inputs)
+        model.compute(inputs)
+        model.compute_d_pop_d_output()
+        self.assertIsNone(model.life_expectancy_sensitivities)
+        gradient_inputs = {GlossaryCore.OutputNetOfDamage: GlossaryCore.EconomicsDfValue,
+                           GlossaryCore.TempAtmo: GlossaryCore.TemperatureDfValue,
+                           'kcal_pc': GlossaryCore.CaloriesPerCapitaValue}
+        for direction, df_name in gradient_inputs.items():
+            nb_years = len(inputs[df_name])
+            d_life_expectancy_complex_step = np.zeros((nb_years, nb_years))
+            for iyear in range(nb_years):
+                perturbed_df = inputs[df_name].copy()
+                perturbed_df[direction] = perturbed_df[direction].values + 1j * step * np.eye(nb_years)[iyear]
+                perturbed_inputs = {**inputs, df_name: perturbed_df}
+                life_expectancy_df = Population(perturbed_inputs).compute(perturbed_inputs)[5]
+                d_life_expectancy_complex_step[:, iyear] = np.imag(life_expectancy_df['life_expectancy'].values) / step
+            np.testing.assert_allclose(model.compute_d_life_expectancy(direction), d_life_expectancy_complex_step,
+                                       rtol=1e-10, atol=1e-12)
+
+
+if '__main__' == __name__:
+    unittest.main()
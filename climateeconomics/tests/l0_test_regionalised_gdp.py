@@ -0,0 +1,65 @@
+'''
+Copyright 2024 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from climateeconomics.core.core_witness.macroeconomics_model_v1 import (
+    compute_regionalised_gdp,
+)
+from climateeconomics.database.database_witness_core import DatabaseWitnessCore
+from climateeconomics.glossarycore import GlossaryCore
+
+
+class RegionalisedGDPTestCase(unittest.TestCase):
+    """
+    Vectorized gdp breakdown per group of countries and per country is compared to the loop over countries
+    """
+
+    def setUp(self):
+        self.years = np.arange(GlossaryCore.YearStartDefault, GlossaryCore.YearEndDefault + 1)
+        self.output_net_of_damage = np.linspace(130., 310., len(self.years))
+
+    def reference_gdp_per_country(self, total_gdp_per_group_df: pd.DataFrame) -> pd.DataFrame:
+        """gdp per country built country by country and concatenated"""
+        mean_percentage_gdp_country = DatabaseWitnessCore.GDPPercentagePerCountry.value
+        df_gdp_per_country = None
+        for index, (_, row) in enumerate(mean_percentage_gdp_country.iterrows()):
+            df_temp = pd.DataFrame({GlossaryCore.Years: total_gdp_per_group_df[GlossaryCore.Years]})
+            df_temp[GlossaryCore.GDPName] = 1000 * row[GlossaryCore.MeanPercentageName] * total_gdp_per_group_df[row[GlossaryCore.GroupName]] / 100
+            df_temp[GlossaryCore.CountryName] = row[GlossaryCore.CountryName]
+            df_temp[GlossaryCore.GroupName] = row[GlossaryCore.GroupName]
+            df_gdp_per_country = pd.concat([df_gdp_per_country, df_temp]) if index > 0 else df_temp.copy()
+        df_gdp_per_country.reset_index(drop=True, inplace=True)
+        return df_gdp_per_country
+
+    def test_01_groups(self):
+        total_gdp_per_group_df, percentage_gdp_per_group_df, _ = compute_regionalised_gdp(self.years, self.output_net_of_damage)
+        groups = list(DatabaseWitnessCore.CountriesPerRegionIMF.value.keys())
+        self.assertListEqual(list(total_gdp_per_group_df.columns), [GlossaryCore.Years] + groups)
+        self.assertListEqual(list(percentage_gdp_per_group_df.columns), [GlossaryCore.Years] + groups)
+        np.testing.assert_allclose(percentage_gdp_per_group_df[groups].sum(axis=1), 100.)
+        np.testing.assert_allclose(total_gdp_per_group_df[groups].sum(axis=1), self.output_net_of_damage)
+
+    def test_02_countries(self):
+        total_gdp_per_group_df, _, df_gdp_per_country = compute_regionalised_gdp(self.years, self.output_net_of_damage)
+        pd.testing.assert_frame_equal(df_gdp_per_country, self.reference_gdp_per_country(total_gdp_per_group_df),
+                                      check_exact=False, rtol=1e-12)
+
+
+if '__main__' == __name__:
+    unittest.main()
@@ -0,0 +1,134 @@
+'''
+Copyright 2024 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from climateeconomics.core.core_resources.resource_model.resource_model import (
+    ResourceModel,
+)
+from climateeconomics.glossarycore import GlossaryCore
+
+
+class ResourceMeritOrderTestCase(unittest.TestCase):
+    """
+    Array based merit order allocation of the resource model is compared to an explicit loop on years and resource types,
+    and its derivatives regarding demand to complex step
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.year_start = 2020
+        self.year_end = 2060
+        self.lifespan = 2
+        self.years = np.arange(self.year_start, self.year_end + 1)
+        self.sub_resource_list = ['expensive', 'cheap', 'medium']
+        self.production = 10. * rng.random((len(self.years), 3))
+        # a few years without production and without demand
+        self.production[[5, 6]] = 0.
+        self.demand = 30. * rng.random(len(self.years))
+        self.demand[[12, 20]] = 0.
+        consumed_data = pd.DataFrame({f'{resource_type}_consumption': rng.random(self.lifespan + 1)
+                                      for resource_type in self.sub_resource_list})
+        self.inputs_dict = {
+            GlossaryCore.YearStart: self.year_start,
+            GlossaryCore.YearEnd: self.year_end,
+            'production_start': self.year_start,
+            'stock_start': 5.,
+            'resources_demand': pd.DataFrame({GlossaryCore.Years: self.years, 'resource': self.demand}),
+            'resource_consumed_data': consumed_data,
+            'lifespan': self.lifespan,
+            'recycled_rate': 0.4,
+            'resource_data': pd.DataFrame(),
+            'resource_production_data': pd.DataFrame(columns=[GlossaryCore.Years] + self.sub_resource_list),
+            'resource_price_data': pd.DataFrame({'resource_type': ['medium', 'expensive', 'cheap'],
+                                                 'price': [20., 50., 10.]}),
+        }
+
+    def compute_model(self):
+        model = ResourceModel('resource')
+        model.configure_parameters(self.inputs_dict)
+        model.configure_parameters_update(self.inputs_dict)
+        for resource_index, resource_type in enumerate(self.sub_resource_list):
+            model.predictable_production[resource_type] = self.production[:, resource_index]
+        model.compute_stock()
+        model.compute_price()
+        return model
+
+    def allocation_loop(self):
+        consumed = self.inputs_dict['resource_consumed_data'].values
+        stock = np.zeros((len(self.years), 3))
+        stock[0] = 5.
+        use = np.zeros((len(self.years) + self.lifespan, 3))
+        use[:self.lifespan + 1] = consumed
+        recycled = np.zeros((len(self.years), 3))
+        recycled[0] = consumed[0] * 0.4
+        for t in range(1, len(self.years)):
+            if self.production[t].sum() <= 0:
+                continue
+            demand = self.demand[t]
+            for k in [1, 2, 0]:
+                recycled[t, k] = use[t, k] * 0.4
+                available = stock[t - 1, k] + self.production[t, k] + recycled[t, k]
+                used = min(max(demand, 0.), available)
+                use[t + self.lifespan, k] = used
+                stock[t, k] = available - used
+                demand -= used
+        return stock, use[self.lifespan:], recycled
+
+    def test_01_allocation(self):
+        model = self.compute_model()
+        stock, use, recycled = self.allocation_loop()
+        np.testing.assert_allclose(model.resource_stock[self.sub_resource_list].values, stock, atol=1e-12)
+        np.testing.assert_allclose(model.use_stock[self.sub_resource_list].values, use, atol=1e-12)
+        np.testing.assert_allclose(model.recycled_production[self.sub_resource_list].values, recycled, atol=1e-12)
+        self.assertListEqual(list(model.resource_stock.index), list(self.years))
+        # allocation decisions are stored by ascending price, a resource type is only used when the cheaper ones are
+        # exhausted
+        self.assertTrue(np.all(model.exhausted_resources[:, 0] | ~model.exhausted_resources[:, 1]))
+        self.assertFalse(model.supplied_years[5] or model.supplied_years[6])
+
+    def test_02_price(self):
+        model = self.compute_model()
+        _, use, _ = self.allocation_loop()
+        total = use.sum(axis=1)
+        expected_price = np.where(total != 0, use @ np.array([50., 10., 20.]) / np.where(total != 0, total, 1.), 0.)
+        np.testing.assert_allclose(model.resource_price['price'].values, expected_price)
+
+    def test_03_derivatives(self):
+        model = self.compute_model()
+        grad_stock, grad_price, grad_use, grad_recycling = model.get_derivative_resource()
+        epsilon = 1e-30
+        reference_demand = self.demand
+        for year_index in range(len(self.years)):
+            self.demand = reference_demand.astype(complex)
+            self.demand[year_index] += epsilon * 1j
+            self.inputs_dict['resources_demand'] = pd.DataFrame({GlossaryCore.Years: self.years,
+                                                                 'resource': self.demand})
+            perturbed_model = self.compute_model()
+            for resource_type in self.sub_resource_list:
+                for dataframe, gradient in [(perturbed_model.resource_stock, grad_stock),
+                                            (perturbed_model.use_stock, grad_use),
+                                            (perturbed_model.recycled_production, grad_recycling)]:
+                    np.testing.assert_allclose(gradient[resource_type][:, year_index],
+                                               np.imag(dataframe[resource_type].values) / epsilon, atol=1e-12)
+            np.testing.assert_allclose(grad_price[:, year_index],
+                                       np.imag(perturbed_model.resource_price['price'].values) / epsilon, atol=1e-10)
+
+
+if '__main__' == __name__:
+    unittest.main()
@@ -0,0 +1,284 @@
+'''
+Copyright 2024 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from climateeconomics.core.core_sectorization.sector_model import (
+    SectorModel,
+    StackedSectorModel,
+)
+from climateeconomics.core.tools.jacobian_operators import to_dense
+from climateeconomics.glossarycore import GlossaryCore
+
+
+class StackedSectorModelTestCase(unittest.TestCase):
+    """
+    SectorModel outputs are compared to a year by year reference and its gradients to finite differences, batched
+    evaluation of the sectors is compared to one SectorModel per sector, for each damage assumption, with a different
+    output gamma per sector
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.years = np.arange(2020, 2101)
+        nb_years = len(self.years)
+        self.sectors = [GlossaryCore.SectorIndustry, GlossaryCore.SectorServices, GlossaryCore.SectorAgriculture]
+        workforce_df = pd.DataFrame({GlossaryCore.Years: self.years,
+                                     **{sector: 500. + 500. * rng.random(nb_years) for sector in self.sectors}})
+        self.sectors_inputs = {}
+        for i, sector in enumerate(self.sectors):
+            sections = GlossaryCore.SectionDictSectors[sector]
+            percentages = rng.random(len(sections))
+            percentages_df = pd.DataFrame({GlossaryCore.Years: self.years,
+                                           **dict(zip(sections, 100. * percentages / percentages.sum()))})
+            self.sectors_inputs[sector] = {
+                'prod_function_fitting': False,
+                GlossaryCore.YearStart: self.years[0],
+                GlossaryCore.YearEnd: self.years[-1],
+                f"{sector}.{GlossaryCore.SectionGdpPercentageDfValue}": percentages_df,
+                f"{sector}.{GlossaryCore.SectionEnergyConsumptionPercentageDfValue}": percentages_df.copy(),
+                'productivity_start': 0.5 + i,
+                'capital_start': 50. + 20. * i,
+                'productivity_gr_start': 0.01 + 0.005 * i,
+                'decline_rate_tfp': 0.02,
+                'depreciation_capital': 0.05 + 0.02 * i,
+                GlossaryCore.FractionDamageToProductivityValue: 0.3,
+                GlossaryCore.DamageToProductivity: True,
+                'output_alpha': 0.8 - 0.1 * i,
+                'output_gamma': 0.4 + 0.15 * i,
+                'energy_eff_k': 0.05,
+                'energy_eff_cst': 0.9 + 0.5 * i,
+                'energy_eff_xzero': 2015.,
+                'energy_eff_max': 3. + i,
+                'capital_utilisation_ratio': 0.8,
+                'max_capital_utilisation_ratio': 0.85,
+                'ref_emax_enet_constraint': 60e3,
+                'assumptions_dict': {'compute_climate_impact_on_gdp': True},
+                'usable_capital_ref': 5.,
+                f"{sector}.{GlossaryCore.InvestmentDfValue}": pd.DataFrame({GlossaryCore.Years: self.years,
+                                                                            GlossaryCore.InvestmentsValue: 5. + rng.random(nb_years)}),
+                GlossaryCore.EnergyProductionValue: pd.DataFrame({GlossaryCore.Years: self.years,
+                                                                  GlossaryCore.TotalProductionValue: 20. + 10. * rng.random(nb_years)}),
+                GlossaryCore.WorkforceDfValue: workforce_df,
+                GlossaryCore.DamageFractionDfValue: pd.DataFrame({GlossaryCore.Years: self.years,
+                                                                  GlossaryCore.DamageFractionOutput: 0.05 * rng.random(nb_years)}),
+            }
+
+    damage_assumptions_list = [[(True, True), (False, True), (False, False)],
+                               [(False, True), (True, True), (True, False)]]
+
+    # outputs of the gradients methods of SectorModel, in the order they are returned
+    energy_production_outputs = ['gross_output', 'net_output', 'damages', 'estimated_damages', 'damages_from_climate',
+                                 'estimated_damages_from_climate', 'damages_from_prod_loss',
+                                 'estimated_damages_from_prod_loss', 'ku_constraint', 'usable_capital',
+                                 'section_energy_consumption', 'section_gdp']
+    working_pop_outputs = ['gross_output', 'net_output', 'damages', 'estimated_damages', 'damages_from_climate',
+                           'estimated_damages_from_climate', 'damages_from_prod_loss', 'estimated_damages_from_prod_loss',
+                           'ku_constraint', 'section_gdp']
+    damage_frac_output_outputs = ['gross_output', 'net_output', 'estimated_damages', 'damages', 'damages_from_prod_loss',
+                                  'estimated_damages_from_prod_loss', 'estimated_damages_from_climate',
+                                  'damages_from_climate', 'ku_constraint', 'section_gdp']
+    invests_outputs = ['capital', 'ku_constraint']
+
+    def set_damage_assumptions(self, damage_assumptions):
+        for sector, (damage_to_productivity, compute_climate_impact_on_gdp) in zip(self.sectors, damage_assumptions):
+            inputs = self.sectors_inputs[sector]
+            inputs[GlossaryCore.DamageToProductivity] = damage_to_productivity
+            inputs['assumptions_dict'] = {'compute_climate_impact_on_gdp': compute_climate_impact_on_gdp}
+
+    def run_sector_model(self, inputs, sector):
+        model = SectorModel()
+        model.configure_parameters(inputs, sector)
+        model.compute(inputs)
+        return model
+
+    def get_models(self, damage_assumptions):
+        self.set_damage_assumptions(damage_assumptions)
+        sector_models = [self.run_sector_model(self.sectors_inputs[sector], sector) for sector in self.sectors]
+
+        stacked_models = []
+        for sector in self.sectors:
+            model = SectorModel()
+            model.configure_parameters(self.sectors_inputs[sector], sector)
+            stacked_models.append(model)
+        stacked_model = StackedSectorModel(stacked_models)
+        stacked_model.compute(self.sectors_inputs)
+        return sector_models, stacked_model
+
+    @staticmethod
+    def get_outputs(model) -> dict:
+        return {'gross_output': model.production_df[GlossaryCore.GrossOutput].values,
+                'net_output': model.production_df[GlossaryCore.OutputNetOfDamage].values,
+                'damages': model.damage_df[GlossaryCore.Damages].values,
+                'estimated_damages': model.damage_df[GlossaryCore.EstimatedDamages].values,
+                'damages_from_climate': model.damage_df[GlossaryCore.DamagesFromClimate].values,
+                'estimated_damages_from_climate': model.damage_df[GlossaryCore.EstimatedDamagesFromClimate].values,
+                'damages_from_prod_loss': model.damage_df[GlossaryCore.DamagesFromProductivityLoss].values,
+                'estimated_damages_from_prod_loss': model.damage_df[GlossaryCore.EstimatedDamagesFromProductivityLoss].values,
+                'ku_constraint': model.usable_capital_upper_bound_constraint,
+                'usable_capital': model.capital_df[GlossaryCore.UsableCapital].values,
+                'capital': model.capital_df[GlossaryCore.Capital].values,
+                'section_energy_consumption': {section: model.section_energy_consumption_df[section].values for section in model.section_list},
+                'section_gdp': {section: model.section_gdp_df[section].values for section in model.section_list}}
+
+    def reference_outputs(self, inputs, sector) -> dict:
+        """outputs of the sector computed year by year"""
+        damage_fraction = inputs[GlossaryCore.DamageFractionDfValue][GlossaryCore.DamageFractionOutput].values
+        energy_production = inputs[GlossaryCore.EnergyProductionValue][GlossaryCore.TotalProductionValue].values
+        working_pop = inputs[GlossaryCore.WorkforceDfValue][sector].values
+        invests = inputs[f"{sector}.{GlossaryCore.InvestmentDfValue}"][GlossaryCore.InvestmentsValue].values
+        compute_climate_impact_on_gdp = inputs['assumptions_dict']['compute_climate_impact_on_gdp']
+        damage_to_productivity = inputs[GlossaryCore.DamageToProductivity] and compute_climate_impact_on_gdp
+        frac_damage_prod = inputs[GlossaryCore.FractionDamageToProductivityValue]
+        alpha, gamma = inputs['output_alpha'], inputs['output_gamma']
+
+        outputs = {name: np.zeros(len(self.years)) for name in self.energy_production_outputs[:-2] + ['capital']}
+        productivity_wo_damage = inputs['productivity_start']
+        capital = inputs['capital_start']
+        for t, year in enumerate(self.years):
+            if t > 0:
+                productivity_growth_rate = inputs['productivity_gr_start'] * np.exp(- inputs['decline_rate_tfp'] * (t - 1))
+                productivity_wo_damage = productivity_wo_damage / (1 - productivity_growth_rate / 5)
+                capital = (1 - inputs['depreciation_capital']) * capital + invests[t - 1]
+            damefrac = damage_fraction[t]
+            productivity_w_damage = productivity_wo_damage * (1 - damefrac)
+            productivity = productivity_w_damage if damage_to_productivity else productivity_wo_damage
+            energy_efficiency = inputs['energy_eff_cst'] + inputs['energy_eff_max'] / (
+                    1 + np.exp(-inputs['energy_eff_k'] * (year - inputs['energy_eff_xzero'])))
+            usable_capital = inputs['capital_utilisation_ratio'] * energy_efficiency * energy_production[t]
+            gross_output = productivity * (alpha * usable_capital ** gamma + (1 - alpha) * working_pop[t] ** gamma) ** (1 / gamma)
+            damage_factor = (1 - damefrac) / (1 - frac_damage_prod * damefrac) if damage_to_productivity else 1 - damefrac
+            net_output = damage_factor * gross_output if compute_climate_impact_on_gdp else gross_output
+
+            estimated_damages_from_prod_loss = (productivity_wo_damage - productivity_w_damage) / productivity * gross_output
+            damages_from_climate = gross_output - net_output
+            if not compute_climate_impact_on_gdp:
+                estimated_damages_from_climate = gross_output * damefrac
+            else:
+                estimated_damages_from_climate = damages_from_climate
+            damages_from_prod_loss = estimated_damages_from_prod_loss if damage_to_productivity else 0.
+            values = {'gross_output': gross_output,
+                      'net_output': net_output,
+                      'damages': damages_from_climate + damages_from_prod_loss,
+                      'estimated_damages': estimated_damages_from_climate + estimated_damages_from_prod_loss,
+                      'damages_from_climate': damages_from_climate,
+                      'estimated_damages_from_climate': estimated_damages_from_climate,
+                      'damages_from_prod_loss': damages_from_prod_loss,
+                      'estimated_damages_from_prod_loss': estimated_damages_from_prod_loss,
+                      'ku_constraint': - (usable_capital - inputs['max_capital_utilisation_ratio'] * capital) / inputs['usable_capital_ref'],
+                      'usable_capital': usable_capital,
+                      'capital': capital}
+            for name, value in values.items():
+                outputs[name][t] = value
+
+        sections = GlossaryCore.SectionDictSectors[sector]
+        gdp_percentages = inputs[f"{sector}.{GlossaryCore.SectionGdpPercentageDfValue}"]
+        energy_percentages = inputs[f"{sector}.{GlossaryCore.SectionEnergyConsumptionPercentageDfValue}"]
+        outputs['section_gdp'] = {section: outputs['net_output'] * gdp_percentages[section].values[0] / 100. for section in sections}
+        outputs['section_energy_consumption'] = {section: energy_production * energy_percentages[section].values[0] / 100. for section in sections}
+        return outputs
+
+    def assert_outputs_equal(self, outputs, reference_outputs, rtol, atol=0.):
+        for name, reference in reference_outputs.items():
+            if isinstance(reference, dict):
+                for section, section_reference in reference.items():
+                    np.testing.assert_allclose(outputs[name][section], section_reference, rtol=rtol, atol=atol, err_msg=f"{name} {section}")
+            else:
+                np.testing.assert_allclose(outputs[name], reference, rtol=rtol, atol=atol, err_msg=name)
+
+    def test_01_sector_outputs(self):
+        """outputs of SectorModel are compared to a year by year computation"""
+        for damage_assumptions in self.damage_assumptions_list:
+            sector_models, _ = self.get_models(damage_assumptions)
+            for sector, model in zip(self.sectors, sector_models):
+                with self.subTest(sector=sector, damage_assumptions=damage_assumptions):
+                    self.assert_outputs_equal(self.get_outputs(model), self.reference_outputs(self.sectors_inputs[sector], sector), rtol=1e-12)
+
+    def test_02_sector_gradients(self):
+        """
+        Gradients of SectorModel times a random direction are compared to central finite differences of the outputs
+        along this direction
+        """
+        rng = np.random.default_rng(4)
+        step = 1e-6
+        coupling_inputs = [('d_energy_production', self.energy_production_outputs, GlossaryCore.EnergyProductionValue, GlossaryCore.TotalProductionValue),
+                           ('d_working_pop', self.working_pop_outputs, GlossaryCore.WorkforceDfValue, None),
+                           ('d_damage_frac_output', self.damage_frac_output_outputs, GlossaryCore.DamageFractionDfValue, GlossaryCore.DamageFractionOutput),
+                           ('d_invests', self.invests_outputs, GlossaryCore.InvestmentDfValue, GlossaryCore.InvestmentsValue)]
+        for damage_assumptions in self.damage_assumptions_list:
+            sector_models, _ = self.get_models(damage_assumptions)
+            for sector, model in zip(self.sectors, sector_models):
+                inputs = self.sectors_inputs[sector]
+                for gradients_method, output_names, input_name, column in coupling_inputs:
+                    with self.subTest(sector=sector, damage_assumptions=damage_assumptions, gradients=gradients_method):
+                        if input_name == GlossaryCore.InvestmentDfValue:
+                            input_name = f"{sector}.{input_name}"
+                        column = column or sector
+                        input_values = inputs[input_name][column].values
+                        direction = input_values * rng.random(len(self.years))
+
+                        perturbed_outputs = []
+                        for sign in [1., -1.]:
+                            perturbed_df = inputs[input_name].copy()
+                            perturbed_df[column] = input_values + sign * step * direction
+                            perturbed_outputs.append(self.get_outputs(self.run_sector_model({**inputs, input_name: perturbed_df}, sector)))
+
+                        outputs_directional_derivatives = {}
+                        finite_differences = {}
+                        for name, gradient in zip(output_names, getattr(model, gradients_method)()):
+                            if isinstance(gradient, dict):
+                                outputs_directional_derivatives[name] = {section: section_gradient @ direction for section, section_gradient in gradient.items()}
+                                finite_differences[name] = {section: (perturbed_outputs[0][name][section] - perturbed_outputs[1][name][section]) / (2 * step)
+                                                            for section in gradient}
+                            else:
+                                outputs_directional_derivatives[name] = to_dense(gradient) @ direction
+                                finite_differences[name] = (perturbed_outputs[0][name] - perturbed_outputs[1][name]) / (2 * step)
+                        self.assert_outputs_equal(outputs_directional_derivatives, finite_differences, rtol=1e-5, atol=1e-7)
+
+    def assert_gradients_equal(self, sector_gradients, stacked_gradients, i, sector):
+        for sector_gradient, stacked_gradient in zip(sector_gradients, stacked_gradients):
+            if isinstance(sector_gradient, dict):
+                for section, gradient in sector_gradient.items():
+                    np.testing.assert_allclose(gradient, np.diag(stacked_gradient[sector][section]), rtol=1e-12)
+            else:
+                np.testing.assert_allclose(sector_gradient, np.diag(stacked_gradient[i]), rtol=1e-12)
+
+    def test_03_stacked_sectors(self):
+        """sectors with different parameters and damage assumptions evaluated at once are the same as one by one"""
+        for damage_assumptions in self.damage_assumptions_list:
+            sector_models, stacked_model = self.get_models(damage_assumptions)
+            for i, (sector, model) in enumerate(zip(self.sectors, sector_models)):
+                stacked_sector_model = stacked_model.sector_models[i]
+                for attr in ['productivity_df', 'capital_df', 'production_df', 'damage_df', 'section_gdp_df',
+                             'section_energy_consumption_df']:
+                    sector_df = getattr(model, attr)
+                    stacked_df = getattr(stacked_sector_model, attr)
+                    self.assertListEqual(list(sector_df.columns), list(stacked_df.columns))
+                    np.testing.assert_allclose(stacked_df.values.astype(float), sector_df.values.astype(float), rtol=1e-12)
+                np.testing.assert_allclose(stacked_sector_model.usable_capital_upper_bound_constraint,
+                                           model.usable_capital_upper_bound_constraint, rtol=1e-12)
+
+                self.assert_gradients_equal(model.d_energy_production(), stacked_model.d_energy_production(), i, sector)
+                self.assert_gradients_equal(model.d_working_pop(), stacked_model.d_working_pop(), i, sector)
+                self.assert_gradients_equal(model.d_damage_frac_output(), stacked_model.d_damage_frac_output(), i, sector)
+                for sector_gradient, stacked_gradient in zip(model.d_invests(), stacked_model.d_invests()):
+                    np.testing.assert_allclose(stacked_gradient[i], to_dense(sector_gradient), rtol=1e-12, atol=1e-14)
+
+
+if '__main__' == __name__:
+    unittest.main()
@@ -18,9 +18,10 @@ import unittest
 from os.path import dirname, join
 
 import numpy as np
-from pandas import read_csv
+from pandas import DataFrame, read_csv
 from sostrades_core.execution_engine.execution_engine import ExecutionEngine
 
+from climateeconomics.core.core_witness.tempchange_model_v2 import TempChange
 from climateeconomics.glossarycore import GlossaryCore
 
 
@@ -291,3 +292,64 @@ class TemperatureDiscTest(unittest.TestCase):
         graph_list = disc.get_post_processing_list(filter)
         # for graph in graph_list:
         #     graph.to_plotly().show()
+
+    def test_06_execute_FAIR_ensemble(self):
+
+        self.model_name = 'temperature'
+        ns_dict = {GlossaryCore.NS_WITNESS: f'{self.name}',
+                   'ns_public': f'{self.name}',}
+
+        self.ee.ns_manager.add_ns_def(ns_dict)
+
+        mod_path = 'climateeconomics.sos_wrapping.sos_wrapping_witness.tempchange_v2.tempchange_discipline.TempChangeDiscipline'
+        builder = self.ee.factory.get_builder_from_module(
+            self.model_name, mod_path)
+
+        self.ee.factory.set_builders_to_coupling_builder(builder)
+
+        self.ee.configure()
+        self.ee.display_treeview_nodes()
+
+        data_dir = join(dirname(__file__), 'data')
+        carboncycle_df_ally = read_csv(
+            join(data_dir, 'carbon_cycle_data_onestep.csv'))
+        # Take only from year start value
+        ghg_cycle_df = carboncycle_df_ally[carboncycle_df_ally[GlossaryCore.Years] >= GlossaryCore.YearStartDefault]
+
+        ghg_cycle_df[GlossaryCore.CO2Concentration] = ghg_cycle_df['ppm']
+        ghg_cycle_df[GlossaryCore.CH4Concentration] = ghg_cycle_df['ppm'] * 1222/296
+        ghg_cycle_df[GlossaryCore.N2OConcentration] = ghg_cycle_df['ppm'] * 296/296
+        ghg_cycle_df = ghg_cycle_df[[GlossaryCore.Years, GlossaryCore.CO2Concentration, GlossaryCore.CH4Concentration, GlossaryCore.N2OConcentration]]
+
+        # put manually the index
+        years = np.arange(GlossaryCore.YearStartDefault, GlossaryCore.YearEndDefault + 1, 1)
+        ghg_cycle_df.index = years
+
+        fair_ensemble_df = DataFrame({TempChange.ECS: [2., 3., 4.5],
+                                      TempChange.TCR: [1.2, 1.8, 2.2],
+                                      TempChange.FAST_TIMESCALE: [4.1, 4.1, 5.],
+                                      TempChange.SLOW_TIMESCALE: [239., 200., 280.]})
+
+        values_dict = {f'{self.name}.{GlossaryCore.YearStart}': GlossaryCore.YearStartDefault,
+                       f'{self.name}.{GlossaryCore.YearEnd}': GlossaryCore.YearEndDefault,
+                       f'{self.name}.{self.model_name}.temperature_model': 'FAIR',
+                       f'{self.name}.{self.model_name}.forcing_model': 'Meinshausen',
+                       f'{self.name}.{self.model_name}.fair_ensemble_df': fair_ensemble_df,
+                       f'{self.name}.{GlossaryCore.GHGCycleDfValue}': ghg_cycle_df}
+
+        self.ee.load_study_from_input_dict(values_dict)
+
+        self.ee.execute()
+
+        temps = self.ee.dm.get_value(f'{self.name}.{GlossaryCore.TemperatureDfValue}')
+        temps_ensemble = self.ee.dm.get_value(f'{self.name}.{self.model_name}.{GlossaryCore.TemperatureEnsembleDfValue}')
+        # warmer members for higher climate sensitivities
+        self.assertTrue(np.all(np.diff(temps_ensemble[[f'member_{i}' for i in range(3)]].values[-1]) > 0.))
+        self.assertEqual(len(temps), len(temps_ensemble))
+
+        disc = self.ee.dm.get_disciplines_with_name(
+            f'{self.name}.{self.model_name}')[0]
+        filter = disc.get_chart_filter_list()
+        graph_list = disc.get_post_processing_list(filter)
+        # for graph in graph_list:
+        #     graph.to_plotly().show()
@@ -0,0 +1,74 @@
+'''
+Copyright 2024 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+
+import numpy as np
+
+from climateeconomics.core.core_witness.utility_tools import (
+    compute_utility_objective_bis_der,
+    compute_utility_objective_der,
+    compute_utility_quantities_bis_der,
+    compute_utility_quantities_der,
+    s_curve_function,
+    s_curve_function_der,
+)
+from climateeconomics.glossarycore import GlossaryCore
+
+
+class UtilityDerivativesTestCase(unittest.TestCase):
+    """
+    Analytic derivatives of the utility quantities and objectives are compared to the autograd ones
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        years = np.arange(2020, 2041)
+        consumption = np.linspace(12., 6., len(years)) * (1. + 0.1 * rng.random(len(years)))
+        energy_price = 200. + 50. * rng.random(len(years))
+        population = np.linspace(7886., 9550., len(years))
+        self.args = (years, consumption, energy_price, population, 0.015, 0.2, 5.)
+        self.quantity_names = [GlossaryCore.UtilityDiscountRate, GlossaryCore.UtilityQuantity,
+                               GlossaryCore.PerCapitaUtilityQuantity, GlossaryCore.DiscountedUtilityQuantityPerCapita,
+                               GlossaryCore.DiscountedQuantityUtilityPopulation]
+
+    def assert_derivatives_equal(self, derivatives, derivatives_autograd):
+        for derivative, derivative_autograd in zip(derivatives, derivatives_autograd):
+            np.testing.assert_allclose(derivative, derivative_autograd, rtol=1e-10,
+                                       atol=1e-12 * np.max(np.abs(derivative_autograd)))
+
+    def test_01_s_curve_derivative(self):
+        x = np.linspace(0., 3., 50)
+        epsilon = 1e-20
+        complex_step = np.imag(s_curve_function(x + 1j * epsilon, 0.2, 5.)) / epsilon
+        np.testing.assert_allclose(s_curve_function_der(x, 0.2, 5.), complex_step, rtol=1e-12)
+
+    def test_02_quantities(self):
+        for quantity_name in self.quantity_names:
+            for compute_der in [compute_utility_quantities_der, compute_utility_quantities_bis_der]:
+                self.assert_derivatives_equal(compute_der(quantity_name, *self.args),
+                                              compute_der(quantity_name, *self.args, use_autograd=True))
+
+    def test_03_objectives(self):
+        self.assert_derivatives_equal(compute_utility_objective_der(*self.args),
+                                      compute_utility_objective_der(*self.args, use_autograd=True))
+        for multiply_by_pop in [True, False]:
+            self.assert_derivatives_equal(compute_utility_objective_bis_der(*self.args, multiply_by_pop),
+                                          compute_utility_objective_bis_der(*self.args, multiply_by_pop,
+                                                                            use_autograd=True))
+
+
+if '__main__' == __name__:
+    unittest.main()
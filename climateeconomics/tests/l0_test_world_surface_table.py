@@ -0,0 +1,52 @@
+'''
+Copyright 2024 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+
+import pandas as pd
+
+from climateeconomics.core.core_land_use.land_use_v1 import LandUseV1
+from climateeconomics.core.core_land_use.land_use_v2 import LandUseV2
+from climateeconomics.core.core_land_use.world_surface_table import (
+    WORLD_SURFACE_DATA_FILE,
+    get_world_surface_table,
+)
+
+
+class WorldSurfaceTableTestCase(unittest.TestCase):
+    """
+    Shared world surfaces table used by the land use models
+    """
+
+    def test_01_surfaces_in_ha(self):
+        surface_df = pd.read_csv(WORLD_SURFACE_DATA_FILE)
+        table = get_world_surface_table()
+        for _, row in surface_df.iterrows():
+            self.assertEqual(row['Unit'], 'km2')
+            self.assertEqual(row['Magnitude'], 'M')
+            self.assertAlmostEqual(table.get_surface(row['Category'], row['Name']), row['Surface'] * 100. * 1e6)
+        self.assertFalse(table.surfaces_ha.flags.writeable)
+
+    def test_02_shared_by_models(self):
+        land_use_v1 = LandUseV1({LandUseV1.YEAR_START: 2020, LandUseV1.YEAR_END: 2050,
+                                 LandUseV1.LAND_USE_CONSTRAINT_REF: 1.})
+        land_use_v2 = LandUseV2({LandUseV2.YEAR_START: 2020, LandUseV2.YEAR_END: 2050,
+                                 LandUseV2.LAND_DEMAND_CONSTRAINT_REF: 1.})
+        self.assertIs(land_use_v1.world_surface_table, land_use_v2.world_surface_table)
+        self.assertAlmostEqual(land_use_v2.total_forest_surfaces, 39.14 * 100. * 1e6 / 1e9)
+
+
+if '__main__' == __name__:
+    unittest.main()